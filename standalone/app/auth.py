@@ -5,16 +5,23 @@ import jwt
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 
 from app.config import settings
 from app.db import get_db
 from app.models import User
+from app.utils.cache import TTLCache, on_commit
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Active users by email, as detached column snapshots. A hit is merged into
+# the request's session without a SELECT; the TTL bounds how long another
+# process's role or is_active change can go unseen.
+_user_cache = TTLCache(ttl=settings.auth_user_cache_ttl_seconds, maxsize=settings.auth_user_cache_size)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -43,12 +50,42 @@ def get_current_user(
     except jwt.PyJWTError as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
 
-    user = db.query(User).filter(User.email == email).first()
+    user = _resolve_user(db, email)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not active")
     return user
 
 
+def _resolve_user(db: Session, email: str) -> Optional[User]:
+    cached = _user_cache.get(email)
+    if cached is not None:
+        return db.merge(cached, load=False)
+    user = db.query(User).filter(User.email == email).first()
+    if user is not None and user.is_active:
+        snapshot = User(**{c.key: getattr(user, c.key) for c in inspect(User).column_attrs})
+        make_transient_to_detached(snapshot)
+        _user_cache.set(email, snapshot)
+    return user
+
+
+def invalidate_user_cache(email: Optional[str] = None) -> None:
+    """Forget one cached user (or all of them)."""
+    if email is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(email)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(_mapper, _connection, target: User) -> None:
+    # Role, is_active or email changes must take effect on the next request
+    # after the change commits (not at flush, when readers still see the old row).
+    session = object_session(target)
+    for email in (target.email, *inspect(target).attrs.email.history.deleted):
+        on_commit(session, invalidate_user_cache, email)
+
+
 def require_role(required_role: str):
     def _check(user: User = Depends(get_current_user)) -> User:
         if user.role != required_role and user.role != "admin":
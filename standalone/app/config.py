@@ -21,6 +21,8 @@ class Settings(BaseSettings):
     jwt_secret: str = "change-me"
     jwt_algorithm: str = "HS256"
     jwt_expires_minutes: int = 60
+    auth_user_cache_ttl_seconds: int = 60  # Max delay before another worker's deactivation applies
+    auth_user_cache_size: int = 1024
 
     # ── Document Storage ─────────────────────────────────────
     storage_dir: str = "./storage"
@@ -39,6 +41,21 @@ class Settings(BaseSettings):
     celery_broker_url: str = "redis://localhost:6379/0"
     celery_result_backend: str = "redis://localhost:6379/0"
 
+    # ── Background Import Jobs ───────────────────────────────
+    import_job_workers: int = 2  # Thread pool size for background imports
+    import_job_lease_seconds: int = 300  # A running job with no heartbeat for this long may be taken over
+
+    # ── Finance ──────────────────────────────────────────────
+    base_currency: str = "EUR"  # Ledger and reporting currency
+    fx_missing_rate_at_par: bool = False  # Convert at 1 instead of rejecting when no rate is stored
+
+    # ── Caching ──────────────────────────────────────────────
+    count_cache_ttl_seconds: int = 30  # List totals served with count_mode=cached
+    report_cache_ttl_seconds: int = 86400  # Statements for closed fiscal periods
+    fx_rate_cache_ttl_seconds: int = 300  # Exchange rate histories held in memory
+    aging_cache_ttl_seconds: int = 60  # AR aging report
+    account_tree_cache_ttl_seconds: int = 3600  # Chart of accounts hierarchy
+
     # ── Feature Flags ────────────────────────────────────────
     feature_deals_enabled: bool = True
     feature_finance_enabled: bool = False
@@ -16,7 +16,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 
 from app.config import settings
-from app.db import Base, engine
+from app.db import Base, SessionLocal, engine
 from app.routers import (
     audit,
     auth,
@@ -33,6 +33,7 @@ from app.routers import (
     projects,
     shares,
 )
+from app.services.import_jobs import resume_pending_jobs
 from app.storage import ensure_storage_dir
 
 # ── Logging ──────────────────────────────────────────────────
@@ -56,6 +57,14 @@ async def lifespan(app: FastAPI):
         Base.metadata.create_all(bind=engine)
         logger.info("Development mode: auto-created database tables")
 
+    # Pick up background imports interrupted by a restart or crash.
+    try:
+        resumed = resume_pending_jobs(SessionLocal)
+        if resumed:
+            logger.info("Resumed %d pending import job(s)", resumed)
+    except Exception:
+        logger.exception("Could not resume pending import jobs")
+
     yield
 
     # Shutdown
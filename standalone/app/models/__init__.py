@@ -8,6 +8,7 @@ All SQLAlchemy ORM models are organized in sub-modules:
   - auth:   User, Role
   - deals:  (Phase 2)
   - finance: (Phase 3)
+  - search: Full-text index over deals (maintained by triggers)
 """
 
 from app.models.base import Base, TimestampMixin, SoftDeleteMixin, TenantMixin
@@ -16,15 +17,17 @@ from app.models.docs import Document, DocumentShare, AccessLog
 from app.models.auth import User
 from app.models.deals import (
     Deal, DealStage, DealTeamMember, DealActivity, DealNote,
+    DealStageTransition, DealStageStat, DealStageDuration, DealStageFlow,
     BuyerList, BuyerListEntry, Bid,
 )
 from app.models.finance import (
     Currency, ExchangeRate, FiscalYear, FiscalPeriod,
-    Account, JournalEntry, JournalEntryLine,
-    Invoice, InvoiceLine, Payment,
+    Account, JournalEntry, JournalEntryLine, AccountBalance, AccountClosingBalance,
+    Invoice, InvoiceLine, Payment, BankTransaction,
     Vendor, Bill, BillLine,
-    ExpenseReport, ExpenseItem,
+    ExpenseReport, ExpenseItem, DocumentSequence,
 )
+from app.models.search import deal_search
 from app.models.projects import Project, Task, TimeEntry
 from app.models.workflows import (
     WorkflowTemplate, WorkflowState, WorkflowTransition, WorkflowInstance,
@@ -36,7 +39,7 @@ from app.models.integrations import (
     AuditLog, Permission, RolePermission, ApiKey,
     Tag, EntityTag, Address,
     CustomFieldDefinition, CustomFieldValue,
-    IntegrationConfig, SyncLog,
+    IntegrationConfig, SyncLog, ImportJob,
 )
 
 __all__ = [
@@ -56,9 +59,14 @@ __all__ = [
     "DealTeamMember",
     "DealActivity",
     "DealNote",
+    "DealStageTransition",
+    "DealStageStat",
+    "DealStageDuration",
+    "DealStageFlow",
     "BuyerList",
     "BuyerListEntry",
     "Bid",
+    "deal_search",
     "Currency",
     "ExchangeRate",
     "FiscalYear",
@@ -66,14 +74,18 @@ __all__ = [
     "Account",
     "JournalEntry",
     "JournalEntryLine",
+    "AccountBalance",
+    "AccountClosingBalance",
     "Invoice",
     "InvoiceLine",
     "Payment",
+    "BankTransaction",
     "Vendor",
     "Bill",
     "BillLine",
     "ExpenseReport",
     "ExpenseItem",
+    "DocumentSequence",
     "Project",
     "Task",
     "TimeEntry",
@@ -96,4 +108,5 @@ __all__ = [
     "CustomFieldValue",
     "IntegrationConfig",
     "SyncLog",
+    "ImportJob",
 ]
@@ -8,7 +8,7 @@ Migrated from the flat models.py and enhanced with:
   - UUIDMixin (public-facing UUID)
 """
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base, SoftDeleteMixin, TenantMixin, TimestampMixin, UUIDMixin
@@ -16,6 +16,10 @@ from app.models.base import Base, SoftDeleteMixin, TenantMixin, TimestampMixin,
 
 class Company(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     __tablename__ = "companies"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id) within a tenant.
+        Index("ix_companies_tenant_created", "tenant_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
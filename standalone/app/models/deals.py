@@ -7,7 +7,7 @@ a configurable 12-stage lifecycle from origination to post-closing.
 
 from sqlalchemy import (
     Boolean, Column, Date, DateTime, Enum, Float, ForeignKey,
-    Integer, Numeric, String, Text,
+    Index, Integer, Numeric, String, Text, UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -41,6 +41,14 @@ class Deal(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     with financial metrics, team assignments, and activity history.
     """
     __tablename__ = "deals"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id) within a tenant.
+        Index("ix_deals_tenant_created", "tenant_id", "created_at", "id"),
+        # Pipeline dashboards: stage or owner lists, closing-date windows.
+        Index("ix_deals_tenant_stage_close", "tenant_id", "is_deleted", "stage_id", "expected_close_date"),
+        Index("ix_deals_tenant_owner_close", "tenant_id", "is_deleted", "owner_user_id", "expected_close_date"),
+        Index("ix_deals_tenant_close", "tenant_id", "is_deleted", "expected_close_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -128,6 +136,84 @@ class DealActivity(Base, TimestampMixin, TenantMixin):
         return f"<DealActivity(deal={self.deal_id}, type='{self.activity_type}')>"
 
 
+class DealStageTransition(Base, TenantMixin):
+    """
+    One stage change of a deal (``from_stage_id`` is NULL when the deal is
+    created in ``to_stage_id``). ``days_in_stage`` is how long the deal
+    spent in ``from_stage_id``; ``sector`` and ``deal_type`` are the deal's
+    values at the time of the move, which is how the rollups attribute it.
+    """
+    __tablename__ = "deal_stage_transitions"
+    __table_args__ = (
+        Index("ix_deal_stage_transitions_deal", "tenant_id", "deal_id", "transitioned_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False)
+    from_stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=True)
+    to_stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    transitioned_at = Column(DateTime(timezone=True), nullable=False)
+    days_in_stage = Column(Float, nullable=True)
+    sector = Column(String(100), nullable=False, default="")
+    deal_type = Column(String(50), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<DealStageTransition(deal={self.deal_id}, {self.from_stage_id}->{self.to_stage_id})>"
+
+
+class DealStageStat(Base, TenantMixin):
+    """
+    Per stage, sector and deal type: deals that ever reached the stage, how
+    many stays in it have ended and their total length in days. Maintained
+    incrementally from stage transitions.
+    """
+    __tablename__ = "deal_stage_stats"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "sector", "deal_type", "stage_id", name="uq_deal_stage_stat"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sector = Column(String(100), nullable=False, default="")  # "" when the deal has no sector
+    deal_type = Column(String(50), nullable=False)
+    stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=False)
+    reached = Column(Integer, nullable=False, default=0)
+    exits = Column(Integer, nullable=False, default=0)
+    days_total = Column(Float, nullable=False, default=0.0)
+
+
+class DealStageDuration(Base, TenantMixin):
+    """Histogram of completed stays per stage in whole days (for medians)."""
+    __tablename__ = "deal_stage_durations"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "sector", "deal_type", "stage_id", "days", name="uq_deal_stage_duration"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sector = Column(String(100), nullable=False, default="")
+    deal_type = Column(String(50), nullable=False)
+    stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=False)
+    days = Column(Integer, nullable=False)
+    deals = Column(Integer, nullable=False, default=0)
+
+
+class DealStageFlow(Base, TenantMixin):
+    """Count of moves from one stage to another, per sector and deal type."""
+    __tablename__ = "deal_stage_flows"
+    __table_args__ = (
+        UniqueConstraint(
+            "tenant_id", "sector", "deal_type", "from_stage_id", "to_stage_id", name="uq_deal_stage_flow",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    sector = Column(String(100), nullable=False, default="")
+    deal_type = Column(String(50), nullable=False)
+    from_stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=False)
+    to_stage_id = Column(Integer, ForeignKey("deal_stages.id"), nullable=False)
+    deals = Column(Integer, nullable=False, default=0)
+
+
 class DealNote(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     """Internal deal notes with @mention support."""
     __tablename__ = "deal_notes"
@@ -9,7 +9,7 @@ from datetime import date
 
 from sqlalchemy import (
     Boolean, CheckConstraint, Column, Date, DateTime, ForeignKey,
-    Integer, Numeric, String, Text, UniqueConstraint,
+    Index, Integer, Numeric, String, Text, UniqueConstraint, text,
 )
 from sqlalchemy.orm import relationship
 
@@ -90,6 +90,9 @@ class FiscalPeriod(Base, TimestampMixin, TenantMixin):
     start_date = Column(Date, nullable=False)
     end_date = Column(Date, nullable=False)
     is_closed = Column(Boolean, default=False)
+    # Set by the period close once closing balances are written.
+    closed_at = Column(DateTime(timezone=True), nullable=True)
+    closed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
 
     fiscal_year = relationship("FiscalYear", back_populates="periods")
 
@@ -111,7 +114,8 @@ class Account(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     is_header = Column(Boolean, default=False)  # Group header (non-postable)
     is_active = Column(Boolean, default=True)
 
-    parent = relationship("Account", remote_side="Account.id", lazy="joined")
+    # Hierarchies are read via ChartOfAccountsService; don't self-join every account query.
+    parent = relationship("Account", remote_side="Account.id", lazy="select")
 
     __table_args__ = (
         UniqueConstraint("code", "tenant_id", name="uq_account_code_tenant"),
@@ -128,8 +132,19 @@ class Account(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
 class JournalEntry(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     """General ledger journal entry header."""
     __tablename__ = "journal_entries"
+    __table_args__ = (
+        # One FX revaluation (and one reversal) per currency and fiscal period,
+        # even when two runs race past the "already revalued" check.
+        Index(
+            "uq_journal_entries_fx_revaluation", "tenant_id", "source_type", "source_id", "reference",
+            unique=True,
+            sqlite_where=text("source_type IN ('fx_revaluation', 'fx_revaluation_reversal')"),
+            postgresql_where=text("source_type IN ('fx_revaluation', 'fx_revaluation_reversal')"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    entry_number = Column(String(50), nullable=True, index=True)
     entry_date = Column(Date, nullable=False, index=True)
     reference = Column(String(100), nullable=True, index=True)
     memo = Column(Text, nullable=True)
@@ -137,7 +152,7 @@ class JournalEntry(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin
     fiscal_period_id = Column(Integer, ForeignKey("fiscal_periods.id"), nullable=True, index=True)
     posted_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     posted_at = Column(DateTime(timezone=True), nullable=True)
-    source_type = Column(String(50), nullable=True)  # manual, invoice, payment, fx_revaluation
+    source_type = Column(String(50), nullable=True)  # manual, invoice, payment, fx_revaluation[_reversal]
     source_id = Column(Integer, nullable=True)  # ID of the originating record
 
     lines = relationship("JournalEntryLine", back_populates="journal_entry", lazy="selectin", cascade="all, delete-orphan")
@@ -176,6 +191,53 @@ class JournalEntryLine(Base, TimestampMixin, TenantMixin):
         return f"<JournalEntryLine(account={self.account_id}, dr={self.debit}, cr={self.credit})>"
 
 
+class AccountBalance(Base, TenantMixin):
+    """
+    Materialized posted totals per account and calendar month (base currency).
+
+    Maintained by LedgerService when entries are posted; rebuildable from
+    journal_entry_lines at any time.
+    """
+    __tablename__ = "account_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False, index=True)
+    period_start = Column(Date, nullable=False)  # First day of the month
+    debit = Column(Numeric(precision=18, scale=2), nullable=False, default=0)
+    credit = Column(Numeric(precision=18, scale=2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("account_id", "period_start", "tenant_id", name="uq_account_balance_period"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AccountBalance(account={self.account_id}, {self.period_start}, {self.debit}/{self.credit})>"
+
+
+class AccountClosingBalance(Base, TenantMixin):
+    """
+    Cumulative posted totals per account at the end of a closed fiscal period.
+
+    Written once when the period is closed. At fiscal year end revenue and
+    expense totals are moved into retained earnings, so the snapshot is the
+    opening position of the following year.
+    """
+    __tablename__ = "account_closing_balances"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fiscal_period_id = Column(Integer, ForeignKey("fiscal_periods.id"), nullable=False, index=True)
+    account_id = Column(Integer, ForeignKey("accounts.id"), nullable=False)
+    debit = Column(Numeric(precision=18, scale=2), nullable=False, default=0)
+    credit = Column(Numeric(precision=18, scale=2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("fiscal_period_id", "account_id", "tenant_id", name="uq_account_closing_balance"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<AccountClosingBalance(period={self.fiscal_period_id}, account={self.account_id})>"
+
+
 # ═══════════════════════════════════════════════════════════════
 # ACCOUNTS RECEIVABLE & INVOICING
 # ═══════════════════════════════════════════════════════════════
@@ -183,6 +245,13 @@ class JournalEntryLine(Base, TimestampMixin, TenantMixin):
 class Invoice(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     """Sales invoice issued to a client."""
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id) within a tenant.
+        Index("ix_invoices_tenant_created", "tenant_id", "created_at", "id"),
+        # Receivables dashboards: status lists with due-date windows.
+        Index("ix_invoices_tenant_status_due", "tenant_id", "is_deleted", "status", "due_date"),
+        UniqueConstraint("invoice_number", "tenant_id", name="uq_invoice_number_tenant"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String(50), nullable=False, index=True)
@@ -262,6 +331,39 @@ class Payment(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
         return f"<Payment(inv={self.invoice_id}, amount={self.amount} {self.currency})>"
 
 
+class BankTransaction(Base, TimestampMixin, TenantMixin):
+    """
+    Imported bank statement line and its reconciliation state.
+
+    Unmatched lines form the review queue; ``invoice_id`` and
+    ``match_confidence`` then hold the best suggestion, if any.
+    """
+    __tablename__ = "bank_transactions"
+    __table_args__ = (
+        # Re-importing an overlapping statement must not create payments twice.
+        UniqueConstraint("fingerprint", "tenant_id", name="uq_bank_transaction_fingerprint"),
+        Index("ix_bank_transactions_tenant_status", "tenant_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint = Column(String(64), nullable=False)
+    source = Column(String(255), nullable=True)  # statement file name
+    booking_date = Column(Date, nullable=False, index=True)
+    amount = Column(Numeric(precision=18, scale=2), nullable=False)  # negative = outgoing
+    currency = Column(String(3), nullable=False)
+    reference = Column(String(500), nullable=True)  # remittance information
+    counterparty = Column(String(255), nullable=True)
+    bank_reference = Column(String(100), nullable=True)  # bank's own transaction id
+    status = Column(String(20), default="unmatched", nullable=False)  # matched, unmatched
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=True, index=True)
+    payment_id = Column(Integer, ForeignKey("payments.id"), nullable=True)
+    match_confidence = Column(Numeric(precision=3, scale=2), nullable=True)
+    match_reason = Column(String(50), nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<BankTransaction({self.booking_date}, {self.amount} {self.currency}, {self.status})>"
+
+
 # ═══════════════════════════════════════════════════════════════
 # ACCOUNTS PAYABLE
 # ═══════════════════════════════════════════════════════════════
@@ -269,6 +371,10 @@ class Payment(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
 class Vendor(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     """Vendor/supplier registry."""
     __tablename__ = "vendors"
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id) within a tenant.
+        Index("ix_vendors_tenant_created", "tenant_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False, index=True)
@@ -295,6 +401,7 @@ class Bill(Base, TimestampMixin, SoftDeleteMixin, TenantMixin, UUIDMixin):
     due_date = Column(Date, nullable=False)
     status = Column(String(20), default="draft", index=True)  # draft, approved, paid, overdue, void
     currency = Column(String(3), default="EUR")
+    exchange_rate = Column(Numeric(precision=18, scale=8), default=1)
     subtotal = Column(Numeric(precision=18, scale=2), default=0)
     tax_amount = Column(Numeric(precision=18, scale=2), default=0)
     total = Column(Numeric(precision=18, scale=2), default=0)
@@ -373,3 +480,23 @@ class ExpenseItem(Base, TimestampMixin, TenantMixin):
 
     def __repr__(self) -> str:
         return f"<ExpenseItem({self.category}, {self.amount})>"
+
+
+# ═══════════════════════════════════════════════════════════════
+# DOCUMENT NUMBERING
+# ═══════════════════════════════════════════════════════════════
+
+class DocumentSequence(Base, TimestampMixin, TenantMixin):
+    """Per-tenant counter for invoice, bill and journal entry numbers."""
+    __tablename__ = "document_sequences"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(50), nullable=False)  # invoice, bill, journal_entry
+    next_value = Column(Integer, nullable=False, default=1)
+
+    __table_args__ = (
+        UniqueConstraint("name", "tenant_id", name="uq_document_sequence_name_tenant"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<DocumentSequence({self.name}, next={self.next_value})>"
@@ -237,3 +237,32 @@ class SyncLog(Base, TimestampMixin, TenantMixin):
 
     def __repr__(self) -> str:
         return f"<SyncLog(integration={self.integration_id}, status='{self.status}')>"
+
+
+# ═══════════════════════════════════════════════════════════════
+# DATA IMPORT JOBS
+# ═══════════════════════════════════════════════════════════════
+
+class ImportJob(Base, TimestampMixin, TenantMixin, UUIDMixin):
+    """Background bulk import of a spooled upload, with chunk-level progress."""
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String(50), nullable=False)  # companies, contacts
+    file_format = Column(String(10), nullable=False)  # csv, json
+    file_name = Column(String(255), nullable=False)
+    file_path = Column(String(500), nullable=False)
+    status = Column(String(20), default="queued", nullable=False, index=True)  # queued, running, completed, failed
+    rows_processed = Column(Integer, default=0, nullable=False)  # Resume checkpoint
+    rows_successful = Column(Integer, default=0, nullable=False)
+    rows_failed = Column(Integer, default=0, nullable=False)
+    error_count = Column(Integer, default=0, nullable=False)
+    errors_json = Column(Text, nullable=True)  # JSON array, capped
+    warnings_json = Column(Text, nullable=True)  # JSON array, capped
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Renewed by the worker at every chunk
+    created_by_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+
+    def __repr__(self) -> str:
+        return f"<ImportJob(id={self.id}, entity='{self.entity}', status='{self.status}')>"
@@ -0,0 +1,170 @@
+"""
+Full-text search index over deals.
+
+``deal_search`` holds one document per live deal: its title, description and
+notes, plus the content of every live ``DealNote``. It is not an ORM model;
+the database maintains it with triggers on ``deals`` and ``deal_notes``, so
+ORM writes, executemany inserts and set-based updates all keep it in sync
+in the same transaction.
+
+  - SQLite: an FTS5 virtual table keyed by ``rowid = deals.id``, ranked
+    with weighted ``bm25()`` as its ``rank`` column
+  - PostgreSQL: a ``tsvector`` column (title weighted A, description B,
+    notes C) with a GIN index, ranked with ``ts_rank_cd()``
+
+The DDL runs after ``Base.metadata.create_all`` and is idempotent. When the
+index is first created on an existing database it is filled from ``deals``.
+"""
+
+from sqlalchemy import column, event, table
+
+from app.models.base import Base
+
+# Deal id is ``rowid`` on SQLite and ``deal_id`` on PostgreSQL.
+deal_search = table(
+    "deal_search",
+    column("rowid"), column("rank"), column("deal_id"), column("tenant_id"), column("document"),
+)
+
+# ── SQLite (FTS5) ────────────────────────────────────────────
+
+_SQLITE_DOCUMENT = """
+SELECT d.id, d.title, coalesce(d.description, ''),
+       coalesce(d.notes, '') || ' ' || coalesce(
+           (SELECT group_concat(n.content, ' ') FROM deal_notes n
+            WHERE n.deal_id = d.id AND n.is_deleted = 0), ''),
+       d.tenant_id
+FROM deals d WHERE d.is_deleted = 0"""
+
+_SQLITE_COLUMNS = "INSERT INTO deal_search (rowid, title, description, notes, tenant_id)"
+
+
+def _sqlite_refresh(deal_id: str) -> str:
+    return (
+        f"DELETE FROM deal_search WHERE rowid = {deal_id}; "
+        f"{_SQLITE_COLUMNS} {_SQLITE_DOCUMENT} AND d.id = {deal_id};"
+    )
+
+
+_SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS deal_search USING fts5("
+    "title, description, notes, tenant_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2')",
+    # ``rank`` is bm25() with title > description > notes; FTS5 sorts on it natively.
+    "INSERT INTO deal_search (deal_search, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')",
+    f"""CREATE TRIGGER IF NOT EXISTS deal_search_deal_insert AFTER INSERT ON deals
+    BEGIN {_sqlite_refresh("NEW.id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS deal_search_deal_update
+    AFTER UPDATE OF title, description, notes, is_deleted ON deals
+    BEGIN {_sqlite_refresh("NEW.id")} END""",
+    """CREATE TRIGGER IF NOT EXISTS deal_search_deal_delete AFTER DELETE ON deals
+    BEGIN DELETE FROM deal_search WHERE rowid = OLD.id; END""",
+    f"""CREATE TRIGGER IF NOT EXISTS deal_search_note_insert AFTER INSERT ON deal_notes
+    BEGIN {_sqlite_refresh("NEW.deal_id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS deal_search_note_update
+    AFTER UPDATE OF deal_id, content, is_deleted ON deal_notes
+    BEGIN {_sqlite_refresh("OLD.deal_id")} {_sqlite_refresh("NEW.deal_id")} END""",
+    f"""CREATE TRIGGER IF NOT EXISTS deal_search_note_delete AFTER DELETE ON deal_notes
+    BEGIN {_sqlite_refresh("OLD.deal_id")} END""",
+]
+
+_SQLITE_REBUILD = ["DELETE FROM deal_search", f"{_SQLITE_COLUMNS} {_SQLITE_DOCUMENT}"]
+
+_SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS deal_search_{name}"
+    for name in ("deal_insert", "deal_update", "deal_delete", "note_insert", "note_update", "note_delete")
+] + ["DROP TABLE IF EXISTS deal_search"]
+
+# ── PostgreSQL (tsvector + GIN) ──────────────────────────────
+
+_PG_DOCUMENT = """
+SELECT d.id, d.tenant_id,
+       setweight(to_tsvector('simple', coalesce(d.title, '')), 'A') ||
+       setweight(to_tsvector('simple', coalesce(d.description, '')), 'B') ||
+       setweight(to_tsvector('simple', coalesce(d.notes, '') || ' ' || coalesce(
+           (SELECT string_agg(n.content, ' ') FROM deal_notes n
+            WHERE n.deal_id = d.id AND NOT n.is_deleted), '')), 'C')
+FROM deals d WHERE NOT d.is_deleted"""
+
+_PG_CREATE = [
+    """CREATE TABLE IF NOT EXISTS deal_search (
+        deal_id INTEGER PRIMARY KEY REFERENCES deals (id) ON DELETE CASCADE,
+        tenant_id VARCHAR(36) NOT NULL,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_deal_search_document ON deal_search USING GIN (document)",
+    f"""CREATE OR REPLACE FUNCTION deal_search_refresh(target INTEGER) RETURNS VOID AS $$
+    BEGIN
+        DELETE FROM deal_search WHERE deal_id = target;
+        INSERT INTO deal_search (deal_id, tenant_id, document) {_PG_DOCUMENT} AND d.id = target;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION deal_search_deal_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM deal_search_refresh(NEW.id);
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION deal_search_note_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP <> 'INSERT' THEN PERFORM deal_search_refresh(OLD.deal_id); END IF;
+        IF TG_OP <> 'DELETE' THEN PERFORM deal_search_refresh(NEW.deal_id); END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+    "DROP TRIGGER IF EXISTS deal_search_deals ON deals",
+    """CREATE TRIGGER deal_search_deals
+    AFTER INSERT OR UPDATE OF title, description, notes, is_deleted ON deals
+    FOR EACH ROW EXECUTE FUNCTION deal_search_deal_trigger()""",
+    "DROP TRIGGER IF EXISTS deal_search_notes ON deal_notes",
+    """CREATE TRIGGER deal_search_notes
+    AFTER INSERT OR UPDATE OF deal_id, content, is_deleted OR DELETE ON deal_notes
+    FOR EACH ROW EXECUTE FUNCTION deal_search_note_trigger()""",
+]
+
+_PG_REBUILD = ["TRUNCATE deal_search", f"INSERT INTO deal_search (deal_id, tenant_id, document) {_PG_DOCUMENT}"]
+
+_PG_DROP = [
+    "DROP TABLE IF EXISTS deal_search",
+    "DROP FUNCTION IF EXISTS deal_search_deal_trigger() CASCADE",
+    "DROP FUNCTION IF EXISTS deal_search_note_trigger() CASCADE",
+    "DROP FUNCTION IF EXISTS deal_search_refresh(INTEGER)",
+]
+
+_DIALECTS = {
+    # dialect: (exists query, create, rebuild, drop)
+    "sqlite": ("SELECT 1 FROM sqlite_master WHERE name = 'deal_search'",
+               _SQLITE_CREATE, _SQLITE_REBUILD, _SQLITE_DROP),
+    "postgresql": ("SELECT to_regclass('deal_search')", _PG_CREATE, _PG_REBUILD, _PG_DROP),
+}
+
+
+def rebuild_deal_search(connection) -> None:
+    """Refill the search index from ``deals`` and ``deal_notes``."""
+    _, _, rebuild, _ = _DIALECTS[connection.dialect.name]
+    for statement in rebuild:
+        connection.exec_driver_sql(statement)
+
+
+def create_deal_search(connection) -> None:
+    """Create the index and its triggers if missing; a new index is filled from ``deals``."""
+    exists, create, _, _ = _DIALECTS[connection.dialect.name]
+    existed = connection.exec_driver_sql(exists).scalar() is not None
+    for statement in create:
+        connection.exec_driver_sql(statement)
+    if not existed:
+        rebuild_deal_search(connection)
+
+
+def drop_deal_search(connection) -> None:
+    """Drop the index and its triggers."""
+    for statement in _DIALECTS[connection.dialect.name][3]:
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _after_create(_metadata, connection, **_kw) -> None:
+    if connection.dialect.name in _DIALECTS:
+        create_deal_search(connection)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def _before_drop(_metadata, connection, **_kw) -> None:
+    if connection.dialect.name in _DIALECTS:
+        drop_deal_search(connection)
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
 from app.db import get_db
 from app.models import Company
 from app.schemas import CompanyCreate, CompanyOut
+from app.services.crm import CompanyService
+from app.services.pagination import NEXT_CURSOR_HEADER
 
 
 router = APIRouter()
@@ -27,6 +31,29 @@ def create_company(
     return company
 
 
+@router.get("", response_model=List[CompanyOut])
+def list_companies(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    sector: Optional[str] = None,
+    company_type: Optional[str] = None,
+    db: Session = Depends(get_db),
+    _user=Depends(get_current_user)
+):
+    """List companies newest first; the next page's cursor is sent in ``X-Next-Cursor``."""
+    svc = CompanyService(db)
+    try:
+        companies, next_cursor = svc.list_page(
+            limit=limit, cursor=cursor, sector=sector, company_type=company_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return companies
+
+
 @router.get("/{company_id}", response_model=CompanyOut)
 def get_company(company_id: int, db: Session = Depends(get_db), _user=Depends(get_current_user)):
     company = db.query(Company).filter(Company.id == company_id).first()
@@ -1,13 +1,14 @@
 """
 Deal management router: Full REST API for M&A deal lifecycle.
 
-Endpoints cover: deal CRUD, pipeline view, stage transitions,
+Endpoints cover: deal CRUD, bulk changes, pipeline view, stage transitions,
 notes, team management, buyer lists, bids, and activity log.
 """
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic_core import to_json
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
@@ -15,11 +16,14 @@ from app.db import get_db
 from app.models import User
 from app.schemas.deals import (
     BidCreate, BidOut, BuyerListCreate, BuyerListEntryCreate, BuyerListEntryOut,
-    BuyerListOut, DealActivityOut, DealCreate, DealListOut, DealNoteCreate,
-    DealNoteOut, DealOut, DealStageOut, DealTeamMemberCreate, DealTeamMemberOut,
-    DealUpdate, PipelineStageView,
+    BuyerListOut, DealActivityOut, DealBulkOut, DealBulkRequest, DealCreate, DealListOut, DealNoteCreate,
+    DealNoteOut, DealOut, DealSearchOut, DealStageOut, DealTeamMemberCreate, DealTeamMemberOut,
+    DealUpdate, PipelineStageDealsOut, PipelineStageView, StageAnalyticsOut,
 )
+from app.services.base_repository import CountMode
 from app.services.deals import DealService, seed_default_stages
+from app.services.search import DealSearchService
+from app.services.stage_history import StageHistoryService
 
 router = APIRouter()
 
@@ -28,6 +32,14 @@ def _deal_svc(db: Session = Depends(get_db)) -> DealService:
     return DealService(db, tenant_id="default")
 
 
+def _search_svc(db: Session = Depends(get_db)) -> DealSearchService:
+    return DealSearchService(db, tenant_id="default")
+
+
+def _history_svc(db: Session = Depends(get_db)) -> StageHistoryService:
+    return StageHistoryService(db, tenant_id="default")
+
+
 # ── Stages ───────────────────────────────────────────────────
 
 @router.get("/stages", response_model=List[DealStageOut])
@@ -40,11 +52,36 @@ def list_stages(db: Session = Depends(get_db), _user: User = Depends(get_current
 
 @router.get("/pipeline", response_model=List[PipelineStageView])
 def get_pipeline(
+    limit_per_stage: int = Query(20, ge=1, le=200),
     svc: DealService = Depends(_deal_svc),
     _user: User = Depends(get_current_user),
 ):
     """Get Kanban-style pipeline view with deals grouped by stage."""
-    return svc.get_pipeline_view()
+    return svc.get_pipeline_view(limit_per_stage=limit_per_stage)
+
+
+@router.get("/pipeline/stages/{stage_id}", response_model=PipelineStageDealsOut)
+def get_pipeline_stage_deals(
+    stage_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    cursor: Optional[str] = None,
+    svc: DealService = Depends(_deal_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Load the next page of deal cards for one pipeline column."""
+    deals, next_cursor = svc.get_stage_deals(stage_id, limit=limit, cursor=cursor)
+    return PipelineStageDealsOut(items=deals, next_cursor=next_cursor)
+
+
+@router.get("/analytics/stages", response_model=StageAnalyticsOut)
+def get_stage_analytics(
+    sector: Optional[str] = None,
+    deal_type: Optional[str] = None,
+    svc: StageHistoryService = Depends(_history_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Funnel conversion, drop-off and days in stage, from precomputed rollups."""
+    return svc.analytics(sector=sector, deal_type=deal_type)
 
 
 # ── Deal CRUD ────────────────────────────────────────────────
@@ -60,25 +97,110 @@ def create_deal(
     return svc.create(data, user_id=user.id)
 
 
+@router.post("/bulk", response_model=DealBulkOut)
+def bulk_deals(
+    payload: DealBulkRequest,
+    svc: DealService = Depends(_deal_svc),
+    user: User = Depends(get_current_user),
+):
+    """
+    Move, reassign, reprioritise or soft-delete many deals in one transaction.
+
+    Deals are selected by ``ids`` and/or ``filter`` expressions; the change
+    is one set-based UPDATE, logged per deal in the activity and stage
+    history.
+    """
+    try:
+        deal_ids = svc.bulk_apply(
+            ids=payload.ids,
+            where=svc.parse_filters(payload.filter),
+            changes=payload.model_dump(include={"stage_id", "owner_user_id", "priority"}),
+            delete=payload.delete,
+            user_id=user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DealBulkOut(updated=len(deal_ids), ids=deal_ids)
+
+
 @router.get("", response_model=DealListOut)
 def list_deals(
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces offset)"),
+    count_mode: CountMode = Query("exact", description="How `total` is computed: exact, cached or approximate"),
     stage_id: Optional[int] = None,
     deal_type: Optional[str] = None,
     priority: Optional[str] = None,
     sector: Optional[str] = None,
+    filter_exprs: List[str] = Query(
+        [], alias="filter", description="field:operator:value, e.g. stage_id:in:7,8,9 (repeatable)",
+    ),
+    fields: Optional[str] = Query(
+        None, description="Comma-separated columns to return, e.g. id,title,target_value,stage_id",
+    ),
     svc: DealService = Depends(_deal_svc),
     _user: User = Depends(get_current_user),
 ):
-    """List deals with filtering and pagination."""
-    deals = svc.list(
-        offset=offset, limit=limit,
-        stage_id=stage_id, deal_type=deal_type,
-        priority=priority, sector=sector,
+    """
+    List deals with filtering and pagination.
+
+    The first page and every ``cursor`` page use keyset pagination and
+    return ``next_cursor``; ``offset`` is still honoured for old clients.
+    ``filter`` takes IN, range, null and date-window expressions (see
+    ``app.services.filters``); all of them must match.
+
+    With ``fields`` each item holds only those columns (plus ``id``). They
+    are read with one Core query and serialized straight from the rows,
+    skipping Deal objects, their eager loads and ``DealOut`` validation.
+    """
+    filters = dict(stage_id=stage_id, deal_type=deal_type, priority=priority, sector=sector)
+    try:
+        filters["where"] = svc.parse_filters(filter_exprs)
+        columns = svc.parse_fields(fields) if fields is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = None
+    if cursor or offset == 0:
+        try:
+            if columns:
+                deals, next_cursor = svc.list_page_rows(columns, limit=limit, cursor=cursor, **filters)
+            else:
+                deals, next_cursor = svc.list_page(limit=limit, cursor=cursor, **filters)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        offset = 0
+    elif columns:
+        deals = svc.list_rows(columns, offset=offset, limit=limit, **filters)
+    else:
+        deals = svc.list(offset=offset, limit=limit, **filters)
+    total = svc.count(mode=count_mode, **filters)
+    page = dict(total=total, count_mode=count_mode, offset=offset, limit=limit, next_cursor=next_cursor)
+    if columns:
+        return Response(to_json({"items": deals, **page}), media_type="application/json")
+    return DealListOut(items=deals, **page)
+
+
+@router.get("/search", response_model=DealSearchOut)
+def search_deals(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to find in titles, descriptions and notes"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    svc: DealSearchService = Depends(_search_svc),
+    _user: User = Depends(get_current_user),
+):
+    """
+    Full-text search over deal titles, descriptions, notes and deal notes,
+    best matches first. Pass ``next_offset`` back as ``offset`` for the next page.
+    """
+    try:
+        hits, next_offset = svc.search(q, limit=limit, offset=offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return DealSearchOut(
+        items=[{"deal": deal, "score": score} for deal, score in hits],
+        offset=offset, limit=limit, next_offset=next_offset,
     )
-    total = svc.count()
-    return DealListOut(items=deals, total=total, offset=offset, limit=limit)
 
 
 @router.get("/{deal_id}", response_model=DealOut)
@@ -1,22 +1,24 @@
-"""Export router for bulk data export."""
+"""Export router for bulk data export.
 
+All endpoints stream their bodies: CSV, JSON and NDJSON straight from a
+server-side cursor, and the full ZIP built on the fly from cursors and
+stored files, so response memory is constant in the data size.
+"""
+
+from datetime import datetime
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
-from io import BytesIO
-import json
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
 from ..auth import get_current_user
 from ..db import get_db
 from ..models import User
 from ..utils.export import (
-    export_companies_csv,
-    export_companies_json,
-    export_contacts_csv,
-    export_contacts_json,
-    export_documents_csv,
-    export_documents_json,
-    create_zip_export
+    EXPORT_ENTITIES,
+    stream_csv,
+    stream_json_array,
+    stream_ndjson,
+    stream_zip_export
 )
 from ..config import settings
 from sqlalchemy.orm import Session
@@ -24,19 +26,40 @@ from sqlalchemy.orm import Session
 router = APIRouter(prefix="/export", tags=["export"])
 
 
+def _csv_response(db: Session, entity: str) -> StreamingResponse:
+    model, fields = EXPORT_ENTITIES[entity]
+    return StreamingResponse(
+        stream_csv(db, model, fields),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={entity}.csv"}
+    )
+
+
+def _json_response(db: Session, entity: str) -> StreamingResponse:
+    model, fields = EXPORT_ENTITIES[entity]
+    return StreamingResponse(
+        stream_json_array(db, model, fields),
+        media_type="application/json",
+        headers={"Content-Disposition": f"attachment; filename={entity}.json"}
+    )
+
+
+def _ndjson_response(db: Session, entity: str) -> StreamingResponse:
+    model, fields = EXPORT_ENTITIES[entity]
+    return StreamingResponse(
+        stream_ndjson(db, model, fields),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={entity}.ndjson"}
+    )
+
+
 @router.get("/companies/csv")
 def export_companies_csv_endpoint(
     _user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Export all companies as CSV."""
-    csv_content = export_companies_csv(db)
-    
-    return StreamingResponse(
-        iter([csv_content]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=companies.csv"}
-    )
+    return _csv_response(db, "companies")
 
 
 @router.get("/companies/json")
@@ -45,13 +68,16 @@ def export_companies_json_endpoint(
     db: Session = Depends(get_db)
 ):
     """Export all companies as JSON."""
-    data = export_companies_json(db)
-    
-    return StreamingResponse(
-        iter([json.dumps(data, indent=2)]),
-        media_type="application/json",
-        headers={"Content-Disposition": "attachment; filename=companies.json"}
-    )
+    return _json_response(db, "companies")
+
+
+@router.get("/companies/ndjson")
+def export_companies_ndjson_endpoint(
+    _user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Export all companies as newline-delimited JSON."""
+    return _ndjson_response(db, "companies")
 
 
 @router.get("/contacts/csv")
@@ -60,13 +86,7 @@ def export_contacts_csv_endpoint(
     db: Session = Depends(get_db)
 ):
     """Export all contacts as CSV."""
-    csv_content = export_contacts_csv(db)
-    
-    return StreamingResponse(
-        iter([csv_content]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=contacts.csv"}
-    )
+    return _csv_response(db, "contacts")
 
 
 @router.get("/contacts/json")
@@ -75,13 +95,16 @@ def export_contacts_json_endpoint(
     db: Session = Depends(get_db)
 ):
     """Export all contacts as JSON."""
-    data = export_contacts_json(db)
-    
-    return StreamingResponse(
-        iter([json.dumps(data, indent=2)]),
-        media_type="application/json",
-        headers={"Content-Disposition": "attachment; filename=contacts.json"}
-    )
+    return _json_response(db, "contacts")
+
+
+@router.get("/contacts/ndjson")
+def export_contacts_ndjson_endpoint(
+    _user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Export all contacts as newline-delimited JSON."""
+    return _ndjson_response(db, "contacts")
 
 
 @router.get("/documents/csv")
@@ -90,13 +113,7 @@ def export_documents_csv_endpoint(
     db: Session = Depends(get_db)
 ):
     """Export all document metadata as CSV."""
-    csv_content = export_documents_csv(db)
-    
-    return StreamingResponse(
-        iter([csv_content]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=documents.csv"}
-    )
+    return _csv_response(db, "documents")
 
 
 @router.get("/documents/json")
@@ -105,27 +122,30 @@ def export_documents_json_endpoint(
     db: Session = Depends(get_db)
 ):
     """Export all document metadata as JSON."""
-    data = export_documents_json(db)
-    
-    return StreamingResponse(
-        iter([json.dumps(data, indent=2)]),
-        media_type="application/json",
-        headers={"Content-Disposition": "attachment; filename=documents.json"}
-    )
+    return _json_response(db, "documents")
+
+
+@router.get("/documents/ndjson")
+def export_documents_ndjson_endpoint(
+    _user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Export all document metadata as newline-delimited JSON."""
+    return _ndjson_response(db, "documents")
 
 
 @router.get("/full")
 def export_full_zip(
+    store_compressed: bool = Query(
+        True, description="Store already-compressed files (PDF, Office, images) without deflating"
+    ),
     _user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Export complete database as ZIP with CSV/JSON and document attachments."""
-    try:
-        zip_path = create_zip_export(db, settings.storage_dir)
-        return FileResponse(
-            zip_path,
-            media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename={zip_path.split('/')[-1]}"}
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    """Stream the complete database as ZIP with CSV/JSON and document attachments."""
+    filename = f"ma_advisory_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        stream_zip_export(db, settings.storage_dir, store_compressed=store_compressed),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
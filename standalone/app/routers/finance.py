@@ -1,28 +1,42 @@
 """
 Finance router: REST API for the ERP financial engine.
 
-Endpoints cover: Chart of Accounts, Journal Entries (GL),
-Invoices (AR), Payments, Vendors, Bills (AP).
+Endpoints cover: Exchange Rates, Chart of Accounts, Fiscal Years, Journal Entries (GL),
+Financial Statements, Invoices (AR), Payments, Bank Reconciliation, Vendors, Bills (AP).
 """
 
-from typing import List, Optional
+import io
+from datetime import date
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Response, UploadFile
 from sqlalchemy.orm import Session
 
 from app.auth import get_current_user
 from app.db import get_db
 from app.models import User
 from app.schemas.finance import (
-    AccountCreate, AccountOut,
-    BillCreate, BillOut,
-    ExchangeRateCreate, ExchangeRateOut,
+    AccountBalanceOut, AccountCreate, AccountOut, AccountTreeNodeOut, ARAgingOut,
+    BankStatementImportOut, BankTransactionMatch, BankTransactionOut,
+    BillCreate, BillingRunCreate, BillingRunOut, BillOut,
+    ExchangeRateCreate, ExchangeRateLookupOut, ExchangeRateOut,
+    FinancialStatementOut, FiscalYearCreate, FiscalYearOut, FXRevaluationOut,
     InvoiceCreate, InvoiceListOut, InvoiceOut,
-    JournalEntryCreate, JournalEntryOut,
-    PaymentCreate, PaymentOut,
+    JournalEntryBulkCreate, JournalEntryBulkOut, JournalEntryCreate, JournalEntryOut,
+    PaymentCreate, PaymentOut, PeriodCloseOut,
     VendorCreate, VendorOut,
 )
+from app.services.base_repository import CountMode
+from app.services.billing import BillingRunService
+from app.services.chart import ChartOfAccountsService
 from app.services.finance import AccountingService, InvoiceService, VendorService
+from app.services.fx import FXService
+from app.services.pagination import NEXT_CURSOR_HEADER
+from app.services.period_close import PeriodCloseService
+from app.services.reconciliation import ReconciliationService
+from app.services.reports import FinancialReportService
+from app.services.revaluation import FXRevaluationService
+from app.utils.bank_statements import STATEMENT_PARSERS
 
 router = APIRouter()
 
@@ -31,6 +45,10 @@ def _acct_svc(db: Session = Depends(get_db)) -> AccountingService:
     return AccountingService(db, tenant_id="default")
 
 
+def _chart_svc(db: Session = Depends(get_db)) -> ChartOfAccountsService:
+    return ChartOfAccountsService(db, tenant_id="default")
+
+
 def _inv_svc(db: Session = Depends(get_db)) -> InvoiceService:
     return InvoiceService(db, tenant_id="default")
 
@@ -39,6 +57,63 @@ def _vendor_svc(db: Session = Depends(get_db)) -> VendorService:
     return VendorService(db, tenant_id="default")
 
 
+def _fx_svc(db: Session = Depends(get_db)) -> FXService:
+    return FXService(db, tenant_id="default")
+
+
+def _reval_svc(db: Session = Depends(get_db)) -> FXRevaluationService:
+    return FXRevaluationService(db, tenant_id="default")
+
+
+def _close_svc(db: Session = Depends(get_db)) -> PeriodCloseService:
+    return PeriodCloseService(db, tenant_id="default")
+
+
+def _billing_svc(db: Session = Depends(get_db)) -> BillingRunService:
+    return BillingRunService(db, tenant_id="default")
+
+
+def _recon_svc(db: Session = Depends(get_db)) -> ReconciliationService:
+    return ReconciliationService(db, tenant_id="default")
+
+
+def _report_svc(db: Session = Depends(get_db)) -> FinancialReportService:
+    return FinancialReportService(db, tenant_id="default")
+
+
+# ── Exchange Rates ───────────────────────────────────────────
+
+@router.post("/exchange-rates", response_model=ExchangeRateOut)
+def create_exchange_rate(
+    payload: ExchangeRateCreate,
+    svc: FXService = Depends(_fx_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Store a daily exchange rate (1 from_currency = rate to_currency)."""
+    try:
+        return svc.add_rate(payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@router.get("/exchange-rates/lookup", response_model=ExchangeRateLookupOut)
+def lookup_exchange_rate(
+    from_currency: str,
+    to_currency: Optional[str] = Query(None, description="Defaults to the base currency"),
+    on: Optional[date] = Query(None, description="Defaults to today"),
+    svc: FXService = Depends(_fx_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Rate in force on a date: the latest rate dated on or before it."""
+    to_currency = to_currency or svc.base_currency
+    on = on or date.today()
+    try:
+        rate = svc.rate(from_currency, to_currency, on)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return ExchangeRateLookupOut(from_currency=from_currency, to_currency=to_currency, on=on, rate=rate)
+
+
 # ── Chart of Accounts ────────────────────────────────────────
 
 @router.get("/accounts", response_model=List[AccountOut])
@@ -52,6 +127,20 @@ def list_accounts(
     return svc.list_accounts(account_type=account_type)
 
 
+@router.get("/accounts/tree", response_model=List[AccountTreeNodeOut])
+def account_tree(
+    as_of: Optional[date] = Query(None, description="Balances as of this day (default: all postings)"),
+    root_id: Optional[int] = Query(None, description="Return only this account's subtree"),
+    svc: ChartOfAccountsService = Depends(_chart_svc),
+    _user: User = Depends(get_current_user),
+):
+    """The whole chart of accounts as a tree, with balances rolled up to header accounts."""
+    try:
+        return svc.tree(as_of=as_of, root_id=root_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @router.post("/accounts", response_model=AccountOut)
 def create_account(
     payload: AccountCreate,
@@ -62,6 +151,78 @@ def create_account(
     return svc.create_account(payload.model_dump())
 
 
+@router.get("/accounts/{account_id}/balance", response_model=AccountBalanceOut)
+def get_account_balance(
+    account_id: int,
+    as_of: Optional[date] = None,
+    svc: AccountingService = Depends(_acct_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Net posted balance of an account, optionally as of a date."""
+    balance = svc.get_account_balance(account_id, as_of=as_of)
+    return AccountBalanceOut(account_id=account_id, as_of=as_of, balance=balance)
+
+
+# ── Fiscal Calendar ──────────────────────────────────────────
+
+@router.post("/fiscal-years", response_model=FiscalYearOut)
+def create_fiscal_year(
+    payload: FiscalYearCreate,
+    svc: AccountingService = Depends(_acct_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Create a fiscal year with one period per calendar month."""
+    try:
+        return svc.create_fiscal_year(payload.name, payload.start_date, payload.end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/fiscal-years", response_model=List[FiscalYearOut])
+def list_fiscal_years(
+    svc: AccountingService = Depends(_acct_svc),
+    _user: User = Depends(get_current_user),
+):
+    """List fiscal years and their periods."""
+    return svc.list_fiscal_years()
+
+
+@router.post("/fiscal-periods/{period_id}/close", response_model=PeriodCloseOut)
+def close_fiscal_period(
+    period_id: int,
+    svc: PeriodCloseService = Depends(_close_svc),
+    user: User = Depends(get_current_user),
+):
+    """
+    Close a fiscal period: snapshot closing balances and block further postings.
+
+    Periods close in date order. Closing the last period of a fiscal year
+    rolls the year's net income into retained earnings.
+    """
+    try:
+        return svc.close(period_id, user_id=user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/fiscal-periods/{period_id}/fx-revaluation", response_model=FXRevaluationOut)
+def run_fx_revaluation(
+    period_id: int,
+    svc: FXRevaluationService = Depends(_reval_svc),
+    user: User = Depends(get_current_user),
+):
+    """
+    Revalue open foreign-currency invoices and bills at the period-end rate.
+
+    Posts one entry per currency (reversed the next day). Running it again
+    for the same period returns the existing entries.
+    """
+    try:
+        return svc.run(period_id, user_id=user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ── Journal Entries ──────────────────────────────────────────
 
 @router.post("/journal-entries", response_model=JournalEntryOut)
@@ -84,6 +245,28 @@ def create_journal_entry(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/journal-entries/bulk", response_model=JournalEntryBulkOut)
+def create_journal_entries_bulk(
+    payload: JournalEntryBulkCreate,
+    svc: AccountingService = Depends(_acct_svc),
+    user: User = Depends(get_current_user),
+):
+    """
+    Create many journal entries in one transaction.
+
+    Entries that fail validation are skipped and listed in ``errors`` by their
+    index; the rest are written.
+    """
+    try:
+        return svc.create_journal_entries_bulk(
+            [entry.model_dump() for entry in payload.entries],
+            auto_post=payload.auto_post,
+            user_id=user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/journal-entries", response_model=List[JournalEntryOut])
 def list_journal_entries(
     offset: int = Query(0, ge=0),
@@ -120,21 +303,83 @@ def create_invoice(
     """Create a new invoice with line items."""
     data = payload.model_dump()
     data["lines"] = [l.model_dump() for l in payload.lines]
-    return svc.create(data, user_id=user.id)
+    try:
+        return svc.create(data, user_id=user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/invoices", response_model=InvoiceListOut)
 def list_invoices(
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (replaces offset)"),
+    count_mode: CountMode = Query("exact", description="How `total` is computed: exact, cached or approximate"),
     status: Optional[str] = None,
+    filter_exprs: List[str] = Query(
+        [], alias="filter", description="field:operator:value, e.g. due_date:within:last_30d (repeatable)",
+    ),
+    svc: InvoiceService = Depends(_inv_svc),
+    _user: User = Depends(get_current_user),
+):
+    """
+    List invoices with keyset (``cursor``) or offset pagination, a status
+    filter and repeatable ``filter`` expressions.
+    """
+    try:
+        where = svc.parse_filters(filter_exprs)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    next_cursor = None
+    if cursor or offset == 0:
+        try:
+            invoices, next_cursor = svc.list_page(limit=limit, cursor=cursor, status=status, where=where)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        offset = 0
+    else:
+        invoices = svc.list(offset=offset, limit=limit, status=status, where=where)
+    total = svc.count(mode=count_mode, status=status, where=where)
+    return InvoiceListOut(
+        items=invoices, total=total, count_mode=count_mode,
+        offset=offset, limit=limit, next_cursor=next_cursor,
+    )
+
+
+@router.post("/billing-runs", response_model=BillingRunOut)
+def create_billing_run(
+    payload: BillingRunCreate,
+    svc: BillingRunService = Depends(_billing_svc),
+    _user: User = Depends(get_current_user),
+):
+    """
+    Invoice unbilled billable time, one invoice per deal.
+
+    With ``dry_run`` the invoices are previewed and nothing is written.
+    """
+    try:
+        return svc.run(
+            payload.period_start,
+            payload.period_end,
+            invoice_date=payload.invoice_date,
+            due_days=payload.due_days,
+            deal_ids=payload.deal_ids,
+            dry_run=payload.dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/invoices/aging", response_model=ARAgingOut)
+def invoice_aging(
+    as_of: Optional[date] = Query(
+        None, description="Day to report on (default today); payments dated after it are not deducted",
+    ),
     svc: InvoiceService = Depends(_inv_svc),
     _user: User = Depends(get_current_user),
 ):
-    """List invoices with pagination and status filter."""
-    invoices = svc.list(offset=offset, limit=limit, status=status)
-    total = svc.count()
-    return InvoiceListOut(items=invoices, total=total, offset=offset, limit=limit)
+    """Receivables open on ``as_of`` by client and currency, bucketed by days past due."""
+    return svc.aging(as_of=as_of)
 
 
 @router.get("/invoices/{invoice_id}", response_model=InvoiceOut)
@@ -150,6 +395,19 @@ def get_invoice(
     return inv
 
 
+@router.post("/invoices/{invoice_id}/send", response_model=InvoiceOut)
+def send_invoice(
+    invoice_id: int,
+    svc: InvoiceService = Depends(_inv_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Issue a draft invoice (status ``sent``), making it a receivable."""
+    try:
+        return svc.issue(invoice_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/invoices/{invoice_id}/payments", response_model=PaymentOut)
 def record_payment(
     invoice_id: int,
@@ -164,6 +422,65 @@ def record_payment(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+# ── Bank Reconciliation ──────────────────────────────────────
+
+@router.post("/bank-statements", response_model=BankStatementImportOut)
+def import_bank_statement(
+    file: UploadFile = File(...),
+    file_format: Literal["csv", "camt053", "mt940"] = Form("csv"),
+    svc: ReconciliationService = Depends(_recon_svc),
+    _user: User = Depends(get_current_user),
+):
+    """
+    Import a bank statement and auto-match incoming payments to open invoices.
+
+    The upload is parsed as a stream. Matched lines are recorded as payments
+    in one transaction; the rest go to the unmatched queue. Lines imported
+    before are skipped.
+    """
+    parser, binary = STATEMENT_PARSERS[file_format]
+    source = file.file if binary else io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return svc.import_statement(parser(source), source=file.filename)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Statement import failed: {e}")
+
+
+@router.get("/bank-transactions", response_model=List[BankTransactionOut])
+def list_bank_transactions(
+    response: Response,
+    status: Optional[Literal["matched", "unmatched"]] = Query("unmatched"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    svc: ReconciliationService = Depends(_recon_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Imported bank lines, the unmatched review queue by default (oldest first)."""
+    try:
+        transactions, next_cursor = svc.list_transactions(status=status, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return transactions
+
+
+@router.post("/bank-transactions/{transaction_id}/match", response_model=BankTransactionOut)
+def match_bank_transaction(
+    transaction_id: int,
+    payload: BankTransactionMatch,
+    svc: ReconciliationService = Depends(_recon_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Resolve a queued line by recording it as a payment on the given invoice."""
+    if not svc.get_transaction(transaction_id):
+        raise HTTPException(status_code=404, detail="Bank transaction not found")
+    try:
+        return svc.match(transaction_id, payload.invoice_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ── Vendors ──────────────────────────────────────────────────
 
 @router.post("/vendors", response_model=VendorOut)
@@ -178,13 +495,23 @@ def create_vendor(
 
 @router.get("/vendors", response_model=List[VendorOut])
 def list_vendors(
+    response: Response,
     offset: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page (replaces offset)"),
     svc: VendorService = Depends(_vendor_svc),
     _user: User = Depends(get_current_user),
 ):
-    """List vendors."""
-    return svc.list(offset=offset, limit=limit)
+    """List vendors. Keyset pages return the next cursor in ``X-Next-Cursor``."""
+    if offset and not cursor:
+        return svc.list(offset=offset, limit=limit)
+    try:
+        vendors, next_cursor = svc.list_page(limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return vendors
 
 
 @router.post("/vendors/{vendor_id}/bills", response_model=BillOut)
@@ -197,4 +524,49 @@ def create_bill(
     """Create a vendor bill with line items."""
     data = payload.model_dump()
     data["lines"] = [l.model_dump() for l in payload.lines]
-    return svc.create_bill(vendor_id, data)
+    try:
+        return svc.create_bill(vendor_id, data)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# ── Financial Statements ─────────────────────────────────────
+
+def _statement(build, period_id: int, compare: List[int]):
+    try:
+        return build(period_id, compare)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.get("/reports/trial-balance", response_model=FinancialStatementOut)
+def trial_balance(
+    period_id: int,
+    compare: List[int] = Query([], description="Additional period ids to show as columns"),
+    svc: FinancialReportService = Depends(_report_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Account balances at the end of the period(s)."""
+    return _statement(svc.trial_balance, period_id, compare)
+
+
+@router.get("/reports/income-statement", response_model=FinancialStatementOut)
+def income_statement(
+    period_id: int,
+    compare: List[int] = Query([], description="Additional period ids to show as columns"),
+    svc: FinancialReportService = Depends(_report_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Revenue, expenses and net income within the period(s)."""
+    return _statement(svc.income_statement, period_id, compare)
+
+
+@router.get("/reports/balance-sheet", response_model=FinancialStatementOut)
+def balance_sheet(
+    period_id: int,
+    compare: List[int] = Query([], description="Additional period ids to show as columns"),
+    svc: FinancialReportService = Depends(_report_svc),
+    _user: User = Depends(get_current_user),
+):
+    """Assets, liabilities and equity at the end of the period(s)."""
+    return _statement(svc.balance_sheet, period_id, compare)
@@ -1,12 +1,19 @@
-"""Import router for bulk data import."""
+"""Import router for bulk data import.
 
-from typing import Literal
+The ``/import/{entity}/{format}`` endpoints process small files inline;
+``/import/jobs`` spools large files and imports them in the background.
+"""
+
+import json
+from typing import Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
 from sqlalchemy.orm import Session
 
 from ..auth import get_current_user, require_role
 from ..db import get_db
-from ..models import User
+from ..models import ImportJob, User
+from ..schemas.core import ImportJobOut
+from ..services.import_jobs import ImportJobService, rows_per_second
 from ..utils.import_ import (
     import_companies_csv,
     import_companies_json,
@@ -80,3 +87,54 @@ async def import_contacts_json_endpoint(
         return result.to_dict()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
+
+
+# ── Background Import Jobs ───────────────────────────────────
+
+def _job_out(job: ImportJob) -> ImportJobOut:
+    return ImportJobOut(
+        id=job.id,
+        uuid=job.uuid,
+        entity=job.entity,
+        file_format=job.file_format,
+        file_name=job.file_name,
+        status=job.status,
+        rows_processed=job.rows_processed,
+        rows_successful=job.rows_successful,
+        rows_failed=job.rows_failed,
+        error_count=job.error_count,
+        rows_per_second=rows_per_second(job),
+        errors=json.loads(job.errors_json) if job.errors_json else [],
+        warnings=json.loads(job.warnings_json) if job.warnings_json else [],
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        created_at=job.created_at,
+    )
+
+
+@router.post("/jobs", response_model=ImportJobOut, status_code=202)
+def create_import_job(
+    entity: Literal["companies", "contacts"] = Form(...),
+    file_format: Optional[Literal["csv", "json"]] = Form(None),
+    file: UploadFile = File(...),
+    user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Spool an upload to storage and import it in the background. Poll the returned job."""
+    svc = ImportJobService(db, tenant_id="default")
+    job = svc.create_job(file, entity, file_format, user_id=user.id)
+    svc.submit(job)
+    return _job_out(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobOut)
+def get_import_job(
+    job_id: int,
+    _user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db)
+):
+    """Report progress of a background import: rows done, errors, rows/sec."""
+    job = ImportJobService(db, tenant_id="default").get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return _job_out(job)
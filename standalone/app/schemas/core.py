@@ -1,5 +1,5 @@
 from datetime import date, datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, EmailStr
 
@@ -162,3 +162,22 @@ class EmailCaptureOut(BaseModel):
     interaction_id: int
     contact_id: int
     company_id: Optional[int]
+
+
+class ImportJobOut(BaseModel):
+    id: int
+    uuid: str
+    entity: str
+    file_format: str
+    file_name: str
+    status: str
+    rows_processed: int
+    rows_successful: int
+    rows_failed: int
+    error_count: int
+    rows_per_second: float
+    errors: List[str] = []
+    warnings: List[str] = []
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
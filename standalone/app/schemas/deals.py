@@ -74,6 +74,25 @@ class DealUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class DealBulkRequest(BaseModel):
+    """
+    One change applied to many deals. Select them by ``ids`` and/or
+    ``filter`` expressions (as on ``GET /deals``), then either set stage,
+    owner or priority, or soft-delete them with ``delete``.
+    """
+    ids: Optional[List[int]] = None
+    filter: List[str] = []
+    stage_id: Optional[int] = None
+    owner_user_id: Optional[int] = None
+    priority: Optional[str] = None
+    delete: bool = False
+
+
+class DealBulkOut(BaseModel):
+    updated: int
+    ids: List[int]
+
+
 class DealOut(BaseModel):
     id: int
     uuid: str
@@ -109,8 +128,22 @@ class DealOut(BaseModel):
 class DealListOut(BaseModel):
     items: List[DealOut]
     total: int
+    count_mode: str = "exact"  # exact | cached | approximate
+    offset: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+
+class DealSearchHit(BaseModel):
+    deal: DealOut
+    score: float
+
+
+class DealSearchOut(BaseModel):
+    items: List[DealSearchHit]
     offset: int
     limit: int
+    next_offset: Optional[int] = None
 
 
 # ── Deal Note Schemas ────────────────────────────────────────
@@ -251,4 +284,40 @@ class PipelineStageView(BaseModel):
     stage: DealStageOut
     deals: List[DealOut]
     total_value: Decimal
+    weighted_value: Decimal = Decimal(0)
     deal_count: int
+    next_cursor: Optional[str] = None
+
+
+class PipelineStageDealsOut(BaseModel):
+    """One further page of deal cards for a single pipeline column."""
+    items: List[DealOut]
+    next_cursor: Optional[str] = None
+
+
+# ── Stage Analytics ──────────────────────────────────────────
+
+class StageFunnelOut(BaseModel):
+    """Funnel and time-in-stage figures for one stage."""
+    stage_id: int
+    name: str
+    reached: int
+    exits: int
+    advanced: int
+    median_days: Optional[float] = None
+    avg_days: Optional[float] = None
+    conversion_rate: Optional[float] = None
+    drop_off_rate: Optional[float] = None
+
+
+class StageFlowOut(BaseModel):
+    """Moves from one stage to another; ``rate`` is per exit of the source stage."""
+    from_stage_id: int
+    to_stage_id: int
+    deals: int
+    rate: Optional[float] = None
+
+
+class StageAnalyticsOut(BaseModel):
+    stages: List[StageFunnelOut]
+    transitions: List[StageFlowOut]
@@ -4,7 +4,7 @@ Financial schemas: API request/response models for the ERP core.
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -41,6 +41,13 @@ class ExchangeRateOut(BaseModel):
         from_attributes = True
 
 
+class ExchangeRateLookupOut(BaseModel):
+    from_currency: str
+    to_currency: str
+    on: date
+    rate: Decimal
+
+
 # ── Chart of Accounts ────────────────────────────────────────
 
 class AccountCreate(BaseModel):
@@ -68,6 +75,107 @@ class AccountOut(BaseModel):
         from_attributes = True
 
 
+class AccountTreeNodeOut(BaseModel):
+    id: int
+    code: str
+    name: str
+    account_type: str
+    parent_id: Optional[int] = None
+    is_header: bool
+    depth: int
+    balance: Decimal  # own postings, debit - credit
+    total: Decimal  # including all descendants
+    children: List["AccountTreeNodeOut"] = []
+
+
+class AccountBalanceOut(BaseModel):
+    account_id: int
+    as_of: Optional[date] = None
+    balance: Decimal  # debit - credit, base currency
+
+
+# ── Fiscal Calendar ──────────────────────────────────────────
+
+class FiscalYearCreate(BaseModel):
+    name: str
+    start_date: date
+    end_date: date
+
+
+class FiscalPeriodOut(BaseModel):
+    id: int
+    name: str
+    period_number: int
+    start_date: date
+    end_date: date
+    is_closed: bool
+    closed_at: Optional[datetime] = None
+    class Config:
+        from_attributes = True
+
+
+class FiscalYearOut(BaseModel):
+    id: int
+    name: str
+    start_date: date
+    end_date: date
+    is_closed: bool
+    periods: List[FiscalPeriodOut]
+    class Config:
+        from_attributes = True
+
+
+class PeriodCloseOut(BaseModel):
+    period_id: int
+    closed_at: datetime
+    entries_assigned: int  # journal entries newly linked to the period
+    accounts: int  # closing balance rows written
+    retained_earnings: Optional[Decimal] = None  # net income rolled forward at year end
+    fiscal_year_closed: bool
+
+
+class FXRevaluationEntryOut(BaseModel):
+    journal_entry_id: int
+    entry_number: Optional[str] = None
+    currency: str
+    documents: int  # invoices and bills revalued
+    net_gain: Decimal  # negative for a loss
+
+
+class FXRevaluationOut(BaseModel):
+    period_id: int
+    rate_date: date
+    created: bool  # False when the period had already been revalued
+    entries: List[FXRevaluationEntryOut]
+
+
+# ── Financial Statements ─────────────────────────────────────
+
+class ReportColumnOut(BaseModel):
+    period_id: int
+    name: str
+    start_date: date
+    end_date: date
+
+
+class ReportLineOut(BaseModel):
+    account_id: int
+    code: str
+    name: str
+    account_type: str
+    parent_id: Optional[int] = None
+    is_header: bool
+    depth: int
+    amounts: List[Decimal]  # one per column, including child accounts
+
+
+class FinancialStatementOut(BaseModel):
+    report: str  # trial_balance | income_statement | balance_sheet
+    columns: List[ReportColumnOut]
+    lines: List[ReportLineOut]
+    totals: Dict[str, List[Decimal]]
+
+
 # ── Journal Entry ────────────────────────────────────────────
 
 class JournalEntryLineCreate(BaseModel):
@@ -75,7 +183,7 @@ class JournalEntryLineCreate(BaseModel):
     debit: Decimal = Decimal(0)
     credit: Decimal = Decimal(0)
     currency: str = "EUR"
-    exchange_rate: Decimal = Decimal(1)
+    exchange_rate: Optional[Decimal] = None  # Defaults to the as-of rate for entry_date
     description: Optional[str] = None
 
 
@@ -86,6 +194,27 @@ class JournalEntryCreate(BaseModel):
     lines: List[JournalEntryLineCreate]
 
 
+class JournalEntryBulkCreate(BaseModel):
+    entries: List[JournalEntryCreate]
+    auto_post: bool = False
+
+
+class JournalEntryBulkCreated(BaseModel):
+    index: int  # position in the request's ``entries``
+    id: int
+    entry_number: str
+
+
+class JournalEntryBulkError(BaseModel):
+    index: int
+    error: str
+
+
+class JournalEntryBulkOut(BaseModel):
+    created: List[JournalEntryBulkCreated]
+    errors: List[JournalEntryBulkError]
+
+
 class JournalEntryLineOut(BaseModel):
     id: int
     account_id: int
@@ -103,10 +232,12 @@ class JournalEntryLineOut(BaseModel):
 class JournalEntryOut(BaseModel):
     id: int
     uuid: str
+    entry_number: Optional[str] = None
     entry_date: date
     reference: Optional[str] = None
     memo: Optional[str] = None
     status: str
+    fiscal_period_id: Optional[int] = None
     lines: List[JournalEntryLineOut]
     created_at: datetime
     class Config:
@@ -173,8 +304,82 @@ class InvoiceOut(BaseModel):
 class InvoiceListOut(BaseModel):
     items: List[InvoiceOut]
     total: int
+    count_mode: str = "exact"  # exact | cached | approximate
     offset: int
     limit: int
+    next_cursor: Optional[str] = None
+
+
+class ARAgingRowOut(BaseModel):
+    company_id: Optional[int] = None
+    company_name: Optional[str] = None
+    currency: str
+    current: Decimal  # not yet due
+    days_1_30: Decimal
+    days_31_60: Decimal
+    days_61_90: Decimal
+    days_91_120: Decimal
+    days_over_120: Decimal
+    total: Decimal
+
+
+class ARAgingTotalOut(BaseModel):
+    currency: str
+    current: Decimal
+    days_1_30: Decimal
+    days_31_60: Decimal
+    days_61_90: Decimal
+    days_91_120: Decimal
+    days_over_120: Decimal
+    total: Decimal
+
+
+class ARAgingOut(BaseModel):
+    as_of: date
+    buckets: List[str]
+    rows: List[ARAgingRowOut]
+    totals: List[ARAgingTotalOut]  # one per currency
+
+
+# ── Billing Run ──────────────────────────────────────────────
+
+class BillingRunCreate(BaseModel):
+    period_start: date
+    period_end: date
+    invoice_date: Optional[date] = None  # defaults to period_end
+    due_days: int = 30
+    deal_ids: Optional[List[int]] = None  # default: every deal with unbilled time
+    dry_run: bool = False
+
+
+class BillingRunLineOut(BaseModel):
+    description: str
+    quantity: Decimal
+    unit_price: Decimal
+    line_total: Decimal
+
+
+class BillingRunInvoiceOut(BaseModel):
+    deal_id: int
+    deal_title: str
+    company_id: Optional[int] = None
+    currency: str
+    hours: Decimal
+    entries: int
+    subtotal: Decimal
+    lines: List[BillingRunLineOut]
+    invoice_id: Optional[int] = None  # None on a dry run
+    invoice_number: Optional[str] = None
+
+
+class BillingRunOut(BaseModel):
+    dry_run: bool
+    period_start: date
+    period_end: date
+    invoice_date: date
+    invoices: List[BillingRunInvoiceOut]
+    skipped_entries: int  # billable time without an hourly rate
+    skipped_deals: List[int] = []  # deals without a client, left unbilled
 
 
 # ── Payment ──────────────────────────────────────────────────
@@ -202,6 +407,45 @@ class PaymentOut(BaseModel):
         from_attributes = True
 
 
+# ── Bank Reconciliation ──────────────────────────────────────
+
+class BankStatementPaymentOut(BaseModel):
+    payment_id: int
+    invoice_id: int
+    invoice_number: str
+
+
+class BankStatementImportOut(BaseModel):
+    lines: int
+    duplicates: int
+    matched: int
+    unmatched: int
+    matched_amount: Decimal
+    payments: List[BankStatementPaymentOut] = []
+
+
+class BankTransactionOut(BaseModel):
+    id: int
+    booking_date: date
+    amount: Decimal
+    currency: str
+    reference: Optional[str] = None
+    counterparty: Optional[str] = None
+    bank_reference: Optional[str] = None
+    source: Optional[str] = None
+    status: str
+    invoice_id: Optional[int] = None  # suggestion while unmatched
+    payment_id: Optional[int] = None
+    match_confidence: Optional[Decimal] = None
+    match_reason: Optional[str] = None
+    class Config:
+        from_attributes = True
+
+
+class BankTransactionMatch(BaseModel):
+    invoice_id: int
+
+
 # ── Vendor ───────────────────────────────────────────────────
 
 class VendorCreate(BaseModel):
@@ -4,21 +4,61 @@ Generic CRUD Repository.
 Provides base data access operations that all entity-specific repositories inherit:
   - get_by_id / get_by_uuid
   - list (with pagination, filtering, sorting)
+  - list_keyset (cursor pagination that stays fast at any depth)
+  - select_keyset / select_rows (the same, selecting only some columns as dicts)
   - create / update / delete (soft-delete)
-  - count
+  - count (exact, cached, or approximate from planner statistics)
+  - criteria (the tenant-scoped, filtered WHERE clauses for custom statements)
 
 All queries automatically scope to tenant_id and exclude soft-deleted records.
+Filters map a field to a value (equality) or to a ``Condition`` parsed from
+the list endpoints' filter expressions (see ``app.services.filters``).
 """
 
-from typing import Any, Dict, Generic, List, Optional, Sequence, Type, TypeVar
+import json
+from typing import Any, Dict, Generic, List, Literal, Optional, Sequence, Tuple, Type, TypeVar
 
-from sqlalchemy import func, select
+from sqlalchemy import event, func, select
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models.base import Base
+from app.services.filters import Condition
+from app.services.pagination import decode_cursor, encode_cursor, keyset_predicate
+from app.utils.cache import TTLCache
 
 T = TypeVar("T", bound=Base)
 
+CountMode = Literal["exact", "cached", "approximate"]
+COUNT_MODES = ("exact", "cached", "approximate")
+
+# Totals shared by all repositories, keyed by (table, tenant_id, filters).
+count_cache = TTLCache(ttl=settings.count_cache_ttl_seconds, maxsize=4096)
+
+# Session.info key: (table, tenant_id) pairs written by the open transaction.
+PENDING_COUNTS = "pending_count_invalidations"
+
+
+def _discard_counts(table: str, tenant_id: str) -> None:
+    count_cache.discard_where(lambda key: key[0] == table and key[1] == tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_counts(session: Session) -> None:
+    """Drop totals for tables written in the transaction once its rows are visible."""
+    for table, tenant_id in session.info.pop(PENDING_COUNTS, ()):
+        _discard_counts(table, tenant_id)
+
+
+def driver_sql(stmt, dialect) -> Tuple[str, Dict[str, Any]]:
+    """
+    SQL string and parameters to hand straight to the DBAPI, e.g. behind an
+    ``EXPLAIN``. Expanding ``IN`` parameters are rendered as one placeholder
+    per value instead of SQLAlchemy's ``__[POSTCOMPILE_...]`` markers.
+    """
+    compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    return compiled.string, compiled.params
+
 
 class BaseRepository(Generic[T]):
     """Generic CRUD repository with tenant scoping and soft-delete awareness."""
@@ -28,14 +68,35 @@ class BaseRepository(Generic[T]):
         self.db = db
         self.tenant_id = tenant_id
 
-    def _base_query(self):
-        """Base query scoped to tenant and excluding soft-deleted records."""
-        q = self.db.query(self.model)
+    def _scope(self) -> List[Any]:
+        """Criteria scoping to the tenant and excluding soft-deleted records."""
+        criteria = []
         if hasattr(self.model, "tenant_id"):
-            q = q.filter(self.model.tenant_id == self.tenant_id)
+            criteria.append(self.model.tenant_id == self.tenant_id)
         if hasattr(self.model, "is_deleted"):
-            q = q.filter(self.model.is_deleted == False)  # noqa: E712
-        return q
+            criteria.append(self.model.is_deleted == False)  # noqa: E712
+        return criteria
+
+    def criteria(self, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Scope plus equality or ``Condition`` filters (None values are ignored),
+        as a list of WHERE clauses for statements built outside the repository.
+        """
+        criteria = self._scope()
+        if filters:
+            for key, value in filters.items():
+                if hasattr(self.model, key) and value is not None:
+                    column = getattr(self.model, key)
+                    criteria.append(value.clause(column) if isinstance(value, Condition) else column == value)
+        return criteria
+
+    def _base_query(self):
+        """Base query scoped to tenant and excluding soft-deleted records."""
+        return self.db.query(self.model).filter(*self._scope())
+
+    def _filtered_query(self, filters: Optional[Dict[str, Any]] = None):
+        """Base query plus filters."""
+        return self.db.query(self.model).filter(*self.criteria(filters))
 
     def get_by_id(self, id: int) -> Optional[T]:
         """Get a single record by integer primary key."""
@@ -57,54 +118,209 @@ class BaseRepository(Generic[T]):
         filters: Optional[Dict[str, Any]] = None,
     ) -> List[T]:
         """List records with pagination, sorting, and filtering."""
-        q = self._base_query()
-
-        # Apply simple equality filters
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key) and value is not None:
-                    q = q.filter(getattr(self.model, key) == value)
+        q = self._filtered_query(filters)
 
         # Apply ordering
         if order_by and hasattr(self.model, order_by):
             col = getattr(self.model, order_by)
             q = q.order_by(col.desc() if order_desc else col.asc())
         elif hasattr(self.model, "created_at"):
-            q = q.order_by(self.model.created_at.desc())
+            q = q.order_by(self.model.created_at.desc(), self.model.id.desc())
 
         return q.offset(offset).limit(limit).all()
 
-    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
-        """Count records matching filters."""
-        q = self._base_query()
-        if filters:
-            for key, value in filters.items():
-                if hasattr(self.model, key) and value is not None:
-                    q = q.filter(getattr(self.model, key) == value)
-        return q.count()
+    def list_keyset(
+        self,
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[T], Optional[str]]:
+        """
+        List records with keyset pagination.
+
+        Rows are ordered by ``(order_by, id)`` — ``created_at`` by default —
+        and each page resumes strictly after the previous page's last row, so
+        the database seeks via the index instead of scanning skipped rows.
+        Returns the page and an opaque cursor for the next one (None at the end).
+        """
+        sort_name, keys, seek, ordering = self._keyset(order_by, cursor, order_desc)
+        q = self._filtered_query(filters)
+        if seek is not None:
+            q = q.filter(seek)
+        rows = q.order_by(*ordering).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, encode_cursor([sort_name, *(getattr(last, k.key) for k in keys)])
+
+    def select_keyset(
+        self,
+        columns: Sequence[str],
+        *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        order_by: Optional[str] = None,
+        order_desc: bool = True,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        ``list_keyset`` for read-only lists: selects only ``columns`` with a
+        Core query and returns plain dicts, so no ORM objects, eager loads or
+        identity-map bookkeeping. Cursors are interchangeable with ``list_keyset``.
+        """
+        sort_name, keys, seek, ordering = self._keyset(order_by, cursor, order_desc)
+        names = list(dict.fromkeys(columns))
+        selected = names + [k.key for k in keys if k.key not in names]
+        stmt = select(*self._columns(selected)).where(*self.criteria(filters))
+        if seek is not None:
+            stmt = stmt.where(seek)
+        rows = self.db.execute(stmt.order_by(*ordering).limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([sort_name, *(last[selected.index(k.key)] for k in keys)])
+        return [dict(zip(names, row)) for row in rows], next_cursor
+
+    def select_rows(
+        self,
+        columns: Sequence[str],
+        *,
+        offset: int = 0,
+        limit: int = 50,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        """``list`` (default order) selecting only ``columns``, as plain dicts."""
+        names = list(dict.fromkeys(columns))
+        stmt = select(*self._columns(names)).where(*self.criteria(filters))
+        if hasattr(self.model, "created_at"):
+            stmt = stmt.order_by(self.model.created_at.desc(), self.model.id.desc())
+        return [dict(zip(names, row)) for row in self.db.execute(stmt.offset(offset).limit(limit))]
+
+    def _columns(self, names: Sequence[str]) -> List[Any]:
+        table = self.model.__table__
+        unknown = [name for name in names if name not in table.c]
+        if unknown:
+            raise ValueError(f"{self.model.__name__} has no column {', '.join(unknown)}")
+        return [table.c[name] for name in names]
 
-    def create(self, data: Dict[str, Any]) -> T:
-        """Create a new record."""
+    def _keyset(self, order_by: Optional[str], cursor: Optional[str], order_desc: bool):
+        """Sort name, key columns, seek predicate (None on the first page) and ORDER BY."""
+        sort_name = order_by or ("created_at" if hasattr(self.model, "created_at") else "id")
+        column = self.model.__table__.c.get(sort_name)
+        if column is None:
+            raise ValueError(f"Cannot sort {self.model.__name__} by '{sort_name}'")
+        if column.nullable:
+            raise ValueError(f"Cannot keyset-paginate on nullable column '{sort_name}'")
+        sort_col = getattr(self.model, sort_name)
+        keys = (sort_col,) if sort_name == "id" else (sort_col, self.model.id)
+
+        seek = None
+        if cursor:
+            name, *values = decode_cursor(cursor, len(keys) + 1)
+            if name != sort_name:
+                raise ValueError("Pagination cursor does not match the requested sort order")
+            seek = keyset_predicate(keys, values, descending=order_desc)
+        return sort_name, keys, seek, [k.desc() if order_desc else k.asc() for k in keys]
+
+    def count(self, filters: Optional[Dict[str, Any]] = None, mode: CountMode = "exact") -> int:
+        """
+        Count records matching filters.
+
+        ``exact`` runs a plain ``SELECT count(*)``. ``cached`` serves the exact
+        count from a TTL cache that this repository's writes invalidate.
+        ``approximate`` uses the PostgreSQL planner's row estimate (no table
+        scan) and falls back to ``cached`` on other databases.
+        """
+        if mode not in COUNT_MODES:
+            raise ValueError(f"Unknown count mode '{mode}'")
+        if mode == "approximate":
+            estimate = self._estimate_count(filters)
+            if estimate is not None:
+                return estimate
+            mode = "cached"
+        if mode == "cached":
+            key = self._count_key(filters)
+            total = count_cache.get(key)
+            if total is None:
+                total = self._exact_count(filters)
+                count_cache.set(key, total)
+            return total
+        return self._exact_count(filters)
+
+    def _exact_count(self, filters: Optional[Dict[str, Any]]) -> int:
+        stmt = select(func.count()).select_from(self.model).where(*self.criteria(filters))
+        return self.db.scalar(stmt)
+
+    def _estimate_count(self, filters: Optional[Dict[str, Any]]) -> Optional[int]:
+        """Planner row estimate on PostgreSQL; None where unsupported."""
+        bind = self.db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return None
+        stmt = select(self.model.__table__.c.id).where(*self.criteria(filters))
+        sql, params = driver_sql(stmt, bind.dialect)
+        plan = self.db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def _count_key(self, filters: Optional[Dict[str, Any]]) -> Tuple:
+        active = tuple(sorted(
+            (k, v) for k, v in (filters or {}).items()
+            if hasattr(self.model, k) and v is not None
+        ))
+        return (self.model.__tablename__, self.tenant_id, active)
+
+    def invalidate_counts(self) -> None:
+        """Drop cached totals for this table and tenant (call after committed writes)."""
+        _discard_counts(self.model.__tablename__, self.tenant_id)
+
+    def invalidate_counts_on_commit(self) -> None:
+        """
+        Drop cached totals when the session's transaction commits. Dropping
+        them at flush would let another request cache the old total again
+        before the write is visible.
+        """
+        self.db.info.setdefault(PENDING_COUNTS, set()).add((self.model.__tablename__, self.tenant_id))
+
+    def create(self, data: Dict[str, Any], commit: bool = True) -> T:
+        """
+        Create a new record.
+
+        With ``commit=False`` the row is only flushed (so it has an id) and the
+        caller commits it together with the rest of its unit of work.
+        """
         if hasattr(self.model, "tenant_id"):
             data.setdefault("tenant_id", self.tenant_id)
         obj = self.model(**data)
         self.db.add(obj)
-        self.db.commit()
-        self.db.refresh(obj)
+        self._finish_write(commit, obj)
         return obj
 
-    def update(self, id: int, data: Dict[str, Any]) -> Optional[T]:
-        """Update an existing record by ID."""
+    def update(self, id: int, data: Dict[str, Any], commit: bool = True) -> Optional[T]:
+        """Update an existing record by ID (``commit=False`` only flushes)."""
         obj = self.get_by_id(id)
         if not obj:
             return None
         for key, value in data.items():
             if hasattr(obj, key):
                 setattr(obj, key, value)
-        self.db.commit()
-        self.db.refresh(obj)
+        self._finish_write(commit, obj)
         return obj
 
+    def _finish_write(self, commit: bool, obj: T) -> None:
+        if commit:
+            self.db.commit()
+            self.invalidate_counts()
+            self.db.refresh(obj)
+        else:
+            self.db.flush()
+            self.invalidate_counts_on_commit()
+
     def delete(self, id: int, hard: bool = False) -> bool:
         """Delete a record. Soft-delete by default, hard-delete if specified."""
         obj = self.get_by_id(id)
@@ -115,4 +331,5 @@ class BaseRepository(Generic[T]):
         else:
             obj.soft_delete()
         self.db.commit()
+        self.invalidate_counts()
         return True
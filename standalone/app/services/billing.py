@@ -0,0 +1,191 @@
+"""
+Billing runs: invoices generated from unbilled billable time.
+
+One aggregated query sums billable, uninvoiced hours per deal and hourly
+rate for a date range. Each deal becomes one invoice to its client with one
+line per rate. Deals without a client are reported and left unbilled. Invoices and
+lines are written with executemany INSERTs, and
+the time entries are flagged ``invoiced`` with one set-based UPDATE, all in
+one transaction. A dry run returns the same preview without writing.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.deals import Deal
+from app.models.finance import Invoice, InvoiceLine
+from app.models.projects import TimeEntry
+from app.services.base_repository import BaseRepository
+from app.services.finance import invalidate_aging_cache
+from app.services.fx import CENT, FXService
+from app.services.sequences import SequenceAllocator
+
+
+class BillingRunService:
+    """Turns unbilled billable time into invoices for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.fx = FXService(db, tenant_id)
+
+    def run(
+        self,
+        period_start: date,
+        period_end: date,
+        *,
+        invoice_date: Optional[date] = None,
+        due_days: int = 30,
+        deal_ids: Optional[Iterable[int]] = None,
+        dry_run: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Bill time dated within ``[period_start, period_end]``.
+
+        Entries without an hourly rate are left unbilled and counted in
+        ``skipped_entries``; deals without a client (``company_id``) are left
+        unbilled and listed in ``skipped_deals``. Deals without a currency
+        are billed in the base currency. Raises ValueError if the time entries change
+        between the aggregate read and the UPDATE; the run is rolled back and
+        can simply be retried.
+        """
+        if period_end < period_start:
+            raise ValueError("period_end must not be before period_start")
+        invoice_date = invoice_date or period_end
+        deal_ids = list(deal_ids) if deal_ids is not None else None
+
+        drafts, skipped, clientless = self._collect(period_start, period_end, deal_ids)
+        result = {
+            "dry_run": dry_run,
+            "period_start": period_start,
+            "period_end": period_end,
+            "invoice_date": invoice_date,
+            "invoices": drafts,
+            "skipped_entries": skipped,
+            "skipped_deals": clientless,
+        }
+        if dry_run or not drafts:
+            return result
+
+        rates = {c: self.fx.rate(c, on=invoice_date) for c in {d["currency"] for d in drafts}}
+        numbers = SequenceAllocator(self.db, self.tenant_id).allocate("invoice", len(drafts))
+        note = f"Time billed {period_start.isoformat()} to {period_end.isoformat()}"
+        invoice_ids = list(self.db.scalars(
+            insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True),
+            [
+                {
+                    "invoice_number": number,
+                    "invoice_date": invoice_date,
+                    "due_date": invoice_date + timedelta(days=due_days),
+                    "status": "draft",
+                    "currency": d["currency"],
+                    "exchange_rate": rates[d["currency"]],
+                    "subtotal": d["subtotal"],
+                    "tax_amount": Decimal(0),
+                    "total": d["subtotal"],
+                    "amount_paid": Decimal(0),
+                    "balance_due": d["subtotal"],
+                    "company_id": d["company_id"],
+                    "deal_id": d["deal_id"],
+                    "payment_terms": f"Net {due_days}",
+                    "notes": note,
+                    "tenant_id": self.tenant_id,
+                }
+                for number, d in zip(numbers, drafts)
+            ],
+        ))
+        self.db.execute(insert(InvoiceLine), [
+            {**line, "invoice_id": invoice_id, "tax_rate": Decimal(0), "tax_amount": Decimal(0),
+             "tenant_id": self.tenant_id}
+            for invoice_id, d in zip(invoice_ids, drafts)
+            for line in d["lines"]
+        ])
+
+        expected = sum(d["entries"] for d in drafts)
+        marked = self.db.execute(
+            update(TimeEntry)
+            .where(*self._unbilled(period_start, period_end, [d["deal_id"] for d in drafts]),
+                   TimeEntry.hourly_rate.isnot(None))
+            .values(invoiced=True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if marked != expected:
+            self.db.rollback()
+            raise ValueError("Time entries changed during the billing run; nothing was invoiced, retry")
+        self.db.commit()
+
+        BaseRepository(Invoice, self.db, self.tenant_id).invalidate_counts()
+        invalidate_aging_cache(self.tenant_id)
+        for d, invoice_id, number in zip(drafts, invoice_ids, numbers):
+            d["invoice_id"], d["invoice_number"] = invoice_id, number
+        return result
+
+    # ── Selection ────────────────────────────────────────────
+
+    def _unbilled(self, period_start: date, period_end: date, deal_ids: Optional[List[int]]) -> list:
+        criteria = [
+            TimeEntry.tenant_id == self.tenant_id,
+            TimeEntry.billable == True,  # noqa: E712
+            TimeEntry.invoiced == False,  # noqa: E712
+            TimeEntry.deal_id.isnot(None),
+            TimeEntry.date >= period_start,
+            TimeEntry.date <= period_end,
+        ]
+        if deal_ids is not None:
+            criteria.append(TimeEntry.deal_id.in_(deal_ids))
+        return criteria
+
+    def _collect(self, period_start: date, period_end: date, deal_ids: Optional[List[int]]):
+        """
+        One grouped query -> invoice drafts per deal, the count of rate-less
+        entries and the ids of deals skipped for having no client.
+        """
+        rows = self.db.execute(
+            select(
+                TimeEntry.deal_id, Deal.title, Deal.company_id, Deal.currency, TimeEntry.hourly_rate,
+                func.sum(TimeEntry.hours), func.count(TimeEntry.id),
+            )
+            .join(Deal, Deal.id == TimeEntry.deal_id)
+            .where(
+                *self._unbilled(period_start, period_end, deal_ids),
+                Deal.tenant_id == self.tenant_id,
+                Deal.is_deleted == False,  # noqa: E712
+            )
+            .group_by(TimeEntry.deal_id, Deal.title, Deal.company_id, Deal.currency, TimeEntry.hourly_rate)
+            .order_by(TimeEntry.deal_id, TimeEntry.hourly_rate.desc())
+        ).all()
+
+        drafts: Dict[int, Dict[str, Any]] = {}
+        skipped = 0
+        clientless: List[int] = []
+        for deal_id, title, company_id, currency, rate, hours, entries in rows:
+            if rate is None:
+                skipped += entries
+                continue
+            if company_id is None:
+                if deal_id not in clientless:
+                    clientless.append(deal_id)
+                continue
+            hours = Decimal(str(hours)).quantize(CENT)
+            rate = Decimal(str(rate))
+            draft = drafts.setdefault(deal_id, {
+                "deal_id": deal_id, "deal_title": title, "company_id": company_id,
+                "currency": currency or self.fx.base_currency, "hours": Decimal(0), "entries": 0,
+                "subtotal": Decimal(0), "lines": [],
+                "invoice_id": None, "invoice_number": None,
+            })
+            line_total = (hours * rate).quantize(CENT)
+            draft["lines"].append({
+                "description": f"Advisory services: {hours} h @ {rate}",
+                "quantity": hours,
+                "unit_price": rate,
+                "line_total": line_total,
+            })
+            draft["hours"] += hours
+            draft["entries"] += entries
+            draft["subtotal"] += line_total
+        return list(drafts.values()), skipped, clientless
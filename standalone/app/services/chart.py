@@ -0,0 +1,134 @@
+"""
+Chart of accounts tree with subtree balance rollups.
+
+The whole hierarchy is read with one recursive CTE that walks
+``Account.parent_id`` from the roots and returns each account's depth and
+sort path, so the tree arrives in display (depth-first) order without any
+per-node loads. The structure is cached per tenant; inserting, updating or
+deleting an ``Account`` through the ORM drops the tenant's entry when the
+transaction commits (or rolls back).
+
+Balances are never cached: one grouped read of the materialized ledger
+gives every account's own balance, and a single reverse pass over the
+depth-first order adds each subtree total into its parent.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Text, cast, event, literal, or_, select
+from sqlalchemy.orm import Session, aliased, object_session
+
+from app.config import settings
+from app.models.finance import Account
+from app.services.ledger import LedgerService
+from app.utils.cache import TTLCache, on_commit
+
+_tree_cache = TTLCache(ttl=settings.account_tree_cache_ttl_seconds, maxsize=256)
+
+
+class AccountNode(NamedTuple):
+    id: int
+    code: str
+    name: str
+    account_type: str
+    parent_id: Optional[int]
+    is_header: bool
+    depth: int
+
+
+def invalidate_account_tree_cache(tenant_id: Optional[str] = None) -> None:
+    """Drop cached account trees for one tenant (or all tenants)."""
+    if tenant_id is None:
+        _tree_cache.clear()
+    else:
+        _tree_cache.pop(tenant_id)
+
+
+@event.listens_for(Account, "after_insert")
+@event.listens_for(Account, "after_update")
+@event.listens_for(Account, "after_delete")
+def _invalidate_changed_account(_mapper, _connection, target: Account) -> None:
+    on_commit(object_session(target), _tree_cache.pop, target.tenant_id)
+
+
+class ChartOfAccountsService:
+    """Loads the chart of accounts as a tree for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    def nodes(self) -> Tuple[AccountNode, ...]:
+        """Every live account in depth-first order (cached per tenant)."""
+        nodes = _tree_cache.get(self.tenant_id)
+        if nodes is None:
+            nodes = self._load()
+            _tree_cache.set(self.tenant_id, nodes)
+        return nodes
+
+    def tree(
+        self, as_of: Optional[date] = None, root_id: Optional[int] = None, balances: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Nested accounts with ``balance`` (own postings, debit - credit) and
+        ``total`` (balance including all descendants). ``root_id`` limits
+        the result to that account's subtree.
+        """
+        nodes = self.nodes()
+        own = LedgerService(self.db, self.tenant_id).balances(as_of) if balances else {}
+        totals = {n.id: own.get(n.id, Decimal(0)) for n in nodes}
+        for node in reversed(nodes):  # Children always follow their parent
+            if node.parent_id in totals:
+                totals[node.parent_id] += totals[node.id]
+
+        by_id: Dict[int, Dict[str, Any]] = {}
+        roots: List[Dict[str, Any]] = []
+        for node in nodes:
+            item = {
+                **node._asdict(),
+                "balance": own.get(node.id, Decimal(0)),
+                "total": totals[node.id],
+                "children": [],
+            }
+            by_id[node.id] = item
+            parent = by_id.get(node.parent_id)
+            (parent["children"] if parent else roots).append(item)
+        if root_id is not None:
+            if root_id not in by_id:
+                raise ValueError("Account not found")
+            return [by_id[root_id]]
+        return roots
+
+    # ── Loading ──────────────────────────────────────────────
+
+    def _live(self, model) -> list:
+        return [model.tenant_id == self.tenant_id, model.is_deleted == False]  # noqa: E712
+
+    def _load(self) -> Tuple[AccountNode, ...]:
+        parent = aliased(Account)
+        live_parent = select(parent.id).where(*self._live(parent))
+        # Roots: no parent, or a parent that has been deleted.
+        tree = (
+            select(Account.id, literal(0).label("depth"), cast(Account.code, Text).label("path"))
+            .where(*self._live(Account), or_(Account.parent_id.is_(None), Account.parent_id.notin_(live_parent)))
+            .cte("account_tree", recursive=True)
+        )
+        child = aliased(Account)
+        tree = tree.union_all(
+            select(child.id, tree.c.depth + 1, tree.c.path + "/" + cast(child.code, Text))
+            .join(tree, child.parent_id == tree.c.id)
+            .where(*self._live(child))
+        )
+        rows = self.db.execute(
+            select(Account.id, Account.code, Account.name, Account.account_type,
+                   Account.parent_id, Account.is_header, tree.c.depth)
+            .join(tree, tree.c.id == Account.id)
+            .order_by(tree.c.path)
+        ).all()
+        return tuple(
+            AccountNode(r.id, r.code, r.name, r.account_type,
+                        r.parent_id if r.depth else None, bool(r.is_header), r.depth)
+            for r in rows
+        )
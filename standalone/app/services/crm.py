@@ -5,12 +5,12 @@ Each service wraps a BaseRepository with entity-specific operations.
 Routers call these services instead of touching the DB directly.
 """
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from sqlalchemy.orm import Session
 
 from app.models.crm import Company, Contact, Interaction
-from app.services.base_repository import BaseRepository
+from app.services.base_repository import BaseRepository, CountMode
 
 
 class CompanyService:
@@ -33,8 +33,14 @@ class CompanyService:
     def list(self, *, offset: int = 0, limit: int = 50, **filters) -> List[Company]:
         return self.repo.list(offset=offset, limit=limit, filters=filters)
 
-    def count(self, **filters) -> int:
-        return self.repo.count(filters=filters)
+    def list_page(
+        self, *, limit: int = 50, cursor: Optional[str] = None, **filters
+    ) -> Tuple[List[Company], Optional[str]]:
+        """Keyset-paginated list, newest first. Returns (companies, next_cursor)."""
+        return self.repo.list_keyset(limit=limit, cursor=cursor, filters=filters)
+
+    def count(self, *, mode: CountMode = "exact", **filters) -> int:
+        return self.repo.count(filters=filters, mode=mode)
 
     def create(self, data: Dict[str, Any]) -> Company:
         # Check for duplicate name within tenant
@@ -70,8 +76,8 @@ class ContactService:
     def list(self, *, offset: int = 0, limit: int = 50, **filters) -> List[Contact]:
         return self.repo.list(offset=offset, limit=limit, filters=filters)
 
-    def count(self, **filters) -> int:
-        return self.repo.count(filters=filters)
+    def count(self, *, mode: CountMode = "exact", **filters) -> int:
+        return self.repo.count(filters=filters, mode=mode)
 
     def create(self, data: Dict[str, Any]) -> Contact:
         # Check for duplicate email within tenant
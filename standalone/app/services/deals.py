@@ -7,17 +7,32 @@ buyer lists, bids, team management, and deal notes.
 
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from types import MappingProxyType
+from typing import Any, ClassVar, Dict, List, Mapping, Optional, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Numeric, func, insert, select, update
+from sqlalchemy.orm import Session, lazyload
+from typing_extensions import Self
 
+from app.config import settings
+from app.models.auth import User
 from app.models.deals import (
     Bid, BuyerList, BuyerListEntry, Deal, DealActivity,
     DealNote, DealStage, DealTeamMember,
 )
-from app.services.base_repository import BaseRepository
+from app.services.base_repository import BaseRepository, CountMode
+from app.services.filters import Condition, merge_filters, parse_filters
+from app.services.fx import FXService
+from app.services.pagination import decode_cursor, encode_cursor, keyset_predicate
+from app.services.stage_history import StageHistoryService, StageMove
 
 
+# Activity rows written per executemany INSERT by ActivityBuffer.
+ACTIVITY_BATCH_SIZE = 500
+
+# Most deals one bulk operation may touch.
+MAX_BULK_DEALS = 1000
+
 # ── Default M&A Deal Stages ─────────────────────────────────
 DEFAULT_STAGES = [
     {"name": "Origination", "display_order": 1, "default_probability": 0.05, "color": "#6B7280"},
@@ -38,10 +53,29 @@ DEFAULT_STAGES = [
 class DealService:
     """Business logic for Deal management and pipeline operations."""
 
+    # Fields accepted by ``filter=field:operator:value`` on the list endpoint.
+    FILTER_FIELDS = (
+        "stage_id", "deal_type", "priority", "sector", "source", "currency",
+        "owner_user_id", "company_id", "lead_contact_id",
+        "target_value", "expected_revenue", "probability",
+        "expected_close_date", "actual_close_date", "engagement_start_date",
+        "loss_reason", "created_at", "updated_at",
+    )
+
+    # Columns ``fields=`` can pick on lean list reads (``stage`` is ``stage_id``).
+    LIST_FIELDS = (
+        "id", "uuid", "title", "deal_type", "description", "reference_code", "stage_id",
+        "probability", "priority", "target_value", "currency", "retainer_fee", "success_fee_pct",
+        "expected_revenue", "expected_close_date", "actual_close_date", "engagement_start_date",
+        "company_id", "lead_contact_id", "owner_user_id", "sector", "source", "loss_reason",
+        "notes", "created_at", "updated_at",
+    )
+
     def __init__(self, db: Session, tenant_id: str = "default"):
         self.db = db
         self.tenant_id = tenant_id
         self.repo = BaseRepository(Deal, db, tenant_id)
+        self.history = StageHistoryService(db, tenant_id)
 
     # ── CRUD ─────────────────────────────────────────────────
 
@@ -59,7 +93,72 @@ class DealService:
         priority: Optional[str] = None,
         sector: Optional[str] = None,
         owner_user_id: Optional[int] = None,
+        where: Optional[Dict[str, Condition]] = None,
     ) -> List[Deal]:
+        filters = self._list_filters(stage_id, deal_type, priority, sector, owner_user_id)
+        return self.repo.list(offset=offset, limit=limit, filters=merge_filters(filters, where))
+
+    def list_page(
+        self, *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        stage_id: Optional[int] = None,
+        deal_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        sector: Optional[str] = None,
+        owner_user_id: Optional[int] = None,
+        where: Optional[Dict[str, Condition]] = None,
+    ) -> Tuple[List[Deal], Optional[str]]:
+        """Keyset-paginated list, newest first. Returns (deals, next_cursor)."""
+        filters = self._list_filters(stage_id, deal_type, priority, sector, owner_user_id)
+        return self.repo.list_keyset(limit=limit, cursor=cursor, filters=merge_filters(filters, where))
+
+    def list_rows(
+        self, fields: Tuple[str, ...], *,
+        offset: int = 0, limit: int = 50,
+        stage_id: Optional[int] = None,
+        deal_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        sector: Optional[str] = None,
+        owner_user_id: Optional[int] = None,
+        where: Optional[Dict[str, Condition]] = None,
+    ) -> List[Dict[str, Any]]:
+        """``list`` selecting only ``fields`` (see ``parse_fields``), as plain dicts."""
+        filters = self._list_filters(stage_id, deal_type, priority, sector, owner_user_id)
+        return self.repo.select_rows(fields, offset=offset, limit=limit, filters=merge_filters(filters, where))
+
+    def list_page_rows(
+        self, fields: Tuple[str, ...], *,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        stage_id: Optional[int] = None,
+        deal_type: Optional[str] = None,
+        priority: Optional[str] = None,
+        sector: Optional[str] = None,
+        owner_user_id: Optional[int] = None,
+        where: Optional[Dict[str, Condition]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        ``list_page`` selecting only ``fields`` with one Core query: no Deal
+        objects, eager loads of stage, company, contact, owner or team.
+        """
+        filters = self._list_filters(stage_id, deal_type, priority, sector, owner_user_id)
+        return self.repo.select_keyset(fields, limit=limit, cursor=cursor, filters=merge_filters(filters, where))
+
+    def parse_fields(self, spec: str) -> Tuple[str, ...]:
+        """Parse a ``fields=id,title,...`` list; ``id`` always comes first (ValueError if unknown)."""
+        fields = [name.strip() for name in spec.split(",") if name.strip()]
+        unknown = [name for name in fields if name not in self.LIST_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown field {', '.join(unknown)}; allowed: {', '.join(self.LIST_FIELDS)}")
+        return tuple(dict.fromkeys(["id", *fields]))
+
+    def parse_filters(self, expressions: List[str]) -> Dict[str, Condition]:
+        """Parse ``field:operator:value`` filter expressions (ValueError if invalid)."""
+        return parse_filters(Deal, expressions, self.FILTER_FIELDS)
+
+    @staticmethod
+    def _list_filters(stage_id, deal_type, priority, sector, owner_user_id) -> Dict[str, Any]:
         filters = {}
         if stage_id is not None:
             filters["stage_id"] = stage_id
@@ -71,14 +170,17 @@ class DealService:
             filters["sector"] = sector
         if owner_user_id is not None:
             filters["owner_user_id"] = owner_user_id
-        return self.repo.list(offset=offset, limit=limit, filters=filters)
+        return filters
 
-    def count(self, **filters) -> int:
-        return self.repo.count(filters=filters)
+    def count(self, *, mode: CountMode = "exact", where: Optional[Dict[str, Condition]] = None, **filters) -> int:
+        return self.repo.count(filters=merge_filters(filters, where), mode=mode)
 
     def create(self, data: Dict[str, Any], user_id: Optional[int] = None) -> Deal:
-        deal = self.repo.create(data)
+        deal = self.repo.create(data, commit=False)
         self._log_activity(deal.id, user_id, "deal_created", f"Deal '{deal.title}' created")
+        if deal.stage_id:
+            self.history.record([StageMove(deal.id, None, deal.stage_id, deal.sector, deal.deal_type, user_id)])
+        self._commit(deal)
         return deal
 
     def update(self, deal_id: int, data: Dict[str, Any], user_id: Optional[int] = None) -> Optional[Deal]:
@@ -88,7 +190,7 @@ class DealService:
 
         # Track stage changes for activity log
         old_stage_id = old_deal.stage_id
-        deal = self.repo.update(deal_id, data)
+        deal = self.repo.update(deal_id, data, commit=False)
 
         if deal and data.get("stage_id") and data["stage_id"] != old_stage_id:
             self._log_activity(
@@ -97,44 +199,305 @@ class DealService:
                 old_value=str(old_stage_id),
                 new_value=str(data["stage_id"]),
             )
+            self.history.record([
+                StageMove(deal_id, old_stage_id, deal.stage_id, deal.sector, deal.deal_type, user_id),
+            ])
+        self._commit(deal)
         return deal
 
+    def bulk_create(self, items: List[Dict[str, Any]], user_id: Optional[int] = None) -> List[int]:
+        """
+        Insert many deals with one executemany INSERT and log their
+        ``deal_created`` activities through an ActivityBuffer and their
+        starting stages in the stage history; one commit. Returns the new
+        deal ids in input order.
+        """
+        if not items:
+            return []
+        rows = [{"tenant_id": self.tenant_id, **item} for item in items]
+        deal_ids = list(self.db.scalars(
+            insert(Deal).returning(Deal.id, sort_by_parameter_order=True), rows,
+        ))
+        with ActivityBuffer(self.db, self.tenant_id) as activities:
+            for deal_id, row in zip(deal_ids, rows):
+                activities.add(deal_id, user_id, "deal_created", f"Deal '{row['title']}' created")
+        self.history.record(
+            StageMove(deal_id, None, row["stage_id"], row.get("sector"), row["deal_type"], user_id)
+            for deal_id, row in zip(deal_ids, rows) if row.get("stage_id")
+        )
+        self.db.commit()
+        self.repo.invalidate_counts()
+        return deal_ids
+
+    def bulk_update(self, changes: Dict[int, Dict[str, Any]], user_id: Optional[int] = None) -> int:
+        """
+        Apply per-deal partial updates (``{deal_id: data}``) in one transaction.
+
+        Current stages are read with a single query, updates go out as one
+        executemany UPDATE by primary key, and stage changes are logged through
+        an ActivityBuffer and one batched stage history write. Unknown or
+        deleted deals are skipped. Returns the number of deals updated.
+        """
+        if not changes:
+            return 0
+        current = {row.id: row for row in self.db.execute(
+            select(Deal.id, Deal.stage_id, Deal.sector, Deal.deal_type).where(
+                Deal.id.in_(changes),
+                Deal.tenant_id == self.tenant_id,
+                Deal.is_deleted == False,  # noqa: E712
+            )
+        )}
+        rows = [
+            {"id": deal_id, **{k: v for k, v in data.items() if k in Deal.__table__.c and k != "id"}}
+            for deal_id, data in changes.items() if deal_id in current
+        ]
+        rows = [row for row in rows if len(row) > 1]
+        if not rows:
+            return 0
+        self.db.execute(update(Deal), rows)
+        moves = []
+        with ActivityBuffer(self.db, self.tenant_id) as activities:
+            for row in rows:
+                old, new_stage = current[row["id"]], row.get("stage_id")
+                if new_stage and new_stage != old.stage_id:
+                    activities.add(
+                        row["id"], user_id, "stage_change", "Stage changed",
+                        old_value=str(old.stage_id), new_value=str(new_stage),
+                    )
+                    moves.append(StageMove(
+                        row["id"], old.stage_id, new_stage,
+                        row.get("sector", old.sector), row.get("deal_type", old.deal_type), user_id,
+                    ))
+        self.history.record(moves)
+        self.db.commit()
+        self.repo.invalidate_counts()
+        return len(rows)
+
+    # Fields ``bulk_apply`` can set, with the activity logged when one changes.
+    BULK_FIELDS: ClassVar[Mapping[str, Tuple[str, str]]] = MappingProxyType({
+        "stage_id": ("stage_change", "Stage changed"),
+        "owner_user_id": ("owner_change", "Owner changed"),
+        "priority": ("priority_change", "Priority changed"),
+    })
+
+    def bulk_apply(
+        self, *,
+        ids: Optional[List[int]] = None,
+        where: Optional[Dict[str, Condition]] = None,
+        changes: Optional[Dict[str, Any]] = None,
+        delete: bool = False,
+        user_id: Optional[int] = None,
+    ) -> List[int]:
+        """
+        Apply the same change to every deal selected by ``ids`` and/or
+        ``where`` (both must match when both are given): set ``changes``
+        (stage, owner, priority) or soft-delete them.
+
+        The selection is read with one query, the change is one set-based
+        UPDATE, and activities and stage history go out as multi-row inserts;
+        one commit. Raises ValueError for an empty selection, no change, an
+        unknown stage or owner, or more than MAX_BULK_DEALS deals. Returns the ids of
+        the deals changed.
+        """
+        changes = {k: v for k, v in (changes or {}).items() if v is not None}
+        if ids is None and not where:
+            raise ValueError("Select deals with ids or a filter")
+        unknown = changes.keys() - self.BULK_FIELDS.keys()
+        if unknown:
+            raise ValueError(f"Cannot bulk-set {', '.join(sorted(unknown))}")
+        if delete == bool(changes):
+            raise ValueError("Give either changes or delete")
+        stage_id = changes.get("stage_id")
+        if stage_id is not None and not self.db.scalar(
+            select(DealStage.id).where(DealStage.id == stage_id, DealStage.tenant_id == self.tenant_id)
+        ):
+            raise ValueError(f"Unknown stage {stage_id}")
+        owner_id = changes.get("owner_user_id")
+        if owner_id is not None and not self.db.scalar(
+            select(User.id).where(
+                User.id == owner_id, User.tenant_id == self.tenant_id,
+                User.is_deleted == False,  # noqa: E712
+            )
+        ):
+            raise ValueError(f"Unknown user {owner_id}")
+
+        criteria = self.repo.criteria(where)
+        if ids is not None:
+            criteria.append(Deal.id.in_(ids))
+        current = self.db.execute(
+            select(Deal.id, Deal.stage_id, Deal.owner_user_id, Deal.priority, Deal.sector, Deal.deal_type)
+            .where(*criteria).order_by(Deal.id).limit(MAX_BULK_DEALS + 1)
+        ).all()
+        if len(current) > MAX_BULK_DEALS:
+            raise ValueError(f"Bulk operations are limited to {MAX_BULK_DEALS} deals")
+        if not current:
+            return []
+        deal_ids = [row.id for row in current]
+
+        values = {"is_deleted": True, "deleted_at": datetime.now(timezone.utc)} if delete else changes
+        self.db.execute(
+            update(Deal).where(Deal.id.in_(deal_ids)).values(values)
+            .execution_options(synchronize_session="fetch")
+        )
+        moves = []
+        with ActivityBuffer(self.db, self.tenant_id) as activities:
+            for row in current:
+                if delete:
+                    activities.add(row.id, user_id, "deal_deleted", "Deal deleted")
+                    continue
+                for field, new in changes.items():
+                    old = getattr(row, field)
+                    if new != old:
+                        activities.add(
+                            row.id, user_id, *self.BULK_FIELDS[field],
+                            old_value=None if old is None else str(old), new_value=str(new),
+                        )
+                if stage_id is not None and stage_id != row.stage_id:
+                    moves.append(StageMove(row.id, row.stage_id, stage_id, row.sector, row.deal_type, user_id))
+        self.history.record(moves)
+        self.db.commit()
+        self.repo.invalidate_counts()
+        return deal_ids
+
+    def _commit(self, obj: Any) -> None:
+        """Commit the unit of work (row plus its activities) and reload ``obj``."""
+        self.db.commit()
+        self.db.refresh(obj)
+
     def delete(self, deal_id: int) -> bool:
         return self.repo.delete(deal_id)
 
     # ── Pipeline View ────────────────────────────────────────
 
-    def get_pipeline_view(self) -> List[Dict]:
-        """Build Kanban-style pipeline data grouped by stage."""
+    def _card_query(self):
+        """Deal query for Kanban cards: only the stage is eager-loaded."""
+        return (
+            self.db.query(Deal)
+            .options(
+                lazyload(Deal.company), lazyload(Deal.lead_contact),
+                lazyload(Deal.owner), lazyload(Deal.team_members),
+            )
+            .filter(
+                Deal.tenant_id == self.tenant_id,
+                Deal.is_deleted == False,  # noqa: E712
+            )
+        )
+
+    def get_pipeline_totals(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Per-stage deal count, value sum and probability-weighted value in one
+        GROUP BY (stage, currency); sums are converted to base currency at
+        today's rate in one FX call. A currency without a rate raises
+        ValueError (400), or counts at par with ``FX_MISSING_RATE_AT_PAR``.
+        """
+        rows = (
+            self.db.query(
+                Deal.stage_id,
+                Deal.currency,
+                func.count(Deal.id),
+                func.coalesce(func.sum(Deal.target_value), 0),
+                func.coalesce(
+                    func.sum(Deal.target_value * Deal.probability, type_=Numeric(18, 2)), 0,
+                ),
+            )
+            .filter(
+                Deal.tenant_id == self.tenant_id,
+                Deal.is_deleted == False,  # noqa: E712
+                Deal.stage_id.isnot(None),
+            )
+            .group_by(Deal.stage_id, Deal.currency)
+            .all()
+        )
+        currencies = [currency or settings.base_currency for _, currency, _, _, _ in rows]
+        fx = FXService(self.db, self.tenant_id)
+        totals = fx.convert_many([r[3] for r in rows], currencies)
+        weighted = fx.convert_many([r[4] for r in rows], currencies)
+
+        result: Dict[int, Dict[str, Any]] = {}
+        for (stage_id, _, count, _, _), total, weight in zip(rows, totals, weighted):
+            stage = result.setdefault(stage_id, {
+                "deal_count": 0, "total_value": Decimal(0), "weighted_value": Decimal(0),
+            })
+            stage["deal_count"] += count
+            stage["total_value"] += total
+            stage["weighted_value"] += weight
+        return result
+
+    def get_pipeline_view(self, limit_per_stage: int = 20) -> List[Dict]:
+        """
+        Build Kanban-style pipeline data grouped by stage.
+
+        Totals come from a single aggregate query; cards are the first
+        ``limit_per_stage`` deals of each stage (most recently updated first),
+        ranked with a window function so all columns load in one round trip.
+        Each column carries a ``next_cursor`` for ``get_stage_deals``.
+        """
         stages = (
             self.db.query(DealStage)
             .filter(DealStage.tenant_id == self.tenant_id)
             .order_by(DealStage.display_order)
             .all()
         )
+        totals = self.get_pipeline_totals()
+
+        rank = func.row_number().over(
+            partition_by=Deal.stage_id,
+            order_by=(Deal.updated_at.desc(), Deal.id.desc()),
+        ).label("rank")
+        ranked = (
+            select(Deal.id, rank)
+            .where(
+                Deal.tenant_id == self.tenant_id,
+                Deal.is_deleted == False,  # noqa: E712
+                Deal.stage_id.in_([s.id for s in stages]),
+            )
+            .subquery()
+        )
+        cards = (
+            self._card_query()
+            .join(ranked, ranked.c.id == Deal.id)
+            .filter(ranked.c.rank <= limit_per_stage + 1)
+            .order_by(Deal.stage_id, Deal.updated_at.desc(), Deal.id.desc())
+            .all()
+        )
+        by_stage: Dict[int, List[Deal]] = {}
+        for deal in cards:
+            by_stage.setdefault(deal.stage_id, []).append(deal)
+
         result = []
         for stage in stages:
-            deals = (
-                self.db.query(Deal)
-                .filter(
-                    Deal.tenant_id == self.tenant_id,
-                    Deal.stage_id == stage.id,
-                    Deal.is_deleted == False,  # noqa: E712
-                )
-                .order_by(Deal.updated_at.desc())
-                .all()
-            )
-            total_value = sum(
-                d.target_value or Decimal(0) for d in deals
-            )
+            deals, next_cursor = self._page(by_stage.get(stage.id, []), limit_per_stage)
+            stage_totals = totals.get(stage.id, {})
             result.append({
                 "stage": stage,
                 "deals": deals,
-                "total_value": total_value,
-                "deal_count": len(deals),
+                "total_value": stage_totals.get("total_value", Decimal(0)),
+                "weighted_value": stage_totals.get("weighted_value", Decimal(0)),
+                "deal_count": stage_totals.get("deal_count", 0),
+                "next_cursor": next_cursor,
             })
         return result
 
+    def get_stage_deals(
+        self, stage_id: int, *, limit: int = 20, cursor: Optional[str] = None,
+    ) -> Tuple[List[Deal], Optional[str]]:
+        """Load one more page of a Kanban column using a keyset cursor."""
+        q = self._card_query().filter(Deal.stage_id == stage_id)
+        if cursor:
+            updated_at, deal_id = decode_cursor(cursor, 2)
+            q = q.filter(keyset_predicate((Deal.updated_at, Deal.id), (updated_at, deal_id)))
+        deals = q.order_by(Deal.updated_at.desc(), Deal.id.desc()).limit(limit + 1).all()
+        return self._page(deals, limit)
+
+    @staticmethod
+    def _page(deals: List[Deal], limit: int) -> Tuple[List[Deal], Optional[str]]:
+        """Trim a limit+1 fetch to ``limit`` rows and derive the next cursor."""
+        if len(deals) <= limit:
+            return deals, None
+        deals = deals[:limit]
+        last = deals[-1]
+        return deals, encode_cursor((last.updated_at, last.id))
+
     # ── Notes ────────────────────────────────────────────────
 
     def add_note(self, deal_id: int, author_id: int, content: str, is_pinned: bool = False) -> DealNote:
@@ -144,9 +507,8 @@ class DealService:
             tenant_id=self.tenant_id,
         )
         self.db.add(note)
-        self.db.commit()
-        self.db.refresh(note)
         self._log_activity(deal_id, author_id, "note_added", "Note added")
+        self._commit(note)
         return note
 
     def get_notes(self, deal_id: int) -> List[DealNote]:
@@ -225,9 +587,8 @@ class DealService:
         bid = Bid(deal_id=deal_id, tenant_id=self.tenant_id, **data)
         bid.submitted_at = datetime.now(timezone.utc)
         self.db.add(bid)
-        self.db.commit()
-        self.db.refresh(bid)
         self._log_activity(deal_id, user_id, "bid_received", f"{data.get('bid_type', 'unknown')} bid received")
+        self._commit(bid)
         return bid
 
     def get_bids(self, deal_id: int) -> List[Bid]:
@@ -265,7 +626,7 @@ class DealService:
         old_value: Optional[str] = None,
         new_value: Optional[str] = None,
     ) -> None:
-        """Create an activity log entry for a deal event."""
+        """Add an activity entry to the current unit of work; the caller commits it."""
         activity = DealActivity(
             deal_id=deal_id,
             user_id=user_id,
@@ -276,7 +637,60 @@ class DealService:
             tenant_id=self.tenant_id,
         )
         self.db.add(activity)
-        self.db.commit()
+
+
+class ActivityBuffer:
+    """
+    Buffered writer for DealActivity rows.
+
+    Rows are collected in memory and written with one executemany INSERT per
+    ``batch_size`` rows (and on ``flush()`` / leaving the ``with`` block).
+    It never commits: the rows belong to the caller's transaction.
+    """
+
+    def __init__(self, db: Session, tenant_id: str = "default", batch_size: int = ACTIVITY_BATCH_SIZE):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.batch_size = batch_size
+        self.written = 0
+        self._rows: List[Dict[str, Any]] = []
+
+    def add(
+        self,
+        deal_id: int,
+        user_id: Optional[int],
+        activity_type: str,
+        description: str,
+        old_value: Optional[str] = None,
+        new_value: Optional[str] = None,
+    ) -> None:
+        self._rows.append({
+            "deal_id": deal_id,
+            "user_id": user_id,
+            "activity_type": activity_type,
+            "description": description,
+            "old_value": old_value,
+            "new_value": new_value,
+            "tenant_id": self.tenant_id,
+        })
+        if len(self._rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write buffered rows; returns how many were written."""
+        if not self._rows:
+            return 0
+        rows, self._rows = self._rows, []
+        self.db.execute(insert(DealActivity), rows)
+        self.written += len(rows)
+        return len(rows)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
 
 
 def seed_default_stages(db: Session, tenant_id: str = "default") -> List[DealStage]:
@@ -0,0 +1,172 @@
+"""
+Filter expressions for list endpoints.
+
+List endpoints take repeatable ``filter`` query parameters of the form
+``field:operator:value``:
+
+    filter=stage_id:in:7,8,9
+    filter=target_value:between:20000000,200000000
+    filter=expected_close_date:within:this_quarter
+    filter=loss_reason:null:true
+
+Operators:
+
+  - ``eq``, ``ne``, ``lt``, ``lte``, ``gt``, ``gte``: one value
+  - ``in``, ``nin``: comma-separated values
+  - ``between``: ``low,high``, both inclusive
+  - ``null``: ``true`` (IS NULL) or ``false`` (IS NOT NULL)
+  - ``within``: a date window on date/datetime fields: ``today``,
+    ``this_week``, ``this_month``, ``this_quarter``, ``this_year``,
+    ``last_<N>d`` (the N days up to today) or ``next_<N>d`` (today and
+    the N days after)
+
+Values are converted to the column's type, and date windows are resolved to
+concrete dates when parsed. The result is a ``{field: Condition}`` dict that
+``BaseRepository`` accepts next to plain equality filters, so cached counts
+are keyed on the resolved values.
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Sequence, Tuple, Type
+
+from sqlalchemy import and_
+
+SCALAR_OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+}
+OPERATORS = (*SCALAR_OPERATORS, "in", "nin", "between", "null", "within")
+
+# Most values accepted by one ``in``/``nin`` filter.
+MAX_IN_VALUES = 500
+
+_RELATIVE_WINDOW = re.compile(r"(last|next)_(\d{1,4})d")
+
+
+class Condition(NamedTuple):
+    """One parsed filter operation on a column (hashable, for count cache keys)."""
+    op: str
+    value: Any
+
+    def clause(self, column):
+        if self.op == "and":
+            return and_(*(c.clause(column) for c in self.value))
+        if self.op == "null":
+            return column.is_(None) if self.value else column.isnot(None)
+        if self.op == "in":
+            return column.in_(self.value)
+        if self.op == "nin":
+            return column.notin_(self.value)
+        if self.op == "between":
+            return column.between(*self.value)
+        return SCALAR_OPERATORS[self.op](column, self.value)
+
+
+def date_window(name: str, today: Optional[date] = None) -> Tuple[date, date]:
+    """Resolve a named window to inclusive ``(first_day, last_day)``."""
+    today = today or date.today()
+    if name == "today":
+        return today, today
+    if name == "this_week":
+        start = today - timedelta(days=today.weekday())
+        return start, start + timedelta(days=6)
+    if name == "this_month":
+        start = today.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    if name == "this_quarter":
+        start = today.replace(month=3 * ((today.month - 1) // 3) + 1, day=1)
+        return start, (start + timedelta(days=93)).replace(day=1) - timedelta(days=1)
+    if name == "this_year":
+        return today.replace(month=1, day=1), today.replace(month=12, day=31)
+    match = _RELATIVE_WINDOW.fullmatch(name)
+    if match:
+        days = int(match.group(2))
+        if match.group(1) == "last":
+            return today - timedelta(days=days), today
+        return today, today + timedelta(days=days)
+    raise ValueError(f"Unknown date window '{name}'")
+
+
+def _convert(raw: str, python_type: Type, field: str) -> Any:
+    try:
+        if python_type is bool:
+            if raw.lower() not in ("true", "false"):
+                raise ValueError
+            return raw.lower() == "true"
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is date:
+            return date.fromisoformat(raw)
+        if python_type is Decimal:
+            return Decimal(raw)
+        return python_type(raw)
+    except (ValueError, InvalidOperation):
+        raise ValueError(f"Invalid value '{raw}' for '{field}'")
+
+
+def parse_filter(model, expression: str, fields: Sequence[str], today: Optional[date] = None) -> Tuple[str, Condition]:
+    """Parse one ``field:operator:value`` expression against ``model``'s columns."""
+    parts = expression.split(":", 2)
+    if len(parts) != 3:
+        raise ValueError(f"Filter '{expression}' must look like field:operator:value")
+    field, op, raw = (p.strip() for p in parts)
+    if field not in fields:
+        raise ValueError(f"Cannot filter on '{field}'; allowed: {', '.join(fields)}")
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown filter operator '{op}'; allowed: {', '.join(OPERATORS)}")
+    python_type = model.__table__.c[field].type.python_type
+
+    if op == "null":
+        return field, Condition("null", _convert(raw, bool, field))
+    if op == "within":
+        if python_type not in (date, datetime):
+            raise ValueError(f"'within' needs a date field; '{field}' is not one")
+        first, last = date_window(raw, today)
+        if python_type is date:
+            return field, Condition("between", (first, last))
+        start = datetime.combine(first, datetime.min.time())
+        end = datetime.combine(last + timedelta(days=1), datetime.min.time())
+        return field, Condition("and", (Condition("gte", start), Condition("lt", end)))
+    if op in ("in", "nin", "between"):
+        values = tuple(_convert(v.strip(), python_type, field) for v in raw.split(",") if v.strip())
+        if op == "between" and len(values) != 2:
+            raise ValueError(f"'between' on '{field}' needs two values: low,high")
+        if not values or len(values) > MAX_IN_VALUES:
+            raise ValueError(f"'{op}' on '{field}' needs 1 to {MAX_IN_VALUES} values")
+        return field, Condition(op, values)
+    return field, Condition(op, _convert(raw, python_type, field))
+
+
+def parse_filters(
+    model, expressions: Iterable[str], fields: Sequence[str], today: Optional[date] = None,
+) -> Dict[str, Condition]:
+    """Parse filter expressions; several on one field must all hold."""
+    parsed: Dict[str, Condition] = {}
+    for expression in expressions:
+        field, condition = parse_filter(model, expression, fields, today)
+        parsed[field] = merge_conditions(parsed.get(field), condition)
+    return parsed
+
+
+def merge_conditions(first: Any, second: Any) -> Any:
+    """Combine two filters on the same field (either may be a plain value or None)."""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    as_condition = [c if isinstance(c, Condition) else Condition("eq", c) for c in (first, second)]
+    return Condition("and", tuple(as_condition))
+
+
+def merge_filters(filters: Dict[str, Any], where: Optional[Dict[str, Condition]]) -> Dict[str, Any]:
+    """Equality filters plus parsed conditions; a field in both must satisfy both."""
+    merged = dict(filters)
+    for field, condition in (where or {}).items():
+        merged[field] = merge_conditions(merged.get(field), condition)
+    return merged
@@ -6,19 +6,55 @@ Invoice lifecycle, Payment processing, and accounting integrity.
 """
 
 import itertools
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
+from sqlalchemy import and_, case, func, insert, select, update
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.models.crm import Company
 from app.models.finance import (
     Account, Bill, BillLine, Currency, ExchangeRate,
     ExpenseReport, ExpenseItem, FiscalYear, FiscalPeriod,
     Invoice, InvoiceLine, JournalEntry, JournalEntryLine,
     Payment, Vendor,
 )
-from app.services.base_repository import BaseRepository
+from app.services.base_repository import BaseRepository, CountMode
+from app.services.filters import Condition, merge_filters, parse_filters
+from app.services.fx import FXService
+from app.services.ledger import LedgerService
+from app.services.reports import invalidate_report_cache
+from app.services.sequences import SequenceAllocator
+from app.utils.cache import TTLCache
+
+# Upper bound on entries accepted by one bulk journal entry call.
+MAX_BULK_JOURNAL_ENTRIES = 5000
+
+# AR aging buckets: (name, min days overdue, max days overdue or None).
+AGING_BUCKETS = (
+    ("current", None, 0),
+    ("days_1_30", 1, 30),
+    ("days_31_60", 31, 60),
+    ("days_61_90", 61, 90),
+    ("days_91_120", 91, 120),
+    ("days_over_120", 121, None),
+)
+
+_aging_cache = TTLCache(ttl=settings.aging_cache_ttl_seconds, maxsize=256)
+
+
+def invalidate_aging_cache(tenant_id: Optional[str] = None) -> None:
+    """Drop cached AR aging reports for one tenant (or all tenants)."""
+    if tenant_id is None:
+        _aging_cache.clear()
+    else:
+        _aging_cache.discard_where(lambda key: key[0] == tenant_id)
+
+
+def _dec(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
 
 
 # ── Default Chart of Accounts ────────────────────────────────
@@ -41,6 +77,7 @@ DEFAULT_ACCOUNTS = [
     {"code": "4010", "name": "Advisory Fees", "account_type": "revenue"},
     {"code": "4020", "name": "Retainer Fees", "account_type": "revenue"},
     {"code": "4030", "name": "Success Fees", "account_type": "revenue"},
+    {"code": "4080", "name": "Unrealized FX Gains", "account_type": "revenue"},
     {"code": "4090", "name": "Other Revenue", "account_type": "revenue"},
     # Expenses
     {"code": "5000", "name": "Operating Expenses", "account_type": "expense", "is_header": True},
@@ -49,6 +86,7 @@ DEFAULT_ACCOUNTS = [
     {"code": "5030", "name": "Travel & Entertainment", "account_type": "expense"},
     {"code": "5040", "name": "Office Expenses", "account_type": "expense"},
     {"code": "5050", "name": "Technology & Software", "account_type": "expense"},
+    {"code": "5080", "name": "Unrealized FX Losses", "account_type": "expense"},
     {"code": "5090", "name": "Miscellaneous Expenses", "account_type": "expense"},
 ]
 
@@ -60,6 +98,8 @@ class AccountingService:
         self.db = db
         self.tenant_id = tenant_id
         self.account_repo = BaseRepository(Account, db, tenant_id)
+        self.ledger = LedgerService(db, tenant_id)
+        self.fx = FXService(db, tenant_id)
 
     # ── Chart of Accounts ────────────────────────────────────
 
@@ -70,8 +110,13 @@ class AccountingService:
             return self.account_repo.list(limit=100, order_by="code")
 
         accounts = []
+        header = None
         for a in DEFAULT_ACCOUNTS:
             acct = Account(tenant_id=self.tenant_id, **a)
+            if acct.is_header:
+                header = acct
+            elif header is not None and header.account_type == acct.account_type:
+                acct.parent = header  # Roll up under the preceding header
             self.db.add(acct)
             accounts.append(acct)
         self.db.commit()
@@ -86,7 +131,99 @@ class AccountingService:
         return self.account_repo.list(limit=200, filters=filters, order_by="code")
 
     def create_account(self, data: Dict[str, Any]) -> Account:
-        return self.account_repo.create(data)
+        account = self.account_repo.create(data)
+        invalidate_report_cache(self.tenant_id)
+        return account
+
+    def default_account(self, code: str) -> Account:
+        """The tenant's account for a default code, created if the chart predates it."""
+        account = (
+            self.db.query(Account)
+            .filter(Account.tenant_id == self.tenant_id, Account.code == code,
+                    Account.is_deleted == False)  # noqa: E712
+            .first()
+        )
+        if account is None:
+            spec = next(a for a in DEFAULT_ACCOUNTS if a["code"] == code)
+            header = (
+                self.db.query(Account)
+                .filter(Account.tenant_id == self.tenant_id, Account.is_header == True,  # noqa: E712
+                        Account.account_type == spec["account_type"], Account.is_deleted == False)  # noqa: E712
+                .order_by(Account.code)
+                .first()
+            )
+            account = self.create_account({**spec, "parent_id": header.id if header else None})
+        return account
+
+    # ── Fiscal Calendar ──────────────────────────────────────
+
+    def create_fiscal_year(self, name: str, start_date: date, end_date: date) -> FiscalYear:
+        """Create a fiscal year split into calendar-month periods."""
+        if end_date <= start_date:
+            raise ValueError("Fiscal year must end after it starts")
+        fy = FiscalYear(name=name, start_date=start_date, end_date=end_date, tenant_id=self.tenant_id)
+        self.db.add(fy)
+        period_start, number = start_date, 1
+        while period_start <= end_date:
+            next_month = (period_start.replace(day=1) + timedelta(days=32)).replace(day=1)
+            period_end = min(next_month - timedelta(days=1), end_date)
+            fy.periods.append(FiscalPeriod(
+                name=period_start.strftime("%B %Y"),
+                period_number=number,
+                start_date=period_start,
+                end_date=period_end,
+                tenant_id=self.tenant_id,
+            ))
+            period_start, number = next_month, number + 1
+        self.db.flush()
+        # Entries already dated in the new year join their periods.
+        self.db.execute(
+            update(JournalEntry)
+            .where(
+                JournalEntry.tenant_id == self.tenant_id,
+                JournalEntry.fiscal_period_id.is_(None),
+                JournalEntry.entry_date.between(start_date, end_date),
+            )
+            .values(fiscal_period_id=select(FiscalPeriod.id).where(
+                FiscalPeriod.fiscal_year_id == fy.id,
+                FiscalPeriod.start_date <= JournalEntry.entry_date,
+                FiscalPeriod.end_date >= JournalEntry.entry_date,
+            ).scalar_subquery())
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        self.db.refresh(fy)
+        return fy
+
+    def list_fiscal_years(self) -> List[FiscalYear]:
+        return (
+            self.db.query(FiscalYear)
+            .filter(FiscalYear.tenant_id == self.tenant_id)
+            .order_by(FiscalYear.start_date)
+            .all()
+        )
+
+    def fiscal_periods_for(self, days: Iterable[date]) -> Dict[date, Optional[FiscalPeriod]]:
+        """Map each day to the fiscal period containing it (None if uncovered), in one query."""
+        days = set(days)
+        if not days:
+            return {}
+        periods = (
+            self.db.query(FiscalPeriod)
+            .filter(
+                FiscalPeriod.tenant_id == self.tenant_id,
+                FiscalPeriod.start_date <= max(days),
+                FiscalPeriod.end_date >= min(days),
+            )
+            .all()
+        )
+        return {d: next((p for p in periods if p.start_date <= d <= p.end_date), None) for d in days}
+
+    @staticmethod
+    def _closed_period_error(period: Optional[FiscalPeriod]) -> Optional[str]:
+        if period is not None and period.is_closed:
+            return f"Fiscal period '{period.name}' is closed"
+        return None
 
     # ── Journal Entries (GL) ─────────────────────────────────
 
@@ -109,12 +246,24 @@ class AccountingService:
             raise ValueError(
                 f"Journal entry out of balance: debits={total_debit}, credits={total_credit}"
             )
+        period = self.fiscal_periods_for([entry_date])[entry_date]
+        closed = self._closed_period_error(period)
+        if closed:
+            raise ValueError(closed)
+        # Lines without an explicit rate use the as-of rate into base currency.
+        rates = [
+            Decimal(str(l["exchange_rate"])) if l.get("exchange_rate") is not None
+            else self.fx.rate(l.get("currency", "EUR"), on=entry_date)
+            for l in lines
+        ]
 
         je = JournalEntry(
+            entry_number=SequenceAllocator(self.db, self.tenant_id).next("journal_entry"),
             entry_date=entry_date,
             reference=reference,
             memo=memo,
             status="posted" if auto_post else "draft",
+            fiscal_period_id=period.id if period else None,
             source_type=source_type,
             source_id=source_id,
             tenant_id=self.tenant_id,
@@ -126,8 +275,8 @@ class AccountingService:
         self.db.add(je)
         self.db.flush()  # Get the ID
 
-        for line_data in lines:
-            rate = Decimal(str(line_data.get("exchange_rate", 1)))
+        entry_lines = []
+        for line_data, rate in zip(lines, rates):
             debit = Decimal(str(line_data.get("debit", 0)))
             credit = Decimal(str(line_data.get("credit", 0)))
             jel = JournalEntryLine(
@@ -143,11 +292,140 @@ class AccountingService:
                 tenant_id=self.tenant_id,
             )
             self.db.add(jel)
+            entry_lines.append(jel)
 
+        if auto_post:
+            self.ledger.record(entry_date, entry_lines)
         self.db.commit()
         self.db.refresh(je)
         return je
 
+    def create_journal_entries_bulk(
+        self,
+        entries: List[Dict[str, Any]],
+        auto_post: bool = False,
+        user_id: Optional[int] = None,
+        atomic: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Validate and insert many journal entries in one transaction.
+
+        Balance and line checks run per entry in memory; referenced accounts
+        are resolved with a single query for the whole batch. Valid entries
+        are numbered from one sequence block and written with two executemany
+        INSERTs (headers, then lines); invalid ones are skipped and reported
+        as ``{"index", "error"}``. With ``atomic=True`` the batch is all or
+        nothing: the first invalid entry raises ValueError before anything is
+        written. Returns ``created`` (index, id, entry_number per written
+        entry) and ``errors``.
+        """
+        if len(entries) > MAX_BULK_JOURNAL_ENTRIES:
+            raise ValueError(f"At most {MAX_BULK_JOURNAL_ENTRIES} entries per request")
+
+        account_ids = {line["account_id"] for entry in entries for line in entry.get("lines", [])}
+        known = set(self.db.scalars(
+            select(Account.id).where(
+                Account.id.in_(account_ids),
+                Account.tenant_id == self.tenant_id,
+                Account.is_deleted == False,  # noqa: E712
+            )
+        )) if account_ids else set()
+
+        periods = self.fiscal_periods_for(entry["entry_date"] for entry in entries)
+
+        valid: List[Tuple[int, Dict[str, Any], List[Dict[str, Any]]]] = []
+        errors: List[Dict[str, Any]] = []
+        for index, entry in enumerate(entries):
+            lines, error = [], self._closed_period_error(periods[entry["entry_date"]])
+            if not error:
+                lines, error = self._prepare_lines(entry["entry_date"], entry.get("lines", []), known)
+            if error and atomic:
+                raise ValueError(f"Entry {index}: {error}")
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                valid.append((index, entry, lines))
+        if not valid:
+            return {"created": [], "errors": errors}
+
+        numbers = SequenceAllocator(self.db, self.tenant_id).allocate("journal_entry", len(valid))
+        posted_at = datetime.now(timezone.utc) if auto_post else None
+        headers = [
+            {
+                "entry_number": number,
+                "entry_date": entry["entry_date"],
+                "reference": entry.get("reference"),
+                "memo": entry.get("memo"),
+                "status": "posted" if auto_post else "draft",
+                "fiscal_period_id": getattr(periods[entry["entry_date"]], "id", None),
+                "source_type": entry.get("source_type"),
+                "source_id": entry.get("source_id"),
+                "posted_by_id": user_id if auto_post else None,
+                "posted_at": posted_at,
+                "tenant_id": self.tenant_id,
+            }
+            for number, (_, entry, _) in zip(numbers, valid)
+        ]
+        je_ids = list(self.db.scalars(
+            insert(JournalEntry).returning(JournalEntry.id, sort_by_parameter_order=True), headers,
+        ))
+        line_rows = [
+            {**line, "journal_entry_id": je_id, "tenant_id": self.tenant_id}
+            for je_id, (_, _, lines) in zip(je_ids, valid)
+            for line in lines
+        ]
+        self.db.execute(insert(JournalEntryLine), line_rows)
+        if auto_post:
+            self.ledger.record_many(
+                (entry["entry_date"], line["account_id"], line["base_debit"], line["base_credit"])
+                for _, entry, lines in valid
+                for line in lines
+            )
+        self.db.commit()
+        return {
+            "created": [
+                {"index": index, "id": je_id, "entry_number": number}
+                for (index, _, _), je_id, number in zip(valid, je_ids, numbers)
+            ],
+            "errors": errors,
+        }
+
+    def _prepare_lines(
+        self, entry_date: date, lines: List[Dict[str, Any]], known_accounts: set,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Convert one entry's lines to insert rows, or return why it is invalid."""
+        if len(lines) < 2:
+            return [], "Journal entry needs at least two lines"
+        rows = []
+        total_debit = total_credit = Decimal(0)
+        for position, line in enumerate(lines):
+            debit, credit = _dec(line.get("debit")), _dec(line.get("credit"))
+            currency = line.get("currency", "EUR")
+            if line["account_id"] not in known_accounts:
+                return [], f"Line {position}: account {line['account_id']} not found"
+            try:
+                rate = _dec(line["exchange_rate"] if line.get("exchange_rate") is not None
+                            else self.fx.rate(currency, on=entry_date))
+            except ValueError as e:
+                return [], f"Line {position}: {e}"
+            if debit < 0 or credit < 0 or (debit and credit):
+                return [], f"Line {position}: use either a non-negative debit or credit"
+            total_debit += debit
+            total_credit += credit
+            rows.append({
+                "account_id": line["account_id"],
+                "debit": debit,
+                "credit": credit,
+                "currency": currency,
+                "exchange_rate": rate,
+                "base_debit": debit * rate,
+                "base_credit": credit * rate,
+                "description": line.get("description"),
+            })
+        if total_debit != total_credit:
+            return [], f"Journal entry out of balance: debits={total_debit}, credits={total_credit}"
+        return rows, None
+
     def post_journal_entry(self, je_id: int, user_id: int) -> JournalEntry:
         """Post a draft journal entry."""
         je = self.db.query(JournalEntry).filter(JournalEntry.id == je_id).first()
@@ -155,9 +433,13 @@ class AccountingService:
             raise ValueError("Journal entry not found")
         if je.status != "draft":
             raise ValueError(f"Cannot post entry in '{je.status}' status")
+        closed = self._closed_period_error(self.fiscal_periods_for([je.entry_date])[je.entry_date])
+        if closed:
+            raise ValueError(closed)
         je.status = "posted"
         je.posted_by_id = user_id
         je.posted_at = datetime.now(timezone.utc)
+        self.ledger.record(je.entry_date, je.lines)
         self.db.commit()
         self.db.refresh(je)
         return je
@@ -171,26 +453,20 @@ class AccountingService:
             q = q.filter(JournalEntry.status == status)
         return q.order_by(JournalEntry.entry_date.desc()).offset(offset).limit(limit).all()
 
-    def get_account_balance(self, account_id: int) -> Decimal:
-        """Get net balance for an account from all posted journal entries."""
-        lines = (
-            self.db.query(JournalEntryLine)
-            .join(JournalEntry)
-            .filter(
-                JournalEntryLine.account_id == account_id,
-                JournalEntryLine.tenant_id == self.tenant_id,
-                JournalEntry.status == "posted",
-            )
-            .all()
-        )
-        total_debit = sum(l.base_debit or Decimal(0) for l in lines)
-        total_credit = sum(l.base_credit or Decimal(0) for l in lines)
-        return total_debit - total_credit
+    def get_account_balance(self, account_id: int, as_of: Optional[date] = None) -> Decimal:
+        """Net posted balance (debit - credit), read from the materialized balances."""
+        return self.ledger.balance(account_id, as_of)
 
 
 class InvoiceService:
     """Business logic for invoicing (Accounts Receivable)."""
 
+    # Fields accepted by ``filter=field:operator:value`` on the list endpoint.
+    FILTER_FIELDS = (
+        "status", "currency", "company_id", "deal_id", "contact_id",
+        "invoice_date", "due_date", "total", "amount_paid", "balance_due", "created_at",
+    )
+
     def __init__(self, db: Session, tenant_id: str = "default"):
         self.db = db
         self.tenant_id = tenant_id
@@ -198,13 +474,16 @@ class InvoiceService:
         self.accounting = AccountingService(db, tenant_id)
 
     def _next_invoice_number(self) -> str:
-        """Generate sequential invoice number."""
-        count = self.repo.count() + 1
-        return f"INV-{count:05d}"
+        """Allocate the next gap-free invoice number for this tenant."""
+        return SequenceAllocator(self.db, self.tenant_id).next("invoice")
 
     def create(self, data: Dict[str, Any], user_id: Optional[int] = None) -> Invoice:
         """Create an invoice with lines and compute totals."""
         lines_data = data.pop("lines", [])
+        if data.get("exchange_rate") is None:
+            data["exchange_rate"] = self.accounting.fx.rate(
+                data.get("currency", "EUR"), on=data.get("invoice_date"),
+            )
 
         invoice = Invoice(
             invoice_number=self._next_invoice_number(),
@@ -243,20 +522,51 @@ class InvoiceService:
         invoice.balance_due = invoice.total
 
         self.db.commit()
+        self.repo.invalidate_counts()
+        invalidate_aging_cache(self.tenant_id)
         self.db.refresh(invoice)
         return invoice
 
     def get(self, invoice_id: int) -> Optional[Invoice]:
         return self.repo.get_by_id(invoice_id)
 
-    def list(self, *, offset: int = 0, limit: int = 50, status: Optional[str] = None) -> List[Invoice]:
+    def list(
+        self, *, offset: int = 0, limit: int = 50, status: Optional[str] = None,
+        where: Optional[Dict[str, Condition]] = None,
+    ) -> List[Invoice]:
         filters = {}
         if status:
             filters["status"] = status
-        return self.repo.list(offset=offset, limit=limit, filters=filters)
+        return self.repo.list(offset=offset, limit=limit, filters=merge_filters(filters, where))
+
+    def list_page(
+        self, *, limit: int = 50, cursor: Optional[str] = None, status: Optional[str] = None,
+        where: Optional[Dict[str, Condition]] = None,
+    ) -> Tuple[List[Invoice], Optional[str]]:
+        """Keyset-paginated list, newest first. Returns (invoices, next_cursor)."""
+        filters = merge_filters({"status": status}, where)
+        return self.repo.list_keyset(limit=limit, cursor=cursor, filters=filters)
+
+    def parse_filters(self, expressions: List[str]) -> Dict[str, Condition]:
+        """Parse ``field:operator:value`` filter expressions (ValueError if invalid)."""
+        return parse_filters(Invoice, expressions, self.FILTER_FIELDS)
 
-    def count(self, **filters) -> int:
-        return self.repo.count(filters=filters)
+    def count(self, *, mode: CountMode = "exact", where: Optional[Dict[str, Condition]] = None, **filters) -> int:
+        return self.repo.count(filters=merge_filters(filters, where), mode=mode)
+
+    def issue(self, invoice_id: int) -> Invoice:
+        """Mark a draft invoice as sent; from then on it is owed and aged."""
+        invoice = self.get(invoice_id)
+        if not invoice:
+            raise ValueError("Invoice not found")
+        if invoice.status != "draft":
+            raise ValueError(f"Only draft invoices can be issued; this one is {invoice.status}")
+        invoice.status = "sent"
+        self.db.commit()
+        self.repo.invalidate_counts()  # status changed
+        invalidate_aging_cache(self.tenant_id)
+        self.db.refresh(invoice)
+        return invoice
 
     def record_payment(self, invoice_id: int, data: Dict[str, Any]) -> Payment:
         """Record a payment against an invoice, update balance."""
@@ -281,9 +591,85 @@ class InvoiceService:
             invoice.status = "partially_paid"
 
         self.db.commit()
+        self.repo.invalidate_counts()  # status changed
+        invalidate_aging_cache(self.tenant_id)
         self.db.refresh(payment)
         return payment
 
+    def aging(self, as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Receivables aging by client and currency as of a day (default today).
+        Draft invoices have not been issued and are left out.
+
+        The open amount on ``as_of`` is each invoice's total less the payments
+        dated on or before it, so a past date shows what was then outstanding
+        (including invoices paid since). It is bucketed by days past
+        ``due_date`` in a single CASE/GROUP BY over invoices joined to their
+        summed payments; bucket edges are computed here as dates so the query
+        compares ``due_date`` directly on every backend. Results are cached
+        briefly and dropped when an invoice or payment is recorded.
+        """
+        as_of = as_of or date.today()
+        key = (self.tenant_id, as_of)
+        report = _aging_cache.get(key)
+        if report is None:
+            report = self._compute_aging(as_of)
+            _aging_cache.set(key, report)
+        return report
+
+    def _compute_aging(self, as_of: date) -> Dict[str, Any]:
+        paid = (
+            select(Payment.invoice_id, func.sum(Payment.amount).label("amount"))
+            .where(
+                Payment.tenant_id == self.tenant_id,
+                Payment.is_deleted == False,  # noqa: E712
+                Payment.payment_date <= as_of,
+            )
+            .group_by(Payment.invoice_id)
+            .subquery()
+        )
+        open_amount = Invoice.total - func.coalesce(paid.c.amount, 0)
+        columns = []
+        for name, min_days, max_days in AGING_BUCKETS:
+            conditions = []
+            if min_days is not None:
+                conditions.append(Invoice.due_date <= as_of - timedelta(days=min_days))
+            if max_days is not None:
+                conditions.append(Invoice.due_date >= as_of - timedelta(days=max_days))
+            amount = case((and_(*conditions), open_amount), else_=0)
+            columns.append(func.coalesce(func.sum(amount), 0).label(name))
+        rows = self.db.execute(
+            select(Invoice.company_id, Company.name, Invoice.currency, *columns)
+            .outerjoin(Company, Company.id == Invoice.company_id)
+            .outerjoin(paid, paid.c.invoice_id == Invoice.id)
+            .where(
+                Invoice.tenant_id == self.tenant_id,
+                Invoice.is_deleted == False,  # noqa: E712
+                Invoice.status.notin_(("draft", "void")),  # Drafts are not issued, so not owed
+                open_amount > 0,
+                Invoice.invoice_date <= as_of,
+            )
+            .group_by(Invoice.company_id, Company.name, Invoice.currency)
+            .order_by(Company.name, Invoice.currency)
+        ).all()
+
+        names = [name for name, _, _ in AGING_BUCKETS]
+        clients, totals = [], {}
+        for company_id, company_name, currency, *amounts in rows:
+            buckets = {n: Decimal(str(a)) for n, a in zip(names, amounts)}
+            buckets["total"] = sum(buckets.values(), Decimal(0))
+            clients.append({"company_id": company_id, "company_name": company_name,
+                            "currency": currency, **buckets})
+            currency_total = totals.setdefault(currency, dict.fromkeys([*names, "total"], Decimal(0)))
+            for n, value in buckets.items():
+                currency_total[n] += value
+        return {
+            "as_of": as_of,
+            "buckets": names,
+            "rows": clients,
+            "totals": [{"currency": c, **t} for c, t in sorted(totals.items())],
+        }
+
 
 class VendorService:
     """Business logic for vendor management and AP."""
@@ -302,10 +688,20 @@ class VendorService:
     def list(self, *, offset: int = 0, limit: int = 50) -> List[Vendor]:
         return self.repo.list(offset=offset, limit=limit)
 
+    def list_page(self, *, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[Vendor], Optional[str]]:
+        """Keyset-paginated list, newest first. Returns (vendors, next_cursor)."""
+        return self.repo.list_keyset(limit=limit, cursor=cursor)
+
     def create_bill(self, vendor_id: int, data: Dict[str, Any]) -> Bill:
         """Create a vendor bill with lines and compute totals."""
         lines_data = data.pop("lines", [])
         data.pop("vendor_id", None)  # Avoid duplicate kwarg
+        if not data.get("bill_number"):
+            data["bill_number"] = SequenceAllocator(self.db, self.tenant_id).next("bill")
+        if data.get("exchange_rate") is None:
+            data["exchange_rate"] = FXService(self.db, self.tenant_id).rate(
+                data.get("currency", "EUR"), on=data.get("bill_date"),
+            )
         bill = Bill(vendor_id=vendor_id, tenant_id=self.tenant_id, **data)
         self.db.add(bill)
         self.db.flush()
@@ -0,0 +1,168 @@
+"""
+Exchange rates: as-of lookup and conversion to base currency.
+
+Each currency pair's rate history is loaded once into two parallel sorted
+tuples (dates, rates) and kept in a per-process cache; the rate in force on a
+day is then a ``bisect`` over the dates, with no query per conversion.
+Inserting, updating or deleting an ``ExchangeRate`` through the ORM drops the
+affected pair from the cache when the transaction commits; the TTL bounds how
+long rates written by other processes can be missed.
+
+A conversion with no stored rate raises ValueError (HTTP 400), unlike before
+rates were stored, when amounts counted at par. ``FX_MISSING_RATE_AT_PAR``
+restores the old behavior.
+"""
+
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.models.finance import ExchangeRate
+from app.utils.cache import TTLCache, on_commit
+
+CENT = Decimal("0.01")
+
+# (tenant_id, from_currency, to_currency) -> (sorted dates, rates)
+History = Tuple[Tuple[date, ...], Tuple[Decimal, ...]]
+
+_history_cache = TTLCache(ttl=settings.fx_rate_cache_ttl_seconds, maxsize=1024)
+
+_MISSING = object()
+
+
+def invalidate_fx_cache(tenant_id: Optional[str] = None) -> None:
+    """Drop cached rate histories for one tenant (or all tenants)."""
+    if tenant_id is None:
+        _history_cache.clear()
+    else:
+        _history_cache.discard_where(lambda key: key[0] == tenant_id)
+
+
+@event.listens_for(ExchangeRate, "after_insert")
+@event.listens_for(ExchangeRate, "after_update")
+@event.listens_for(ExchangeRate, "after_delete")
+def _invalidate_changed_rate(_mapper, _connection, target: ExchangeRate) -> None:
+    # Both directions: an inverse lookup may have been served from this pair.
+    session = object_session(target)
+    for pair in ((target.from_currency, target.to_currency), (target.to_currency, target.from_currency)):
+        on_commit(session, _history_cache.pop, (target.tenant_id, *pair))
+
+
+class FXService:
+    """As-of exchange rate lookups and base-currency conversion for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default", base_currency: Optional[str] = None):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.base_currency = base_currency or settings.base_currency
+
+    # ── Rates ────────────────────────────────────────────────
+
+    def add_rate(self, data: Dict[str, Any]) -> ExchangeRate:
+        """Store a daily rate (``1 from_currency = rate to_currency``)."""
+        rate = ExchangeRate(tenant_id=self.tenant_id, **data)
+        self.db.add(rate)
+        try:
+            self.db.commit()
+        except IntegrityError:
+            self.db.rollback()
+            raise ValueError(
+                f"A {rate.from_currency}/{rate.to_currency} rate for {rate.rate_date} already exists"
+            )
+        self.db.refresh(rate)
+        return rate
+
+    def rate(
+        self, from_currency: str, to_currency: Optional[str] = None,
+        on: Optional[date] = None, default: Any = _MISSING,
+    ) -> Decimal:
+        """
+        Rate in force on ``on`` (default today): the latest rate dated on or
+        before it. Falls back to the inverse pair. Raises ValueError when no
+        rate exists, unless ``default`` is given or ``FX_MISSING_RATE_AT_PAR``
+        is set (then 1).
+        """
+        to_currency = to_currency or self.base_currency
+        if from_currency == to_currency:
+            return Decimal(1)
+        on = on or date.today()
+        found = self._lookup(from_currency, to_currency, on)
+        if found is None:
+            inverse = self._lookup(to_currency, from_currency, on)
+            if inverse:
+                found = Decimal(1) / inverse
+        if found is None:
+            if default is not _MISSING:
+                return default
+            if settings.fx_missing_rate_at_par:
+                return Decimal(1)
+            raise ValueError(f"No {from_currency}/{to_currency} exchange rate on or before {on}")
+        return found
+
+    def _lookup(self, from_currency: str, to_currency: str, on: date) -> Optional[Decimal]:
+        dates, rates = self._history(from_currency, to_currency)
+        i = bisect_right(dates, on)
+        return rates[i - 1] if i else None
+
+    def _history(self, from_currency: str, to_currency: str) -> History:
+        key = (self.tenant_id, from_currency, to_currency)
+        history = _history_cache.get(key)
+        if history is None:
+            rows = self.db.execute(
+                select(ExchangeRate.rate_date, ExchangeRate.rate)
+                .where(
+                    ExchangeRate.tenant_id == self.tenant_id,
+                    ExchangeRate.from_currency == from_currency,
+                    ExchangeRate.to_currency == to_currency,
+                )
+                .order_by(ExchangeRate.rate_date)
+            ).all()
+            history = (
+                tuple(r.rate_date for r in rows),
+                tuple(Decimal(str(r.rate)) for r in rows),
+            )
+            _history_cache.set(key, history)  # Empty histories are cached too
+        return history
+
+    # ── Conversion ───────────────────────────────────────────
+
+    def convert(
+        self, amount: Any, currency: str, on: Optional[date] = None, to_currency: Optional[str] = None,
+    ) -> Decimal:
+        """Convert one amount, rounded to cents."""
+        return (Decimal(str(amount or 0)) * self.rate(currency, to_currency, on)).quantize(CENT)
+
+    def convert_many(
+        self,
+        amounts: Sequence[Any],
+        currencies: Sequence[str],
+        dates: Optional[Sequence[Optional[date]]] = None,
+        to_currency: Optional[str] = None,
+        default_rate: Any = _MISSING,
+    ) -> List[Decimal]:
+        """
+        Convert a column of amounts in one call.
+
+        ``currencies`` and ``dates`` run parallel to ``amounts`` (``dates``
+        defaults to today for every row). Each distinct (currency, date) is
+        resolved once. ``default_rate`` applies to rows with no known rate;
+        without it a missing rate raises ValueError.
+        """
+        if dates is None:
+            dates = [None] * len(amounts)
+        if not len(amounts) == len(currencies) == len(dates):
+            raise ValueError("amounts, currencies and dates must have the same length")
+        rates: Dict[Tuple[str, Optional[date]], Decimal] = {}
+        out = []
+        for amount, currency, on in zip(amounts, currencies, dates):
+            key = (currency, on)
+            if key not in rates:
+                rates[key] = self.rate(currency, to_currency, on, default=default_rate)
+            out.append((Decimal(str(amount or 0)) * rates[key]).quantize(CENT))
+        return out
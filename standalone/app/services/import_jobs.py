@@ -0,0 +1,229 @@
+"""
+Background import jobs.
+
+An upload is spooled to storage, an ImportJob row is created, and a worker
+thread runs the bulk import engine over the file chunk by chunk. Progress
+counters are written in the same transaction as each chunk's rows, so the
+job row is always an exact checkpoint: after a crash, ``resume_pending_jobs``
+re-queues unfinished jobs and they continue from ``rows_processed``.
+
+Any number of processes may run workers. A worker claims a job with a
+conditional UPDATE, so only one of them runs it. A claimed job holds a lease
+that its worker renews at every chunk (``heartbeat_at``). A ``running`` job is
+only taken over once ``IMPORT_JOB_LEASE_SECONDS`` pass without a heartbeat.
+"""
+
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.integrations import ImportJob
+from app.storage import spool_upload
+from app.utils.import_ import (
+    IMPORT_ENTITIES, ImportResult, Record,
+    bulk_import, iter_csv_records, iter_json_stream,
+)
+
+logger = logging.getLogger("ma_advisory.import_jobs")
+
+# Messages kept on the job row; error_count still counts every error.
+MAX_JOB_MESSAGES = 500
+
+FILE_FORMATS = ("csv", "json")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.import_job_workers, thread_name_prefix="import-job",
+            )
+        return _executor
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def rows_per_second(job: ImportJob) -> float:
+    """Average throughput since the job started (up to now while running)."""
+    if not job.started_at:
+        return 0.0
+    end = _as_utc(job.finished_at) if job.finished_at else datetime.now(timezone.utc)
+    elapsed = (end - _as_utc(job.started_at)).total_seconds()
+    return round(job.rows_processed / elapsed, 1) if elapsed > 0 else 0.0
+
+
+class ImportJobService:
+    """Create, inspect and dispatch background import jobs."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    def create_job(
+        self, upload: UploadFile, entity: str, file_format: Optional[str] = None,
+        user_id: Optional[int] = None,
+    ) -> ImportJob:
+        """Spool ``upload`` to storage and record a queued job."""
+        if entity not in IMPORT_ENTITIES:
+            raise ValueError(f"Unsupported import entity '{entity}'")
+        file_format = (file_format or (upload.filename or "").rsplit(".", 1)[-1]).lower()
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unsupported import format '{file_format}'")
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S%f")
+        file_path, _ = spool_upload(upload, "imports", stamp)
+        job = ImportJob(
+            entity=entity,
+            file_format=file_format,
+            file_name=upload.filename or "upload",
+            file_path=file_path,
+            created_by_id=user_id,
+            tenant_id=self.tenant_id,
+        )
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        return job
+
+    def get(self, job_id: int) -> Optional[ImportJob]:
+        """Fetch a job with fresh counters (bypassing the identity map)."""
+        return (
+            self.db.query(ImportJob)
+            .filter(ImportJob.id == job_id, ImportJob.tenant_id == self.tenant_id)
+            .execution_options(populate_existing=True)
+            .first()
+        )
+
+    def submit(self, job: ImportJob) -> Future:
+        """Queue ``job`` on the worker pool, using a session factory bound like ours."""
+        return submit_import_job(job.id, _session_factory_for(self.db))
+
+
+def _session_factory_for(db: Session) -> Callable[[], Session]:
+    bind = db.get_bind()
+    return lambda: Session(bind=bind, autoflush=False)
+
+
+def submit_import_job(job_id: int, session_factory: Callable[[], Session]) -> Future:
+    return _get_executor().submit(run_import_job, job_id, session_factory)
+
+
+def _records(job: ImportJob, handle) -> Iterable[Record]:
+    if job.file_format == "csv":
+        return iter_csv_records(handle)
+    kind = "company" if job.entity == "companies" else "contact"
+    return iter_json_stream(handle, kind)
+
+
+def _load_messages(raw: Optional[str]) -> List[str]:
+    return json.loads(raw) if raw else []
+
+
+def _claimable():
+    """Jobs a worker may take: queued, or running with an expired lease."""
+    expired = datetime.now(timezone.utc) - timedelta(seconds=settings.import_job_lease_seconds)
+    return or_(
+        ImportJob.status == "queued",
+        and_(ImportJob.status == "running",
+             or_(ImportJob.heartbeat_at.is_(None), ImportJob.heartbeat_at < expired)),
+    )
+
+
+def _claim(db: Session, job_id: int) -> bool:
+    """Atomically mark the job running for this worker; False if another worker has it."""
+    now = datetime.now(timezone.utc)
+    claimed = db.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, _claimable())
+        .values(status="running", heartbeat_at=now, started_at=func.coalesce(ImportJob.started_at, now))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return claimed == 1
+
+
+def run_import_job(job_id: int, session_factory: Callable[[], Session]) -> None:
+    """Worker entry point: claim one job and process (or resume) it to completion."""
+    db = session_factory()
+    try:
+        if not _claim(db, job_id):
+            return
+        job = db.get(ImportJob, job_id)
+
+        # Seed the result from the checkpoint so counters continue on resume.
+        result = ImportResult()
+        result.successful = job.rows_successful
+        result.failed = job.rows_failed
+        result.errors = _load_messages(job.errors_json)
+        result.warnings = _load_messages(job.warnings_json)
+        error_count = job.error_count
+        resume_from = job.rows_processed
+        reported: Dict[str, int] = {"errors": len(result.errors)}
+
+        def checkpoint(res: ImportResult, rows_seen: int) -> None:
+            nonlocal error_count
+            error_count += len(res.errors) - reported["errors"]
+            del res.errors[MAX_JOB_MESSAGES:]
+            del res.warnings[MAX_JOB_MESSAGES:]
+            reported["errors"] = len(res.errors)
+            job.rows_processed = resume_from + rows_seen
+            job.rows_successful = res.successful
+            job.rows_failed = res.failed
+            job.error_count = error_count
+            job.errors_json = json.dumps(res.errors)
+            job.warnings_json = json.dumps(res.warnings)
+            job.heartbeat_at = datetime.now(timezone.utc)
+
+        with open(job.file_path, "r", encoding="utf-8", newline="") as handle:
+            records = islice(_records(job, handle), resume_from, None)
+            bulk_import(db, job.entity, records, result, on_chunk=checkpoint)
+
+        job.status = "completed"
+        job.finished_at = datetime.now(timezone.utc)
+        db.commit()
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        db.rollback()
+        job = db.get(ImportJob, job_id)
+        if job is not None:
+            errors = _load_messages(job.errors_json)[:MAX_JOB_MESSAGES - 1]
+            job.errors_json = json.dumps(errors + [f"Import failed: {str(e)}"])
+            job.error_count += 1
+            job.status = "failed"
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+    finally:
+        db.close()
+
+
+def resume_pending_jobs(session_factory: Callable[[], Session]) -> int:
+    """
+    Re-queue jobs left queued, or running with an expired lease (e.g. after a
+    crash). Every process may call this at startup: each job is still run by
+    only one worker, the one that claims it. Returns the count queued here.
+    """
+    db = session_factory()
+    try:
+        job_ids = [
+            job_id for (job_id,) in db.query(ImportJob.id).filter(_claimable()).order_by(ImportJob.id)
+        ]
+    finally:
+        db.close()
+    for job_id in job_ids:
+        submit_import_job(job_id, session_factory)
+    return len(job_ids)
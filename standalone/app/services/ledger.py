@@ -0,0 +1,299 @@
+"""
+Materialized account balances (running-balance ledger).
+
+``account_balances`` holds posted base-currency debit/credit totals per
+account and calendar month. Posting a journal entry adds its lines to those
+rows in the same transaction, so a balance is a sum over a handful of period
+rows instead of a scan of every ledger line. The table can be recomputed from
+``journal_entry_lines`` and checked against it:
+
+    python -m app.services.ledger verify [--tenant default]
+    python -m app.services.ledger rebuild [--tenant default]
+
+The rows hold postings only. The year-end roll of revenue and expense into
+retained earnings exists in the period close snapshot, so reads at or after
+a closed fiscal year end apply the difference between that snapshot and the
+rows at its date.
+"""
+
+import argparse
+import sys
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.finance import (
+    AccountBalance, AccountClosingBalance, FiscalPeriod, FiscalYear, JournalEntry, JournalEntryLine,
+)
+
+CENT = Decimal("0.01")
+
+# (account_id, period_start) -> [debit, credit]
+Totals = Dict[Tuple[int, date], List[Decimal]]
+
+
+def period_start(day: date) -> date:
+    """Bucket a date into its balance period (the first of its month)."""
+    return day.replace(day=1)
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+class LedgerService:
+    """Maintains and reads the account_balances table for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # ── Write path ───────────────────────────────────────────
+
+    def record(self, entry_date: date, lines: Iterable[JournalEntryLine]) -> None:
+        """
+        Add a newly posted entry's lines to the balance rows.
+
+        Runs in the caller's transaction (no commit), so the entry and its
+        balance updates are committed or rolled back together.
+        """
+        self.record_many(
+            (entry_date, line.account_id, line.base_debit, line.base_credit) for line in lines
+        )
+
+    def record_many(self, postings: Iterable[Tuple[date, int, Any, Any]]) -> None:
+        """
+        Add ``(entry_date, account_id, base_debit, base_credit)`` postings from
+        any number of entries; each (account, month) row is touched once.
+        """
+        totals: Totals = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        for entry_date, account_id, debit, credit in postings:
+            bucket = totals[(account_id, period_start(entry_date))]
+            bucket[0] += _money(debit)
+            bucket[1] += _money(credit)
+        for (account_id, period), (debit, credit) in sorted(totals.items()):
+            self._bump(account_id, period, debit, credit)
+
+    def _bump(self, account_id: int, period: date, debit: Decimal, credit: Decimal) -> None:
+        stmt = (
+            update(AccountBalance)
+            .where(
+                AccountBalance.tenant_id == self.tenant_id,
+                AccountBalance.account_id == account_id,
+                AccountBalance.period_start == period,
+            )
+            .values(debit=AccountBalance.debit + debit, credit=AccountBalance.credit + credit)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.execute(stmt).rowcount:
+            return
+        try:
+            with self.db.begin_nested():
+                self.db.execute(insert(AccountBalance).values(
+                    tenant_id=self.tenant_id, account_id=account_id,
+                    period_start=period, debit=debit, credit=credit,
+                ))
+        except IntegrityError:
+            self.db.execute(stmt)  # Row created concurrently; add to it instead.
+
+    # ── Read path ────────────────────────────────────────────
+
+    def balance(self, account_id: int, as_of: Optional[date] = None) -> Decimal:
+        """
+        Net posted balance (debit - credit) for an account, optionally as of a date.
+
+        Whole months come from the balance rows; for ``as_of`` only the lines
+        of its own month up to that day are aggregated. Year-end closes are
+        applied (see ``year_end_adjustments``).
+        """
+        return self._posted_balance(account_id, as_of) + self.year_end_adjustments(as_of).get(account_id, 0)
+
+    def balances(self, as_of: Optional[date] = None) -> Dict[int, Decimal]:
+        """
+        Net posted balance of every account with postings, like ``balance``
+        but grouped: one query over the balance rows, plus one over the
+        lines of ``as_of``'s own month, plus the year-end adjustments.
+        """
+        totals = defaultdict(Decimal, self._posted_balances(as_of))
+        for account_id, adjustment in self.year_end_adjustments(as_of).items():
+            totals[account_id] += adjustment
+        return dict(totals)
+
+    def year_end_adjustments(self, as_of: Optional[date] = None) -> Dict[int, Decimal]:
+        """
+        Net change the latest year-end close on or before ``as_of`` made per
+        account: its closing snapshot minus the balance rows at its end date.
+        Revenue and expense accounts go to zero and retained earnings takes
+        their total. Empty if no fiscal year has been closed.
+        """
+        stmt = (
+            select(FiscalPeriod.id, FiscalPeriod.end_date)
+            .join(FiscalYear, FiscalYear.id == FiscalPeriod.fiscal_year_id)
+            .where(
+                FiscalPeriod.tenant_id == self.tenant_id,
+                FiscalPeriod.closed_at.isnot(None),
+                FiscalPeriod.end_date >= FiscalYear.end_date,
+            )
+            .order_by(FiscalPeriod.end_date.desc())
+            .limit(1)
+        )
+        if as_of is not None:
+            stmt = stmt.where(FiscalPeriod.end_date <= as_of)
+        close = self.db.execute(stmt).first()
+        if close is None:
+            return {}
+        adjustments: Dict[int, Decimal] = defaultdict(Decimal)
+        for account_id, net in self._posted_balances(close.end_date).items():
+            adjustments[account_id] -= net
+        for account_id, debit, credit in self.db.execute(
+            select(AccountClosingBalance.account_id, AccountClosingBalance.debit, AccountClosingBalance.credit)
+            .where(AccountClosingBalance.fiscal_period_id == close.id)
+        ):
+            adjustments[account_id] += _money(debit) - _money(credit)
+        return {account_id: net for account_id, net in adjustments.items() if net}
+
+    def _posted_balance(self, account_id: int, as_of: Optional[date]) -> Decimal:
+        stmt = select(func.coalesce(func.sum(AccountBalance.debit - AccountBalance.credit), 0)).where(
+            AccountBalance.tenant_id == self.tenant_id,
+            AccountBalance.account_id == account_id,
+        )
+        if as_of is None:
+            return _money(self.db.scalar(stmt))
+
+        month = period_start(as_of)
+        total = _money(self.db.scalar(stmt.where(AccountBalance.period_start < month)))
+        partial = self.db.scalar(
+            select(func.coalesce(func.sum(JournalEntryLine.base_debit - JournalEntryLine.base_credit), 0))
+            .join(JournalEntry, JournalEntry.id == JournalEntryLine.journal_entry_id)
+            .where(
+                JournalEntryLine.tenant_id == self.tenant_id,
+                JournalEntryLine.account_id == account_id,
+                JournalEntry.status == "posted",
+                JournalEntry.entry_date >= month,
+                JournalEntry.entry_date <= as_of,
+            )
+        )
+        return total + _money(partial)
+
+    def _posted_balances(self, as_of: Optional[date]) -> Dict[int, Decimal]:
+        stmt = (
+            select(AccountBalance.account_id, func.sum(AccountBalance.debit - AccountBalance.credit))
+            .where(AccountBalance.tenant_id == self.tenant_id)
+            .group_by(AccountBalance.account_id)
+        )
+        if as_of is None:
+            return {account_id: _money(net) for account_id, net in self.db.execute(stmt)}
+
+        month = period_start(as_of)
+        totals: Dict[int, Decimal] = defaultdict(Decimal)
+        for account_id, net in self.db.execute(stmt.where(AccountBalance.period_start < month)):
+            totals[account_id] += _money(net)
+        partial = (
+            select(JournalEntryLine.account_id,
+                   func.sum(JournalEntryLine.base_debit - JournalEntryLine.base_credit))
+            .join(JournalEntry, JournalEntry.id == JournalEntryLine.journal_entry_id)
+            .where(
+                JournalEntryLine.tenant_id == self.tenant_id,
+                JournalEntry.status == "posted",
+                JournalEntry.entry_date >= month,
+                JournalEntry.entry_date <= as_of,
+            )
+            .group_by(JournalEntryLine.account_id)
+        )
+        for account_id, net in self.db.execute(partial):
+            totals[account_id] += _money(net)
+        return dict(totals)
+
+    # ── Rebuild / verify ─────────────────────────────────────
+
+    def compute_from_lines(self) -> Totals:
+        """Recompute every balance row from posted lines (one grouped query)."""
+        rows = self.db.execute(
+            select(
+                JournalEntryLine.account_id,
+                JournalEntry.entry_date,
+                func.sum(JournalEntryLine.base_debit),
+                func.sum(JournalEntryLine.base_credit),
+            )
+            .join(JournalEntry, JournalEntry.id == JournalEntryLine.journal_entry_id)
+            .where(JournalEntryLine.tenant_id == self.tenant_id, JournalEntry.status == "posted")
+            .group_by(JournalEntryLine.account_id, JournalEntry.entry_date)
+        )
+        totals: Totals = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        for account_id, entry_date, debit, credit in rows:
+            bucket = totals[(account_id, period_start(entry_date))]
+            bucket[0] += _money(debit)
+            bucket[1] += _money(credit)
+        return dict(totals)
+
+    def stored(self) -> Totals:
+        rows = self.db.execute(
+            select(
+                AccountBalance.account_id, AccountBalance.period_start,
+                AccountBalance.debit, AccountBalance.credit,
+            ).where(AccountBalance.tenant_id == self.tenant_id)
+        )
+        return {(a, p): [_money(d), _money(c)] for a, p, d, c in rows}
+
+    def verify(self) -> List[Dict[str, Any]]:
+        """Return one dict per (account, period) where the table disagrees with the lines."""
+        expected, actual = self.compute_from_lines(), self.stored()
+        zero = [Decimal(0), Decimal(0)]
+        mismatches = []
+        for key in sorted(expected.keys() | actual.keys()):
+            want, have = expected.get(key, zero), actual.get(key, zero)
+            if want != have:
+                mismatches.append({
+                    "account_id": key[0], "period_start": key[1],
+                    "expected_debit": want[0], "expected_credit": want[1],
+                    "stored_debit": have[0], "stored_credit": have[1],
+                })
+        return mismatches
+
+    def rebuild(self) -> int:
+        """Replace this tenant's balance rows with freshly computed ones and commit."""
+        totals = self.compute_from_lines()
+        self.db.execute(delete(AccountBalance).where(AccountBalance.tenant_id == self.tenant_id))
+        if totals:
+            self.db.execute(insert(AccountBalance), [
+                {"tenant_id": self.tenant_id, "account_id": a, "period_start": p, "debit": d, "credit": c}
+                for (a, p), (d, c) in totals.items()
+            ])
+        self.db.commit()
+        return len(totals)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Verify or rebuild materialized account balances.")
+    parser.add_argument("command", choices=("verify", "rebuild"))
+    parser.add_argument("--tenant", default="default")
+    args = parser.parse_args(argv)
+
+    from app.db import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ledger = LedgerService(db, args.tenant)
+        if args.command == "rebuild":
+            print(f"Rebuilt {ledger.rebuild()} balance rows for tenant '{args.tenant}'")
+            return 0
+        mismatches = ledger.verify()
+        for m in mismatches:
+            print(
+                f"account {m['account_id']} {m['period_start']}: "
+                f"expected {m['expected_debit']}/{m['expected_credit']}, "
+                f"stored {m['stored_debit']}/{m['stored_credit']}"
+            )
+        print(f"{len(mismatches)} mismatched balance rows for tenant '{args.tenant}'")
+        return 1 if mismatches else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
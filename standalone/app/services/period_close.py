@@ -0,0 +1,189 @@
+"""
+Fiscal period close.
+
+Closing a period:
+
+1. assigns every journal entry dated in the period to it,
+2. writes a closing snapshot: cumulative posted totals per account at the
+   period end, computed as the previous snapshot plus only the lines posted
+   since,
+3. at fiscal year end, moves revenue and expense totals into retained
+   earnings, so the snapshot is the next year's opening position (no entry
+   is posted; ``LedgerService`` reads apply the snapshot's roll instead),
+4. marks the period closed; ``AccountingService`` then rejects entries dated
+   in it, so the snapshot stays exact.
+
+Periods close in date order, and a period with draft entries cannot close.
+Balance-type reports start from the latest snapshot and only aggregate lines
+posted after it.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.finance import (
+    Account, AccountClosingBalance, FiscalPeriod, JournalEntry, JournalEntryLine,
+)
+from app.services.finance import AccountingService
+from app.services.fx import CENT
+from app.services.reports import invalidate_report_cache
+
+RETAINED_EARNINGS = "3100"
+
+# Account types closed into retained earnings at fiscal year end.
+NOMINAL_TYPES = ("revenue", "expense")
+
+
+class PeriodCloseService:
+    """Closes fiscal periods for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.accounting = AccountingService(db, tenant_id)
+
+    def close(self, period_id: int, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Close a fiscal period and write its closing balances (one transaction)."""
+        period = (
+            self.db.query(FiscalPeriod)
+            .filter(FiscalPeriod.id == period_id, FiscalPeriod.tenant_id == self.tenant_id)
+            .first()
+        )
+        if period is None:
+            raise ValueError("Fiscal period not found")
+        if period.is_closed:
+            raise ValueError(f"Fiscal period '{period.name}' is already closed")
+        self._check_closable(period)
+        year = period.fiscal_year
+        year_end = period.end_date >= year.end_date
+        # Resolved before any write: creating a missing default account commits.
+        retained_id = self.accounting.default_account(RETAINED_EARNINGS).id if year_end else None
+
+        assigned = self.db.execute(
+            update(JournalEntry)
+            .where(
+                JournalEntry.tenant_id == self.tenant_id,
+                JournalEntry.entry_date.between(period.start_date, period.end_date),
+                JournalEntry.fiscal_period_id.is_distinct_from(period.id),
+            )
+            .values(fiscal_period_id=period.id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+
+        previous = self._previous_snapshot(period)
+        totals = self._closing_totals(period, previous)
+        retained = self._roll_into_retained_earnings(totals, retained_id) if year_end else None
+
+        rows = [
+            {"fiscal_period_id": period.id, "account_id": account_id, "debit": d, "credit": c,
+             "tenant_id": self.tenant_id}
+            for account_id, (d, c) in sorted(totals.items()) if d or c
+        ]
+        if rows:
+            self.db.execute(insert(AccountClosingBalance), rows)
+
+        period.is_closed = True
+        period.closed_at = datetime.now(timezone.utc)
+        period.closed_by_id = user_id
+        if all(p.is_closed for p in year.periods):
+            year.is_closed = True
+        self.db.commit()
+        invalidate_report_cache(self.tenant_id)
+        return {
+            "period_id": period.id,
+            "closed_at": period.closed_at,
+            "entries_assigned": assigned,
+            "accounts": len(rows),
+            "retained_earnings": retained,
+            "fiscal_year_closed": bool(year.is_closed),
+        }
+
+    # ── Checks ───────────────────────────────────────────────
+
+    def _check_closable(self, period: FiscalPeriod) -> None:
+        earlier_open = (
+            self.db.query(FiscalPeriod)
+            .filter(
+                FiscalPeriod.tenant_id == self.tenant_id,
+                FiscalPeriod.end_date < period.start_date,
+                FiscalPeriod.is_closed == False,  # noqa: E712
+            )
+            .order_by(FiscalPeriod.start_date)
+            .first()
+        )
+        if earlier_open is not None:
+            raise ValueError(f"Close '{earlier_open.name}' first; periods close in order")
+        drafts = self.db.scalar(
+            select(func.count(JournalEntry.id)).where(
+                JournalEntry.tenant_id == self.tenant_id,
+                JournalEntry.is_deleted == False,  # noqa: E712
+                JournalEntry.status == "draft",
+                JournalEntry.entry_date.between(period.start_date, period.end_date),
+            )
+        )
+        if drafts:
+            raise ValueError(f"'{period.name}' has {drafts} draft journal entries; post or delete them first")
+
+    # ── Snapshot ─────────────────────────────────────────────
+
+    def _previous_snapshot(self, period: FiscalPeriod) -> Optional[FiscalPeriod]:
+        return (
+            self.db.query(FiscalPeriod)
+            .filter(
+                FiscalPeriod.tenant_id == self.tenant_id,
+                FiscalPeriod.closed_at.isnot(None),
+                FiscalPeriod.end_date < period.start_date,
+            )
+            .order_by(FiscalPeriod.end_date.desc())
+            .first()
+        )
+
+    def _closing_totals(self, period: FiscalPeriod, previous: Optional[FiscalPeriod]) -> Dict[int, List[Decimal]]:
+        """Previous snapshot plus the posted lines dated after it, per account."""
+        totals: Dict[int, List[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        activity = (
+            select(JournalEntryLine.account_id,
+                   func.sum(JournalEntryLine.base_debit), func.sum(JournalEntryLine.base_credit))
+            .join(JournalEntry, JournalEntry.id == JournalEntryLine.journal_entry_id)
+            .where(
+                JournalEntryLine.tenant_id == self.tenant_id,
+                JournalEntry.status == "posted",
+                JournalEntry.entry_date <= period.end_date,
+            )
+            .group_by(JournalEntryLine.account_id)
+        )
+        if previous is not None:
+            activity = activity.where(JournalEntry.entry_date > previous.end_date)
+            for account_id, d, c in self.db.execute(
+                select(AccountClosingBalance.account_id, AccountClosingBalance.debit, AccountClosingBalance.credit)
+                .where(AccountClosingBalance.fiscal_period_id == previous.id)
+            ):
+                totals[account_id] = [Decimal(str(d)), Decimal(str(c))]
+        for account_id, d, c in self.db.execute(activity):
+            totals[account_id][0] += Decimal(str(d or 0))
+            totals[account_id][1] += Decimal(str(c or 0))
+        for amounts in totals.values():
+            amounts[:] = [a.quantize(CENT) for a in amounts]
+        return totals
+
+    def _roll_into_retained_earnings(self, totals: Dict[int, List[Decimal]], retained_id: int) -> Decimal:
+        """Move revenue/expense totals to retained earnings; returns the year's net income."""
+        nominal = set(self.db.scalars(select(Account.id).where(
+            Account.tenant_id == self.tenant_id,
+            Account.id.in_(totals),
+            Account.account_type.in_(NOMINAL_TYPES),
+        )))
+        retained = totals[retained_id]
+        net_income = Decimal(0)
+        for account_id in nominal:
+            debit, credit = totals[account_id]
+            retained[0] += debit
+            retained[1] += credit
+            net_income += credit - debit
+            totals[account_id] = [Decimal(0), Decimal(0)]
+        return net_income
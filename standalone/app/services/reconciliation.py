@@ -0,0 +1,294 @@
+"""
+Bank statement reconciliation: match incoming payments to open invoices.
+
+Open invoices are read once per import with a single query and indexed in
+memory by normalized invoice number and by (currency, open amount). Each
+statement line is then matched with dictionary lookups only:
+
+    ===========================================  ==========  =====================
+    Evidence                                     Confidence  Outcome
+    ===========================================  ==========  =====================
+    invoice number in reference, exact amount    1.00        payment recorded
+    invoice number in reference, partial amount  0.80        payment recorded
+    only invoice with that exact open amount     0.70        payment recorded
+    invoice number, other currency/overpayment   0.50        suggestion (queue)
+    ===========================================  ==========  =====================
+
+Lines below ``AUTO_MATCH_CONFIDENCE`` land in the unmatched queue, keeping the
+best suggestion for review. Statements are consumed as a stream in chunks;
+payments, bank transactions and invoice balances are all written with
+executemany statements and committed once, so an import is all-or-nothing.
+Every line is fingerprinted, so re-importing an overlapping statement skips
+lines that were already imported.
+"""
+
+import hashlib
+import re
+from collections import Counter, defaultdict
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, case, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.finance import BankTransaction, Invoice, Payment
+from app.services.base_repository import BaseRepository
+from app.services.finance import InvoiceService, invalidate_aging_cache
+from app.services.sequences import SEQUENCES
+from app.utils.bank_statements import StatementLine
+
+AUTO_MATCH_CONFIDENCE = Decimal("0.70")
+
+# Statement lines read (and fingerprints checked) per round trip.
+CHUNK_SIZE = 1000
+
+CLOSED_STATUSES = ("paid", "void")
+
+_INVOICE_PREFIX, _INVOICE_WIDTH, _ = SEQUENCES["invoice"]
+# "INV-00042", "inv 42", "INV00042" all normalize to "INV-00042".
+_INVOICE_NUMBER = re.compile(rf"{re.escape(_INVOICE_PREFIX.rstrip('-'))}[\s\-_/]*0*(\d+)", re.IGNORECASE)
+
+
+def _invoice_keys(text: Optional[str]) -> List[str]:
+    """Normalized invoice numbers mentioned in a free-text reference."""
+    if not text:
+        return []
+    keys = [f"{_INVOICE_PREFIX}{int(n):0{_INVOICE_WIDTH}d}" for n in _INVOICE_NUMBER.findall(text)]
+    keys.extend(token.upper() for token in re.findall(r"[\w\-/]+", text))  # custom numbers
+    return keys
+
+
+def _fingerprint(line: StatementLine, occurrence: int) -> str:
+    raw = "|".join(str(part or "") for part in (*line, occurrence))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _OpenInvoice:
+    __slots__ = ("id", "number", "currency", "total", "paid", "open", "applied")
+
+    def __init__(self, id, number, currency, total, paid, balance):
+        self.id, self.number, self.currency = id, number, currency
+        self.total, self.paid = Decimal(str(total or 0)), Decimal(str(paid or 0))
+        self.open = Decimal(str(balance or 0))
+        self.applied = Decimal(0)
+
+
+class ReconciliationService:
+    """Imports bank statements and reconciles them against invoices for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.repo = BaseRepository(BankTransaction, db, tenant_id)
+
+    # ── Import ───────────────────────────────────────────────
+
+    def import_statement(self, lines: Iterable[StatementLine], source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Import statement lines and auto-match credits to open invoices.
+
+        Returns counts of imported, duplicate, matched and unmatched lines and
+        the total amount applied to invoices. Parse errors raised while the
+        stream is consumed abort the import with nothing written.
+        """
+        by_number, by_amount = self._index_open_invoices()
+        summary = {"lines": 0, "duplicates": 0, "matched": 0, "unmatched": 0,
+                   "matched_amount": Decimal(0), "payments": []}
+        seen: Counter = Counter()
+        stream = iter(lines)
+        try:
+            while True:
+                chunk = list(islice(stream, CHUNK_SIZE))
+                if not chunk:
+                    break
+                fingerprints = []
+                for line in chunk:
+                    base = _fingerprint(line, 0)
+                    fingerprints.append(_fingerprint(line, seen[base]) if seen[base] else base)
+                    seen[base] += 1
+                known = set(self.db.scalars(select(BankTransaction.fingerprint).where(
+                    BankTransaction.tenant_id == self.tenant_id,
+                    BankTransaction.fingerprint.in_(fingerprints),
+                )))
+                fresh = [(l, fp) for l, fp in zip(chunk, fingerprints) if fp not in known]
+                summary["lines"] += len(chunk)
+                summary["duplicates"] += len(chunk) - len(fresh)
+                self._write_chunk(fresh, source, by_number, by_amount, summary)
+        except Exception:
+            self.db.rollback()
+            raise
+
+        applied = {inv.id: inv.applied for inv in by_number.values() if inv.applied}
+        if applied:
+            self._apply_to_invoices(applied)
+        self.db.commit()
+        if summary["matched"]:
+            BaseRepository(Invoice, self.db, self.tenant_id).invalidate_counts()
+            invalidate_aging_cache(self.tenant_id)
+        self.repo.invalidate_counts()
+        return summary
+
+    def _index_open_invoices(self) -> Tuple[Dict[str, _OpenInvoice], Dict[Tuple[str, Decimal], List[_OpenInvoice]]]:
+        rows = self.db.execute(
+            select(Invoice.id, Invoice.invoice_number, Invoice.currency,
+                   Invoice.total, Invoice.amount_paid, Invoice.balance_due)
+            .where(
+                Invoice.tenant_id == self.tenant_id,
+                Invoice.is_deleted == False,  # noqa: E712
+                Invoice.status.notin_(CLOSED_STATUSES),
+                Invoice.balance_due > 0,
+            )
+        ).all()
+        by_number: Dict[str, _OpenInvoice] = {}
+        by_amount: Dict[Tuple[str, Decimal], List[_OpenInvoice]] = defaultdict(list)
+        for row in rows:
+            inv = _OpenInvoice(*row)
+            keys = _invoice_keys(inv.number)
+            by_number[keys[0] if keys else inv.number.upper()] = inv
+            by_amount[(inv.currency, inv.open)].append(inv)
+        return by_number, by_amount
+
+    # ── Matching ─────────────────────────────────────────────
+
+    @staticmethod
+    def _match(
+        line: StatementLine,
+        by_number: Dict[str, _OpenInvoice],
+        by_amount: Dict[Tuple[str, Decimal], List[_OpenInvoice]],
+    ) -> Tuple[Optional[_OpenInvoice], Optional[Decimal], str]:
+        """Best (invoice, confidence, reason) for one line; invoice may be None."""
+        if line.amount <= 0:
+            return None, None, "outgoing"
+        best: Tuple[Optional[_OpenInvoice], Optional[Decimal], str] = (None, None, "no_match")
+        for key in dict.fromkeys(_invoice_keys(line.reference)):
+            inv = by_number.get(key)
+            if inv is None:
+                continue
+            if inv.currency != line.currency:
+                found = (inv, Decimal("0.50"), "reference_currency_mismatch")
+            elif line.amount == inv.open:
+                return inv, Decimal("1.00"), "reference_and_amount"
+            elif line.amount < inv.open:
+                found = (inv, Decimal("0.80"), "reference_partial")
+            else:
+                found = (inv, Decimal("0.50"), "reference_overpayment")
+            if best[1] is None or found[1] > best[1]:
+                best = found
+        if best[1] is not None and best[1] >= AUTO_MATCH_CONFIDENCE:
+            return best
+        candidates = [i for i in by_amount.get((line.currency, line.amount), ()) if i.open == line.amount]
+        if len(candidates) == 1:
+            return candidates[0], AUTO_MATCH_CONFIDENCE, "amount_unique"
+        if best[1] is None and candidates:
+            return None, None, "amount_ambiguous"
+        return best
+
+    def _write_chunk(self, fresh, source, by_number, by_amount, summary) -> None:
+        rows, payments = [], []
+        for line, fingerprint in fresh:
+            inv, confidence, reason = self._match(line, by_number, by_amount)
+            matched = inv is not None and confidence >= AUTO_MATCH_CONFIDENCE
+            rows.append({
+                "fingerprint": fingerprint, "source": source, "booking_date": line.booking_date,
+                "amount": line.amount, "currency": line.currency, "reference": line.reference,
+                "counterparty": line.counterparty, "bank_reference": line.bank_reference,
+                "status": "matched" if matched else "unmatched",
+                "invoice_id": inv.id if inv else None, "payment_id": None,
+                "match_confidence": confidence, "match_reason": reason,
+                "tenant_id": self.tenant_id,
+            })
+            if matched:
+                # Consume the balance now so later lines see what is still open.
+                inv.open -= line.amount
+                inv.applied += line.amount
+                payments.append((len(rows) - 1, inv, line))
+                summary["matched"] += 1
+                summary["matched_amount"] += line.amount
+            else:
+                summary["unmatched"] += 1
+        if payments:
+            payment_ids = self.db.scalars(
+                insert(Payment).returning(Payment.id, sort_by_parameter_order=True),
+                [self._payment_row(inv.id, line) for _, inv, line in payments],
+            ).all()
+            for (row_index, inv, _), payment_id in zip(payments, payment_ids):
+                rows[row_index]["payment_id"] = payment_id
+                summary["payments"].append({"payment_id": payment_id, "invoice_id": inv.id,
+                                            "invoice_number": inv.number})
+        if rows:
+            self.db.execute(insert(BankTransaction), rows)
+
+    def _payment_row(self, invoice_id: int, line: StatementLine) -> Dict[str, Any]:
+        return {
+            "invoice_id": invoice_id, "payment_date": line.booking_date, "amount": line.amount,
+            "currency": line.currency, "payment_method": "bank_transfer",
+            "bank_reference": line.bank_reference, "notes": line.reference,
+            "tenant_id": self.tenant_id,
+        }
+
+    def _apply_to_invoices(self, applied: Dict[int, Decimal]) -> None:
+        """
+        Add payments to invoices relative to their current values, in one
+        executemany UPDATE, so payments committed while a long statement was
+        being read are kept rather than overwritten.
+        """
+        invoices = Invoice.__table__
+        paid = invoices.c.amount_paid + bindparam("applied")
+        self.db.execute(
+            update(invoices)
+            .where(invoices.c.id == bindparam("invoice_id"))
+            .values(
+                amount_paid=paid,
+                balance_due=invoices.c.total - paid,
+                status=case((invoices.c.total - paid <= 0, "paid"), else_="partially_paid"),
+            ),
+            [{"invoice_id": invoice_id, "applied": amount} for invoice_id, amount in applied.items()],
+        )
+
+    # ── Unmatched queue ──────────────────────────────────────
+
+    def list_transactions(
+        self, *, status: Optional[str] = "unmatched", limit: int = 50, cursor: Optional[str] = None,
+    ) -> Tuple[List[BankTransaction], Optional[str]]:
+        """Keyset-paginated bank transactions, the unmatched queue by default."""
+        return self.repo.list_keyset(
+            limit=limit, cursor=cursor, order_by="booking_date", order_desc=False,
+            filters={"status": status},
+        )
+
+    def get_transaction(self, transaction_id: int) -> Optional[BankTransaction]:
+        return self.repo.get_by_id(transaction_id)
+
+    def match(self, transaction_id: int, invoice_id: int) -> BankTransaction:
+        """Resolve a queued credit by hand: record it as a payment on ``invoice_id``."""
+        txn = self.get_transaction(transaction_id)
+        if txn is None:
+            raise ValueError("Bank transaction not found")
+        if txn.status == "matched":
+            raise ValueError("Bank transaction is already matched")
+        if txn.amount <= 0:
+            raise ValueError("Only incoming transactions can be matched to invoices")
+        invoice = InvoiceService(self.db, self.tenant_id).get(invoice_id)
+        if invoice is None:
+            raise ValueError("Invoice not found")
+        if invoice.status in CLOSED_STATUSES or invoice.balance_due <= 0:
+            raise ValueError(f"Invoice {invoice.invoice_number} is {invoice.status or 'settled'}, not open")
+        if invoice.currency != txn.currency:
+            raise ValueError(f"Invoice is in {invoice.currency}, the transaction in {txn.currency}")
+
+        line = StatementLine(txn.booking_date, txn.amount, txn.currency, txn.reference,
+                             txn.counterparty, txn.bank_reference)
+        payment = Payment(**self._payment_row(invoice.id, line))
+        self.db.add(payment)
+        self.db.flush()
+        self._apply_to_invoices({invoice.id: txn.amount})
+        txn.status, txn.invoice_id, txn.payment_id = "matched", invoice.id, payment.id
+        txn.match_confidence, txn.match_reason = Decimal("1.00"), "manual"
+        self.db.commit()
+
+        BaseRepository(Invoice, self.db, self.tenant_id).invalidate_counts()
+        invalidate_aging_cache(self.tenant_id)
+        self.repo.invalidate_counts()
+        self.db.refresh(txn)
+        return txn
@@ -0,0 +1,335 @@
+"""
+Financial statements: trial balance, income statement and balance sheet.
+
+Every report is built from one aggregated query that returns posted
+debit/credit totals per (account, fiscal period) for all requested periods
+at once, so period comparisons cost no extra round trips. When the periods
+are whole calendar months the query reads the materialized
+``account_balances`` table; otherwise it aggregates ``journal_entry_lines``.
+Balances (trial balance, balance sheet) start from the latest closing
+snapshot written by the period close and only aggregate what was posted
+after it. Amounts are then rolled up the ``Account.parent_id`` hierarchy in
+memory.
+
+Reports whose periods are all closed are cached: closed periods no longer
+change, so historical statements never rescan the ledger.
+"""
+
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.finance import (
+    Account, AccountBalance, AccountClosingBalance, FiscalPeriod, JournalEntry, JournalEntryLine,
+)
+from app.utils.cache import TTLCache
+
+# Account types whose natural balance is a debit; the others are shown credit-positive.
+DEBIT_NORMAL = ("asset", "expense")
+
+# (account_id, period_id) -> (debit, credit)
+PeriodTotals = Dict[Tuple[int, int], Tuple[Decimal, Decimal]]
+
+_report_cache = TTLCache(ttl=settings.report_cache_ttl_seconds, maxsize=256)
+
+
+def invalidate_report_cache(tenant_id: Optional[str] = None) -> None:
+    """Drop cached statements for one tenant (or all tenants)."""
+    if tenant_id is None:
+        _report_cache.clear()
+    else:
+        _report_cache.discard_where(lambda key: key[0] == tenant_id)
+
+
+def _month_aligned(period: FiscalPeriod) -> bool:
+    return period.start_date.day == 1 and (period.end_date + timedelta(days=1)).day == 1
+
+
+class FinancialReportService:
+    """Builds financial statements for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # ── Public reports ───────────────────────────────────────
+
+    def trial_balance(self, period_id: int, compare: Sequence[int] = ()) -> Dict[str, Any]:
+        """Cumulative debit/credit balance of every account at each period end."""
+        return self._cached("trial_balance", period_id, compare, self._build_trial_balance)
+
+    def income_statement(self, period_id: int, compare: Sequence[int] = ()) -> Dict[str, Any]:
+        """Revenue and expense activity within each period."""
+        return self._cached("income_statement", period_id, compare, self._build_income_statement)
+
+    def balance_sheet(self, period_id: int, compare: Sequence[int] = ()) -> Dict[str, Any]:
+        """Assets, liabilities and equity at each period end."""
+        return self._cached("balance_sheet", period_id, compare, self._build_balance_sheet)
+
+    # ── Builders ─────────────────────────────────────────────
+
+    def _build_trial_balance(self, periods: List[FiscalPeriod]) -> Dict[str, Any]:
+        totals = self._period_totals(periods, cumulative=True)
+        accounts = self._accounts()
+        net = self._net(accounts, periods, totals, types=None, presented=False)
+        # Totals use each account's own balance; rolled-up parents would double count.
+        debit = [Decimal(0)] * len(periods)
+        credit = [Decimal(0)] * len(periods)
+        for amounts in net.values():
+            for i, value in enumerate(amounts):
+                if value > 0:
+                    debit[i] += value
+                else:
+                    credit[i] -= value
+        return self._report("trial_balance", periods, accounts, net, {"debit": debit, "credit": credit})
+
+    def _build_income_statement(self, periods: List[FiscalPeriod]) -> Dict[str, Any]:
+        totals = self._period_totals(periods, cumulative=False)
+        accounts = self._accounts()
+        own = self._net(accounts, periods, totals, types=("revenue", "expense"), presented=True)
+        revenue = self._sum_type(accounts, own, "revenue", len(periods))
+        expense = self._sum_type(accounts, own, "expense", len(periods))
+        return self._report("income_statement", periods, accounts, own, {
+            "revenue": revenue,
+            "expense": expense,
+            "net_income": [r - e for r, e in zip(revenue, expense)],
+        })
+
+    def _build_balance_sheet(self, periods: List[FiscalPeriod]) -> Dict[str, Any]:
+        totals = self._period_totals(periods, cumulative=True)
+        accounts = self._accounts()
+        own = self._net(accounts, periods, totals, types=None, presented=True)
+        n = len(periods)
+        assets = self._sum_type(accounts, own, "asset", n)
+        liabilities = self._sum_type(accounts, own, "liability", n)
+        equity = self._sum_type(accounts, own, "equity", n)
+        # Revenue less expense not yet closed into retained earnings.
+        earnings = [
+            r - e for r, e in zip(self._sum_type(accounts, own, "revenue", n),
+                                  self._sum_type(accounts, own, "expense", n))
+        ]
+        sheet_own = {
+            acc_id: amounts for acc_id, amounts in own.items()
+            if accounts[acc_id].account_type in ("asset", "liability", "equity")
+        }
+        total_equity = [q + e for q, e in zip(equity, earnings)]
+        return self._report("balance_sheet", periods, accounts, sheet_own, {
+            "assets": assets,
+            "liabilities": liabilities,
+            "equity": equity,
+            "current_earnings": earnings,
+            "total_equity": total_equity,
+            "liabilities_and_equity": [l + q for l, q in zip(liabilities, total_equity)],
+        })
+
+    # ── Aggregation ──────────────────────────────────────────
+
+    def _period_totals(self, periods: List[FiscalPeriod], cumulative: bool) -> PeriodTotals:
+        """
+        Posted totals per (account, period) for all ``periods``.
+
+        ``cumulative`` gives balances at each period's end: the latest closing
+        snapshot at or before it plus only the activity posted after that
+        snapshot. Otherwise only activity inside the period is summed.
+        """
+        totals: Dict[Tuple[int, int], List[Decimal]] = defaultdict(lambda: [Decimal(0), Decimal(0)])
+        after: Dict[int, Optional[date]] = {p.id: p.start_date - timedelta(days=1) for p in periods}
+        bases: Dict[int, Optional[FiscalPeriod]] = {}
+        if cumulative:
+            bases = self._snapshot_bases(periods)
+            for base_id, account_id, d, c in self._snapshot_rows(bases.values()):
+                for period in periods:
+                    if bases[period.id] is not None and bases[period.id].id == base_id:
+                        totals[(account_id, period.id)][0] += Decimal(str(d))
+                        totals[(account_id, period.id)][1] += Decimal(str(c))
+            after = {p.id: bases[p.id].end_date if bases[p.id] else None for p in periods}
+
+        pending = [p for p in periods if after[p.id] is None or after[p.id] < p.end_date]
+        if pending:
+            scanned = [*pending, *(b for b in bases.values() if b)]
+            activity = self._activity(pending, after, all(_month_aligned(p) for p in scanned))
+            for key, (d, c) in activity.items():
+                totals[key][0] += d
+                totals[key][1] += c
+        return {key: (d, c) for key, (d, c) in totals.items()}
+
+    def _activity(
+        self, periods: List[FiscalPeriod], after: Dict[int, Optional[date]], month_aligned: bool,
+    ) -> PeriodTotals:
+        """Posted totals dated in ``(after[p], p.end_date]`` per (account, period), in one query."""
+        if month_aligned:
+            account_col = AccountBalance.account_id
+            day_col = AccountBalance.period_start
+            debit, credit = AccountBalance.debit, AccountBalance.credit
+            stmt = select().select_from(AccountBalance).where(AccountBalance.tenant_id == self.tenant_id)
+        else:
+            account_col = JournalEntryLine.account_id
+            day_col = JournalEntry.entry_date
+            debit, credit = JournalEntryLine.base_debit, JournalEntryLine.base_credit
+            stmt = (
+                select().select_from(JournalEntryLine)
+                .join(JournalEntry, JournalEntry.id == JournalEntryLine.journal_entry_id)
+                .where(JournalEntryLine.tenant_id == self.tenant_id, JournalEntry.status == "posted")
+            )
+        lower_bound = or_(*(
+            and_(FiscalPeriod.id == p.id, day_col > after[p.id]) if after[p.id] else FiscalPeriod.id == p.id
+            for p in periods
+        ))
+        stmt = (
+            stmt.add_columns(account_col, FiscalPeriod.id, func.sum(debit), func.sum(credit))
+            .join(FiscalPeriod, and_(day_col <= FiscalPeriod.end_date, FiscalPeriod.tenant_id == self.tenant_id))
+            .where(lower_bound)
+            .group_by(account_col, FiscalPeriod.id)
+        )
+        return {
+            (account_id, period_id): (Decimal(str(d or 0)), Decimal(str(c or 0)))
+            for account_id, period_id, d, c in self.db.execute(stmt)
+        }
+
+    def _snapshot_rows(self, bases) -> list:
+        ids = {b.id for b in bases if b is not None}
+        if not ids:
+            return []
+        return self.db.execute(
+            select(AccountClosingBalance.fiscal_period_id, AccountClosingBalance.account_id,
+                   AccountClosingBalance.debit, AccountClosingBalance.credit)
+            .where(AccountClosingBalance.fiscal_period_id.in_(ids))
+        ).all()
+
+    def _snapshot_bases(self, periods: List[FiscalPeriod]) -> Dict[int, Optional[FiscalPeriod]]:
+        """Latest period with closing balances ending on or before each period's end."""
+        closed = (
+            self.db.query(FiscalPeriod)
+            .filter(FiscalPeriod.tenant_id == self.tenant_id, FiscalPeriod.closed_at.isnot(None))
+            .order_by(FiscalPeriod.end_date)
+            .all()
+        )
+        ends = [c.end_date for c in closed]
+        bases = {}
+        for period in periods:
+            i = bisect_right(ends, period.end_date)
+            bases[period.id] = closed[i - 1] if i else None
+        return bases
+
+    def _accounts(self) -> Dict[int, Account]:
+        rows = (
+            self.db.query(Account)
+            .filter(Account.tenant_id == self.tenant_id, Account.is_deleted == False)  # noqa: E712
+            .order_by(Account.code)
+            .all()
+        )
+        return {a.id: a for a in rows}
+
+    def _net(
+        self, accounts: Dict[int, Account], periods: List[FiscalPeriod], totals: PeriodTotals,
+        types: Optional[Tuple[str, ...]], presented: bool,
+    ) -> Dict[int, List[Decimal]]:
+        """Per-account amounts (own postings only), one per period column."""
+        net: Dict[int, List[Decimal]] = {}
+        for acc_id, account in accounts.items():
+            if types and account.account_type not in types:
+                continue
+            amounts = []
+            for period in periods:
+                d, c = totals.get((acc_id, period.id), (Decimal(0), Decimal(0)))
+                value = d - c
+                if presented and account.account_type not in DEBIT_NORMAL:
+                    value = -value
+                amounts.append(value)
+            net[acc_id] = amounts
+        return net
+
+    @staticmethod
+    def _sum_type(accounts, own: Dict[int, List[Decimal]], account_type: str, n: int) -> List[Decimal]:
+        result = [Decimal(0)] * n
+        for acc_id, amounts in own.items():
+            if accounts[acc_id].account_type == account_type:
+                result = [r + a for r, a in zip(result, amounts)]
+        return result
+
+    # ── Presentation ─────────────────────────────────────────
+
+    def _report(
+        self, name: str, periods: List[FiscalPeriod], accounts: Dict[int, Account],
+        own: Dict[int, List[Decimal]], totals: Dict[str, List[Decimal]],
+    ) -> Dict[str, Any]:
+        rolled = self._rollup(accounts, own)
+        lines = [
+            {
+                "account_id": acc_id,
+                "code": accounts[acc_id].code,
+                "name": accounts[acc_id].name,
+                "account_type": accounts[acc_id].account_type,
+                "parent_id": accounts[acc_id].parent_id,
+                "is_header": bool(accounts[acc_id].is_header),
+                "depth": depth,
+                "amounts": amounts,
+            }
+            for acc_id, depth, amounts in rolled
+            if any(amounts) or accounts[acc_id].is_header
+        ]
+        return {
+            "report": name,
+            "columns": [
+                {"period_id": p.id, "name": p.name, "start_date": p.start_date, "end_date": p.end_date}
+                for p in periods
+            ],
+            "lines": lines,
+            "totals": totals,
+        }
+
+    @staticmethod
+    def _rollup(
+        accounts: Dict[int, Account], own: Dict[int, List[Decimal]],
+    ) -> List[Tuple[int, int, List[Decimal]]]:
+        """Depth-first (account_id, depth, subtree amounts) for accounts in ``own``."""
+        children: Dict[Optional[int], List[int]] = defaultdict(list)
+        for acc_id in own:
+            parent = accounts[acc_id].parent_id
+            children[parent if parent in own else None].append(acc_id)
+
+        out: List[Tuple[int, int, List[Decimal]]] = []
+
+        def visit(acc_id: int, depth: int) -> List[Decimal]:
+            slot = len(out)
+            out.append((acc_id, depth, []))
+            total = list(own[acc_id])
+            for child in children.get(acc_id, []):
+                total = [t + c for t, c in zip(total, visit(child, depth + 1))]
+            out[slot] = (acc_id, depth, total)
+            return total
+
+        for root in children[None]:
+            visit(root, 0)
+        return out
+
+    # ── Periods & caching ────────────────────────────────────
+
+    def _periods(self, period_id: int, compare: Sequence[int]) -> List[FiscalPeriod]:
+        ids = [period_id, *[c for c in compare if c != period_id]]
+        found = {
+            p.id: p for p in self.db.query(FiscalPeriod).filter(
+                FiscalPeriod.id.in_(ids), FiscalPeriod.tenant_id == self.tenant_id,
+            )
+        }
+        missing = [i for i in ids if i not in found]
+        if missing:
+            raise ValueError(f"Fiscal period {missing[0]} not found")
+        return [found[i] for i in ids]
+
+    def _cached(self, name: str, period_id: int, compare: Sequence[int], build) -> Dict[str, Any]:
+        periods = self._periods(period_id, compare)
+        key = (self.tenant_id, name, tuple(p.id for p in periods))
+        if all(p.is_closed for p in periods):
+            report = _report_cache.get(key)
+            if report is None:
+                report = build(periods)
+                _report_cache.set(key, report)
+            return report
+        return build(periods)
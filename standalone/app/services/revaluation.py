@@ -0,0 +1,203 @@
+"""
+Month-end revaluation of open foreign-currency receivables and payables.
+
+Open invoice and bill balances in non-base currencies are read with one
+query, revalued against the period-end exchange rate, and the difference to
+the rate they are booked at is posted as one balanced journal entry per
+currency: one AR/AP line per document plus an unrealized gain or loss line.
+Each entry is reversed on the first day of the next period, so every run
+revalues from the documents' own rates and runs never stack.
+
+A period is revalued at most once: entries are tagged with
+``source_type="fx_revaluation"`` and ``source_id=<fiscal period id>``, and a
+repeated run returns the existing entries. Runs lock the fiscal period row,
+and a partial unique index on those tags stops a concurrent duplicate. The
+revaluations and their reversals are written all or nothing, so both the
+period end and the following day must be in open periods.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.finance import Account, Bill, FiscalPeriod, Invoice, JournalEntry
+from app.services.finance import AccountingService
+from app.services.fx import CENT
+
+SOURCE_TYPE = "fx_revaluation"
+REVERSAL_SOURCE_TYPE = "fx_revaluation_reversal"
+
+# Default chart codes the adjustments post to.
+RECEIVABLE, PAYABLE, FX_GAIN, FX_LOSS = "1100", "2100", "4080", "5080"
+
+CLOSED_STATUSES = ("paid", "void")
+
+
+class FXRevaluationService:
+    """Runs the FX revaluation for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.accounting = AccountingService(db, tenant_id)
+        self.fx = self.accounting.fx
+
+    def run(self, period_id: int, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Revalue open balances at the end of a fiscal period (idempotent)."""
+        period = (
+            self.db.query(FiscalPeriod)
+            .filter(FiscalPeriod.id == period_id, FiscalPeriod.tenant_id == self.tenant_id)
+            .with_for_update()
+            .first()
+        )
+        if period is None:
+            raise ValueError("Fiscal period not found")
+
+        existing = self._existing(period.id)
+        if existing:
+            return self._summary(period, existing, created=False)
+        # The entry and its reversal post on these two days; check both before writing either.
+        for day_period in self.accounting.fiscal_periods_for(
+            (period.end_date, period.end_date + timedelta(days=1))
+        ).values():
+            if day_period is not None and day_period.is_closed:
+                raise ValueError(f"Fiscal period '{day_period.name}' is closed")
+
+        entries = self._build_entries(period)
+        if entries:
+            try:
+                self.accounting.create_journal_entries_bulk(
+                    entries, auto_post=True, user_id=user_id, atomic=True,
+                )
+            except IntegrityError:
+                # A concurrent run posted this period first.
+                self.db.rollback()
+                return self._summary(period, self._existing(period.id), created=False)
+        return self._summary(period, self._existing(period.id), created=bool(entries))
+
+    # ── Building ─────────────────────────────────────────────
+
+    def _open_balances(self, period: FiscalPeriod):
+        """Open non-base invoice and bill balances dated up to the period end (one query)."""
+        base = self.fx.base_currency
+        invoices = select(
+            literal("invoice").label("kind"), Invoice.id, Invoice.invoice_number.label("number"),
+            Invoice.currency, Invoice.exchange_rate, Invoice.balance_due.label("open_amount"),
+        ).where(
+            Invoice.tenant_id == self.tenant_id,
+            Invoice.is_deleted == False,  # noqa: E712
+            Invoice.currency != base,
+            Invoice.status.notin_(CLOSED_STATUSES),
+            Invoice.invoice_date <= period.end_date,
+            Invoice.balance_due != 0,
+        )
+        bills = select(
+            literal("bill").label("kind"), Bill.id, Bill.bill_number.label("number"),
+            Bill.currency, Bill.exchange_rate, (Bill.total - Bill.amount_paid).label("open_amount"),
+        ).where(
+            Bill.tenant_id == self.tenant_id,
+            Bill.is_deleted == False,  # noqa: E712
+            Bill.currency != base,
+            Bill.status.notin_(CLOSED_STATUSES),
+            Bill.bill_date <= period.end_date,
+            Bill.total != Bill.amount_paid,
+        )
+        return self.db.execute(union_all(invoices, bills)).all()
+
+    def _build_entries(self, period: FiscalPeriod) -> List[Dict[str, Any]]:
+        by_currency = defaultdict(list)
+        for row in self._open_balances(period):
+            by_currency[row.currency].append(row)
+        if not by_currency:
+            return []
+
+        accounts = {code: self.accounting.default_account(code).id
+                    for code in (RECEIVABLE, PAYABLE, FX_GAIN, FX_LOSS)}
+        base = self.fx.base_currency
+        entries = []
+        for currency, rows in sorted(by_currency.items()):
+            closing_rate = self.fx.rate(currency, on=period.end_date)
+            lines, net = [], Decimal(0)  # net > 0 is a gain
+            for row in rows:
+                amount = Decimal(str(row.open_amount))
+                booked_rate = Decimal(str(row.exchange_rate or 1))
+                diff = (amount * closing_rate).quantize(CENT) - (amount * booked_rate).quantize(CENT)
+                if not diff:
+                    continue
+                # A receivable (debit balance) gains when it is worth more; a
+                # payable (credit balance) gains when it is worth less.
+                if row.kind == "invoice":
+                    account, side, gain = accounts[RECEIVABLE], "debit" if diff > 0 else "credit", diff
+                else:
+                    account, side, gain = accounts[PAYABLE], "credit" if diff > 0 else "debit", -diff
+                net += gain
+                lines.append({
+                    "account_id": account, side: abs(diff), "currency": base, "exchange_rate": 1,
+                    "description": f"{row.number} {amount} {currency} @ {closing_rate} (booked {booked_rate})",
+                })
+            if not lines:
+                continue
+            if net:
+                lines.append({
+                    "account_id": accounts[FX_GAIN] if net > 0 else accounts[FX_LOSS],
+                    "credit" if net > 0 else "debit": abs(net),
+                    "currency": base, "exchange_rate": 1,
+                    "description": f"Unrealized FX {'gain' if net > 0 else 'loss'} on {currency}",
+                })
+            memo = f"{currency} revaluation at {closing_rate} for {period.name}"
+            entries.append({
+                "entry_date": period.end_date, "reference": f"FXREV-{currency}",
+                "memo": memo, "source_type": SOURCE_TYPE, "source_id": period.id, "lines": lines,
+            })
+            entries.append({
+                "entry_date": period.end_date + timedelta(days=1), "reference": f"FXREV-{currency}",
+                "memo": f"Reversal: {memo}", "source_type": REVERSAL_SOURCE_TYPE, "source_id": period.id,
+                "lines": [_reversed(line) for line in lines],
+            })
+        return entries
+
+    # ── Results ──────────────────────────────────────────────
+
+    def _existing(self, period_id: int) -> List[JournalEntry]:
+        return (
+            self.db.query(JournalEntry)
+            .filter(
+                JournalEntry.tenant_id == self.tenant_id,
+                JournalEntry.source_type == SOURCE_TYPE,
+                JournalEntry.source_id == period_id,
+            )
+            .order_by(JournalEntry.id)
+            .all()
+        )
+
+    def _summary(self, period: FiscalPeriod, entries: List[JournalEntry], created: bool) -> Dict[str, Any]:
+        pnl_accounts = set(self.db.scalars(select(Account.id).where(
+            Account.tenant_id == self.tenant_id, Account.code.in_((FX_GAIN, FX_LOSS)),
+        )))
+        summaries = []
+        for je in entries:
+            pnl = [l for l in je.lines if l.account_id in pnl_accounts]
+            net_gain = sum((Decimal(str(l.base_credit)) - Decimal(str(l.base_debit)) for l in pnl), Decimal(0))
+            summaries.append({
+                "journal_entry_id": je.id,
+                "entry_number": je.entry_number,
+                "currency": je.reference.removeprefix("FXREV-"),
+                "documents": len(je.lines) - len(pnl),
+                "net_gain": net_gain,
+            })
+        return {"period_id": period.id, "rate_date": period.end_date, "created": created, "entries": summaries}
+
+
+def _reversed(line: Dict[str, Any]) -> Dict[str, Any]:
+    flipped = {k: v for k, v in line.items() if k not in ("debit", "credit")}
+    if "debit" in line:
+        flipped["credit"] = line["debit"]
+    else:
+        flipped["debit"] = line["credit"]
+    return flipped
+
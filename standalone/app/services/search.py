@@ -0,0 +1,89 @@
+"""
+Ranked full-text search over deals.
+
+Queries the ``deal_search`` index (see ``app.models.search``): FTS5 with
+weighted ``bm25()`` on SQLite, the GIN-indexed ``tsvector`` with
+``ts_rank_cd()`` on PostgreSQL. Title matches rank above description
+matches, which rank above matches in notes. The page is ranked and cut
+inside the index, so only the returned deals are loaded. Every word of the
+query must match; the last word also matches as a prefix, so results appear
+while a user is still typing.
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session, lazyload
+
+from app.models.deals import Deal
+from app.models.search import deal_search, rebuild_deal_search
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def search_terms(query: str) -> List[str]:
+    """Split a user query into index terms; FTS operators and quotes are dropped."""
+    return _WORD.findall(query.lower())
+
+
+class DealSearchService:
+    """Full-text search over one tenant's deals."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    def search(
+        self, query: str, *, limit: int = 20, offset: int = 0,
+    ) -> Tuple[List[Tuple[Deal, float]], Optional[int]]:
+        """
+        Best matches first, as ``(deal, score)`` pairs (higher is better).
+        Returns the page and the offset of the next page, if there is one.
+        """
+        terms = search_terms(query)
+        if not terms:
+            raise ValueError("Search query has no searchable words")
+        deal_id, score, order, where = self._match(terms)
+        # Rank and cut the page inside the index; only the page joins deals.
+        page = (
+            select(deal_id.label("deal_id"), score.label("score"))
+            .where(where, deal_search.c.tenant_id == self.tenant_id)
+            .order_by(*order)
+            .offset(offset)
+            .limit(limit + 1)
+            .subquery()
+        )
+        stmt = (
+            select(Deal, page.c.score)
+            .join(page, page.c.deal_id == Deal.id)
+            .options(
+                lazyload(Deal.company), lazyload(Deal.lead_contact),
+                lazyload(Deal.owner), lazyload(Deal.team_members),
+            )
+            .where(Deal.is_deleted == False)  # noqa: E712
+            .order_by(page.c.score.desc(), Deal.id)
+        )
+        hits = [(deal, float(rank)) for deal, rank in self.db.execute(stmt)]
+        if len(hits) <= limit:
+            return hits, None
+        return hits[:limit], offset + limit
+
+    def rebuild(self) -> None:
+        """Refill the index from ``deals`` and ``deal_notes`` (all tenants) and commit."""
+        rebuild_deal_search(self.db.connection())
+        self.db.commit()
+
+    def _match(self, terms: List[str]):
+        """Dialect-specific (deal id column, score, ORDER BY, match predicate)."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            tsquery = func.to_tsquery("simple", " & ".join(terms[:-1] + [f"{terms[-1]}:*"]))
+            document = deal_search.c.document
+            score = func.ts_rank_cd(document, tsquery)
+            return deal_search.c.deal_id, score, (score.desc(), deal_search.c.deal_id), document.op("@@")(tsquery)
+        fts_query = " ".join([f'"{t}"' for t in terms[:-1]] + [f'"{terms[-1]}"*'])
+        rank = deal_search.c.rank
+        # ``rank`` (weighted bm25) is lower for better matches. Ordering by it
+        # alone lets FTS5 sort inside the virtual table; the score is negated
+        # so that higher is better on both databases.
+        return deal_search.c.rowid, -rank, (rank,), literal_column("deal_search").op("MATCH")(fts_query)
@@ -0,0 +1,333 @@
+"""
+Deal stage history and funnel rollups.
+
+Every stage change is stored as a typed ``DealStageTransition`` row, in the
+same transaction as the change. The same write adds to three rollup tables
+keyed by stage, sector and deal type:
+
+  - ``deal_stage_stats``: deals that ever reached the stage, completed
+    stays in it and their total length
+  - ``deal_stage_durations``: completed stays per whole number of days,
+    from which medians are read
+  - ``deal_stage_flows``: moves from one stage to another
+
+Analytics read only the rollups, which stay small (stages x sectors x deal
+types), however long the history grows. ``rebuild()`` recomputes them from
+the history table.
+"""
+
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import Integer, cast, delete, func, insert, select, union, union_all
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app.models.deals import (
+    Deal, DealStage, DealStageDuration, DealStageFlow, DealStageStat, DealStageTransition,
+)
+
+SECONDS_PER_DAY = 86400.0
+
+
+class StageMove(NamedTuple):
+    deal_id: int
+    from_stage_id: Optional[int]  # None when the deal is created in to_stage_id
+    to_stage_id: int
+    sector: Optional[str]
+    deal_type: str
+    user_id: Optional[int] = None
+
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _median(histogram: List[Tuple[int, int]]) -> Optional[float]:
+    """Median of a sorted ``[(days, count)]`` histogram."""
+    total = sum(count for _, count in histogram)
+    if not total:
+        return None
+    wanted = ((total - 1) // 2, total // 2)  # The two middle positions (equal when odd)
+    values, seen = [], 0
+    for days, count in histogram:
+        for position in wanted:
+            if seen <= position < seen + count:
+                values.append(days)
+        seen += count
+    return sum(values) / 2.0
+
+
+class StageHistoryService:
+    """Records deal stage transitions and serves funnel analytics for one tenant."""
+
+    def __init__(self, db: Session, tenant_id: str = "default"):
+        self.db = db
+        self.tenant_id = tenant_id
+
+    # ── Write path ───────────────────────────────────────────
+
+    def record(self, moves: Iterable[StageMove], at: Optional[datetime] = None) -> int:
+        """
+        Store stage moves and add them to the rollups.
+
+        Runs in the caller's transaction (no commit). The time in the
+        previous stage is measured from the deal's last transition, or from
+        its creation for deals older than the history; such a deal's first
+        move also counts its previous stage as reached. Returns the number of
+        transitions written.
+        """
+        moves = [m for m in moves if m.to_stage_id and m.to_stage_id != m.from_stage_id]
+        if not moves:
+            return 0
+        at = at or datetime.now(timezone.utc)
+        moved = {m.deal_id for m in moves if m.from_stage_id is not None}
+        since = self._stage_started(moved)
+        reached = self._reached(moved)
+
+        rows: List[Dict[str, Any]] = []
+        stats: Dict[Tuple, List] = defaultdict(lambda: [0, 0, 0.0])  # reached, exits, days_total
+        durations: Counter = Counter()
+        flows: Counter = Counter()
+        for move in moves:
+            group = (move.sector or "", move.deal_type)
+            days = None
+            if move.from_stage_id is not None:
+                if (move.deal_id, move.from_stage_id) not in reached:
+                    # Entered before the history began: it reached the stage it leaves.
+                    reached.add((move.deal_id, move.from_stage_id))
+                    stats[(*group, move.from_stage_id)][0] += 1
+                days = max((at - since[move.deal_id]).total_seconds() / SECONDS_PER_DAY, 0.0)
+                stat = stats[(*group, move.from_stage_id)]
+                stat[1] += 1
+                stat[2] += days
+                durations[(*group, move.from_stage_id, int(days))] += 1
+                flows[(*group, move.from_stage_id, move.to_stage_id)] += 1
+            if (move.deal_id, move.to_stage_id) not in reached:
+                reached.add((move.deal_id, move.to_stage_id))
+                stats[(*group, move.to_stage_id)][0] += 1
+            since[move.deal_id] = at
+            rows.append({
+                "tenant_id": self.tenant_id, "deal_id": move.deal_id,
+                "from_stage_id": move.from_stage_id, "to_stage_id": move.to_stage_id,
+                "user_id": move.user_id, "transitioned_at": at, "days_in_stage": days,
+                "sector": group[0], "deal_type": move.deal_type,
+            })
+
+        self.db.execute(insert(DealStageTransition), rows)
+        self._bump(DealStageStat, ("sector", "deal_type", "stage_id"), [
+            {"sector": s, "deal_type": t, "stage_id": stage_id, "reached": r, "exits": e, "days_total": d}
+            for (s, t, stage_id), (r, e, d) in sorted(stats.items())
+        ])
+        self._bump(DealStageDuration, ("sector", "deal_type", "stage_id", "days"), [
+            {"sector": s, "deal_type": t, "stage_id": stage_id, "days": days, "deals": count}
+            for (s, t, stage_id, days), count in sorted(durations.items())
+        ])
+        self._bump(DealStageFlow, ("sector", "deal_type", "from_stage_id", "to_stage_id"), [
+            {"sector": s, "deal_type": t, "from_stage_id": from_id, "to_stage_id": to_id, "deals": count}
+            for (s, t, from_id, to_id), count in sorted(flows.items())
+        ])
+        return len(rows)
+
+    def _stage_started(self, deal_ids: Set[int]) -> Dict[int, datetime]:
+        """When each deal entered its current stage: last transition, else creation."""
+        if not deal_ids:
+            return {}
+        started = {
+            deal_id: _utc(at) for deal_id, at in self.db.execute(
+                select(DealStageTransition.deal_id, func.max(DealStageTransition.transitioned_at))
+                .where(DealStageTransition.tenant_id == self.tenant_id,
+                       DealStageTransition.deal_id.in_(deal_ids))
+                .group_by(DealStageTransition.deal_id)
+            )
+        }
+        missing = deal_ids - started.keys()
+        if missing:
+            started.update(
+                (deal_id, _utc(created)) for deal_id, created in self.db.execute(
+                    select(Deal.id, Deal.created_at).where(Deal.id.in_(missing))
+                )
+            )
+        return started
+
+    def _reached(self, deal_ids: Set[int]) -> Set[Tuple[int, int]]:
+        """(deal_id, stage_id) pairs already in the history, entered or left."""
+        if not deal_ids:
+            return set()
+        T = DealStageTransition
+        scope = (T.tenant_id == self.tenant_id, T.deal_id.in_(deal_ids))
+        return set(self.db.execute(union(
+            select(T.deal_id, T.to_stage_id).where(*scope),
+            select(T.deal_id, T.from_stage_id).where(*scope, T.from_stage_id.isnot(None)),
+        )).all())
+
+    def _bump(self, model, key: Tuple[str, ...], rows: List[Dict[str, Any]]) -> None:
+        """
+        Add each row's counters to the rollup row with the same ``key``
+        columns, creating missing ones: one executemany INSERT ... ON CONFLICT
+        DO UPDATE, safe against concurrent writers without a savepoint.
+        """
+        if not rows:
+            return
+        dialect = self.db.get_bind().dialect.name
+        upsert = (postgresql_insert if dialect == "postgresql" else sqlite_insert)(model)
+        counters = [name for name in rows[0] if name not in key]
+        stmt = upsert.on_conflict_do_update(
+            index_elements=["tenant_id", *key],
+            set_={name: getattr(model, name) + getattr(upsert.excluded, name) for name in counters},
+        )
+        self.db.execute(stmt, [{"tenant_id": self.tenant_id, **row} for row in rows])
+
+    # ── Read path ────────────────────────────────────────────
+
+    def analytics(self, sector: Optional[str] = None, deal_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Funnel per stage (display order) and stage-to-stage transition rates,
+        optionally for one sector and/or deal type, read from the rollups.
+
+        Per stage: ``reached`` (deals that ever entered it), ``exits``
+        (completed stays), ``advanced`` (moves to a later stage), median and
+        average days per completed stay, ``conversion_rate`` (advanced /
+        reached) and ``drop_off_rate`` (share of deals that reached it but
+        not the next stage).
+        """
+        stages = list(self.db.scalars(
+            select(DealStage).where(DealStage.tenant_id == self.tenant_id).order_by(DealStage.display_order)
+        ))
+        order = {stage.id: position for position, stage in enumerate(stages)}
+
+        stats = {
+            stage_id: (n_reached, exits, days_total)
+            for stage_id, n_reached, exits, days_total in self.db.execute(
+                select(DealStageStat.stage_id, func.sum(DealStageStat.reached),
+                       func.sum(DealStageStat.exits), func.sum(DealStageStat.days_total))
+                .where(*self._group(DealStageStat, sector, deal_type))
+                .group_by(DealStageStat.stage_id)
+            )
+        }
+        histograms: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        for stage_id, days, count in self.db.execute(
+            select(DealStageDuration.stage_id, DealStageDuration.days, func.sum(DealStageDuration.deals))
+            .where(*self._group(DealStageDuration, sector, deal_type))
+            .group_by(DealStageDuration.stage_id, DealStageDuration.days)
+            .order_by(DealStageDuration.stage_id, DealStageDuration.days)
+        ):
+            histograms[stage_id].append((days, int(count)))
+        flows = self.db.execute(
+            select(DealStageFlow.from_stage_id, DealStageFlow.to_stage_id, func.sum(DealStageFlow.deals))
+            .where(*self._group(DealStageFlow, sector, deal_type))
+            .group_by(DealStageFlow.from_stage_id, DealStageFlow.to_stage_id)
+            .order_by(DealStageFlow.from_stage_id, DealStageFlow.to_stage_id)
+        ).all()
+
+        advanced: Counter = Counter()
+        for from_id, to_id, count in flows:
+            if order.get(to_id, -1) > order.get(from_id, -1):
+                advanced[from_id] += int(count)
+
+        funnel = []
+        for position, stage in enumerate(stages):
+            n_reached, exits, days_total = stats.get(stage.id, (0, 0, 0.0))
+            n_reached, exits, days_total = int(n_reached or 0), int(exits or 0), float(days_total or 0.0)
+            next_reached = None
+            if position + 1 < len(stages):
+                next_reached = int(stats.get(stages[position + 1].id, (0,))[0] or 0)
+            funnel.append({
+                "stage_id": stage.id,
+                "name": stage.name,
+                "reached": n_reached,
+                "exits": exits,
+                "advanced": advanced[stage.id],
+                "median_days": _median(histograms.get(stage.id, [])),
+                "avg_days": days_total / exits if exits else None,
+                "conversion_rate": advanced[stage.id] / n_reached if n_reached else None,
+                "drop_off_rate": (
+                    max(0.0, 1 - next_reached / n_reached) if n_reached and next_reached is not None else None
+                ),
+            })
+        exits_by_stage = {row["stage_id"]: row["exits"] for row in funnel}
+        transitions = [
+            {
+                "from_stage_id": from_id, "to_stage_id": to_id, "deals": int(count),
+                "rate": int(count) / exits_by_stage[from_id] if exits_by_stage.get(from_id) else None,
+            }
+            for from_id, to_id, count in flows
+        ]
+        return {"stages": funnel, "transitions": transitions}
+
+    def _group(self, model, sector: Optional[str], deal_type: Optional[str]) -> list:
+        criteria = [model.tenant_id == self.tenant_id]
+        if sector is not None:
+            criteria.append(model.sector == sector)
+        if deal_type is not None:
+            criteria.append(model.deal_type == deal_type)
+        return criteria
+
+    # ── Rebuild ──────────────────────────────────────────────
+
+    def rebuild(self) -> int:
+        """Recompute this tenant's rollups from the transition history and commit."""
+        T = DealStageTransition
+        tenant = T.tenant_id == self.tenant_id
+        for model in (DealStageStat, DealStageDuration, DealStageFlow):
+            self.db.execute(delete(model).where(model.tenant_id == self.tenant_id))
+
+        stats: Dict[Tuple, List] = defaultdict(lambda: [0, 0, 0.0])
+        # A deal reached a stage at its first transition into or out of it
+        # (out of it: the deal entered the stage before the history began).
+        mentions = union_all(
+            select(T.id, T.deal_id, T.to_stage_id.label("stage_id"), T.sector, T.deal_type).where(tenant),
+            select(T.id, T.deal_id, T.from_stage_id.label("stage_id"), T.sector, T.deal_type)
+            .where(tenant, T.from_stage_id.isnot(None)),
+        ).subquery()
+        first = (
+            select(func.min(mentions.c.id).label("id"), mentions.c.stage_id)
+            .group_by(mentions.c.deal_id, mentions.c.stage_id)
+            .subquery()
+        )
+        for sector, deal_type, stage_id, count in self.db.execute(
+            select(mentions.c.sector, mentions.c.deal_type, mentions.c.stage_id, func.count())
+            .join(first, (first.c.id == mentions.c.id) & (first.c.stage_id == mentions.c.stage_id))
+            .group_by(mentions.c.sector, mentions.c.deal_type, mentions.c.stage_id)
+        ):
+            stats[(sector, deal_type, stage_id)][0] = count
+        for sector, deal_type, stage_id, count, days_total in self.db.execute(
+            select(T.sector, T.deal_type, T.from_stage_id, func.count(), func.sum(T.days_in_stage))
+            .where(tenant, T.from_stage_id.isnot(None))
+            .group_by(T.sector, T.deal_type, T.from_stage_id)
+        ):
+            stats[(sector, deal_type, stage_id)][1:] = [count, float(days_total or 0.0)]
+        if stats:
+            self.db.execute(insert(DealStageStat), [
+                {"tenant_id": self.tenant_id, "sector": s, "deal_type": t, "stage_id": stage_id,
+                 "reached": r, "exits": e, "days_total": d}
+                for (s, t, stage_id), (r, e, d) in stats.items()
+            ])
+
+        days = cast(T.days_in_stage, Integer)
+        durations = [
+            {"tenant_id": self.tenant_id, "sector": s, "deal_type": t, "stage_id": stage_id,
+             "days": d, "deals": count}
+            for s, t, stage_id, d, count in self.db.execute(
+                select(T.sector, T.deal_type, T.from_stage_id, days, func.count())
+                .where(tenant, T.from_stage_id.isnot(None))
+                .group_by(T.sector, T.deal_type, T.from_stage_id, days)
+            )
+        ]
+        if durations:
+            self.db.execute(insert(DealStageDuration), durations)
+        flows = [
+            {"tenant_id": self.tenant_id, "sector": s, "deal_type": t,
+             "from_stage_id": from_id, "to_stage_id": to_id, "deals": count}
+            for s, t, from_id, to_id, count in self.db.execute(
+                select(T.sector, T.deal_type, T.from_stage_id, T.to_stage_id, func.count())
+                .where(tenant, T.from_stage_id.isnot(None))
+                .group_by(T.sector, T.deal_type, T.from_stage_id, T.to_stage_id)
+            )
+        ]
+        if flows:
+            self.db.execute(insert(DealStageFlow), flows)
+        self.db.commit()
+        return len(stats) + len(durations) + len(flows)
@@ -1,4 +1,5 @@
 import os
+import shutil
 from pathlib import Path
 from typing import Tuple
 
@@ -23,3 +24,17 @@ def save_upload(file: UploadFile, prefix: str) -> Tuple[str, int]:
         size_bytes = len(data)
 
     return file_path, size_bytes
+
+
+def spool_upload(file: UploadFile, subdir: str, prefix: str) -> Tuple[str, int]:
+    """Copy an upload to ``storage_dir/subdir`` in fixed-size chunks (never fully in memory)."""
+    target_dir = Path(settings.storage_dir) / subdir
+    target_dir.mkdir(parents=True, exist_ok=True)
+    safe_name = (file.filename or "upload").replace("/", "_")
+    file_path = str(target_dir / f"{prefix}_{safe_name}")
+
+    with open(file_path, "wb") as handle:
+        shutil.copyfileobj(file.file, handle, length=1024 * 1024)
+        size_bytes = handle.tell()
+
+    return file_path, size_bytes
@@ -0,0 +1,216 @@
+"""Streaming parsers for bank statements: CSV, ISO 20022 CAMT.053 and SWIFT MT940.
+
+Each parser reads its input incrementally and yields one ``StatementLine``
+per booked transaction, so a large statement never has to be held in memory.
+"""
+
+import csv
+import re
+import xml.etree.ElementTree as ET
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional, TextIO
+
+
+class StatementFormatError(ValueError):
+    """Raised when a statement cannot be parsed."""
+
+
+class StatementLine(NamedTuple):
+    booking_date: date
+    amount: Decimal  # positive = money in
+    currency: str
+    reference: Optional[str] = None
+    counterparty: Optional[str] = None
+    bank_reference: Optional[str] = None
+
+
+# ── CSV ──────────────────────────────────────────────────────
+
+# Accepted header names per field (compared lower-cased).
+CSV_COLUMNS = {
+    "booking_date": ("booking_date", "date", "value_date", "booking date"),
+    "amount": ("amount", "value"),
+    "currency": ("currency", "ccy"),
+    "reference": ("reference", "remittance", "description", "details", "purpose"),
+    "counterparty": ("counterparty", "name", "payer", "debtor"),
+    "bank_reference": ("bank_reference", "transaction_id", "id", "ref"),
+}
+
+
+def _parse_amount(raw: str) -> Decimal:
+    value = raw.strip().replace(" ", "").replace("'", "")
+    if "," in value and "." in value:
+        # Whichever separator comes last is the decimal point.
+        value = value.replace(".", "").replace(",", ".") if value.rfind(",") > value.rfind(".") \
+            else value.replace(",", "")
+    else:
+        value = value.replace(",", ".")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise StatementFormatError(f"Invalid amount '{raw}'")
+
+
+def _parse_date(raw: str) -> date:
+    raw = raw.strip()
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%d/%m/%Y", "%Y%m%d"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    raise StatementFormatError(f"Invalid date '{raw}'")
+
+
+def iter_csv_statement(source: TextIO, default_currency: str = "EUR") -> Iterator[StatementLine]:
+    """Yield lines of a CSV export with a header row (see ``CSV_COLUMNS``)."""
+    reader = csv.DictReader(source)
+    if reader.fieldnames is None:
+        raise StatementFormatError("CSV has no headers")
+    header = {name.strip().lower(): name for name in reader.fieldnames}
+    columns: Dict[str, Optional[str]] = {
+        field: next((header[a] for a in aliases if a in header), None)
+        for field, aliases in CSV_COLUMNS.items()
+    }
+    for required in ("booking_date", "amount"):
+        if columns[required] is None:
+            raise StatementFormatError(f"CSV is missing a '{required}' column")
+
+    def get(row: Dict[str, str], field: str) -> Optional[str]:
+        column = columns[field]
+        value = (row.get(column) or "").strip() if column else ""
+        return value or None
+
+    for row_num, row in enumerate(reader, start=2):
+        try:
+            yield StatementLine(
+                booking_date=_parse_date(row[columns["booking_date"]]),
+                amount=_parse_amount(row[columns["amount"]]),
+                currency=(get(row, "currency") or default_currency).upper(),
+                reference=get(row, "reference"),
+                counterparty=get(row, "counterparty"),
+                bank_reference=get(row, "bank_reference"),
+            )
+        except StatementFormatError as e:
+            raise StatementFormatError(f"Row {row_num}: {e}")
+
+
+# ── CAMT.053 ─────────────────────────────────────────────────
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find(element: ET.Element, path: str) -> Optional[ET.Element]:
+    """Namespace-agnostic child lookup by '/'-separated local names."""
+    current = [element]
+    for name in path.split("/"):
+        current = [child for node in current for child in node if _local(child.tag) == name]
+        if not current:
+            return None
+    return current[0]
+
+
+def _text(element: ET.Element, *paths: str) -> Optional[str]:
+    for path in paths:
+        found = _find(element, path)
+        if found is not None and found.text and found.text.strip():
+            return found.text.strip()
+    return None
+
+
+def iter_camt053_statement(source: BinaryIO) -> Iterator[StatementLine]:
+    """Yield booked entries (``Ntry``) of a CAMT.053 file using ``iterparse``."""
+    try:
+        for _, element in ET.iterparse(source, events=("end",)):
+            if _local(element.tag) != "Ntry":
+                continue
+            amount_el = _find(element, "Amt")
+            if amount_el is None or not amount_el.text:
+                raise StatementFormatError("CAMT entry without an amount")
+            amount = _parse_amount(amount_el.text)
+            if _text(element, "CdtDbtInd") == "DBIT":
+                amount = -amount
+            details = "NtryDtls/TxDtls"
+            yield StatementLine(
+                booking_date=_parse_date(_text(element, "BookgDt/Dt", "ValDt/Dt") or ""),
+                amount=amount,
+                currency=amount_el.get("Ccy", "EUR"),
+                reference=_text(
+                    element,
+                    f"{details}/RmtInf/Strd/CdtrRefInf/Ref",
+                    f"{details}/RmtInf/Ustrd",
+                    "AddtlNtryInf",
+                ),
+                counterparty=_text(element, f"{details}/RltdPties/Dbtr/Nm", f"{details}/RltdPties/Cdtr/Nm"),
+                bank_reference=_text(element, "AcctSvcrRef", "NtryRef", f"{details}/Refs/EndToEndId"),
+            )
+            element.clear()  # Keep memory flat on large statements
+    except ET.ParseError as e:
+        raise StatementFormatError(f"Invalid CAMT XML: {e}")
+
+
+# ── MT940 ────────────────────────────────────────────────────
+
+# :61:YYMMDD[MMDD]C|D|RC|RD[funds code]amount N<type>customer ref[//bank ref]
+_MT940_61 = re.compile(
+    r"^(?P<date>\d{6})(?:\d{4})?(?P<mark>R?[CD])[A-Z]?(?P<amount>[\d,]+)"
+    r"N?[A-Z0-9]{3}(?P<ref>[^/\n]*)(?://(?P<bank_ref>[^\n]*))?"
+)
+_MT940_TAG = re.compile(r"^:(\d{2}[A-Z]?):")
+
+
+def _mt940_fields(source: TextIO) -> Iterator[tuple]:
+    """Yield ``(tag, content)`` per field, joining continuation lines."""
+    tag, buffer = None, []
+    for raw in source:
+        line = raw.rstrip("\r\n")
+        match = _MT940_TAG.match(line)
+        if match or line.startswith("-"):
+            if tag:
+                yield tag, "\n".join(buffer).strip()
+            tag, buffer = (match.group(1), [line[match.end():]]) if match else (None, [])
+        elif tag:
+            buffer.append(line)
+    if tag:
+        yield tag, "\n".join(buffer).strip()
+
+
+def iter_mt940_statement(source: TextIO) -> Iterator[StatementLine]:
+    """Yield ``:61:`` transactions of an MT940 file, with ``:86:`` as reference."""
+    currency = "EUR"
+    pending: Optional[StatementLine] = None
+    for tag, content in _mt940_fields(source):
+        if tag in ("60F", "60M"):
+            currency = content[7:10]
+        elif tag == "61":
+            if pending:
+                yield pending
+            match = _MT940_61.match(content)
+            if not match:
+                raise StatementFormatError(f"Invalid :61: line '{content[:40]}'")
+            amount = _parse_amount(match["amount"])
+            if match["mark"] in ("D", "RC"):
+                amount = -amount
+            pending = StatementLine(
+                booking_date=datetime.strptime(match["date"], "%y%m%d").date(),
+                amount=amount,
+                currency=currency,
+                reference=match["ref"].strip() or None,
+                bank_reference=(match["bank_ref"] or "").strip() or None,
+            )
+        elif tag == "86" and pending:
+            pending = pending._replace(reference=" ".join(content.split()))
+        elif tag in ("62F", "62M") and pending:
+            yield pending
+            pending = None
+    if pending:
+        yield pending
+
+
+# Format name -> (parser, reads bytes)
+STATEMENT_PARSERS: Dict[str, tuple] = {
+    "csv": (iter_csv_statement, False),
+    "camt053": (iter_camt053_statement, True),
+    "mt940": (iter_mt940_statement, False),
+}
@@ -0,0 +1,101 @@
+"""In-process TTL cache.
+
+A small, thread-safe, size-bounded mapping whose entries expire after a fixed
+number of seconds. Used for values that are expensive to compute but may be
+served slightly stale (list totals, report results, resolved principals).
+Callers invalidate explicitly on writes; the TTL only bounds staleness from
+writers this process cannot see.
+
+Invalidation for a write still in an open transaction is deferred with
+``on_commit``: dropping an entry at flush time would let another request
+cache the old committed value again before the write becomes visible.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+# Session.info key: {(callback, args): None} to run after the transaction commits.
+_ON_COMMIT = "cache_invalidations"
+
+
+def on_commit(session: Session, callback: Callable[..., Any], *args: Hashable) -> None:
+    """
+    Call ``callback(*args)`` once ``session``'s transaction commits (duplicates
+    run once). It also runs on rollback, so values cached from the discarded
+    writes are dropped too.
+    """
+    session.info.setdefault(_ON_COMMIT, {})[(callback, args)] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    for callback, args in session.info.pop(_ON_COMMIT, {}):
+        callback(*args)
+
+
+@event.listens_for(Session, "after_rollback")
+def _run_on_rollback(session: Session) -> None:
+    # A read inside the transaction may have cached its uncommitted writes.
+    # The queue is kept, so a later commit (e.g. of an enclosing transaction
+    # after a savepoint rollback) still runs it.
+    for callback, args in list(session.info.get(_ON_COMMIT, {})):
+        callback(*args)
+
+
+class TTLCache:
+    """Least-recently-used cache with per-entry expiry."""
+
+    def __init__(self, ttl: float, maxsize: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (self._clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``. Returns the count."""
+        with self._lock:
+            doomed = [k for k in self._data if predicate(k)]
+            for k in doomed:
+                del self._data[k]
+            return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
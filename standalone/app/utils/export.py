@@ -1,213 +1,301 @@
-"""Export utilities for bulk data export in CSV and JSON formats."""
+"""Export utilities for bulk data export in CSV, JSON and NDJSON formats.
+
+Rows are read through server-side cursors (``yield_per``) and serialized
+chunk by chunk, so memory stays constant no matter how large the table is.
+"""
 
 import csv
+import io
 import json
-import os
-import shutil
+import logging
 import tempfile
+import zipfile
 from io import StringIO
 from pathlib import Path
-from typing import Any, List, Dict
-from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from datetime import date, datetime
 
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from ..models import Company, Contact, Interaction, Document, DocumentShare
+from ..models import Company, Contact, Interaction, Document
+
+logger = logging.getLogger("ma_advisory.export")
+
+# Rows fetched per server-side cursor round trip (and per emitted chunk).
+EXPORT_CHUNK_SIZE = 1000
+
+COMPANY_FIELDS = [
+    'id', 'name', 'company_type', 'sector', 'annual_revenue',
+    'employee_count', 'created_at'
+]
+CONTACT_FIELDS = [
+    'id', 'first_name', 'last_name', 'email', 'job_title',
+    'decision_maker', 'company_id', 'created_at'
+]
+DOCUMENT_FIELDS = [
+    'id', 'document_name', 'document_type', 'deal_name', 'file_name',
+    'content_type', 'size_bytes', 'version', 'status', 'is_confidential', 'created_at'
+]
+
+# Entity name -> (model, exported fields). Drives the streaming endpoints.
+EXPORT_ENTITIES = {
+    'companies': (Company, COMPANY_FIELDS),
+    'contacts': (Contact, CONTACT_FIELDS),
+    'documents': (Document, DOCUMENT_FIELDS),
+}
+
+
+def iter_records(
+    db: Session, model, fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield rows as plain dicts, fetched ``chunk_size`` at a time from a server-side cursor."""
+    stmt = (
+        select(*[getattr(model, f) for f in fields])
+        .order_by(model.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = db.execute(stmt)
+    try:
+        for partition in result.partitions():
+            for row in partition:
+                yield dict(row._mapping)
+    finally:
+        result.close()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _json_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        k: v.isoformat() if isinstance(v, (datetime, date)) else v
+        for k, v in record.items()
+    }
+
+
+def _csv_lines(
+    records: Iterable[Dict[str, Any]], fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for count, record in enumerate(records, start=1):
+        writer.writerow([_csv_value(record[f]) for f in fields])
+        if count % chunk_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
+
+
+def stream_csv(
+    db: Session, model, fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Yield a CSV export (header first) in chunks of ``chunk_size`` rows."""
+    return _csv_lines(iter_records(db, model, fields, chunk_size), fields, chunk_size)
+
+
+def _json_chunks(
+    db: Session, model, fields: Sequence[str], chunk_size: int
+) -> Iterator[List[str]]:
+    """Yield lists of up to ``chunk_size`` serialized JSON objects."""
+    lines: List[str] = []
+    for record in iter_records(db, model, fields, chunk_size):
+        lines.append(json.dumps(_json_record(record), default=str))
+        if len(lines) == chunk_size:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def stream_ndjson(
+    db: Session, model, fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Yield newline-delimited JSON, one object per row, in chunks of ``chunk_size`` rows."""
+    for lines in _json_chunks(db, model, fields, chunk_size):
+        yield '\n'.join(lines) + '\n'
+
+
+def stream_json_array(
+    db: Session, model, fields: Sequence[str], chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Yield a single JSON array incrementally, without materializing the row list."""
+    yield '['
+    separator = ''
+    for lines in _json_chunks(db, model, fields, chunk_size):
+        yield separator + ','.join(lines)
+        separator = ','
+    yield ']'
 
 
 def export_companies_csv(db: Session) -> str:
     """Export all companies as CSV string."""
-    companies = db.query(Company).all()
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        'id', 'name', 'company_type', 'sector', 'annual_revenue',
-        'employee_count', 'created_at'
-    ])
-    
-    for company in companies:
-        writer.writerow([
-            company.id,
-            company.name,
-            company.company_type or '',
-            company.sector or '',
-            company.annual_revenue or '',
-            company.employee_count or '',
-            company.created_at.isoformat() if company.created_at else ''
-        ])
-    
-    return output.getvalue()
+    return ''.join(stream_csv(db, Company, COMPANY_FIELDS))
 
 
 def export_companies_json(db: Session) -> List[Dict[str, Any]]:
     """Export all companies as JSON list."""
-    companies = db.query(Company).all()
-    
-    result = []
-    for company in companies:
-        result.append({
-            'id': company.id,
-            'name': company.name,
-            'company_type': company.company_type,
-            'sector': company.sector,
-            'annual_revenue': company.annual_revenue,
-            'employee_count': company.employee_count,
-            'created_at': company.created_at.isoformat() if company.created_at else None
-        })
-    
-    return result
+    return [_json_record(r) for r in iter_records(db, Company, COMPANY_FIELDS)]
 
 
 def export_contacts_csv(db: Session) -> str:
     """Export all contacts as CSV string."""
-    contacts = db.query(Contact).all()
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        'id', 'first_name', 'last_name', 'email', 'job_title',
-        'decision_maker', 'company_id', 'created_at'
-    ])
-    
-    for contact in contacts:
-        writer.writerow([
-            contact.id,
-            contact.first_name or '',
-            contact.last_name or '',
-            contact.email or '',
-            contact.job_title or '',
-            contact.decision_maker or False,
-            contact.company_id or '',
-            contact.created_at.isoformat() if contact.created_at else ''
-        ])
-    
-    return output.getvalue()
+    return ''.join(stream_csv(db, Contact, CONTACT_FIELDS))
 
 
 def export_contacts_json(db: Session) -> List[Dict[str, Any]]:
     """Export all contacts as JSON list."""
-    contacts = db.query(Contact).all()
-    
-    result = []
-    for contact in contacts:
-        result.append({
-            'id': contact.id,
-            'first_name': contact.first_name,
-            'last_name': contact.last_name,
-            'email': contact.email,
-            'job_title': contact.job_title,
-            'decision_maker': contact.decision_maker,
-            'company_id': contact.company_id,
-            'created_at': contact.created_at.isoformat() if contact.created_at else None
-        })
-    
-    return result
+    return [_json_record(r) for r in iter_records(db, Contact, CONTACT_FIELDS)]
 
 
 def export_documents_csv(db: Session) -> str:
     """Export all documents as CSV string (metadata only)."""
-    documents = db.query(Document).all()
-    
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow([
-        'id', 'document_name', 'document_type', 'deal_name', 'file_name',
-        'content_type', 'size_bytes', 'version', 'status', 'is_confidential', 'created_at'
-    ])
-    
-    for doc in documents:
-        writer.writerow([
-            doc.id,
-            doc.document_name or '',
-            doc.document_type or '',
-            doc.deal_name or '',
-            doc.file_name or '',
-            doc.content_type or '',
-            doc.size_bytes or '',
-            doc.version or '',
-            doc.status or '',
-            doc.is_confidential or False,
-            doc.created_at.isoformat() if doc.created_at else ''
-        ])
-    
-    return output.getvalue()
+    return ''.join(stream_csv(db, Document, DOCUMENT_FIELDS))
 
 
 def export_documents_json(db: Session) -> List[Dict[str, Any]]:
     """Export all documents as JSON list (metadata only)."""
-    documents = db.query(Document).all()
-    
-    result = []
-    for doc in documents:
-        result.append({
-            'id': doc.id,
-            'document_name': doc.document_name,
-            'document_type': doc.document_type,
-            'deal_name': doc.deal_name,
-            'file_name': doc.file_name,
-            'content_type': doc.content_type,
-            'size_bytes': doc.size_bytes,
-            'version': doc.version,
-            'status': doc.status,
-            'is_confidential': doc.is_confidential,
-            'created_at': doc.created_at.isoformat() if doc.created_at else None
-        })
-    
-    return result
+    return [_json_record(r) for r in iter_records(db, Document, DOCUMENT_FIELDS)]
 
 
-def create_zip_export(db: Session, storage_dir: str) -> str:
-    """Create complete export zip with CSV/JSON and document attachments."""
-    temp_dir = tempfile.mkdtemp()
-    try:
-        # Create data subdirectory
-        data_dir = Path(temp_dir) / 'data'
-        data_dir.mkdir(exist_ok=True)
-        
-        # Export CSVs
-        with open(data_dir / 'companies.csv', 'w') as f:
-            f.write(export_companies_csv(db))
-        with open(data_dir / 'contacts.csv', 'w') as f:
-            f.write(export_contacts_csv(db))
-        with open(data_dir / 'documents.csv', 'w') as f:
-            f.write(export_documents_csv(db))
-        
-        # Export JSONs
-        with open(data_dir / 'companies.json', 'w') as f:
-            json.dump(export_companies_json(db), f, indent=2)
-        with open(data_dir / 'contacts.json', 'w') as f:
-            json.dump(export_contacts_json(db), f, indent=2)
-        with open(data_dir / 'documents.json', 'w') as f:
-            json.dump(export_documents_json(db), f, indent=2)
-        
-        # Copy document files
-        docs_dir = Path(temp_dir) / 'documents'
-        docs_dir.mkdir(exist_ok=True)
-        
-        documents = db.query(Document).all()
-        for doc in documents:
-            if doc.file_path:
-                src = Path(storage_dir) / doc.file_path
-                if src.exists():
-                    dest = docs_dir / f"{doc.id}_{doc.file_name}"
-                    shutil.copy2(src, dest)
-        
-        # Create metadata
+# Files in these formats are already compressed; deflating them again only costs CPU.
+STORED_EXTENSIONS = {
+    '.pdf', '.zip', '.gz', '.7z', '.rar',
+    '.xlsx', '.docx', '.pptx', '.odt', '.ods',
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.mp4', '.mov',
+}
+
+# Read size for copying stored document files into the archive.
+FILE_CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, unseekable sink that buffers zip output until drained."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> Iterator[bytes]:
+        """Yield everything written since the last drain (nothing if empty)."""
+        if self._chunks:
+            data = b''.join(self._chunks)
+            self._chunks.clear()
+            yield data
+
+
+def _resolve_document_path(storage_dir: str, file_path: str) -> Optional[Path]:
+    """
+    Locate a stored document, whether its path is storage-relative or already
+    joined. Paths resolving outside ``storage_dir`` (absolute paths, ``..``,
+    symlinks) are never read.
+    """
+    root = Path(storage_dir).resolve()
+    inside = [
+        resolved for resolved in ((root / file_path).resolve(), Path(file_path).resolve())
+        if resolved.is_relative_to(root)
+    ]
+    if not inside:
+        logger.warning("Skipping document stored outside %s: %s", root, file_path)
+    return next((path for path in inside if path.is_file()), None)
+
+
+def stream_zip_export(
+    db: Session, storage_dir: str, store_compressed: bool = True
+) -> Iterator[bytes]:
+    """
+    Yield a complete export ZIP built on the fly.
+
+    Data files are serialized straight from DB cursors and document files are
+    copied from storage in chunks, so nothing is staged on disk and memory is
+    bounded by one chunk. With ``store_compressed``, files whose format is
+    already compressed (PDF, Office, images) are stored rather than deflated.
+    """
+    sink = _ChunkSink()
+    now = datetime.now()
+    counts: Dict[str, int] = {}
+    documents: List[tuple] = []
+
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+
+        def write_entry(name: str, chunks: Iterable, compress_type: int = zipfile.ZIP_DEFLATED,
+                        date_time=now.timetuple()[:6]) -> Iterator[bytes]:
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.compress_type = compress_type
+            with zf.open(info, 'w', force_zip64=True) as dest:
+                for chunk in chunks:
+                    dest.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+
+        for entity, (model, fields) in EXPORT_ENTITIES.items():
+            counts[entity] = 0
+            # Document paths are collected during the CSV pass so the file
+            # copy below needs no second query.
+            extra = ['file_path'] if model is Document else []
+
+            def counted(model=model, fields=fields, entity=entity, extra=extra):
+                for record in iter_records(db, model, list(fields) + extra):
+                    counts[entity] += 1
+                    if extra and record['file_path']:
+                        documents.append((record['id'], record['file_name'], record['file_path']))
+                    yield record
+
+            yield from write_entry(f'data/{entity}.csv', _csv_lines(counted(), fields))
+            yield from write_entry(f'data/{entity}.json', stream_json_array(db, model, fields))
+
+        for doc_id, file_name, file_path in documents:
+            src = _resolve_document_path(storage_dir, file_path)
+            if src is None:
+                continue
+            stored = store_compressed and src.suffix.lower() in STORED_EXTENSIONS
+            yield from write_entry(
+                f'documents/{doc_id}_{file_name}',
+                _read_file_chunks(src),
+                compress_type=zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED,
+                date_time=datetime.fromtimestamp(src.stat().st_mtime).timetuple()[:6],
+            )
+
         metadata = {
-            'export_date': datetime.now().isoformat(),
-            'total_companies': db.query(Company).count(),
-            'total_contacts': db.query(Contact).count(),
-            'total_documents': db.query(Document).count(),
-            'total_interactions': db.query(Interaction).count()
+            'export_date': now.isoformat(),
+            'total_companies': counts['companies'],
+            'total_contacts': counts['contacts'],
+            'total_documents': counts['documents'],
+            'total_interactions': db.query(func.count(Interaction.id)).scalar(),
         }
-        with open(Path(temp_dir) / 'metadata.json', 'w') as f:
-            json.dump(metadata, f, indent=2)
-        
-        # Create zip
-        zip_path = Path(temp_dir).parent / f"ma_advisory_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        shutil.make_archive(str(zip_path), 'zip', temp_dir)
-        
-        return str(zip_path) + '.zip'
-    
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
+        yield from write_entry('metadata.json', [json.dumps(metadata, indent=2)])
+
+    yield from sink.drain()
+
+
+def _read_file_chunks(path: Path) -> Iterator[bytes]:
+    with open(path, 'rb') as handle:
+        while True:
+            chunk = handle.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def create_zip_export(db: Session, storage_dir: str) -> str:
+    """Write the streaming export ZIP to a file in the temp directory and return its path."""
+    zip_path = Path(tempfile.gettempdir()) / (
+        f"ma_advisory_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    )
+    with open(zip_path, 'wb') as handle:
+        for chunk in stream_zip_export(db, storage_dir):
+            handle.write(chunk)
+    return str(zip_path)
@@ -1,14 +1,24 @@
-"""Import utilities for bulk data import from CSV and JSON formats."""
+"""Import utilities for bulk data import from CSV and JSON formats.
+
+Rows are processed in chunks of ``IMPORT_CHUNK_SIZE``: each chunk pre-loads
+its existing duplicate keys (and referenced company ids) with one ``IN``
+query, then inserts all valid rows with a single executemany ``INSERT``.
+"""
 
 import csv
 import json
 from io import StringIO
-from typing import Any, Dict, List, Optional, Tuple
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 
-from ..models import Company, Contact, Interaction, Document
+from ..models import Company, Contact
+
+
+# Rows validated and inserted per round trip.
+IMPORT_CHUNK_SIZE = 1000
 
 
 class ImportError(Exception):
@@ -23,7 +33,7 @@ class ImportResult:
         self.failed = 0
         self.errors: List[str] = []
         self.warnings: List[str] = []
-    
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             'successful': self.successful,
@@ -33,208 +43,254 @@ class ImportResult:
         }
 
 
-def import_companies_csv(db: Session, csv_content: str) -> ImportResult:
-    """Import companies from CSV content."""
-    result = ImportResult()
-    
-    try:
-        reader = csv.DictReader(StringIO(csv_content))
-        if reader.fieldnames is None:
-            raise ImportError("CSV has no headers")
-        
-        for row_num, row in enumerate(reader, start=2):  # start at 2 (header is 1)
+# A record is (label used in messages, raw row/item).
+Record = Tuple[str, Dict[str, Any]]
+
+
+def _to_int(value: Any) -> Optional[int]:
+    if value is None or value == '':
+        return None
+    return int(value)
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() == 'true'
+    return bool(value)
+
+
+def _company_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'name': item['name'],
+        'company_type': item.get('company_type') or None,
+        'sector': item.get('sector') or None,
+        'annual_revenue': _to_int(item.get('annual_revenue')),
+        'employee_count': _to_int(item.get('employee_count')),
+    }
+
+
+def _contact_values(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'first_name': item.get('first_name') or '',
+        'last_name': item.get('last_name') or '',
+        'email': item['email'],
+        'job_title': item.get('job_title') or None,
+        'decision_maker': _to_bool(item.get('decision_maker', False)),
+        'company_id': _to_int(item.get('company_id')),
+    }
+
+
+# Entity -> (model, dedup key field, row builder, duplicate warning template)
+IMPORT_ENTITIES = {
+    'companies': (Company, 'name', _company_values, "Company '{}' already exists"),
+    'contacts': (Contact, 'email', _contact_values, "Contact with email '{}' already exists"),
+}
+
+
+def iter_csv_records(source: Union[str, TextIO]) -> Iterator[Record]:
+    """Yield CSV rows lazily. Raises ImportError if the CSV has no header."""
+    reader = csv.DictReader(StringIO(source) if isinstance(source, str) else source)
+    if reader.fieldnames is None:
+        raise ImportError("CSV has no headers")
+    for row_num, row in enumerate(reader, start=2):  # start at 2 (header is 1)
+        yield f"Row {row_num}", row
+
+
+def iter_json_records(content: str, kind: str) -> Iterator[Record]:
+    """Yield items of a JSON array. Raises ImportError if it is not an array."""
+    data = json.loads(content)
+    if not isinstance(data, list):
+        raise ImportError(f"JSON must be an array of {kind} objects")
+    for idx, item in enumerate(data):
+        yield f"Item {idx}", item
+
+
+def iter_json_stream(handle: TextIO, kind: str, read_size: int = 1 << 16) -> Iterator[Record]:
+    """
+    Yield items of a JSON array read incrementally from ``handle``; memory
+    holds one read block plus the item being decoded, not the whole file.
+    Raises ImportError if it is not an array, ValueError if it is malformed.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+
+    def more() -> bool:
+        nonlocal buffer, pos, eof
+        block = handle.read(read_size)
+        buffer, pos, eof = buffer[pos:] + block, 0, not block
+        return bool(block)
+
+    def next_char() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not more():
+                return buffer[pos] if pos < len(buffer) else ""
+
+    if next_char() != "[":
+        raise ImportError(f"JSON must be an array of {kind} objects")
+    pos += 1
+    if next_char() == "]":
+        return
+    idx = 0
+    while True:
+        next_char()
+        while True:
             try:
-                # Validate required fields
-                if not row.get('name'):
-                    result.errors.append(f"Row {row_num}: Missing required field 'name'")
-                    result.failed += 1
-                    continue
-                
-                # Check for duplicate
-                existing = db.query(Company).filter(Company.name == row['name']).first()
-                if existing:
-                    result.warnings.append(f"Row {row_num}: Company '{row['name']}' already exists")
-                    result.failed += 1
-                    continue
-                
-                # Create company
-                company = Company(
-                    name=row['name'],
-                    company_type=row.get('company_type') or None,
-                    sector=row.get('sector') or None,
-                    annual_revenue=row.get('annual_revenue') or None,
-                    employee_count=row.get('employee_count') or None
-                )
-                db.add(company)
-                result.successful += 1
-                
-            except Exception as e:
-                result.errors.append(f"Row {row_num}: {str(e)}")
+                item, end = decoder.raw_decode(buffer, pos)
+                # A number or literal cut at the block edge may decode short.
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            more()
+        pos = end
+        yield f"Item {idx}", item
+        idx += 1
+        separator = next_char()
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ValueError(f"Expected ',' or ']' after item {idx - 1}")
+
+
+def _chunks(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def bulk_import(
+    db: Session,
+    entity: str,
+    records: Iterable[Record],
+    result: Optional[ImportResult] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[ImportResult, int], None]] = None,
+) -> ImportResult:
+    """
+    Validate and insert ``records`` for ``entity`` ('companies' or 'contacts').
+
+    Each chunk costs one key lookup, one company lookup (contacts only), one
+    executemany INSERT and one commit. Rows already in the database or
+    repeated within the file are reported as warnings; invalid rows as
+    errors. ``on_chunk(result, rows_seen)`` runs just before each chunk's
+    commit, so anything it writes is committed atomically with the rows.
+    """
+    model, key_field, build, duplicate_msg = IMPORT_ENTITIES[entity]
+    key_column = getattr(model, key_field)
+    result = result or ImportResult()
+    seen_keys = set()
+    rows_seen = 0
+
+    for chunk in _chunks(records, chunk_size):
+        rows_seen += len(chunk)
+        keyed: List[Record] = []
+        for label, item in chunk:
+            if not isinstance(item, dict):
+                result.errors.append(f"{label}: Expected an object")
                 result.failed += 1
-        
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        result.errors.append(f"CSV parsing error: {str(e)}")
-        result.failed += 1
-    
-    return result
+            elif not item.get(key_field):
+                result.errors.append(f"{label}: Missing required field '{key_field}'")
+                result.failed += 1
+            else:
+                keyed.append((label, item))
 
+        keys = {item[key_field] for _, item in keyed}
+        existing = set(db.scalars(select(key_column).where(key_column.in_(keys)))) if keys else set()
 
-def import_companies_json(db: Session, json_content: str) -> ImportResult:
-    """Import companies from JSON content."""
-    result = ImportResult()
-    
-    try:
-        data = json.loads(json_content)
-        if not isinstance(data, list):
-            raise ImportError("JSON must be an array of company objects")
-        
-        for idx, item in enumerate(data):
+        company_ids = set()
+        if model is Contact:
+            for _, item in keyed:
+                try:
+                    company_ids.add(_to_int(item.get('company_id')))
+                except (TypeError, ValueError):
+                    pass
+            company_ids.discard(None)
+        known_companies = (
+            set(db.scalars(select(Company.id).where(Company.id.in_(company_ids))))
+            if company_ids else set()
+        )
+
+        labels: List[str] = []
+        values: List[Dict[str, Any]] = []
+        for label, item in keyed:
+            key = item[key_field]
+            if key in existing or key in seen_keys:
+                result.warnings.append(f"{label}: {duplicate_msg.format(key)}")
+                result.failed += 1
+                continue
             try:
-                if not item.get('name'):
-                    result.errors.append(f"Item {idx}: Missing required field 'name'")
-                    result.failed += 1
-                    continue
-                
-                # Check for duplicate
-                existing = db.query(Company).filter(Company.name == item['name']).first()
-                if existing:
-                    result.warnings.append(f"Item {idx}: Company '{item['name']}' already exists")
-                    result.failed += 1
-                    continue
-                
-                company = Company(
-                    name=item['name'],
-                    company_type=item.get('company_type'),
-                    sector=item.get('sector'),
-                    annual_revenue=item.get('annual_revenue'),
-                    employee_count=item.get('employee_count')
-                )
-                db.add(company)
-                result.successful += 1
-                
+                row = build(item)
             except Exception as e:
-                result.errors.append(f"Item {idx}: {str(e)}")
+                result.errors.append(f"{label}: {str(e)}")
+                result.failed += 1
+                continue
+            if model is Contact and row['company_id'] is not None \
+                    and row['company_id'] not in known_companies:
+                result.errors.append(f"{label}: Company with id {item.get('company_id')} not found")
                 result.failed += 1
-        
+                continue
+            seen_keys.add(key)
+            labels.append(label)
+            values.append(row)
+
+        if values:
+            try:
+                db.execute(insert(model), values)
+                result.successful += len(values)
+            except Exception as e:
+                db.rollback()
+                for key in (v[key_field] for v in values):
+                    seen_keys.discard(key)
+                result.errors.append(f"{labels[0]} to {labels[-1]}: insert failed: {str(e)}")
+                result.failed += len(values)
+
+        if on_chunk:
+            on_chunk(result, rows_seen)
         db.commit()
-    except Exception as e:
-        db.rollback()
-        result.errors.append(f"JSON parsing error: {str(e)}")
-        result.failed += 1
-    
+
     return result
 
 
-def import_contacts_csv(db: Session, csv_content: str) -> ImportResult:
-    """Import contacts from CSV content."""
+def _run_import(
+    db: Session, entity: str, records: Callable[[], Iterable[Record]], error_prefix: str
+) -> ImportResult:
     result = ImportResult()
-    
     try:
-        reader = csv.DictReader(StringIO(csv_content))
-        if reader.fieldnames is None:
-            raise ImportError("CSV has no headers")
-        
-        for row_num, row in enumerate(reader, start=2):
-            try:
-                # Validate required fields
-                if not row.get('email'):
-                    result.errors.append(f"Row {row_num}: Missing required field 'email'")
-                    result.failed += 1
-                    continue
-                
-                # Check for duplicate
-                existing = db.query(Contact).filter(Contact.email == row['email']).first()
-                if existing:
-                    result.warnings.append(f"Row {row_num}: Contact with email '{row['email']}' already exists")
-                    result.failed += 1
-                    continue
-                
-                # Validate company_id if exists
-                company_id = row.get('company_id')
-                if company_id:
-                    company = db.query(Company).filter(Company.id == company_id).first()
-                    if not company:
-                        result.errors.append(f"Row {row_num}: Company with id {company_id} not found")
-                        result.failed += 1
-                        continue
-                
-                contact = Contact(
-                    first_name=row.get('first_name') or '',
-                    last_name=row.get('last_name') or '',
-                    email=row['email'],
-                    job_title=row.get('job_title') or None,
-                    decision_maker=row.get('decision_maker', 'False').lower() == 'true',
-                    company_id=company_id or None
-                )
-                db.add(contact)
-                result.successful += 1
-                
-            except Exception as e:
-                result.errors.append(f"Row {row_num}: {str(e)}")
-                result.failed += 1
-        
-        db.commit()
+        bulk_import(db, entity, records(), result)
     except Exception as e:
         db.rollback()
-        result.errors.append(f"CSV parsing error: {str(e)}")
+        result.errors.append(f"{error_prefix}: {str(e)}")
         result.failed += 1
-    
     return result
 
 
+def import_companies_csv(db: Session, csv_content: str) -> ImportResult:
+    """Import companies from CSV content."""
+    return _run_import(db, 'companies', lambda: iter_csv_records(csv_content), "CSV parsing error")
+
+
+def import_companies_json(db: Session, json_content: str) -> ImportResult:
+    """Import companies from JSON content."""
+    return _run_import(
+        db, 'companies', lambda: iter_json_records(json_content, 'company'), "JSON parsing error"
+    )
+
+
+def import_contacts_csv(db: Session, csv_content: str) -> ImportResult:
+    """Import contacts from CSV content."""
+    return _run_import(db, 'contacts', lambda: iter_csv_records(csv_content), "CSV parsing error")
+
+
 def import_contacts_json(db: Session, json_content: str) -> ImportResult:
     """Import contacts from JSON content."""
-    result = ImportResult()
-    
-    try:
-        data = json.loads(json_content)
-        if not isinstance(data, list):
-            raise ImportError("JSON must be an array of contact objects")
-        
-        for idx, item in enumerate(data):
-            try:
-                if not item.get('email'):
-                    result.errors.append(f"Item {idx}: Missing required field 'email'")
-                    result.failed += 1
-                    continue
-                
-                # Check for duplicate
-                existing = db.query(Contact).filter(Contact.email == item['email']).first()
-                if existing:
-                    result.warnings.append(f"Item {idx}: Contact with email '{item['email']}' already exists")
-                    result.failed += 1
-                    continue
-                
-                # Validate company_id if exists
-                company_id = item.get('company_id')
-                if company_id:
-                    company = db.query(Company).filter(Company.id == company_id).first()
-                    if not company:
-                        result.errors.append(f"Item {idx}: Company with id {company_id} not found")
-                        result.failed += 1
-                        continue
-                
-                contact = Contact(
-                    first_name=item.get('first_name') or '',
-                    last_name=item.get('last_name') or '',
-                    email=item['email'],
-                    job_title=item.get('job_title'),
-                    decision_maker=item.get('decision_maker', False),
-                    company_id=company_id
-                )
-                db.add(contact)
-                result.successful += 1
-                
-            except Exception as e:
-                result.errors.append(f"Item {idx}: {str(e)}")
-                result.failed += 1
-        
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        result.errors.append(f"JSON parsing error: {str(e)}")
-        result.failed += 1
-    
-    return result
+    return _run_import(
+        db, 'contacts', lambda: iter_json_records(json_content, 'contact'), "JSON parsing error"
+    )
@@ -0,0 +1,106 @@
+"""
+Dashboard filter benchmark: filter expressions on ``GET /deals``.
+
+Seeds N deals over 12 stages, 40 owners, a spread of target values and
+closing dates, runs ``ANALYZE`` and times the common dashboard queries
+(first keyset page and exact count) with and without the composite
+indexes. Each query's plan is checked with ``EXPLAIN``: with the indexes
+in place it must use one of them instead of scanning ``deals``.
+
+    python -m benchmarks.bench_deal_filters [N]
+"""
+
+import random
+import sys
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, insert, select
+
+from app.models import Deal
+from app.services.deals import DealService
+from benchmarks.common import bench_session, explain, print_table, timer
+
+PAGE_SIZE = 50
+REPEATS = 5
+SEED_CHUNK = 10_000
+COMPOSITE_INDEXES = ("ix_deals_tenant_stage_close", "ix_deals_tenant_owner_close", "ix_deals_tenant_close")
+
+TODAY = date.today()
+
+QUERIES = {
+    "late stages, 20M-200M, this quarter": [
+        "stage_id:in:9,10,11", "target_value:between:20000000,200000000",
+        "expected_close_date:within:this_quarter",
+    ],
+    "my team, closing in 30 days": ["owner_user_id:in:3,7,12,21", "expected_close_date:within:next_30d"],
+    "closing this quarter": ["expected_close_date:within:this_quarter"],
+    "early stages, no close date": ["stage_id:in:1,2", "expected_close_date:null:true"],
+}
+
+
+def _seed(db, n: int) -> None:
+    rng = random.Random(7)
+    for lo in range(0, n, SEED_CHUNK):
+        db.execute(insert(Deal), [
+            {
+                "title": f"Deal {i}", "deal_type": "sell-side", "tenant_id": "default",
+                "stage_id": rng.randint(1, 12), "owner_user_id": rng.randint(1, 40),
+                "target_value": Decimal(rng.randint(1, 500) * 1_000_000),
+                "expected_close_date": (
+                    None if rng.random() < 0.1 else TODAY + timedelta(days=rng.randint(-720, 720))
+                ),
+            }
+            for i in range(lo, min(lo + SEED_CHUNK, n))
+        ])
+    db.commit()
+
+
+def _best_ms(fn) -> str:
+    best = float("inf")
+    for _ in range(REPEATS):
+        with timer() as elapsed:
+            fn()
+        best = min(best, elapsed[0])
+    return f"{best * 1000:.2f}"
+
+
+def _run(db, svc: DealService) -> dict:
+    """Per query: (index used by the count, page ms, count ms)."""
+    results = {}
+    for label, expressions in QUERIES.items():
+        where = svc.parse_filters(expressions)
+        criteria = svc.repo.criteria(where)
+        plan = explain(db, select(func.count()).select_from(Deal).where(*criteria))
+        used = next((name for name in COMPOSITE_INDEXES if any(name in line for line in plan)), "-")
+        results[label] = (
+            used,
+            _best_ms(lambda where=where: svc.list_page(limit=PAGE_SIZE, where=where)),
+            _best_ms(lambda where=where: svc.count(where=where)),
+        )
+        db.expunge_all()
+    return results
+
+
+def main(n: int) -> None:
+    with bench_session() as db:
+        _seed(db, n)
+        db.connection().exec_driver_sql("ANALYZE")
+        svc = DealService(db)
+        indexed = _run(db, svc)
+        for name in COMPOSITE_INDEXES:
+            db.connection().exec_driver_sql(f"DROP INDEX {name}")
+        db.connection().exec_driver_sql("ANALYZE")
+        plain = _run(db, svc)
+        db.rollback()
+    unindexed = [label for label, (used, _, _) in indexed.items() if used == "-"]
+    print_table(
+        ("query", "index", "page ms", "count ms", "page ms (no composite)", "count ms (no composite)"),
+        [(label, *indexed[label], *plain[label][1:]) for label in QUERIES],
+    )
+    if unindexed:
+        raise SystemExit(f"no composite index used for: {', '.join(unindexed)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,96 @@
+"""
+Deal list latency: full ORM pages vs. lean ``fields=`` rows.
+
+Seeds N deals, each linked to a company, a contact, an owner and two team
+members, and times building one JSON page of ``GET /deals`` both ways:
+
+  - orm: ``DealService.list_page`` (Deal objects with their joined and
+    selectin eager loads) validated into ``DealListOut`` and dumped
+  - lean: ``DealService.list_page_rows`` (one Core SELECT of the requested
+    columns) dumped straight from the row dicts
+
+A fresh session state is used for every run, as for a request.
+
+    python -m benchmarks.bench_deal_list_fields [N]
+"""
+
+import sys
+
+from pydantic_core import to_json
+from sqlalchemy import insert
+
+from app.models import Company, Contact, Deal, DealTeamMember, User
+from app.schemas.deals import DealListOut
+from app.services.deals import DealService, seed_default_stages
+from benchmarks.common import bench_session, print_table, timer
+
+REPEATS = 5
+SEED_CHUNK = 10_000
+
+TABLE_FIELDS = "title,stage_id,target_value,currency,expected_close_date"
+
+
+def _seed(db, n: int) -> None:
+    stages = [stage.id for stage in seed_default_stages(db)]
+    db.execute(insert(User), [
+        {"email": f"banker{i}@example.com", "hashed_password": "x", "tenant_id": "default"} for i in range(20)
+    ])
+    db.execute(insert(Company), [{"name": f"Company {i}", "tenant_id": "default"} for i in range(1000)])
+    db.execute(insert(Contact), [
+        {"first_name": "Ann", "last_name": f"Lee {i}", "email": f"c{i}@example.com", "tenant_id": "default"}
+        for i in range(1000)
+    ])
+    for lo in range(0, n, SEED_CHUNK):
+        ids = range(lo + 1, min(lo + SEED_CHUNK, n) + 1)
+        db.execute(insert(Deal), [
+            {"id": i, "title": f"Project {i}", "deal_type": "sell-side", "stage_id": stages[i % len(stages)],
+             "target_value": 1_000_000 + i, "description": "Carve-out of the regional logistics business " * 4,
+             "company_id": i % 1000 + 1, "lead_contact_id": i % 1000 + 1, "owner_user_id": i % 20 + 1,
+             "tenant_id": "default"}
+            for i in ids
+        ])
+        db.execute(insert(DealTeamMember), [
+            {"deal_id": i, "user_id": (i + k) % 20 + 1, "role": "analyst", "tenant_id": "default"}
+            for i in ids for k in (1, 2)
+        ])
+    db.commit()
+
+
+def _best_ms(db, fn) -> str:
+    best = float("inf")
+    for _ in range(REPEATS):
+        db.expunge_all()
+        with timer() as elapsed:
+            fn()
+        best = min(best, elapsed[0])
+    return f"{best * 1000:.2f}"
+
+
+def main(n: int) -> None:
+    results = []
+    with bench_session() as db:
+        _seed(db, n)
+        svc = DealService(db)
+        table_fields = svc.parse_fields(TABLE_FIELDS)
+        all_fields = svc.parse_fields(",".join(svc.LIST_FIELDS))
+
+        def orm_page(limit):
+            deals, cursor = svc.list_page(limit=limit)
+            return DealListOut(items=deals, total=n, offset=0, limit=limit, next_cursor=cursor).model_dump_json()
+
+        def lean_page(fields, limit):
+            rows, cursor = svc.list_page_rows(fields, limit=limit)
+            return to_json({"items": rows, "total": n, "offset": 0, "limit": limit, "next_cursor": cursor})
+
+        for limit in (50, 200):
+            results.append((
+                limit,
+                _best_ms(db, lambda limit=limit: orm_page(limit)),
+                _best_ms(db, lambda limit=limit: lean_page(all_fields, limit)),
+                _best_ms(db, lambda limit=limit: lean_page(table_fields, limit)),
+            ))
+    print_table(("page size", "orm ms", "lean all fields ms", f"lean {TABLE_FIELDS} ms"), results)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,101 @@
+"""
+Full-text deal search latency.
+
+Seeds N deals with NOTES_PER_DEAL notes each, builds the index over them
+in one pass (as on an upgrade) and times one 20-hit page of
+``DealSearchService.search`` for rare, common and prefix queries. Also
+times adding one note, which re-indexes its deal through the triggers:
+
+    python -m benchmarks.bench_deal_search [N] [NOTES_PER_DEAL]
+"""
+
+import random
+import sys
+from itertools import accumulate
+
+from sqlalchemy import insert
+
+from app.models import Deal, DealNote, User
+from app.models.search import create_deal_search, drop_deal_search
+from app.services.deals import DealService
+from app.services.search import DealSearchService
+from benchmarks.common import bench_session, print_table, timer
+
+PAGE_SIZE = 20
+REPEATS = 5
+SEED_CHUNK = 10_000
+
+# Domain words head a Zipf-distributed vocabulary with a long synthetic tail,
+# so queries range from words in most deals to words in a handful.
+WORDS = (
+    "acquisition buyout carve-out divestiture merger recapitalisation refinancing "
+    "logistics software healthcare fintech retail energy industrial media telecom "
+    "nordic iberian benelux alpine baltic management presentation teaser datasite "
+    "diligence valuation synergies earn-out escrow warranty indemnity covenant"
+).split()
+
+VOCABULARY = WORDS + [f"term{i}" for i in range(20_000)]
+CUM_WEIGHTS = list(accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+QUERIES = ("orion", "term15000", "term500", "nordic software", "synerg", "acquisition")
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+
+def _seed(db, n: int, notes_per_deal: int) -> None:
+    rng = random.Random(42)
+    db.execute(insert(User), [{"email": "bench@example.com", "hashed_password": "x", "tenant_id": "default"}])
+    author_id = db.query(User.id).scalar()
+    for lo in range(0, n, SEED_CHUNK):
+        db.execute(insert(Deal), [
+            {"id": i + 1, "title": f"Project {i} {_text(rng, 2)}", "deal_type": "sell-side",
+             "description": _text(rng, 30), "notes": _text(rng, 10), "tenant_id": "default"}
+            for i in range(lo, min(lo + SEED_CHUNK, n))
+        ])
+        db.execute(insert(DealNote), [
+            {"deal_id": i + 1, "author_id": author_id, "content": _text(rng, 25), "tenant_id": "default"}
+            for i in range(lo, min(lo + SEED_CHUNK, n)) for _ in range(notes_per_deal)
+        ])
+    # One needle for the rare-term query.
+    db.execute(insert(DealNote), [
+        {"deal_id": n // 2, "author_id": author_id, "content": "Orion LOI received", "tenant_id": "default"}
+    ])
+    db.commit()
+
+
+def _best_ms(fn) -> str:
+    best = float("inf")
+    for _ in range(REPEATS):
+        with timer() as elapsed:
+            fn()
+        best = min(best, elapsed[0])
+    return f"{best * 1000:.2f}"
+
+
+def main(n: int, notes_per_deal: int) -> None:
+    with bench_session() as db:
+        drop_deal_search(db.connection())
+        _seed(db, n, notes_per_deal)
+        with timer() as indexed:
+            create_deal_search(db.connection())
+            db.commit()
+        print(f"indexed {n:,} deals and {n * notes_per_deal:,} notes in {indexed[0]:.1f}s")
+        search = DealSearchService(db)
+        results = []
+        for query in QUERIES:
+            hits, _ = search.search(query, limit=PAGE_SIZE)
+            results.append((query, len(hits), _best_ms(lambda query=query: search.search(query, limit=PAGE_SIZE))))
+            db.expunge_all()
+        deals = DealService(db)
+        add_note = _best_ms(lambda: deals.add_note(n // 3, author_id=1, content=_text(random.Random(), 25)))
+    print_table(("query", "hits", "page ms"), results)
+    print(f"add_note (re-indexes one deal): {add_note} ms")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 100_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
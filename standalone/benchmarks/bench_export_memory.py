@@ -0,0 +1,78 @@
+"""
+Export memory benchmark: streaming cursor export vs. load-everything export.
+
+Seeds N contacts, then measures the peak Python heap (tracemalloc) while
+producing a full CSV export two ways:
+
+  - legacy:    ORM ``.all()`` + one StringIO holding the whole file
+  - streaming: ``stream_csv`` over a ``yield_per`` server-side cursor
+
+The streaming peak should stay flat as N grows; the legacy peak grows linearly.
+
+    python -m benchmarks.bench_export_memory [N ...]
+"""
+
+import csv
+import sys
+import tracemalloc
+from io import StringIO
+
+from sqlalchemy import insert
+
+from app.models import Contact
+from app.utils.export import CONTACT_FIELDS, stream_csv
+from benchmarks.common import bench_session, print_table, timer
+
+
+def _seed(db, n: int) -> None:
+    db.query(Contact).delete()
+    rows = [
+        {
+            "first_name": f"First{i}", "last_name": f"Last{i}",
+            "email": f"contact{i}@example.com", "job_title": "Partner",
+            "decision_maker": i % 2 == 0, "tenant_id": "default",
+            "uuid": f"00000000-0000-0000-0000-{i:012d}",
+        }
+        for i in range(n)
+    ]
+    for start in range(0, n, 10_000):
+        db.execute(insert(Contact), rows[start:start + 10_000])
+    db.commit()
+
+
+def _legacy_export(db) -> int:
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CONTACT_FIELDS)
+    for c in db.query(Contact).all():
+        writer.writerow([getattr(c, f) for f in CONTACT_FIELDS])
+    return len(output.getvalue())
+
+
+def _streaming_export(db) -> int:
+    return sum(len(chunk) for chunk in stream_csv(db, Contact, CONTACT_FIELDS))
+
+
+def _measure(fn, db):
+    db.expunge_all()
+    tracemalloc.start()
+    with timer() as elapsed:
+        size = fn(db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak / 1024 / 1024, elapsed[0]
+
+
+def main(sizes) -> None:
+    results = []
+    with bench_session() as db:
+        for n in sizes:
+            _seed(db, n)
+            for label, fn in (("legacy", _legacy_export), ("streaming", _streaming_export)):
+                size, peak_mb, secs = _measure(fn, db)
+                results.append((n, label, f"{size / 1024 / 1024:.1f}", f"{peak_mb:.1f}", f"{secs:.2f}"))
+    print_table(("rows", "path", "output MB", "peak heap MB", "seconds"), results)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [10_000, 50_000, 100_000])
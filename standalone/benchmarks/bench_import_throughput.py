@@ -0,0 +1,78 @@
+"""
+Import throughput benchmark: chunked bulk engine vs. row-at-a-time ORM import.
+
+Generates a contacts CSV of N rows (half linked to existing companies, a few
+duplicates) and reports rows per second for:
+
+  - legacy: one duplicate query + one company query + one ORM add per row
+  - bulk:   ``import_contacts_csv`` (one IN lookup + executemany per chunk)
+
+    python -m benchmarks.bench_import_throughput [N ...]
+"""
+
+import csv
+import sys
+from io import StringIO
+
+from sqlalchemy import delete, insert
+
+from app.models import Company, Contact
+from app.utils.import_ import import_contacts_csv
+from benchmarks.common import bench_session, print_table, timer
+
+COMPANIES = 200
+
+
+def _make_csv(n: int, company_ids) -> str:
+    out = StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["first_name", "last_name", "email", "job_title", "decision_maker", "company_id"])
+    for i in range(n):
+        email = f"person{i if i % 50 else i - 1}@example.com"  # ~2% duplicates
+        company = company_ids[i % len(company_ids)] if i % 2 else ""
+        writer.writerow([f"First{i}", f"Last{i}", email, "Analyst", "true" if i % 3 else "false", company])
+    return out.getvalue()
+
+
+def _legacy_import(db, content: str) -> int:
+    imported = 0
+    for row in csv.DictReader(StringIO(content)):
+        if db.query(Contact).filter(Contact.email == row["email"]).first():
+            continue
+        company_id = row.get("company_id")
+        if company_id and not db.query(Company).filter(Company.id == company_id).first():
+            continue
+        db.add(Contact(
+            first_name=row["first_name"], last_name=row["last_name"], email=row["email"],
+            job_title=row["job_title"], decision_maker=row["decision_maker"] == "true",
+            company_id=int(company_id) if company_id else None,
+        ))
+        db.flush()
+        imported += 1
+    db.commit()
+    return imported
+
+
+def _bulk_import(db, content: str) -> int:
+    return import_contacts_csv(db, content).successful
+
+
+def main(sizes) -> None:
+    results = []
+    with bench_session() as db:
+        db.execute(insert(Company), [{"name": f"Company {i}", "tenant_id": "default"} for i in range(COMPANIES)])
+        db.commit()
+        company_ids = [c.id for c in db.query(Company.id)]
+        for n in sizes:
+            content = _make_csv(n, company_ids)
+            for label, fn in (("legacy", _legacy_import), ("bulk", _bulk_import)):
+                db.execute(delete(Contact))
+                db.commit()
+                with timer() as elapsed:
+                    imported = fn(db, content)
+                results.append((n, label, imported, f"{elapsed[0]:.2f}", f"{n / elapsed[0]:,.0f}"))
+    print_table(("rows", "path", "imported", "seconds", "rows/sec"), results)
+
+
+if __name__ == "__main__":
+    main([int(a) for a in sys.argv[1:]] or [5_000, 20_000])
@@ -0,0 +1,73 @@
+"""
+Page latency benchmark: OFFSET pagination vs. keyset (cursor) pagination.
+
+Seeds N companies and times fetching one 50-row page at increasing depths:
+
+  - offset: ``BaseRepository.list(offset=depth)``, which scans and discards
+    every skipped row, so latency grows with depth
+  - keyset: ``BaseRepository.list_keyset(cursor=...)``, which seeks on the
+    ``(tenant_id, created_at, id)`` index, so latency stays flat
+
+    python -m benchmarks.bench_keyset_pagination [N]
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+from app.models import Company
+from app.services.base_repository import BaseRepository
+from app.services.pagination import encode_cursor
+from benchmarks.common import bench_session, print_table, timer
+
+PAGE_SIZE = 50
+REPEATS = 5
+SEED_CHUNK = 10_000
+
+
+def _seed(db, n: int) -> None:
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    for lo in range(0, n, SEED_CHUNK):
+        db.execute(insert(Company), [
+            {"name": f"Company {i}", "tenant_id": "default", "created_at": start + timedelta(minutes=i // 3)}
+            for i in range(lo, min(lo + SEED_CHUNK, n))
+        ])
+    db.commit()
+
+
+def _best_ms(fn) -> str:
+    best = float("inf")
+    for _ in range(REPEATS):
+        with timer() as elapsed:
+            fn()
+        best = min(best, elapsed[0])
+    return f"{best * 1000:.2f}"
+
+
+def main(n: int) -> None:
+    results = []
+    with bench_session() as db:
+        _seed(db, n)
+        repo = BaseRepository(Company, db)
+        depths = [d for d in (0, 1_000, 10_000, 50_000, 100_000, 200_000, 500_000) if d < n]
+        for depth in depths:
+            cursor = None
+            if depth:
+                # The cursor a client would hold after paging down to ``depth``.
+                last = repo.list(offset=depth - 1, limit=1)[0]
+                cursor = encode_cursor(["created_at", last.created_at, last.id])
+            offset_page = repo.list(offset=depth, limit=PAGE_SIZE)
+            keyset_page, _ = repo.list_keyset(limit=PAGE_SIZE, cursor=cursor)
+            assert [c.id for c in offset_page] == [c.id for c in keyset_page]
+            results.append((
+                f"{depth:,}",
+                _best_ms(lambda depth=depth: repo.list(offset=depth, limit=PAGE_SIZE)),
+                _best_ms(lambda cursor=cursor: repo.list_keyset(limit=PAGE_SIZE, cursor=cursor)),
+            ))
+            db.expunge_all()
+    print_table(("depth", "offset ms", "keyset ms"), results)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
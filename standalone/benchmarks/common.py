@@ -0,0 +1,79 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Each benchmark runs against a throwaway SQLite file (or ``BENCH_DATABASE_URL``
+to point at PostgreSQL) with all tables created from the model metadata.
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import Base
+
+
+@contextmanager
+def bench_session() -> Iterator[Session]:
+    """Yield a session bound to a fresh database; dropped afterwards."""
+    url = os.environ.get("BENCH_DATABASE_URL")
+    tmp_dir = None
+    if not url:
+        tmp_dir = tempfile.mkdtemp(prefix="ma_bench_")
+        url = f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+        if tmp_dir:
+            for name in os.listdir(tmp_dir):
+                os.unlink(os.path.join(tmp_dir, name))
+            os.rmdir(tmp_dir)
+
+
+@contextmanager
+def timer() -> Iterator[list]:
+    """Collect elapsed wall time in seconds into the yielded one-item list."""
+    elapsed = [0.0]
+    start = time.perf_counter()
+    try:
+        yield elapsed
+    finally:
+        elapsed[0] = time.perf_counter() - start
+
+
+def explain(db: Session, stmt) -> List[str]:
+    """The database's plan for ``stmt``, one line per step (SQLite or PostgreSQL)."""
+    dialect = db.get_bind().dialect
+    compiled = stmt.compile(dialect=dialect, compile_kwargs={"literal_binds": True})
+    if dialect.name == "sqlite":
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+        return [row[-1] for row in rows]
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    lines, nodes = [], [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop()
+        lines.append(" ".join(filter(None, (node["Node Type"], node.get("Index Name"), node.get("Relation Name")))))
+        nodes.extend(node.get("Plans", []))
+    return lines
+
+
+def print_table(headers: Tuple[str, ...], rows) -> None:
+    """Print a fixed-width results table."""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(v).rjust(w) for v, w in zip(row, widths)))
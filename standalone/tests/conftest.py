@@ -17,7 +17,12 @@ from app.db import get_db
 from app.main import app
 from app.models.base import Base
 from app.models.auth import User
-from app.auth import hash_password, create_access_token
+from app.services.base_repository import count_cache
+from app.services.chart import invalidate_account_tree_cache
+from app.services.finance import invalidate_aging_cache
+from app.services.fx import invalidate_fx_cache
+from app.services.reports import invalidate_report_cache
+from app.auth import hash_password, create_access_token, invalidate_user_cache
 
 
 # ── Test Database ────────────────────────────────────────────
@@ -31,6 +36,12 @@ TestSessionLocal = sessionmaker(bind=test_engine, autocommit=False, autoflush=Fa
 def db_session():
     """Provide a clean database session for each test."""
     Base.metadata.create_all(bind=test_engine)
+    count_cache.clear()
+    invalidate_user_cache()
+    invalidate_report_cache()
+    invalidate_fx_cache()
+    invalidate_aging_cache()
+    invalidate_account_tree_cache()
     session = TestSessionLocal()
     try:
         yield session
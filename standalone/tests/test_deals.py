@@ -1,9 +1,18 @@
 """Tests for Deal management endpoints and service."""
 
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 
-from app.models.deals import DealStage
-from app.services.deals import DealService, seed_default_stages
+import pytest
+from sqlalchemy import event, func, select, text
+
+from app.models.auth import User
+from app.models.deals import Deal, DealActivity, DealStage, DealStageStat, DealStageTransition
+from app.services.deals import ActivityBuffer, DealService, seed_default_stages
+from app.services.filters import Condition, date_window, parse_filters
+from app.services.fx import FXService
+from app.services.search import DealSearchService
+from app.services.stage_history import StageHistoryService, StageMove
 
 
 class TestDealStageSeeding:
@@ -50,6 +59,48 @@ class TestDealService:
         stage_changes = [a for a in activities if a.activity_type == "stage_change"]
         assert len(stage_changes) == 1
 
+    def test_deal_writes_commit_once(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        commits = []
+        event.listen(db_session, "after_commit", lambda _session: commits.append(1))
+        deal = svc.create({"title": "One Commit", "deal_type": "sell-side", "stage_id": stages[0].id})
+        svc.update(deal.id, {"stage_id": stages[1].id})
+        svc.add_note(deal.id, author_id=1, content="n")
+        svc.add_bid(deal.id, {"bid_type": "indicative"})
+        assert len(commits) == 4
+        types = {a.activity_type for a in svc.get_activities(deal.id)}
+        assert types == {"deal_created", "stage_change", "note_added", "bid_received"}
+
+    def test_bulk_create_and_update(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        ids = svc.bulk_create([
+            {"title": f"Bulk {i}", "deal_type": "sell-side", "stage_id": stages[0].id} for i in range(3)
+        ], user_id=1)
+        assert [db_session.get(Deal, i).title for i in ids] == ["Bulk 0", "Bulk 1", "Bulk 2"]
+        updated = svc.bulk_update({
+            ids[0]: {"stage_id": stages[2].id},
+            ids[1]: {"priority": "high"},
+            999999: {"priority": "low"},
+        }, user_id=1)
+        assert updated == 2
+        db_session.expire_all()
+        assert db_session.get(Deal, ids[0]).stage_id == stages[2].id
+        assert db_session.get(Deal, ids[1]).priority == "high"
+        changes = db_session.query(DealActivity).filter(DealActivity.activity_type == "stage_change").all()
+        assert [(a.deal_id, a.new_value) for a in changes] == [(ids[0], str(stages[2].id))]
+        assert db_session.query(DealActivity).filter(DealActivity.activity_type == "deal_created").count() == 3
+
+    def test_activity_buffer_flushes_in_batches(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        deal = svc.create({"title": "Buffered", "deal_type": "sell-side", "stage_id": stages[0].id})
+        buffer = ActivityBuffer(db_session, batch_size=2)
+        for i in range(5):
+            buffer.add(deal.id, None, "note_added", f"n{i}")
+        assert buffer.written == 4
+        assert buffer.flush() == 1
+        db_session.commit()
+        assert len(svc.get_activities(deal.id)) == 6
+
     def test_deal_notes(self, db_session):
         svc, stages = self._seed_and_svc(db_session)
         deal = svc.create({"title": "Note Deal", "deal_type": "buy-side", "stage_id": stages[0].id})
@@ -103,6 +154,58 @@ class TestDealService:
         assert origination["deal_count"] == 2
         assert origination["total_value"] == Decimal("3000000")
 
+    def test_pipeline_weighted_value(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        svc.create({"title": "W1", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("1000000"), "probability": 0.5})
+        svc.create({"title": "W2", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("2000000"), "probability": 0.25})
+        origination = svc.get_pipeline_view()[0]
+        assert origination["weighted_value"] == Decimal("1000000")
+        assert svc.get_pipeline_view()[1]["weighted_value"] == Decimal(0)
+
+    def test_pipeline_totals_in_base_currency(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        FXService(db_session).add_rate({"from_currency": "USD", "to_currency": "EUR",
+                                        "rate": Decimal("0.9"), "rate_date": date(2020, 1, 1)})
+        svc.create({"title": "EUR", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("1000000"), "probability": 0.5})
+        svc.create({"title": "USD", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("1000000"), "probability": 0.5, "currency": "USD"})
+        origination = svc.get_pipeline_totals()[stages[0].id]
+        assert origination["deal_count"] == 2
+        assert origination["total_value"] == Decimal("1900000")
+        assert origination["weighted_value"] == Decimal("950000")
+
+    def test_pipeline_totals_with_missing_rate(self, db_session, monkeypatch):
+        from app.config import settings
+        svc, stages = self._seed_and_svc(db_session)
+        svc.create({"title": "EUR", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("1000000"), "probability": 0.5})
+        svc.create({"title": "JPY", "deal_type": "sell-side", "stage_id": stages[0].id,
+                    "target_value": Decimal("5000"), "probability": 0.5, "currency": "JPY"})
+        with pytest.raises(ValueError, match="No JPY/EUR exchange rate"):
+            svc.get_pipeline_totals()
+        monkeypatch.setattr(settings, "fx_missing_rate_at_par", True)
+        assert svc.get_pipeline_totals()[stages[0].id]["total_value"] == Decimal("1005000")
+
+    def test_pipeline_limit_and_stage_cursor(self, db_session):
+        svc, stages = self._seed_and_svc(db_session)
+        for i in range(5):
+            svc.create({"title": f"Deal {i}", "deal_type": "sell-side", "stage_id": stages[0].id})
+        origination = svc.get_pipeline_view(limit_per_stage=2)[0]
+        assert origination["deal_count"] == 5
+        assert len(origination["deals"]) == 2
+        assert origination["next_cursor"] is not None
+
+        seen = [d.id for d in origination["deals"]]
+        cursor = origination["next_cursor"]
+        while cursor:
+            page, cursor = svc.get_stage_deals(stages[0].id, limit=2, cursor=cursor)
+            seen.extend(d.id for d in page)
+        assert len(seen) == 5
+        assert len(set(seen)) == 5
+
 
 class TestDealEndpoints:
     """Verify deal REST API endpoints."""
@@ -179,3 +282,455 @@ class TestDealEndpoints:
         assert response.status_code == 200
         pipeline = response.json()
         assert len(pipeline) == 12
+
+    def test_pipeline_stage_page_api(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        for i in range(3):
+            auth_client.post("/deals", json={
+                "title": f"Column Deal {i}", "deal_type": "sell-side", "stage_id": stages[0]["id"],
+            })
+        column = auth_client.get("/deals/pipeline", params={"limit_per_stage": 1}).json()[0]
+        assert column["deal_count"] == 3
+        assert len(column["deals"]) == 1
+        page = auth_client.get(
+            f"/deals/pipeline/stages/{stages[0]['id']}",
+            params={"limit": 5, "cursor": column["next_cursor"]},
+        ).json()
+        assert len(page["items"]) == 2
+        assert page["next_cursor"] is None
+
+    def test_pipeline_stage_page_bad_cursor(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        response = auth_client.get(
+            f"/deals/pipeline/stages/{stages[0]['id']}", params={"cursor": "not-a-cursor"},
+        )
+        assert response.status_code == 400
+
+    def test_list_deals_cursor_pages(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        for i in range(5):
+            auth_client.post("/deals", json={
+                "title": f"Paged {i}", "deal_type": "sell-side", "stage_id": stages[0]["id"],
+            })
+        first = auth_client.get("/deals", params={"limit": 3}).json()
+        assert len(first["items"]) == 3
+        assert first["next_cursor"]
+        second = auth_client.get("/deals", params={"limit": 3, "cursor": first["next_cursor"]}).json()
+        assert len(second["items"]) == 2
+        assert second["next_cursor"] is None
+        titles = [d["title"] for d in first["items"] + second["items"]]
+        assert sorted(titles) == [f"Paged {i}" for i in range(5)]
+        # Offset pagination still works for older clients.
+        legacy = auth_client.get("/deals", params={"limit": 3, "offset": 3}).json()
+        assert [d["id"] for d in legacy["items"]] == [d["id"] for d in second["items"]]
+        assert legacy["next_cursor"] is None
+
+    def test_list_deals_total_respects_filters(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        for priority in ("high", "high", "low"):
+            auth_client.post("/deals", json={
+                "title": f"{priority} deal", "deal_type": "sell-side",
+                "stage_id": stages[0]["id"], "priority": priority,
+            })
+        for mode in ("exact", "cached", "approximate"):
+            body = auth_client.get("/deals", params={"priority": "high", "count_mode": mode}).json()
+            assert body["total"] == 2
+            assert body["count_mode"] == mode
+        assert auth_client.get("/deals", params={"count_mode": "bogus"}).status_code == 422
+
+
+class TestDealSearch:
+    """Verify full-text deal search and index maintenance."""
+
+    def _svc(self, db_session):
+        return DealService(db_session), DealSearchService(db_session)
+
+    @staticmethod
+    def _ids(hits):
+        return [deal.id for deal, _score in hits]
+
+    def test_ranks_title_above_description_and_notes(self, db_session):
+        deals, search = self._svc(db_session)
+        in_notes = deals.create({"title": "Project Alpha", "deal_type": "sell-side", "notes": "Logistics carve-out"})
+        in_title = deals.create({"title": "Logistics roll-up", "deal_type": "buy-side"})
+        in_description = deals.create({"title": "Project Beta", "deal_type": "sell-side",
+                                       "description": "Regional logistics operator"})
+        deals.create({"title": "Unrelated", "deal_type": "sell-side"})
+        hits, next_offset = search.search("logistics")
+        assert self._ids(hits) == [in_title.id, in_description.id, in_notes.id]
+        assert next_offset is None
+
+    def test_all_words_match_and_last_word_is_prefix(self, db_session):
+        deals, search = self._svc(db_session)
+        both = deals.create({"title": "Nordic software buyout", "deal_type": "buy-side"})
+        deals.create({"title": "Nordic shipping", "deal_type": "sell-side"})
+        assert self._ids(search.search("nordic soft")[0]) == [both.id]
+        assert self._ids(search.search('NORDIC "soft*" OR')[0]) == []
+
+    def test_index_follows_deal_and_note_writes(self, db_session):
+        deals, search = self._svc(db_session)
+        deal = deals.create({"title": "Project Gamma", "deal_type": "sell-side"})
+        note = deals.add_note(deal.id, author_id=1, content="Management presentation scheduled")
+        assert self._ids(search.search("presentation")[0]) == [deal.id]
+
+        note.content = "Data room opened"
+        db_session.commit()
+        assert search.search("presentation")[0] == []
+        assert self._ids(search.search("room")[0]) == [deal.id]
+
+        deals.update(deal.id, {"title": "Project Delta"})
+        assert search.search("gamma")[0] == []
+        assert self._ids(search.search("delta")[0]) == [deal.id]
+
+        deals.delete(deal.id)
+        assert search.search("delta")[0] == []
+
+    def test_bulk_writes_are_indexed(self, db_session):
+        deals, search = self._svc(db_session)
+        ids = deals.bulk_create([
+            {"title": f"Bulk {i}", "deal_type": "sell-side", "description": "fintech"} for i in range(3)
+        ])
+        deals.bulk_update({ids[0]: {"description": "healthcare"}})
+        assert sorted(self._ids(search.search("fintech")[0])) == ids[1:]
+        assert self._ids(search.search("healthcare")[0]) == ids[:1]
+
+    def test_pages_and_tenants(self, db_session):
+        deals, search = self._svc(db_session)
+        ids = deals.bulk_create([{"title": f"Carve-out {i}", "deal_type": "sell-side"} for i in range(5)])
+        DealService(db_session, tenant_id="other").create({"title": "Carve-out", "deal_type": "sell-side"})
+        seen, offset = [], 0
+        while offset is not None:
+            hits, offset = search.search("carve", limit=2, offset=offset)
+            seen.extend(self._ids(hits))
+        assert sorted(seen) == ids
+
+    def test_rebuild_restores_index(self, db_session):
+        deals, search = self._svc(db_session)
+        deal = deals.create({"title": "Orion", "deal_type": "sell-side"})
+        db_session.execute(text("DELETE FROM deal_search"))
+        db_session.commit()
+        assert search.search("orion")[0] == []
+        search.rebuild()
+        assert self._ids(search.search("orion")[0]) == [deal.id]
+
+    def test_search_endpoint(self, auth_client):
+        auth_client.post("/deals", json={"title": "Solar portfolio", "deal_type": "sell-side"})
+        response = auth_client.get("/deals/search", params={"q": "solar"})
+        assert response.status_code == 200
+        body = response.json()
+        assert [hit["deal"]["title"] for hit in body["items"]] == ["Solar portfolio"]
+        assert body["items"][0]["score"] > 0
+        assert body["next_offset"] is None
+        assert auth_client.get("/deals/search", params={"q": "--"}).status_code == 400
+
+
+class TestDealFilters:
+    """Verify filter expressions on deal lists and their indexes."""
+
+    def _seed(self, db_session):
+        stages = seed_default_stages(db_session, tenant_id="default")
+        svc = DealService(db_session)
+        today = date.today()
+        rows = [
+            ("Late big", stages[8].id, 1, "50000000", today),
+            ("Late small", stages[9].id, 2, "5000000", today),
+            ("Early", stages[0].id, 1, "80000000", None),
+            ("Late undated", stages[10].id, 3, "90000000", None),
+        ]
+        ids = svc.bulk_create([
+            {"title": title, "deal_type": "sell-side", "stage_id": stage_id, "owner_user_id": owner,
+             "target_value": Decimal(value), "expected_close_date": close}
+            for title, stage_id, owner, value, close in rows
+        ])
+        return svc, stages, dict(zip((r[0] for r in rows), ids))
+
+    @staticmethod
+    def _titles(deals):
+        return sorted(d.title for d in deals)
+
+    def test_in_range_and_window(self, db_session):
+        svc, stages, _ = self._seed(db_session)
+        where = svc.parse_filters([
+            f"stage_id:in:{stages[8].id},{stages[9].id},{stages[10].id}",
+            "target_value:between:20000000,200000000",
+            "expected_close_date:within:this_quarter",
+        ])
+        deals, _ = svc.list_page(where=where)
+        assert self._titles(deals) == ["Late big"]
+        assert svc.count(where=where) == 1
+
+    def test_null_and_combined_with_equality(self, db_session):
+        svc, stages, _ = self._seed(db_session)
+        where = svc.parse_filters(["expected_close_date:null:true"])
+        assert self._titles(svc.list(where=where)) == ["Early", "Late undated"]
+        assert self._titles(svc.list(where=where, owner_user_id=3)) == ["Late undated"]
+        # Equality parameter and expression on one field must both hold.
+        where = svc.parse_filters(["owner_user_id:in:1,2"])
+        assert self._titles(svc.list(where=where, owner_user_id=2)) == ["Late small"]
+        assert svc.count(mode="cached", where=where) == 3
+
+    def test_parse_errors(self, db_session):
+        svc = DealService(db_session)
+        for expression in ("title:eq:x", "stage_id:like:1", "stage_id:in:a", "target_value:between:1",
+                           "stage_id:within:this_week", "expected_close_date:within:next_quarter", "stage_id"):
+            with pytest.raises(ValueError):
+                svc.parse_filters([expression])
+
+    def test_parsed_values_and_windows(self):
+        where = parse_filters(Deal, ["probability:gte:0.5", "probability:lt:0.9", "created_at:within:today"],
+                              DealService.FILTER_FIELDS, today=date(2026, 5, 17))
+        assert where["probability"] == Condition("and", (Condition("gte", 0.5), Condition("lt", 0.9)))
+        assert where["created_at"].value[1].value.date() == date(2026, 5, 18)
+        assert date_window("this_quarter", date(2026, 11, 3)) == (date(2026, 10, 1), date(2026, 12, 31))
+        assert date_window("this_month", date(2026, 2, 10)) == (date(2026, 2, 1), date(2026, 2, 28))
+        assert date_window("last_7d", date(2026, 5, 17)) == (date(2026, 5, 10), date(2026, 5, 17))
+
+    def test_dashboard_query_uses_composite_index(self, db_session):
+        svc, stages, _ = self._seed(db_session)
+        where = svc.parse_filters([f"stage_id:in:{stages[8].id},{stages[9].id}",
+                                   "expected_close_date:within:this_quarter"])
+        stmt = select(func.count()).select_from(Deal).where(*svc.repo.criteria(where))
+        compiled = stmt.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " ".join(row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert "ix_deals_tenant_stage_close" in plan
+
+    def test_list_endpoint_filters(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        for title, stage in (("A", 0), ("B", 5), ("C", 9)):
+            auth_client.post("/deals", json={"title": title, "deal_type": "sell-side",
+                                             "stage_id": stages[stage]["id"]})
+        response = auth_client.get("/deals", params={
+            "filter": [f"stage_id:in:{stages[5]['id']},{stages[9]['id']}", "loss_reason:null:true"],
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert sorted(d["title"] for d in body["items"]) == ["B", "C"]
+        assert body["total"] == 2
+        response = auth_client.get("/deals", params={"filter": "stage_id:in:x"})
+        assert response.status_code == 400
+
+
+class TestStageHistory:
+    """Verify stage transition history and the funnel rollups built from it."""
+
+    def _seed(self, db_session):
+        stages = seed_default_stages(db_session, tenant_id="default")
+        return DealService(db_session), StageHistoryService(db_session), stages
+
+    def test_deal_writes_record_transitions(self, db_session):
+        svc, history, stages = self._seed(db_session)
+        deal = svc.create({"title": "A", "deal_type": "sell-side", "sector": "Tech", "stage_id": stages[0].id})
+        svc.update(deal.id, {"stage_id": stages[1].id}, user_id=None)
+        svc.update(deal.id, {"title": "A2"})  # no stage change, no transition
+        ids = svc.bulk_create([{"title": "B", "deal_type": "buy-side", "stage_id": stages[0].id}])
+        svc.bulk_update({ids[0]: {"stage_id": stages[2].id, "sector": "Health"}})
+
+        rows = db_session.scalars(select(DealStageTransition).order_by(DealStageTransition.id)).all()
+        assert [(r.deal_id, r.from_stage_id, r.to_stage_id) for r in rows] == [
+            (deal.id, None, stages[0].id), (deal.id, stages[0].id, stages[1].id),
+            (ids[0], None, stages[0].id), (ids[0], stages[0].id, stages[2].id),
+        ]
+        assert rows[0].days_in_stage is None and rows[1].days_in_stage >= 0
+        assert (rows[1].sector, rows[2].sector, rows[3].sector) == ("Tech", "", "Health")
+
+    def test_median_conversion_and_drop_off(self, db_session):
+        svc, history, stages = self._seed(db_session)
+        first, second, third = stages[0].id, stages[1].id, stages[2].id
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        ids = svc.bulk_create([{"title": f"D{i}", "deal_type": "sell-side", "sector": "Tech",
+                                "stage_id": first} for i in range(4)])
+        db_session.query(DealStageTransition).update({"transitioned_at": start})
+        # Three deals leave the first stage after 2, 4 and 10 days; one stays.
+        for deal_id, days in zip(ids, (2, 4, 10)):
+            history.record([StageMove(deal_id, first, second, "Tech", "sell-side")], at=start + timedelta(days=days))
+        # One of them advances again, one falls back.
+        history.record([StageMove(ids[0], second, third, "Tech", "sell-side")], at=start + timedelta(days=5))
+        history.record([StageMove(ids[1], second, first, "Tech", "sell-side")], at=start + timedelta(days=6))
+        db_session.commit()
+
+        result = history.analytics(sector="Tech")
+        funnel = {row["stage_id"]: row for row in result["stages"]}
+        assert funnel[first]["reached"] == 4  # re-entry is not a second arrival
+        assert funnel[first]["exits"] == 3
+        assert funnel[first]["median_days"] == 4
+        assert funnel[first]["avg_days"] == pytest.approx(16 / 3)
+        assert funnel[first]["conversion_rate"] == 0.75
+        assert funnel[first]["drop_off_rate"] == 0.25
+        assert funnel[second]["median_days"] == 2.5  # stays of 3 and 2 days
+        assert funnel[second]["conversion_rate"] == pytest.approx(1 / 3)
+        flows = {(t["from_stage_id"], t["to_stage_id"]): t for t in result["transitions"]}
+        assert flows[(second, third)]["deals"] == 1
+        assert flows[(second, first)]["rate"] == 0.5
+        assert history.analytics(sector="Health")["stages"][0]["reached"] == 0
+
+    def test_rebuild_matches_incremental_rollups(self, db_session):
+        svc, history, stages = self._seed(db_session)
+        ids = svc.bulk_create([{"title": f"D{i}", "deal_type": t, "stage_id": stages[0].id}
+                               for i, t in enumerate(("sell-side", "buy-side", "sell-side"))])
+        svc.bulk_update({i: {"stage_id": stages[1].id} for i in ids})
+        svc.update(ids[0], {"stage_id": stages[0].id})
+        svc.update(ids[0], {"stage_id": stages[3].id})
+        before = history.analytics()
+        assert before["stages"][0]["reached"] == 3
+        db_session.query(DealStageStat).update({"reached": 0})
+        db_session.commit()
+        history.rebuild()
+        assert history.analytics() == before
+        assert history.analytics(deal_type="buy-side")["stages"][1]["reached"] == 1
+
+    def test_deal_older_than_history_reaches_the_stage_it_leaves(self, db_session):
+        svc, history, stages = self._seed(db_session)
+        ids = svc.bulk_create([{"title": f"Old {i}", "deal_type": "sell-side", "stage_id": stages[1].id}
+                               for i in range(2)])
+        # As if the deals predate the history table.
+        db_session.query(DealStageTransition).delete()
+        db_session.query(DealStageStat).delete()
+        db_session.commit()
+        svc.bulk_update({i: {"stage_id": stages[2].id} for i in ids})
+        svc.update(ids[0], {"stage_id": stages[3].id})
+
+        before = history.analytics()
+        funnel = {row["stage_id"]: row for row in before["stages"]}
+        assert (funnel[stages[1].id]["reached"], funnel[stages[1].id]["exits"]) == (2, 2)
+        assert funnel[stages[1].id]["conversion_rate"] == 1.0
+        assert funnel[stages[1].id]["drop_off_rate"] == 0.0
+        assert (funnel[stages[2].id]["reached"], funnel[stages[2].id]["exits"]) == (2, 1)
+        assert all(row["reached"] >= row["exits"] for row in before["stages"])
+        history.rebuild()
+        assert history.analytics() == before
+
+    def test_stage_analytics_endpoint(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        deal = auth_client.post("/deals", json={"title": "A", "deal_type": "sell-side", "sector": "Tech",
+                                                "stage_id": stages[0]["id"]}).json()
+        auth_client.patch(f"/deals/{deal['id']}", json={"stage_id": stages[1]["id"]})
+        body = auth_client.get("/deals/analytics/stages", params={"sector": "Tech"}).json()
+        assert [s["reached"] for s in body["stages"][:3]] == [1, 1, 0]
+        assert body["stages"][0]["conversion_rate"] == 1.0
+        assert body["transitions"] == [{"from_stage_id": stages[0]["id"], "to_stage_id": stages[1]["id"],
+                                        "deals": 1, "rate": 1.0}]
+
+
+class TestDealBulk:
+    """Verify set-based bulk changes over ids or filters."""
+
+    def _seed(self, db_session):
+        stages = seed_default_stages(db_session, tenant_id="default")
+        svc = DealService(db_session)
+        ids = svc.bulk_create([
+            {"title": f"D{i}", "deal_type": "sell-side", "stage_id": stages[i % 2].id}
+            for i in range(6)
+        ])
+        return svc, stages, ids
+
+    def _activities(self, db_session, activity_type):
+        return db_session.scalars(
+            select(DealActivity).where(DealActivity.activity_type == activity_type).order_by(DealActivity.deal_id)
+        ).all()
+
+    def test_stage_move_by_ids_logs_activity_and_history(self, db_session):
+        svc, stages, ids = self._seed(db_session)
+        commits = []
+        event.listen(db_session, "after_commit", lambda _session: commits.append(1))
+        changed = svc.bulk_apply(ids=ids[:4], changes={"stage_id": stages[1].id}, user_id=1)
+        assert changed == ids[:4] and commits == [1]
+        assert {svc.get(i).stage_id for i in ids[:4]} == {stages[1].id}
+        # Deals already in the target stage get no stage_change or transition.
+        moved = [a.deal_id for a in self._activities(db_session, "stage_change")]
+        assert moved == [ids[0], ids[2]]
+        history = db_session.scalars(
+            select(DealStageTransition).where(DealStageTransition.from_stage_id.isnot(None))
+        ).all()
+        assert sorted(t.deal_id for t in history) == [ids[0], ids[2]]
+
+    def test_reassign_and_delete_by_filter(self, db_session):
+        svc, stages, ids = self._seed(db_session)
+        owner = User(email="owner@test.com", hashed_password="x", tenant_id="default")
+        db_session.add(owner)
+        db_session.commit()
+        where = svc.parse_filters([f"stage_id:in:{stages[0].id}"])
+        assert svc.bulk_apply(where=where, changes={"owner_user_id": owner.id, "priority": "high"}) == ids[::2]
+        owners = [a.new_value for a in self._activities(db_session, "owner_change")]
+        assert owners == [str(owner.id)] * 3
+        assert svc.count(owner_user_id=owner.id, priority="high") == 3
+        where = svc.parse_filters([f"owner_user_id:eq:{owner.id}"])
+        assert svc.bulk_apply(ids=ids, where=where, delete=True) == ids[::2]
+        assert svc.count() == 3
+        assert len(self._activities(db_session, "deal_deleted")) == 3
+
+    def test_invalid_requests(self, db_session):
+        svc, stages, ids = self._seed(db_session)
+        for kwargs in (
+            {"changes": {"priority": "high"}},  # no selection
+            {"ids": ids},  # nothing to do
+            {"ids": ids, "changes": {"priority": "high"}, "delete": True},
+            {"ids": ids, "changes": {"title": "x"}},
+            {"ids": ids, "changes": {"stage_id": 999999}},
+            {"ids": ids, "changes": {"owner_user_id": 999999}},
+        ):
+            with pytest.raises(ValueError):
+                svc.bulk_apply(**kwargs)
+
+    def test_bulk_endpoint(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        ids = [auth_client.post("/deals", json={"title": t, "deal_type": "sell-side",
+                                                "stage_id": stages[0]["id"]}).json()["id"] for t in "ABC"]
+        response = auth_client.post("/deals/bulk", json={"ids": ids[:2], "stage_id": stages[9]["id"]})
+        assert response.status_code == 200
+        assert response.json() == {"updated": 2, "ids": ids[:2]}
+        response = auth_client.post("/deals/bulk", json={"filter": [f"stage_id:eq:{stages[9]['id']}"], "delete": True})
+        assert response.json()["updated"] == 2
+        assert auth_client.get(f"/deals/{ids[0]}").status_code == 404
+        assert auth_client.post("/deals/bulk", json={"ids": ids}).status_code == 400
+        assert auth_client.post("/deals/bulk", json={"ids": ids, "owner_user_id": 999999}).status_code == 400
+        assert auth_client.post("/deals/bulk", json={"filter": ["x:eq:1"], "delete": True}).status_code == 400
+
+
+class TestDealFieldsets:
+    """Verify sparse ``fields=`` lists read through the lean Core path."""
+
+    def _seed(self, db_session, n=5):
+        stages = seed_default_stages(db_session, tenant_id="default")
+        svc = DealService(db_session)
+        svc.bulk_create([
+            {"title": f"D{i}", "deal_type": "sell-side", "stage_id": stages[i % 3].id,
+             "target_value": Decimal("1000000.50") * (i + 1)}
+            for i in range(n)
+        ])
+        return svc, stages
+
+    def test_rows_match_orm_pages(self, db_session):
+        svc, stages = self._seed(db_session)
+        fields = svc.parse_fields("title, target_value,stage_id")
+        assert fields == ("id", "title", "target_value", "stage_id")
+        orm, orm_cursor = svc.list_page(limit=3)
+        rows, cursor = svc.list_page_rows(fields, limit=3)
+        assert rows == [{"id": d.id, "title": d.title, "target_value": d.target_value, "stage_id": d.stage_id}
+                        for d in orm]
+        assert cursor == orm_cursor
+        rest, end = svc.list_page_rows(fields, limit=3, cursor=cursor)
+        assert [r["id"] for r in rest] == [d.id for d in svc.list_page(limit=3, cursor=orm_cursor)[0]]
+        assert end is None
+        by_offset = svc.list_rows(fields, offset=1, stage_id=stages[0].id)
+        assert [r["id"] for r in by_offset] == [d.id for d in svc.list(offset=1, stage_id=stages[0].id)]
+        assert len(by_offset) == 1
+
+    def test_unknown_field(self, db_session):
+        with pytest.raises(ValueError):
+            DealService(db_session).parse_fields("title,company")
+
+    def test_list_endpoint_fields(self, auth_client):
+        stages = auth_client.get("/deals/stages").json()
+        for title in ("A", "B", "C"):
+            auth_client.post("/deals", json={"title": title, "deal_type": "sell-side", "stage_id": stages[0]["id"],
+                                             "target_value": "2500000.00"})
+        full = auth_client.get("/deals", params={"limit": 2}).json()
+        lean = auth_client.get("/deals", params={"limit": 2, "fields": "title,target_value,created_at"}).json()
+        assert lean["items"] == [
+            {"id": d["id"], "title": d["title"], "target_value": d["target_value"], "created_at": d["created_at"]}
+            for d in full["items"]
+        ]
+        assert (lean["total"], lean["next_cursor"]) == (3, full["next_cursor"])
+        page = auth_client.get("/deals", params={"fields": "title", "cursor": lean["next_cursor"]}).json()
+        assert [d["title"] for d in page["items"]] == ["A"]
+        assert auth_client.get("/deals", params={"fields": "stage"}).status_code == 400
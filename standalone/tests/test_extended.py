@@ -8,6 +8,8 @@ from datetime import date
 
 import pytest
 
+from sqlalchemy import event
+
 from app.auth import hash_password, verify_password, create_access_token
 from app.services.crm import CompanyService, ContactService, InteractionService
 
@@ -129,6 +131,53 @@ class TestAuthUtilities:
         assert len(token) > 20
 
 
+class TestUserCache:
+
+    @staticmethod
+    def _count_user_selects(db_session):
+        statements = []
+
+        def _capture(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+                statements.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", _capture)
+        return statements
+
+    def test_cached_user_skips_lookup(self, auth_client, db_session, test_user):
+        assert auth_client.get("/deals/stages").status_code == 200
+        db_session.expunge_all()
+        selects = self._count_user_selects(db_session)
+        for _ in range(3):
+            assert auth_client.get("/deals/stages").status_code == 200
+        assert selects == []
+
+    def test_deactivation_applies_immediately(self, auth_client, db_session, test_user):
+        assert auth_client.get("/deals/stages").status_code == 200
+        test_user.is_active = False
+        db_session.commit()
+        assert auth_client.get("/deals/stages").status_code == 401
+
+    def test_flushed_change_is_invalidated_at_commit(self, auth_client, db_session, test_user):
+        from app.auth import _user_cache
+        assert auth_client.get("/deals/stages").status_code == 200
+        test_user.is_active = False
+        db_session.flush()
+        # The old row is still the committed one; keep serving it until commit.
+        assert _user_cache.get(test_user.email) is not None
+        db_session.commit()
+        assert _user_cache.get(test_user.email) is None
+        assert auth_client.get("/deals/stages").status_code == 401
+
+    def test_role_change_applies_immediately(self, auth_client, db_session, test_user):
+        payload = {"email": "new@test.com", "full_name": "New", "password": "pw", "role": "user"}
+        assert auth_client.post("/auth/register", json=payload).status_code == 200
+        test_user.role = "user"
+        db_session.commit()
+        payload["email"] = "other@test.com"
+        assert auth_client.post("/auth/register", json=payload).status_code == 403
+
+
 # ═══════════════════════════════════════════════════════════════
 # INTERACTION ENDPOINT TESTS
 # ═══════════════════════════════════════════════════════════════
@@ -2,10 +2,230 @@
 
 from datetime import date
 from decimal import Decimal
+from io import BytesIO, StringIO
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 
+from app.models.crm import Company
+from app.models.deals import Deal
+from app.models.finance import (
+    AccountBalance, AccountClosingBalance, BankTransaction, ExchangeRate, Invoice,
+    JournalEntry, JournalEntryLine, Payment,
+)
+from app.models.projects import TimeEntry
+from app.services.billing import BillingRunService
+from app.services.chart import ChartOfAccountsService, invalidate_account_tree_cache
 from app.services.finance import AccountingService, InvoiceService, VendorService
+from app.services.fx import FXService
+from app.services.ledger import LedgerService
+from app.services.period_close import PeriodCloseService
+from app.services.reconciliation import ReconciliationService
+from app.services.reports import FinancialReportService, invalidate_report_cache
+from app.services.revaluation import FXRevaluationService
+from app.services.sequences import SequenceAllocator
+from app.utils.bank_statements import (
+    StatementFormatError, StatementLine, iter_camt053_statement, iter_csv_statement, iter_mt940_statement,
+)
+
+
+class TestExchangeRates:
+    """Verify as-of rate lookups and base-currency conversion."""
+
+    def _rates(self, db_session):
+        fx = FXService(db_session, tenant_id="default")
+        for day, rate in ((date(2026, 1, 1), "0.90"), (date(2026, 1, 15), "0.95"), (date(2026, 2, 1), "0.92")):
+            fx.add_rate({"from_currency": "USD", "to_currency": "EUR", "rate": Decimal(rate), "rate_date": day})
+        return fx
+
+    def test_as_of_lookup(self, db_session):
+        fx = self._rates(db_session)
+        assert fx.rate("USD", on=date(2026, 1, 14)) == Decimal("0.90")
+        assert fx.rate("USD", on=date(2026, 1, 15)) == Decimal("0.95")
+        assert fx.rate("USD", on=date(2026, 3, 1)) == Decimal("0.92")
+        assert fx.rate("EUR", on=date(2025, 1, 1)) == 1
+        assert fx.rate("EUR", "USD", on=date(2026, 2, 1)) == Decimal(1) / Decimal("0.92")
+        with pytest.raises(ValueError, match="No USD/EUR exchange rate"):
+            fx.rate("USD", on=date(2025, 12, 31))
+        assert fx.rate("CHF", on=date(2026, 1, 1), default=None) is None
+
+    def test_history_cached_until_rate_inserted(self, db_session):
+        fx = self._rates(db_session)
+        fx.rate("USD", on=date(2026, 2, 10))
+        statements = []
+        listen = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db_session.bind, "before_cursor_execute", listen)
+        try:
+            values = [fx.rate("USD", on=date(2026, 1, d)) for d in range(1, 29)]
+            assert not statements
+            fx.add_rate({"from_currency": "USD", "to_currency": "EUR",
+                         "rate": Decimal("0.99"), "rate_date": date(2026, 2, 10)})
+            assert fx.rate("USD", on=date(2026, 2, 10)) == Decimal("0.99")
+        finally:
+            event.remove(db_session.bind, "before_cursor_execute", listen)
+        assert values[13] == Decimal("0.90") and values[14] == Decimal("0.95")
+        with pytest.raises(ValueError, match="already exists"):
+            fx.add_rate({"from_currency": "USD", "to_currency": "EUR",
+                         "rate": Decimal("1"), "rate_date": date(2026, 2, 10)})
+
+    def test_flushed_rate_invalidates_history_at_commit(self, db_session):
+        fx = self._rates(db_session)
+        assert fx.rate("USD", on=date(2026, 2, 10)) == Decimal("0.92")
+        db_session.add(ExchangeRate(from_currency="USD", to_currency="EUR", rate=Decimal("0.99"),
+                                    rate_date=date(2026, 2, 10), tenant_id="default"))
+        db_session.flush()
+        assert fx.rate("USD", on=date(2026, 2, 10)) == Decimal("0.92")  # Not committed yet
+        db_session.commit()
+        assert fx.rate("USD", on=date(2026, 2, 10)) == Decimal("0.99")
+
+    def test_missing_rate_at_par_setting(self, db_session, test_user, monkeypatch):
+        from app.config import settings
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = {a.code: a for a in svc.seed_default_accounts()}
+        monkeypatch.setattr(settings, "fx_missing_rate_at_par", True)
+        je = svc.create_journal_entry(entry_date=date(2026, 1, 20), lines=[
+            {"account_id": accounts["1010"].id, "debit": Decimal("5"), "currency": "GBP"},
+            {"account_id": accounts["4010"].id, "credit": Decimal("5"), "currency": "GBP"},
+        ])
+        assert [l.base_debit + l.base_credit for l in je.lines] == [Decimal("5.00"), Decimal("5.00")]
+
+    def test_convert_many(self, db_session):
+        fx = self._rates(db_session)
+        converted = fx.convert_many(
+            [Decimal("100"), Decimal("100"), Decimal("10.005"), Decimal("7")],
+            ["USD", "USD", "EUR", "GBP"],
+            [date(2026, 1, 2), date(2026, 2, 2), None, None],
+            default_rate=Decimal(1),
+        )
+        assert converted == [Decimal("90.00"), Decimal("92.00"), Decimal("10.00"), Decimal("7.00")]
+
+    def test_journal_and_invoice_use_as_of_rate(self, db_session, test_user):
+        fx = self._rates(db_session)
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = {a.code: a for a in svc.seed_default_accounts()}
+        je = svc.create_journal_entry(
+            entry_date=date(2026, 1, 20), auto_post=True, user_id=test_user.id,
+            lines=[
+                {"account_id": accounts["1010"].id, "debit": Decimal("100"), "currency": "USD"},
+                {"account_id": accounts["4010"].id, "credit": Decimal("100"), "currency": "USD",
+                 "exchange_rate": Decimal("0.95")},
+            ],
+        )
+        assert [l.base_debit + l.base_credit for l in je.lines] == [Decimal("95.00"), Decimal("95.00")]
+        with pytest.raises(ValueError, match="No GBP/EUR"):
+            svc.create_journal_entry(entry_date=date(2026, 1, 20), lines=[
+                {"account_id": accounts["1010"].id, "debit": Decimal("1"), "currency": "GBP"},
+                {"account_id": accounts["4010"].id, "credit": Decimal("1"), "currency": "GBP"},
+            ])
+
+        invoice = InvoiceService(db_session, tenant_id="default").create({
+            "invoice_date": date(2026, 2, 3), "due_date": date(2026, 3, 3), "currency": "USD",
+            "lines": [{"description": "Fee", "unit_price": Decimal("1000")}],
+        })
+        assert invoice.exchange_rate == Decimal("0.92")
+        assert fx.convert(invoice.total, invoice.currency, invoice.invoice_date) == Decimal("920.00")
+
+    def test_rate_endpoints(self, auth_client):
+        created = auth_client.post("/finance/exchange-rates", json={
+            "from_currency": "GBP", "to_currency": "EUR", "rate": "1.17", "rate_date": "2026-01-01",
+        })
+        assert created.status_code == 200
+        duplicate = auth_client.post("/finance/exchange-rates", json={
+            "from_currency": "GBP", "to_currency": "EUR", "rate": "1.18", "rate_date": "2026-01-01",
+        })
+        assert duplicate.status_code == 409
+        body = auth_client.get("/finance/exchange-rates/lookup",
+                               params={"from_currency": "GBP", "on": "2026-06-30"}).json()
+        assert (body["to_currency"], Decimal(body["rate"])) == ("EUR", Decimal("1.17"))
+        missing = auth_client.get("/finance/exchange-rates/lookup", params={"from_currency": "JPY"})
+        assert missing.status_code == 404
+
+
+class TestFXRevaluation:
+    """Verify the period-end FX revaluation run."""
+
+    def _setup(self, db_session):
+        fx = FXService(db_session, tenant_id="default")
+        for currency, day, rate in (
+            ("USD", date(2026, 1, 1), "0.90"), ("USD", date(2026, 1, 31), "0.95"),
+            ("GBP", date(2026, 1, 1), "1.20"), ("GBP", date(2026, 1, 31), "1.10"),
+        ):
+            fx.add_rate({"from_currency": currency, "to_currency": "EUR", "rate": Decimal(rate), "rate_date": day})
+        svc = AccountingService(db_session, tenant_id="default")
+        svc.seed_default_accounts()
+        fy = svc.create_fiscal_year("FY 2026", date(2026, 1, 1), date(2026, 12, 31))
+        january = min(fy.periods, key=lambda p: p.period_number)
+
+        invoices = InvoiceService(db_session, tenant_id="default")
+        for currency, price in (("USD", "1000"), ("USD", "500"), ("EUR", "700")):
+            invoices.create({
+                "invoice_date": date(2026, 1, 10), "due_date": date(2026, 2, 10), "currency": currency,
+                "lines": [{"description": "Fee", "unit_price": Decimal(price)}],
+            })
+        vendors = VendorService(db_session, tenant_id="default")
+        vendor = vendors.create({"name": "London Counsel"})
+        vendors.create_bill(vendor.id, {
+            "bill_date": date(2026, 1, 5), "due_date": date(2026, 2, 5), "currency": "GBP",
+            "lines": [{"description": "Legal", "unit_price": Decimal("2000")}],
+        })
+        return svc, january
+
+    def test_posts_one_balanced_entry_per_currency(self, db_session, test_user):
+        svc, january = self._setup(db_session)
+        result = FXRevaluationService(db_session, tenant_id="default").run(january.id, user_id=test_user.id)
+        assert result["created"] is True
+        by_currency = {e["currency"]: e for e in result["entries"]}
+        # USD receivables 1500 @ 0.90 -> 0.95: +75 gain. GBP payable 2000 @ 1.20 -> 1.10: +200 gain.
+        assert by_currency["USD"]["documents"] == 2
+        assert by_currency["USD"]["net_gain"] == Decimal("75")
+        assert by_currency["GBP"]["net_gain"] == Decimal("200")
+
+        entries = svc.list_journal_entries(status="posted", limit=10)
+        assert len(entries) == 4  # two revaluations and their reversals
+        for je in entries:
+            assert sum(l.debit for l in je.lines) == sum(l.credit for l in je.lines)
+        gain = svc.default_account("4080")
+        assert svc.get_account_balance(gain.id, as_of=date(2026, 1, 31)) == Decimal("-275")
+        assert svc.get_account_balance(gain.id) == 0  # reversed on 1 February
+
+    def test_rerun_is_idempotent(self, db_session, test_user):
+        svc, january = self._setup(db_session)
+        reval = FXRevaluationService(db_session, tenant_id="default")
+        first = reval.run(january.id, user_id=test_user.id)
+        again = reval.run(january.id, user_id=test_user.id)
+        assert again["created"] is False
+        assert again["entries"] == first["entries"]
+        assert len(svc.list_journal_entries(limit=10)) == 4
+
+    def test_closed_following_period_posts_nothing(self, db_session, test_user):
+        svc, january = self._setup(db_session)
+        february = next(p for p in january.fiscal_year.periods if p.period_number == 2)
+        february.is_closed = True
+        db_session.commit()
+        reval = FXRevaluationService(db_session, tenant_id="default")
+        for _ in range(2):
+            with pytest.raises(ValueError, match="closed"):
+                reval.run(january.id, user_id=test_user.id)
+        assert svc.list_journal_entries(limit=10) == []
+
+    def test_duplicate_revaluation_is_rejected_by_index(self, db_session, test_user):
+        svc, january = self._setup(db_session)
+        reval = FXRevaluationService(db_session, tenant_id="default")
+        reval.run(january.id, user_id=test_user.id)
+        # A racing run that missed the existing entries cannot post them again.
+        with pytest.raises(IntegrityError):
+            svc.create_journal_entries_bulk(reval._build_entries(january), auto_post=True, atomic=True)
+        db_session.rollback()
+        assert len(svc.list_journal_entries(limit=10)) == 4
+
+    def test_revaluation_endpoint(self, auth_client, db_session):
+        _, january = self._setup(db_session)
+        response = auth_client.post(f"/finance/fiscal-periods/{january.id}/fx-revaluation")
+        assert response.status_code == 200
+        assert {e["currency"] for e in response.json()["entries"]} == {"GBP", "USD"}
+        assert auth_client.post("/finance/fiscal-periods/99999/fx-revaluation").status_code == 400
 
 
 class TestChartOfAccounts:
@@ -14,7 +234,7 @@ class TestChartOfAccounts:
     def test_seed_defaults(self, db_session):
         svc = AccountingService(db_session, tenant_id="default")
         accounts = svc.seed_default_accounts()
-        assert len(accounts) >= 20  # 22 default accounts
+        assert len(accounts) >= 20  # 24 default accounts
 
     def test_seed_is_idempotent(self, db_session):
         svc = AccountingService(db_session, tenant_id="default")
@@ -38,6 +258,93 @@ class TestChartOfAccounts:
         revenue = svc.list_accounts(account_type="revenue")
         assert all(a.account_type == "revenue" for a in revenue)
 
+    def _deep_chart(self, svc):
+        accounts = {a.code: a for a in svc.seed_default_accounts()}
+        banks = svc.create_account({"code": "1015", "name": "Bank Accounts", "account_type": "asset",
+                                    "is_header": True, "parent_id": accounts["1000"].id})
+        usd = svc.create_account({"code": "1016", "name": "USD Account", "account_type": "asset",
+                                  "parent_id": banks.id})
+        return accounts, banks, usd
+
+    def _post(self, svc, day, debit, credit, amount):
+        svc.create_journal_entry(entry_date=day, auto_post=True, lines=[
+            {"account_id": debit.id, "debit": Decimal(amount)},
+            {"account_id": credit.id, "credit": Decimal(amount)},
+        ])
+
+    def test_tree_rolls_up_subtree_balances(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        acc, banks, usd = self._deep_chart(svc)
+        self._post(svc, date(2026, 1, 5), usd, acc["4010"], "300")
+        self._post(svc, date(2026, 2, 5), acc["1010"], acc["4020"], "200")
+
+        chart = ChartOfAccountsService(db_session)
+        roots = chart.tree()
+        assert [r["code"] for r in roots] == ["1000", "2000", "3000", "4000", "5000"]
+        cash = roots[0]
+        assert [c["code"] for c in cash["children"]] == ["1010", "1015", "1100", "1200"]
+        assert cash["total"] == Decimal("500")
+        bank_node = cash["children"][1]
+        assert (bank_node["balance"], bank_node["total"], bank_node["children"][0]["depth"]) == (
+            Decimal("0"), Decimal("300"), 2,
+        )
+        assert roots[3]["total"] == Decimal("-500")
+
+        january = chart.tree(as_of=date(2026, 1, 31), root_id=banks.id)
+        assert len(january) == 1 and january[0]["total"] == Decimal("300")
+        assert chart.tree(as_of=date(2026, 1, 31))[0]["total"] == Decimal("300")
+
+    def test_tree_is_cached_until_an_account_changes(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        acc, banks, usd = self._deep_chart(svc)
+        chart = ChartOfAccountsService(db_session)
+        nodes = chart.nodes()
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+        try:
+            assert chart.nodes() is nodes
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+        assert statements == []
+
+        usd.parent_id = acc["1000"].id  # Moving an account drops the cached tree
+        db_session.commit()
+        moved = next(n for n in chart.nodes() if n.id == usd.id)
+        assert (moved.parent_id, moved.depth) == (acc["1000"].id, 1)
+
+        usd.is_deleted = True
+        db_session.commit()
+        assert usd.id not in {n.id for n in chart.nodes()}
+
+    def test_rolled_back_rename_is_not_cached(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        _, banks, _ = self._deep_chart(svc)
+        chart = ChartOfAccountsService(db_session)
+        chart.nodes()
+        banks.name = "Renamed Banks"
+        db_session.flush()
+        # Still the committed tree until the rename commits.
+        assert next(n for n in chart.nodes() if n.id == banks.id).name == "Bank Accounts"
+        db_session.rollback()
+        assert next(n for n in chart.nodes() if n.id == banks.id).name == "Bank Accounts"
+
+        banks.name = "Renamed Banks"
+        db_session.flush()
+        invalidate_account_tree_cache("default")
+        assert next(n for n in chart.nodes() if n.id == banks.id).name == "Renamed Banks"  # Uncommitted
+        db_session.rollback()
+        assert next(n for n in chart.nodes() if n.id == banks.id).name == "Bank Accounts"
+
+    def test_tree_endpoint(self, auth_client, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        _, banks, _ = self._deep_chart(svc)
+        body = auth_client.get("/finance/accounts/tree").json()
+        assert body[0]["children"][1]["children"][0]["code"] == "1016"
+        subtree = auth_client.get("/finance/accounts/tree", params={"root_id": banks.id}).json()
+        assert [n["code"] for n in subtree] == ["1015"]
+        assert auth_client.get("/finance/accounts/tree", params={"root_id": 99999}).status_code == 404
+
 
 class TestJournalEntries:
     """Verify General Ledger operations."""
@@ -106,6 +413,382 @@ class TestJournalEntries:
         assert revenue_balance == Decimal("-15000")  # credit balance = negative
 
 
+class TestBulkJournalEntries:
+    """Verify set-based bulk journal entry creation."""
+
+    def _setup(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = svc.seed_default_accounts()
+        cash = next(a for a in accounts if a.code == "1010")
+        revenue = next(a for a in accounts if a.code == "4010")
+        return svc, cash, revenue
+
+    def _entry(self, cash, revenue, debit, credit=None, day=date(2026, 1, 31)):
+        return {
+            "entry_date": day,
+            "memo": "Accrual",
+            "lines": [
+                {"account_id": cash.id, "debit": Decimal(debit)},
+                {"account_id": revenue.id, "credit": Decimal(credit or debit)},
+            ],
+        }
+
+    def test_valid_entries_written_and_errors_reported(self, db_session, test_user):
+        svc, cash, revenue = self._setup(db_session)
+        unknown = self._entry(cash, revenue, "10")
+        unknown["lines"][1]["account_id"] = 999999
+        result = svc.create_journal_entries_bulk([
+            self._entry(cash, revenue, "100"),
+            self._entry(cash, revenue, "100", "90"),
+            unknown,
+            self._entry(cash, revenue, "25"),
+        ], auto_post=True, user_id=test_user.id)
+
+        assert [c["index"] for c in result["created"]] == [0, 3]
+        assert [c["entry_number"] for c in result["created"]] == ["JE-000001", "JE-000002"]
+        assert [e["index"] for e in result["errors"]] == [1, 2]
+        assert "out of balance" in result["errors"][0]["error"]
+        assert "not found" in result["errors"][1]["error"]
+
+        entries = svc.list_journal_entries(status="posted")
+        assert len(entries) == 2 and all(len(e.lines) == 2 for e in entries)
+        assert svc.get_account_balance(cash.id) == Decimal("125")
+        assert svc.ledger.verify() == []
+
+    def test_bulk_runs_in_one_commit(self, db_session, test_user):
+        svc, cash, revenue = self._setup(db_session)
+        commits = []
+        original = db_session.commit
+        db_session.commit = lambda: (commits.append(1), original())[1]
+        try:
+            result = svc.create_journal_entries_bulk(
+                [self._entry(cash, revenue, str(n + 1)) for n in range(50)],
+            )
+        finally:
+            db_session.commit = original
+        assert len(result["created"]) == 50 and commits == [1]
+        assert {e.status for e in svc.list_journal_entries(limit=100)} == {"draft"}
+
+    def test_bulk_endpoint(self, auth_client):
+        accounts = auth_client.get("/finance/accounts").json()
+        cash = next(a for a in accounts if a["code"] == "1010")
+        revenue = next(a for a in accounts if a["code"] == "4010")
+        entry = {
+            "entry_date": "2026-01-31",
+            "lines": [
+                {"account_id": cash["id"], "debit": "10"},
+                {"account_id": revenue["id"], "credit": "10"},
+            ],
+        }
+        bad = {**entry, "lines": entry["lines"][:1]}
+        response = auth_client.post("/finance/journal-entries/bulk", json={
+            "entries": [entry, bad, entry], "auto_post": True,
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert [c["index"] for c in body["created"]] == [0, 2]
+        assert body["errors"] == [{"index": 1, "error": "Journal entry needs at least two lines"}]
+
+
+class TestLedgerBalances:
+    """Verify the materialized account balance table."""
+
+    def _post(self, svc, user_id, day, cash, revenue, amount, auto_post=True):
+        return svc.create_journal_entry(
+            entry_date=day, auto_post=auto_post, user_id=user_id,
+            lines=[
+                {"account_id": cash.id, "debit": Decimal(amount)},
+                {"account_id": revenue.id, "credit": Decimal(amount)},
+            ],
+        )
+
+    def _setup(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = svc.seed_default_accounts()
+        cash = next(a for a in accounts if a.code == "1010")
+        revenue = next(a for a in accounts if a.code == "4010")
+        return svc, cash, revenue
+
+    def test_balance_as_of_date(self, db_session, test_user):
+        svc, cash, revenue = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), cash, revenue, "100")
+        self._post(svc, test_user.id, date(2026, 2, 5), cash, revenue, "40")
+        self._post(svc, test_user.id, date(2026, 2, 20), cash, revenue, "2.50")
+        draft = self._post(svc, test_user.id, date(2026, 2, 1), cash, revenue, "1000", auto_post=False)
+        assert svc.get_account_balance(cash.id) == Decimal("142.50")
+        assert svc.get_account_balance(cash.id, as_of=date(2026, 1, 31)) == Decimal("100")
+        assert svc.get_account_balance(cash.id, as_of=date(2026, 2, 10)) == Decimal("140")
+        svc.post_journal_entry(draft.id, test_user.id)
+        assert svc.get_account_balance(revenue.id) == Decimal("-1142.50")
+        rows = db_session.query(AccountBalance).filter(AccountBalance.account_id == cash.id).all()
+        assert sorted(r.period_start for r in rows) == [date(2026, 1, 1), date(2026, 2, 1)]
+
+    def test_verify_and_rebuild(self, db_session, test_user):
+        svc, cash, revenue = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 3, 3), cash, revenue, "75")
+        assert svc.ledger.verify() == []
+        db_session.query(AccountBalance).filter(AccountBalance.account_id == cash.id).delete()
+        db_session.commit()
+        mismatches = svc.ledger.verify()
+        assert [(m["account_id"], m["expected_debit"]) for m in mismatches] == [(cash.id, Decimal("75.00"))]
+        assert svc.ledger.rebuild() == 2
+        assert svc.ledger.verify() == []
+        assert svc.get_account_balance(cash.id) == Decimal("75")
+
+    def test_balance_endpoint(self, auth_client, db_session, test_user):
+        svc, cash, revenue = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), cash, revenue, "100")
+        body = auth_client.get(f"/finance/accounts/{cash.id}/balance", params={"as_of": "2026-01-05"}).json()
+        assert Decimal(body["balance"]) == 0
+        body = auth_client.get(f"/finance/accounts/{cash.id}/balance").json()
+        assert Decimal(body["balance"]) == Decimal("100")
+
+
+class TestFinancialStatements:
+    """Verify trial balance, income statement and balance sheet."""
+
+    def _setup(self, db_session):
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = {a.code: a for a in svc.seed_default_accounts()}
+        fy = svc.create_fiscal_year("FY 2026", date(2026, 1, 1), date(2026, 12, 31))
+        periods = sorted(fy.periods, key=lambda p: p.period_number)
+        return svc, accounts, periods, FinancialReportService(db_session, tenant_id="default")
+
+    def _post(self, svc, user_id, day, debit, credit, amount):
+        svc.create_journal_entry(
+            entry_date=day, auto_post=True, user_id=user_id,
+            lines=[
+                {"account_id": debit.id, "debit": Decimal(amount)},
+                {"account_id": credit.id, "credit": Decimal(amount)},
+            ],
+        )
+
+    def _line(self, report, code):
+        return next(l for l in report["lines"] if l["code"] == code)
+
+    def test_fiscal_year_has_monthly_periods(self, db_session):
+        _, _, periods, _ = self._setup(db_session)
+        assert len(periods) == 12
+        assert (periods[1].name, periods[1].start_date, periods[1].end_date) == (
+            "February 2026", date(2026, 2, 1), date(2026, 2, 28),
+        )
+
+    def test_income_statement_rolls_up_and_compares(self, db_session, test_user):
+        svc, acc, periods, reports = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["4010"], "1000")
+        self._post(svc, test_user.id, date(2026, 2, 3), acc["1010"], acc["4020"], "500")
+        self._post(svc, test_user.id, date(2026, 2, 9), acc["5010"], acc["1010"], "200")
+
+        report = reports.income_statement(periods[1].id, compare=[periods[0].id])
+        assert [c["name"] for c in report["columns"]] == ["February 2026", "January 2026"]
+        assert self._line(report, "4000")["amounts"] == [Decimal("500"), Decimal("1000")]
+        assert self._line(report, "4020")["depth"] == 1
+        assert report["totals"]["net_income"] == [Decimal("300"), Decimal("1000")]
+        assert all(l["account_type"] in ("revenue", "expense") for l in report["lines"])
+
+    def test_trial_balance_and_balance_sheet_balance(self, db_session, test_user):
+        svc, acc, periods, reports = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["3100"], "5000")
+        self._post(svc, test_user.id, date(2026, 1, 20), acc["1100"], acc["4030"], "2000")
+        self._post(svc, test_user.id, date(2026, 2, 14), acc["5030"], acc["2100"], "300")
+
+        tb = reports.trial_balance(periods[1].id)
+        assert tb["totals"]["debit"] == tb["totals"]["credit"] == [Decimal("7300")]
+
+        bs = reports.balance_sheet(periods[1].id, compare=[periods[0].id])
+        totals = bs["totals"]
+        assert totals["assets"] == [Decimal("7000"), Decimal("7000")]
+        assert totals["current_earnings"] == [Decimal("1700"), Decimal("2000")]
+        assert totals["assets"] == totals["liabilities_and_equity"]
+        assert self._line(bs, "1000")["amounts"] == [Decimal("7000"), Decimal("7000")]
+        assert self._line(bs, "1100")["depth"] == 1
+
+    def test_closed_period_reports_are_cached(self, db_session, test_user):
+        svc, acc, periods, reports = self._setup(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["4010"], "100")
+        january = periods[0]
+        january.is_closed = True
+        db_session.commit()
+
+        first = reports.income_statement(january.id)
+        acc["4010"].name = "Advisory Income"  # bypasses create_account's invalidation
+        db_session.commit()
+        assert reports.income_statement(january.id) == first
+        invalidate_report_cache("default")
+        assert self._line(reports.income_statement(january.id), "4010")["name"] == "Advisory Income"
+
+        # Open periods are always computed fresh.
+        self._post(svc, test_user.id, date(2026, 2, 1), acc["1010"], acc["4010"], "10")
+        assert reports.income_statement(periods[1].id)["totals"]["revenue"] == [Decimal("10")]
+        self._post(svc, test_user.id, date(2026, 2, 2), acc["1010"], acc["4010"], "10")
+        assert reports.income_statement(periods[1].id)["totals"]["revenue"] == [Decimal("20")]
+
+    def test_report_endpoints(self, auth_client, db_session, test_user):
+        fy = auth_client.post("/finance/fiscal-years", json={
+            "name": "FY 2026", "start_date": "2026-01-01", "end_date": "2026-12-31",
+        }).json()
+        assert len(fy["periods"]) == 12
+        period_id = fy["periods"][0]["id"]
+        for path in ("trial-balance", "income-statement", "balance-sheet"):
+            response = auth_client.get(f"/finance/reports/{path}", params={"period_id": period_id})
+            assert response.status_code == 200
+            assert response.json()["columns"][0]["period_id"] == period_id
+        missing = auth_client.get("/finance/reports/balance-sheet", params={"period_id": 99999})
+        assert missing.status_code == 404
+
+
+class TestPeriodClose:
+    """Verify fiscal period close, closing balances and the retained earnings roll-forward."""
+
+    def _setup(self, db_session, end=date(2026, 12, 31)):
+        svc = AccountingService(db_session, tenant_id="default")
+        accounts = {a.code: a for a in svc.seed_default_accounts()}
+        fy = svc.create_fiscal_year("FY 2026", date(2026, 1, 1), end)
+        periods = sorted(fy.periods, key=lambda p: p.period_number)
+        return svc, accounts, periods
+
+    def _post(self, svc, user_id, day, debit, credit, amount):
+        return svc.create_journal_entry(
+            entry_date=day, auto_post=True, user_id=user_id,
+            lines=[
+                {"account_id": debit.id, "debit": Decimal(amount)},
+                {"account_id": credit.id, "credit": Decimal(amount)},
+            ],
+        )
+
+    def test_entries_are_assigned_and_closed_periods_locked(self, db_session, test_user):
+        svc = AccountingService(db_session, tenant_id="default")
+        acc = {a.code: a for a in svc.seed_default_accounts()}
+        early = self._post(svc, test_user.id, date(2026, 1, 5), acc["1010"], acc["4010"], "100")
+        assert early.fiscal_period_id is None
+        fy = svc.create_fiscal_year("FY 2026", date(2026, 1, 1), date(2026, 12, 31))
+        january, february, march = sorted(fy.periods, key=lambda p: p.period_number)[:3]
+        db_session.refresh(early)
+        assert early.fiscal_period_id == january.id
+        assert self._post(svc, test_user.id, date(2026, 2, 3), acc["1010"], acc["4010"], "5").fiscal_period_id == february.id
+
+        closer = PeriodCloseService(db_session)
+        with pytest.raises(ValueError, match="Close 'January 2026' first"):
+            closer.close(march.id)
+        draft = svc.create_journal_entry(date(2026, 1, 9), [
+            {"account_id": acc["1010"].id, "debit": Decimal("1")},
+            {"account_id": acc["4010"].id, "credit": Decimal("1")},
+        ])
+        with pytest.raises(ValueError, match="draft"):
+            closer.close(january.id)
+        db_session.delete(draft)
+        db_session.commit()
+
+        result = closer.close(january.id, user_id=test_user.id)
+        assert (result["accounts"], result["retained_earnings"], result["fiscal_year_closed"]) == (2, None, False)
+        with pytest.raises(ValueError, match="already closed"):
+            closer.close(january.id)
+        with pytest.raises(ValueError, match="is closed"):
+            self._post(svc, test_user.id, date(2026, 1, 31), acc["1010"], acc["4010"], "1")
+        bulk = svc.create_journal_entries_bulk([
+            {"entry_date": day, "lines": [
+                {"account_id": acc["1010"].id, "debit": Decimal("1")},
+                {"account_id": acc["4010"].id, "credit": Decimal("1")},
+            ]}
+            for day in (date(2026, 1, 20), date(2026, 2, 20))
+        ])
+        assert [e["index"] for e in bulk["errors"]] == [0]
+        assert len(bulk["created"]) == 1
+
+    def test_balances_start_from_closing_snapshot(self, db_session, test_user):
+        svc, acc, periods = self._setup(db_session)
+        reports = FinancialReportService(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["3100"], "5000")
+        self._post(svc, test_user.id, date(2026, 1, 20), acc["1100"], acc["4030"], "2000")
+        PeriodCloseService(db_session).close(periods[0].id)
+        snapshot = {
+            row.account_id: (row.debit, row.credit)
+            for row in db_session.query(AccountClosingBalance).filter_by(fiscal_period_id=periods[0].id)
+        }
+        assert snapshot[acc["1010"].id] == (Decimal("5000"), Decimal("0"))
+
+        # A January posting slipped in behind the lock is not rescanned.
+        je = JournalEntry(entry_date=date(2026, 1, 25), status="posted", tenant_id="default")
+        db_session.add(je)
+        db_session.flush()
+        lines = [
+            JournalEntryLine(journal_entry_id=je.id, account_id=acc["1010"].id, debit=9, credit=0,
+                             base_debit=9, base_credit=0, tenant_id="default"),
+            JournalEntryLine(journal_entry_id=je.id, account_id=acc["4010"].id, debit=0, credit=9,
+                             base_debit=0, base_credit=9, tenant_id="default"),
+        ]
+        db_session.add_all(lines)
+        LedgerService(db_session).record(je.entry_date, lines)
+        db_session.commit()
+
+        self._post(svc, test_user.id, date(2026, 2, 14), acc["5030"], acc["2100"], "300")
+        bs = reports.balance_sheet(periods[1].id, compare=[periods[0].id])
+        assert bs["totals"]["assets"] == [Decimal("7000"), Decimal("7000")]
+        assert bs["totals"]["current_earnings"] == [Decimal("1700"), Decimal("2000")]
+        assert bs["totals"]["assets"] == bs["totals"]["liabilities_and_equity"]
+
+    def test_year_end_rolls_retained_earnings_forward(self, db_session, test_user):
+        svc, acc, periods = self._setup(db_session, end=date(2026, 2, 28))
+        reports = FinancialReportService(db_session)
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["4010"], "1000")
+        self._post(svc, test_user.id, date(2026, 2, 10), acc["5010"], acc["1010"], "200")
+        closer = PeriodCloseService(db_session)
+        closer.close(periods[0].id)
+        result = closer.close(periods[1].id)
+        assert result["retained_earnings"] == Decimal("800")
+        assert result["fiscal_year_closed"] is True
+
+        next_year = svc.create_fiscal_year("FY 2027", date(2026, 3, 1), date(2027, 2, 28))
+        march = min(next_year.periods, key=lambda p: p.period_number)
+        self._post(svc, test_user.id, date(2026, 3, 5), acc["1010"], acc["4010"], "50")
+        bs = reports.balance_sheet(march.id)
+        retained = next(l for l in bs["lines"] if l["code"] == "3100")
+        assert retained["amounts"] == [Decimal("800")]
+        assert bs["totals"]["current_earnings"] == [Decimal("50")]
+        assert bs["totals"]["assets"] == bs["totals"]["liabilities_and_equity"] == [Decimal("850")]
+        # Period activity is unaffected by the roll-forward.
+        assert reports.income_statement(periods[1].id)["totals"]["net_income"] == [Decimal("-200")]
+
+    def test_ledger_balances_follow_year_end_close(self, db_session, test_user):
+        svc, acc, periods = self._setup(db_session, end=date(2026, 2, 28))
+        self._post(svc, test_user.id, date(2026, 1, 10), acc["1010"], acc["4010"], "1000")
+        self._post(svc, test_user.id, date(2026, 2, 10), acc["5010"], acc["1010"], "200")
+        closer = PeriodCloseService(db_session)
+        closer.close(periods[0].id)
+        ledger = LedgerService(db_session)
+        assert ledger.balance(acc["4010"].id) == Decimal("-1000")  # Not a year end yet
+        closer.close(periods[1].id)
+
+        next_year = svc.create_fiscal_year("FY 2027", date(2026, 3, 1), date(2027, 2, 28))
+        march = min(next_year.periods, key=lambda p: p.period_number)
+        self._post(svc, test_user.id, date(2026, 3, 5), acc["1010"], acc["4010"], "50")
+        bs = FinancialReportService(db_session).balance_sheet(march.id)
+        reported = {l["code"]: l["amounts"][0] for l in bs["lines"]}
+        balances = ledger.balances(date(2026, 3, 31))
+        assert -balances[acc["3100"].id] == reported["3100"] == Decimal("800")
+        assert balances[acc["1010"].id] == reported["1010"] == Decimal("850")
+        assert balances[acc["4010"].id] == Decimal("-50")
+        assert balances[acc["5010"].id] == Decimal("0")
+        assert sum(balances.values()) == 0
+        assert svc.get_account_balance(acc["4010"].id) == Decimal("-50")
+        assert svc.get_account_balance(acc["3100"].id, as_of=date(2026, 2, 28)) == Decimal("-800")
+        # Before the year end the revenue is still on its own account.
+        assert ledger.balance(acc["4010"].id, as_of=date(2026, 2, 27)) == Decimal("-1000")
+        assert acc["3100"].id not in ledger.balances(date(2026, 2, 27))
+
+    def test_close_endpoint(self, auth_client, db_session):
+        fy = auth_client.post("/finance/fiscal-years", json={
+            "name": "FY 2026", "start_date": "2026-01-01", "end_date": "2026-12-31",
+        }).json()
+        period_id = fy["periods"][0]["id"]
+        resp = auth_client.post(f"/finance/fiscal-periods/{period_id}/close")
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["period_id"] == period_id
+        assert auth_client.post(f"/finance/fiscal-periods/{period_id}/close").status_code == 400
+        periods = auth_client.get("/finance/fiscal-years").json()[0]["periods"]
+        assert periods[0]["is_closed"] and periods[0]["closed_at"]
+
+
 class TestInvoicing:
     """Verify invoice lifecycle."""
 
@@ -170,6 +853,408 @@ class TestInvoicing:
         assert inv.balance_due == Decimal("7000")
 
 
+class TestARAging:
+    """Verify the receivables aging report."""
+
+    AS_OF = date(2026, 6, 30)
+
+    def _invoice(self, svc, company_id, due, amount, currency="EUR", issue=True):
+        invoice = svc.create({
+            "invoice_date": date(2026, 1, 1), "due_date": due, "company_id": company_id,
+            "currency": currency, "exchange_rate": Decimal(1),
+            "lines": [{"description": "Fee", "unit_price": Decimal(amount)}],
+        })
+        return svc.issue(invoice.id) if issue else invoice
+
+    def _setup(self, db_session):
+        acme = Company(name="Acme", tenant_id="default")
+        beta = Company(name="Beta", tenant_id="default")
+        db_session.add_all([acme, beta])
+        db_session.commit()
+        svc = InvoiceService(db_session, tenant_id="default")
+        self._invoice(svc, acme.id, date(2026, 7, 15), "100")    # current
+        self._invoice(svc, acme.id, date(2026, 6, 30), "50")     # due today: current
+        self._invoice(svc, acme.id, date(2026, 6, 29), "200")    # 1 day
+        self._invoice(svc, acme.id, date(2026, 4, 1), "300")     # 90 days
+        self._invoice(svc, acme.id, date(2026, 1, 31), "400")    # 150 days
+        self._invoice(svc, acme.id, date(2026, 5, 1), "70", "USD")
+        paid = self._invoice(svc, beta.id, date(2026, 5, 1), "999")
+        svc.record_payment(paid.id, {"payment_date": date(2026, 5, 2), "amount": Decimal("999")})
+        return svc, acme, beta
+
+    def test_buckets_by_client_and_currency(self, db_session):
+        svc, acme, beta = self._setup(db_session)
+        report = svc.aging(as_of=self.AS_OF)
+        rows = {(r["company_name"], r["currency"]): r for r in report["rows"]}
+        assert set(rows) == {("Acme", "EUR"), ("Acme", "USD")}
+        eur = rows[("Acme", "EUR")]
+        assert eur["current"] == Decimal("150")
+        assert eur["days_1_30"] == Decimal("200")
+        assert eur["days_61_90"] == Decimal("300")
+        assert eur["days_over_120"] == Decimal("400")
+        assert eur["total"] == Decimal("1050")
+        assert rows[("Acme", "USD")]["days_31_60"] == Decimal("70")
+        assert [t["currency"] for t in report["totals"]] == ["EUR", "USD"]
+
+    def test_cache_invalidated_by_payment_and_invoice(self, db_session):
+        svc, acme, beta = self._setup(db_session)
+        first = svc.aging(as_of=self.AS_OF)
+        assert svc.aging(as_of=self.AS_OF) is first
+
+        new = self._invoice(svc, beta.id, date(2026, 6, 1), "10")
+        second = svc.aging(as_of=self.AS_OF)
+        assert second is not first
+        assert any(r["company_name"] == "Beta" for r in second["rows"])
+
+        svc.record_payment(new.id, {"payment_date": date(2026, 6, 2), "amount": Decimal("10")})
+        assert all(r["company_name"] != "Beta" for r in svc.aging(as_of=self.AS_OF)["rows"])
+
+    def test_past_as_of_ignores_later_payments(self, db_session):
+        svc, acme, beta = self._setup(db_session)
+        partial = self._invoice(svc, beta.id, date(2026, 4, 15), "500")
+        svc.record_payment(partial.id, {"payment_date": date(2026, 4, 20), "amount": Decimal("120")})
+        svc.record_payment(partial.id, {"payment_date": date(2026, 7, 10), "amount": Decimal("380")})
+        rows = {(r["company_name"], r["currency"]): r for r in svc.aging(as_of=self.AS_OF)["rows"]}
+        # Paid in full on 10 July, but 380 was still open at the end of June.
+        assert rows[("Beta", "EUR")]["days_61_90"] == Decimal("380")
+        early = {(r["company_name"], r["currency"]): r for r in svc.aging(as_of=date(2026, 5, 1))["rows"]}
+        # The 999 invoice paid on 2 May was open (and due) on 1 May.
+        assert early[("Beta", "EUR")]["total"] == Decimal("999") + Decimal("380")
+        later = svc.aging(as_of=date(2026, 7, 31))["rows"]
+        assert all(r["company_name"] != "Beta" for r in later)
+
+    def test_draft_invoices_are_not_aged(self, db_session):
+        svc, acme, beta = self._setup(db_session)
+        draft = self._invoice(svc, beta.id, date(2026, 5, 1), "250", issue=False)
+        assert all(r["company_name"] != "Beta" for r in svc.aging(as_of=self.AS_OF)["rows"])
+        svc.issue(draft.id)
+        beta_rows = [r for r in svc.aging(as_of=self.AS_OF)["rows"] if r["company_name"] == "Beta"]
+        assert beta_rows[0]["days_31_60"] == Decimal("250")
+        with pytest.raises(ValueError, match="Only draft"):
+            svc.issue(draft.id)
+
+    def test_aging_endpoint(self, auth_client, db_session):
+        self._setup(db_session)
+        response = auth_client.get("/finance/invoices/aging", params={"as_of": "2026-06-30"})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["buckets"][0] == "current" and body["buckets"][-1] == "days_over_120"
+        assert len(body["rows"]) == 2
+
+    def test_send_endpoint(self, auth_client, db_session):
+        svc, acme, _ = self._setup(db_session)
+        draft = self._invoice(svc, acme.id, date(2026, 7, 1), "10", issue=False)
+        response = auth_client.post(f"/finance/invoices/{draft.id}/send")
+        assert (response.status_code, response.json()["status"]) == (200, "sent")
+        assert auth_client.post(f"/finance/invoices/{draft.id}/send").status_code == 400
+
+
+class TestBillingRun:
+    """Verify invoicing of unbilled billable time."""
+
+    def _setup(self, db_session, user_id):
+        acme = Company(name="Acme", tenant_id="default")
+        db_session.add(acme)
+        db_session.flush()
+        alpha = Deal(title="Project Alpha", deal_type="sell-side", company_id=acme.id, tenant_id="default")
+        beta = Deal(title="Project Beta", deal_type="buy-side", tenant_id="default")
+        db_session.add_all([alpha, beta])
+        db_session.flush()
+        entries = [
+            (alpha, date(2026, 1, 5), 3.5, "400", True),
+            (alpha, date(2026, 1, 6), 2.0, "400", True),
+            (alpha, date(2026, 1, 7), 1.25, "250", True),
+            (alpha, date(2026, 1, 8), 4.0, "400", False),  # not billable
+            (alpha, date(2026, 2, 1), 1.0, "400", True),   # next month
+            (beta, date(2026, 1, 9), 2.0, "300", True),
+            (beta, date(2026, 1, 9), 1.0, None, True),     # no rate
+        ]
+        db_session.add_all([
+            TimeEntry(deal_id=deal.id, user_id=user_id, date=day, hours=hours, billable=billable,
+                      hourly_rate=Decimal(rate) if rate else None, tenant_id="default")
+            for deal, day, hours, rate, billable in entries
+        ])
+        db_session.commit()
+        return alpha, beta
+
+    def test_dry_run_previews_without_writing(self, db_session, test_user):
+        alpha, beta = self._setup(db_session, test_user.id)
+        result = BillingRunService(db_session).run(date(2026, 1, 1), date(2026, 1, 31), dry_run=True)
+        by_deal = {i["deal_id"]: i for i in result["invoices"]}
+        assert by_deal[alpha.id]["subtotal"] == Decimal("2512.50")  # 5.5h @ 400 + 1.25h @ 250
+        assert [l["unit_price"] for l in by_deal[alpha.id]["lines"]] == [Decimal("400"), Decimal("250")]
+        assert beta.id not in by_deal  # No client to invoice
+        assert result["skipped_deals"] == [beta.id]
+        assert result["skipped_entries"] == 1
+        assert db_session.query(Invoice).count() == 0
+        assert db_session.query(TimeEntry).filter(TimeEntry.invoiced == True).count() == 0  # noqa: E712
+
+    def test_run_creates_invoices_and_marks_time(self, db_session, test_user):
+        alpha, beta = self._setup(db_session, test_user.id)
+        result = BillingRunService(db_session).run(date(2026, 1, 1), date(2026, 1, 31))
+        numbers = sorted(i["invoice_number"] for i in result["invoices"])
+        assert numbers == ["INV-00001"]
+        assert result["skipped_deals"] == [beta.id]
+
+        invoice = db_session.query(Invoice).filter(Invoice.deal_id == alpha.id).one()
+        assert invoice.company_id == alpha.company_id
+        assert invoice.total == invoice.balance_due == Decimal("2512.50")
+        assert invoice.due_date == date(2026, 3, 2)
+        assert len(invoice.lines) == 2
+        assert db_session.query(TimeEntry).filter(TimeEntry.invoiced == True).count() == 3  # noqa: E712
+
+        # Already-billed time is not billed again.
+        again = BillingRunService(db_session).run(date(2026, 1, 1), date(2026, 1, 31))
+        assert again["invoices"] == []
+        assert InvoiceService(db_session).count() == 1
+
+    def test_deal_without_currency_bills_in_base_currency(self, db_session, test_user):
+        alpha, _ = self._setup(db_session, test_user.id)
+        alpha.currency = None
+        db_session.commit()
+        service = BillingRunService(db_session)
+        service.fx.base_currency = "CHF"
+        result = service.run(date(2026, 1, 1), date(2026, 1, 31), deal_ids=[alpha.id], dry_run=True)
+        assert [i["currency"] for i in result["invoices"]] == ["CHF"]
+
+    def test_billing_run_endpoint(self, auth_client, db_session, test_user):
+        alpha, _ = self._setup(db_session, test_user.id)
+        payload = {"period_start": "2026-01-01", "period_end": "2026-01-31", "deal_ids": [alpha.id]}
+        preview = auth_client.post("/finance/billing-runs", json={**payload, "dry_run": True}).json()
+        assert preview["invoices"][0]["invoice_id"] is None
+        body = auth_client.post("/finance/billing-runs", json=payload).json()
+        assert [i["deal_id"] for i in body["invoices"]] == [alpha.id]
+        assert body["invoices"][0]["invoice_number"] == "INV-00001"
+
+
+class TestBankReconciliation:
+    """Verify statement parsing and automatic matching of bank lines to invoices."""
+
+    CAMT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02"><BkToCstmrStmt><Stmt>
+  <Ntry><Amt Ccy="EUR">5000.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2026-02-03</Dt></BookgDt>
+    <AcctSvcrRef>BANK-1</AcctSvcrRef>
+    <NtryDtls><TxDtls><RltdPties><Dbtr><Nm>Acme SA</Nm></Dbtr></RltdPties>
+      <RmtInf><Ustrd>Payment INV-00001</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+  <Ntry><Amt Ccy="EUR">120.00</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2026-02-04</Dt></BookgDt>
+    <AcctSvcrRef>BANK-2</AcctSvcrRef></Ntry>
+</Stmt></BkToCstmrStmt></Document>"""
+
+    MT940 = """:20:STMT
+:25:DE89370400440532013000
+:28C:1/1
+:60F:C260201EUR1000,00
+:61:2602030203C4000,00NTRFNONREF//BANK-7
+:86:Teilzahlung inv 2
+ Kunde Beta
+:61:2602040204D50,00NMSCNONREF
+:86:Fees
+:62F:C260204EUR4950,00
+-"""
+
+    def _invoices(self, db_session, *amounts):
+        svc = InvoiceService(db_session)
+        return [
+            svc.create({
+                "invoice_date": date(2026, 1, 1),
+                "due_date": date(2026, 1, 31),
+                "lines": [{"description": "Advisory", "unit_price": Decimal(a)}],
+            })
+            for a in amounts
+        ]
+
+    def test_parsers(self):
+        csv_lines = list(iter_csv_statement(StringIO('Date,Amount\n03.02.2026,"1.234,50"\n')))
+        assert csv_lines == [StatementLine(date(2026, 2, 3), Decimal("1234.50"), "EUR")]
+
+        camt = list(iter_camt053_statement(BytesIO(self.CAMT)))
+        assert [(l.amount, l.reference, l.counterparty, l.bank_reference) for l in camt] == [
+            (Decimal("5000.00"), "Payment INV-00001", "Acme SA", "BANK-1"),
+            (Decimal("-120.00"), None, None, "BANK-2"),
+        ]
+
+        mt940 = list(iter_mt940_statement(StringIO(self.MT940)))
+        assert [(l.booking_date, l.amount, l.currency, l.reference, l.bank_reference) for l in mt940] == [
+            (date(2026, 2, 3), Decimal("4000.00"), "EUR", "Teilzahlung inv 2 Kunde Beta", "BANK-7"),
+            (date(2026, 2, 4), Decimal("-50.00"), "EUR", "Fees", None),
+        ]
+
+    def test_malformed_camt_amount(self, auth_client):
+        bad = self.CAMT.replace(b">120.00<", b">12O.00<")
+        with pytest.raises(StatementFormatError, match="Invalid amount '12O.00'"):
+            list(iter_camt053_statement(BytesIO(bad)))
+        resp = auth_client.post(
+            "/finance/bank-statements",
+            data={"file_format": "camt053"},
+            files={"file": ("feb.xml", bad, "application/xml")},
+        )
+        assert resp.status_code == 400
+
+    def test_matching_confidence(self, db_session):
+        first, second, third = self._invoices(db_session, "5000", "10000", "2500")
+        lines = [
+            StatementLine(date(2026, 2, 3), Decimal("5000"), "EUR", "Payment INV-00001"),
+            StatementLine(date(2026, 2, 3), Decimal("4000"), "EUR", "inv 2 part 1"),
+            StatementLine(date(2026, 2, 4), Decimal("2500"), "EUR", "thanks"),  # only open 2500
+            StatementLine(date(2026, 2, 4), Decimal("999"), "USD", "INV-00002"),  # wrong currency
+            StatementLine(date(2026, 2, 5), Decimal("-80"), "EUR", "Bank fees"),
+        ]
+        result = ReconciliationService(db_session).import_statement(lines, source="feb.csv")
+        assert (result["lines"], result["matched"], result["unmatched"]) == (5, 3, 2)
+        assert result["matched_amount"] == Decimal("11500")
+
+        rows = db_session.query(BankTransaction).order_by(BankTransaction.id).all()
+        assert [(r.status, r.match_reason, r.match_confidence) for r in rows] == [
+            ("matched", "reference_and_amount", Decimal("1.00")),
+            ("matched", "reference_partial", Decimal("0.80")),
+            ("matched", "amount_unique", Decimal("0.70")),
+            ("unmatched", "reference_currency_mismatch", Decimal("0.50")),
+            ("unmatched", "outgoing", None),
+        ]
+        assert rows[3].invoice_id == second.id and rows[3].payment_id is None
+
+        for inv in (first, second, third):
+            db_session.refresh(inv)
+        assert (first.status, first.balance_due) == ("paid", Decimal("0"))
+        assert (second.status, second.balance_due) == ("partially_paid", Decimal("6000"))
+        assert third.status == "paid"
+        assert db_session.query(Payment).filter(Payment.payment_method == "bank_transfer").count() == 3
+
+    def test_concurrent_payment_is_not_overwritten(self, db_session):
+        (invoice,) = self._invoices(db_session, "5000")
+
+        def lines():
+            # Another request records a payment after the import indexed open invoices.
+            with Session(db_session.get_bind()) as other:
+                InvoiceService(other, tenant_id="default").record_payment(
+                    invoice.id, {"payment_date": date(2026, 2, 2), "amount": Decimal("1000")},
+                )
+            yield StatementLine(date(2026, 2, 3), Decimal("1500"), "EUR", "INV-00001 part")
+
+        ReconciliationService(db_session).import_statement(lines())
+        db_session.refresh(invoice)
+        assert (invoice.amount_paid, invoice.balance_due) == (Decimal("2500"), Decimal("2500"))
+        assert invoice.status == "partially_paid"
+
+    def test_manual_match_rejects_settled_invoices(self, db_session):
+        paid, void = self._invoices(db_session, "100", "200")
+        InvoiceService(db_session, tenant_id="default").record_payment(
+            paid.id, {"payment_date": date(2026, 2, 1), "amount": Decimal("100")},
+        )
+        void.status = "void"
+        db_session.commit()
+        svc = ReconciliationService(db_session)
+        svc.import_statement([StatementLine(date(2026, 2, 3), Decimal("50"), "EUR", "unknown")])
+        txn = db_session.query(BankTransaction).one()
+        for invoice in (paid, void):
+            with pytest.raises(ValueError, match="not open"):
+                svc.match(txn.id, invoice.id)
+        assert db_session.query(BankTransaction).one().status == "unmatched"
+
+    def test_reimport_skips_known_lines(self, db_session):
+        self._invoices(db_session, "5000")
+        svc = ReconciliationService(db_session)
+        lines = [
+            StatementLine(date(2026, 2, 3), Decimal("100"), "EUR", "Refund"),
+            StatementLine(date(2026, 2, 3), Decimal("100"), "EUR", "Refund"),  # same day, same text
+        ]
+        assert svc.import_statement(lines)["duplicates"] == 0
+        again = svc.import_statement(lines + [StatementLine(date(2026, 2, 6), Decimal("5000"), "EUR", "INV-00001")])
+        assert (again["duplicates"], again["matched"]) == (2, 1)
+        assert db_session.query(BankTransaction).count() == 3
+
+    def test_bank_statement_endpoints(self, auth_client, db_session):
+        self._invoices(db_session, "5000", "10000")
+        resp = auth_client.post(
+            "/finance/bank-statements",
+            data={"file_format": "camt053"},
+            files={"file": ("feb.xml", self.CAMT, "application/xml")},
+        )
+        assert resp.status_code == 200, resp.text
+        assert resp.json()["matched"] == 1
+        assert resp.json()["payments"][0]["invoice_number"] == "INV-00001"
+
+        csv_body = "booking_date,amount,reference\n2026-02-05,7000.00,Beta wire\n"
+        resp = auth_client.post("/finance/bank-statements", files={"file": ("feb.csv", csv_body, "text/csv")})
+        assert resp.json()["unmatched"] == 1
+
+        queue = auth_client.get("/finance/bank-transactions").json()
+        assert [t["amount"] for t in queue] == ["-120.00", "7000.00"]
+        credit = queue[1]
+        invoice_id = db_session.query(Invoice.id).filter(Invoice.invoice_number == "INV-00002").scalar()
+        matched = auth_client.post(
+            f"/finance/bank-transactions/{credit['id']}/match", json={"invoice_id": invoice_id},
+        ).json()
+        assert (matched["status"], matched["match_reason"]) == ("matched", "manual")
+        assert auth_client.get(f"/finance/invoices/{invoice_id}").json()["balance_due"] == "3000.00"
+        assert len(auth_client.get("/finance/bank-transactions").json()) == 1
+        again = auth_client.post(f"/finance/bank-transactions/{credit['id']}/match", json={"invoice_id": invoice_id})
+        assert again.status_code == 400
+        assert auth_client.post("/finance/bank-transactions/999/match", json={"invoice_id": 1}).status_code == 404
+
+        bad = auth_client.post("/finance/bank-statements", files={"file": ("x.csv", "amount\nabc\n", "text/csv")})
+        assert bad.status_code == 400
+
+
+class TestDocumentNumbering:
+    """Verify the per-tenant sequence allocator."""
+
+    def _invoice(self, svc):
+        return svc.create({
+            "invoice_date": date(2026, 1, 1),
+            "due_date": date(2026, 1, 31),
+            "lines": [{"description": "Service", "unit_price": Decimal("100")}],
+        })
+
+    def test_no_reuse_after_soft_delete(self, db_session):
+        svc = InvoiceService(db_session, tenant_id="default")
+        first = self._invoice(svc)
+        second = self._invoice(svc)
+        svc.repo.delete(second.id)
+        third = self._invoice(svc)
+        assert [first.invoice_number, third.invoice_number] == ["INV-00001", "INV-00003"]
+
+    def test_tenants_number_independently(self, db_session):
+        a = SequenceAllocator(db_session, tenant_id="tenant-a")
+        b = SequenceAllocator(db_session, tenant_id="tenant-b")
+        assert [a.next("bill"), a.next("bill"), b.next("bill")] == ["BILL-00001", "BILL-00002", "BILL-00001"]
+
+    def test_block_allocation_and_rollback(self, db_session):
+        seq = SequenceAllocator(db_session, tenant_id="default")
+        assert seq.allocate("invoice", 3) == ["INV-00001", "INV-00002", "INV-00003"]
+        db_session.commit()
+        seq.allocate("invoice", 10)
+        db_session.rollback()  # abandoned block is handed out again: no gaps
+        assert seq.next("invoice") == "INV-00004"
+        with pytest.raises(ValueError):
+            seq.allocate("invoice", 0)
+        with pytest.raises(ValueError, match="Unknown sequence"):
+            seq.next("quote")
+
+    def test_continues_after_legacy_numbers(self, db_session):
+        for n in (1, 2):
+            db_session.add(Invoice(
+                invoice_number=f"INV-{n:05d}", invoice_date=date(2026, 1, 1),
+                due_date=date(2026, 1, 31), tenant_id="default",
+            ))
+        db_session.commit()
+        assert self._invoice(InvoiceService(db_session)).invoice_number == "INV-00003"
+
+    def test_journal_entries_and_bills_are_numbered(self, db_session):
+        acct = AccountingService(db_session, tenant_id="default")
+        accounts = acct.seed_default_accounts()
+        je = acct.create_journal_entry(date(2026, 1, 1), [
+            {"account_id": accounts[0].id, "debit": 10},
+            {"account_id": accounts[1].id, "credit": 10},
+        ])
+        assert je.entry_number == "JE-000001"
+        vendors = VendorService(db_session, tenant_id="default")
+        vendor = vendors.create({"name": "Supplier"})
+        bill_data = {"bill_date": date(2026, 1, 1), "due_date": date(2026, 2, 1), "lines": []}
+        assert vendors.create_bill(vendor.id, dict(bill_data)).bill_number == "BILL-00001"
+        assert vendors.create_bill(vendor.id, dict(bill_data, bill_number="V-77")).bill_number == "V-77"
+
+
 class TestVendorAndBills:
     """Verify AP operations."""
 
@@ -216,6 +1301,21 @@ class TestFinanceEndpoints:
         assert inv["invoice_number"] == "INV-00001"
         assert inv["total"] == "5000.00"
 
+    def test_list_invoices_filter_expressions(self, auth_client):
+        for day in ("2026-01-31", "2026-02-28", "2026-03-31"):
+            auth_client.post("/finance/invoices", json={
+                "invoice_date": "2026-01-01", "due_date": day,
+                "lines": [{"description": "Fee", "unit_price": "1000"}],
+            })
+        response = auth_client.get("/finance/invoices", params={
+            "filter": ["due_date:between:2026-02-01,2026-03-31", "total:gte:1000"],
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert body["total"] == 2
+        assert sorted(i["due_date"] for i in body["items"]) == ["2026-02-28", "2026-03-31"]
+        assert auth_client.get("/finance/invoices", params={"filter": "notes:eq:x"}).status_code == 400
+
     def test_record_payment_api(self, auth_client):
         # Create invoice first
         inv = auth_client.post("/finance/invoices", json={
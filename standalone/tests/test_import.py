@@ -12,7 +12,7 @@ from unittest.mock import MagicMock
 
 from app.models import Company, Contact
 from app.utils.import_ import (
-    ImportResult,
+    ImportResult, bulk_import, iter_csv_records,
     import_companies_csv, import_companies_json,
     import_contacts_csv, import_contacts_json,
 )
@@ -220,6 +220,59 @@ class TestImportContactsJson:
         assert result.successful == 1
 
 
+# ═══════════════════════════════════════════════════════════════
+# bulk_import engine
+# ═══════════════════════════════════════════════════════════════
+
+class TestBulkImport:
+
+    def test_duplicates_within_file(self, db_session):
+        csv = "name\nSameCo\nOtherCo\nSameCo\n"
+        result = import_companies_csv(db_session, csv)
+        assert result.successful == 2
+        assert result.failed == 1
+        assert "Row 4" in result.warnings[0]
+
+    def test_invalid_integer_reports_row(self, db_session):
+        csv = "name,employee_count\nGoodCo,10\nBadCo,many\n"
+        result = import_companies_csv(db_session, csv)
+        assert result.successful == 1
+        assert result.failed == 1
+        assert result.errors[0].startswith("Row 3:")
+
+    def test_chunks_use_constant_statement_count(self, db_session):
+        from sqlalchemy import event
+
+        co = Company(name="ChunkCo", tenant_id="default")
+        db_session.add(co)
+        db_session.commit()
+        lines = [f"C{i},L{i},c{i}@chunk.com,{co.id}" for i in range(10)]
+        csv = "first_name,last_name,email,company_id\n" + "\n".join(lines) + "\n"
+
+        statements = []
+        engine = db_session.get_bind()
+
+        def _count(conn, cursor, statement, *args):
+            statements.append(statement.split()[0])
+
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            progress = []
+            result = bulk_import(
+                db_session, "contacts", iter_csv_records(csv), chunk_size=5,
+                on_chunk=lambda r, seen: progress.append(seen),
+            )
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert result.successful == 10
+        assert progress == [5, 10]
+        # Per chunk: email lookup + company lookup + one executemany INSERT
+        assert statements.count("SELECT") == 4
+        assert statements.count("INSERT") == 2
+        assert db_session.query(Contact).count() == 10
+
+
 # ═══════════════════════════════════════════════════════════════
 # Import Router Endpoints
 # ═══════════════════════════════════════════════════════════════
@@ -254,3 +307,118 @@ class TestImportEndpoints:
         resp = admin_client.post("/import/contacts/json", files=files)
         assert resp.status_code == 200
         assert resp.json()["successful"] == 1
+
+
+# ═══════════════════════════════════════════════════════════════
+# Background Import Jobs
+# ═══════════════════════════════════════════════════════════════
+
+class TestImportJobs:
+
+    def _job(self, db_session, tmp_path, content: str, **kwargs):
+        from app.models import ImportJob
+        path = tmp_path / "upload.csv"
+        path.write_text(content)
+        job = ImportJob(entity="companies", file_format="csv", file_name="upload.csv",
+                        file_path=str(path), tenant_id="default", **kwargs)
+        db_session.add(job)
+        db_session.commit()
+        return job
+
+    def _run(self, db_session, job):
+        from sqlalchemy.orm import sessionmaker
+        from app.services.import_jobs import run_import_job
+        run_import_job(job.id, sessionmaker(bind=db_session.get_bind()))
+        db_session.refresh(job)
+
+    def test_run_job_records_progress(self, db_session, tmp_path):
+        job = self._job(db_session, tmp_path, "name\nJob A\nJob B\n\nJob A\n")
+        self._run(db_session, job)
+        assert job.status == "completed"
+        assert job.rows_processed == 3
+        assert job.rows_successful == 2
+        assert job.rows_failed == 1
+        assert job.finished_at is not None
+
+    def test_resume_skips_checkpointed_rows(self, db_session, tmp_path):
+        job = self._job(
+            db_session, tmp_path, "name\nDone A\nDone B\nNew C\n",
+            status="running", rows_processed=2, rows_successful=2,
+        )
+        self._run(db_session, job)
+        assert job.status == "completed"
+        assert job.rows_processed == 3
+        assert job.rows_successful == 3
+        names = {c.name for c in db_session.query(Company).all()}
+        assert names == {"New C"}  # Rows before the checkpoint are not re-read
+
+    def test_running_job_with_live_lease_is_not_taken_over(self, db_session, tmp_path):
+        from datetime import datetime, timezone
+        job = self._job(db_session, tmp_path, "name\nLeased A\n",
+                        status="running", heartbeat_at=datetime.now(timezone.utc))
+        self._run(db_session, job)
+        assert job.status == "running"
+        assert job.rows_processed == 0
+        assert db_session.query(Company).count() == 0
+
+    def test_running_job_with_expired_lease_is_resumed(self, db_session, tmp_path):
+        from datetime import datetime, timedelta, timezone
+        from app.config import settings
+        stale = datetime.now(timezone.utc) - timedelta(seconds=settings.import_job_lease_seconds + 1)
+        job = self._job(db_session, tmp_path, "name\nStale A\n", status="running", heartbeat_at=stale)
+        self._run(db_session, job)
+        assert job.status == "completed"
+        assert job.rows_successful == 1
+
+    def test_finished_job_is_not_rerun(self, db_session, tmp_path):
+        job = self._job(db_session, tmp_path, "name\nAgain A\n", status="completed")
+        self._run(db_session, job)
+        assert job.rows_processed == 0
+        assert db_session.query(Company).count() == 0
+
+    def test_json_job_is_streamed(self, db_session, tmp_path):
+        job = self._job(db_session, tmp_path, json.dumps([{"name": f"Json {i}"} for i in range(5)]))
+        job.file_format = "json"
+        db_session.commit()
+        self._run(db_session, job)
+        assert job.status == "completed"
+        assert job.rows_successful == 5
+
+    def test_json_stream_reads_in_blocks(self):
+        from app.utils.import_ import ImportError as ImportFormatError, iter_json_stream
+        items = [{"name": "A, [b]", "tags": [1, 2]}, {"name": "C"}, 12345]
+        for read_size in (1, 4, 1 << 16):
+            records = list(iter_json_stream(io.StringIO(json.dumps(items, indent=2)), "company", read_size))
+            assert [item for _, item in records] == items
+            assert records[0][0] == "Item 0"
+        with pytest.raises(ImportFormatError):
+            list(iter_json_stream(io.StringIO('{"name": "A"}'), "company"))
+        with pytest.raises(ValueError):
+            list(iter_json_stream(io.StringIO('[{"name": "A"} {"name": "B"}]'), "company", 3))
+
+    def test_bad_file_marks_job_failed(self, db_session, tmp_path):
+        job = self._job(db_session, tmp_path, "")
+        self._run(db_session, job)
+        assert job.status == "failed"
+        assert job.error_count == 1
+
+    def test_job_endpoints(self, admin_client, tmp_path, monkeypatch):
+        import time
+        from app.config import settings
+        monkeypatch.setattr(settings, "storage_dir", str(tmp_path))
+        files = {"file": ("big.csv", io.BytesIO(b"name\nBg Co 1\nBg Co 2\n"), "text/csv")}
+        resp = admin_client.post("/import/jobs", data={"entity": "companies"}, files=files)
+        assert resp.status_code == 202
+        job = resp.json()
+        assert job["file_format"] == "csv"
+
+        deadline = time.time() + 10
+        while job["status"] not in ("completed", "failed") and time.time() < deadline:
+            time.sleep(0.05)
+            job = admin_client.get(f"/import/jobs/{job['id']}").json()
+        assert job["status"] == "completed"
+        assert job["rows_successful"] == 2
+        assert job["rows_per_second"] >= 0
+
+    def test_job_not_found(self, admin_client):
+        assert admin_client.get("/import/jobs/9999").status_code == 404
@@ -16,7 +16,8 @@ from app.utils.export import (
     export_companies_csv, export_companies_json,
     export_contacts_csv, export_contacts_json,
     export_documents_csv, export_documents_json,
-    create_zip_export,
+    create_zip_export, stream_csv, stream_json_array, stream_ndjson, stream_zip_export,
+    COMPANY_FIELDS,
 )
 from app.utils.watermark import should_watermark, get_watermark_status, add_watermark_text
 from app.email_providers import parse_gmail_webhook, parse_microsoft_webhook
@@ -191,6 +192,88 @@ class TestExportUtils:
         # Cleanup
         os.unlink(zip_path)
 
+    def test_stream_csv_emits_chunks(self, db_session):
+        for i in range(5):
+            db_session.add(Company(name=f"Stream Co {i}", tenant_id="default"))
+        db_session.commit()
+        chunks = list(stream_csv(db_session, Company, COMPANY_FIELDS, chunk_size=2))
+        assert len(chunks) == 3
+        lines = "".join(chunks).strip().split("\n")
+        assert len(lines) == 6  # Header + 5 rows
+        assert lines[0].startswith("id,name")
+
+    def test_stream_ndjson_and_json_array(self, db_session):
+        import json
+        for i in range(3):
+            db_session.add(Company(name=f"Line Co {i}", tenant_id="default"))
+        db_session.commit()
+        ndjson = "".join(stream_ndjson(db_session, Company, COMPANY_FIELDS, chunk_size=2))
+        records = [json.loads(line) for line in ndjson.strip().split("\n")]
+        assert [r["name"] for r in records] == ["Line Co 0", "Line Co 1", "Line Co 2"]
+        array = json.loads("".join(stream_json_array(db_session, Company, COMPANY_FIELDS, chunk_size=2)))
+        assert array == records
+
+    def test_stream_json_array_empty(self, db_session):
+        assert "".join(stream_json_array(db_session, Company, COMPANY_FIELDS)) == "[]"
+
+    def test_stream_zip_export(self, db_session, tmp_path):
+        import io
+        import json
+        import zipfile
+        (tmp_path / "deck.pdf").write_bytes(b"%PDF-1.4 fake")
+        (tmp_path / "notes.txt").write_text("plain text " * 50)
+        db_session.add(Company(name="Zip Stream Co", tenant_id="default"))
+        db_session.add(Document(document_name="Deck", document_type="pdf",
+                                file_path="deck.pdf", file_name="deck.pdf"))
+        db_session.add(Document(document_name="Notes", document_type="txt",
+                                file_path="notes.txt", file_name="notes.txt"))
+        db_session.add(Document(document_name="Gone", document_type="txt",
+                                file_path="missing.txt", file_name="missing.txt"))
+        db_session.commit()
+
+        data = b"".join(stream_zip_export(db_session, str(tmp_path)))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.testzip() is None
+            names = set(zf.namelist())
+            assert {"data/companies.csv", "data/documents.json", "metadata.json"} <= names
+            assert "documents/1_deck.pdf" in names
+            assert "documents/3_missing.txt" not in names
+            assert zf.getinfo("documents/1_deck.pdf").compress_type == zipfile.ZIP_STORED
+            assert zf.getinfo("documents/2_notes.txt").compress_type == zipfile.ZIP_DEFLATED
+            assert zf.read("documents/1_deck.pdf") == b"%PDF-1.4 fake"
+            metadata = json.loads(zf.read("metadata.json"))
+            assert metadata["total_companies"] == 1
+            assert metadata["total_documents"] == 3
+
+    def test_stream_zip_export_skips_files_outside_storage(self, db_session, tmp_path):
+        import io
+        import zipfile
+        storage = tmp_path / "storage"
+        storage.mkdir()
+        (storage / "kept.txt").write_text("kept")
+        secret = tmp_path / "secret.txt"
+        secret.write_text("not exported")
+        (storage / "link.txt").symlink_to(secret)
+        for name, path in (("kept.txt", "kept.txt"), ("abs.txt", str(secret)),
+                           ("dots.txt", "../secret.txt"), ("link.txt", "link.txt")):
+            db_session.add(Document(document_name=name, document_type="txt", file_path=path, file_name=name))
+        db_session.commit()
+        data = b"".join(stream_zip_export(db_session, str(storage)))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            documents = [n for n in zf.namelist() if n.startswith("documents/")]
+        assert documents == ["documents/1_kept.txt"]
+
+    def test_stream_zip_export_deflates_all_when_requested(self, db_session, tmp_path):
+        import io
+        import zipfile
+        (tmp_path / "deck.pdf").write_bytes(b"%PDF-1.4 fake")
+        db_session.add(Document(document_name="Deck", document_type="pdf",
+                                file_path="deck.pdf", file_name="deck.pdf"))
+        db_session.commit()
+        data = b"".join(stream_zip_export(db_session, str(tmp_path), store_compressed=False))
+        with zipfile.ZipFile(io.BytesIO(data)) as zf:
+            assert zf.getinfo("documents/1_deck.pdf").compress_type == zipfile.ZIP_DEFLATED
+
 
 # ═══════════════════════════════════════════════════════════════
 # EXPORT ROUTER TESTS
@@ -210,6 +293,13 @@ class TestExportEndpoints:
         assert resp.status_code == 200
         assert "json" in resp.headers.get("content-type", "")
 
+    def test_export_companies_ndjson_endpoint(self, auth_client):
+        auth_client.post("/companies", json={"name": "NDJSON Export Co"})
+        resp = auth_client.get("/export/companies/ndjson")
+        assert resp.status_code == 200
+        assert "ndjson" in resp.headers.get("content-type", "")
+        assert "NDJSON Export Co" in resp.text
+
     def test_export_contacts_csv_endpoint(self, auth_client):
         resp = auth_client.get("/export/contacts/csv")
         assert resp.status_code == 200
@@ -227,8 +317,14 @@ class TestExportEndpoints:
         assert resp.status_code == 200
 
     def test_export_full_zip(self, auth_client):
+        import io
+        import zipfile
+        auth_client.post("/companies", json={"name": "Full Export Co"})
         resp = auth_client.get("/export/full")
-        assert resp.status_code in (200, 500)  # May fail if storage dir missing
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "application/zip"
+        with zipfile.ZipFile(io.BytesIO(resp.content)) as zf:
+            assert "Full Export Co" in zf.read("data/companies.csv").decode()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -1,9 +1,15 @@
 """Tests for the base repository pattern and CRM services."""
 
+from datetime import datetime, timezone
+
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 
 from app.models.crm import Company, Contact
-from app.services.base_repository import BaseRepository
+from app.services.base_repository import BaseRepository, count_cache, driver_sql
+from app.services.filters import Condition
+from app.utils.cache import TTLCache
 from app.services.crm import CompanyService, ContactService, InteractionService
 
 
@@ -73,6 +79,123 @@ class TestBaseRepository:
         assert repo.count(filters={"sector": "Technology"}) == 2
         assert repo.count(filters={"sector": "Finance"}) == 1
 
+    def test_cached_count_invalidated_by_repository_writes(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        repo.create({"name": "A", "sector": "Tech"})
+        assert repo.count(filters={"sector": "Tech"}, mode="cached") == 1
+        # A write that bypasses the repository is not seen until the TTL expires...
+        db_session.add(Company(name="B", sector="Tech"))
+        db_session.commit()
+        assert repo.count(filters={"sector": "Tech"}, mode="cached") == 1
+        assert repo.count(filters={"sector": "Tech"}) == 2
+        # ...but any write through the repository drops the cached totals.
+        repo.create({"name": "C", "sector": "Finance"})
+        assert repo.count(filters={"sector": "Tech"}, mode="cached") == 2
+
+    def test_flushed_write_invalidates_counts_at_commit(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        repo.create({"name": "A", "sector": "Tech"})
+        assert repo.count(filters={"sector": "Tech"}, mode="cached") == 1
+        repo.create({"name": "B", "sector": "Tech"}, commit=False)
+        # Still cached until the row is committed (a refill now would be stale).
+        assert count_cache.get(repo._count_key({"sector": "Tech"})) == 1
+        db_session.commit()
+        assert count_cache.get(repo._count_key({"sector": "Tech"})) is None
+        assert repo.count(filters={"sector": "Tech"}, mode="cached") == 2
+
+    def test_approximate_count_falls_back_off_postgres(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        repo.create({"name": "A"})
+        assert repo.count(mode="approximate") == 1
+        with pytest.raises(ValueError, match="Unknown count mode"):
+            repo.count(mode="guess")
+
+    def test_estimate_sql_expands_in_filters(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        stmt = select(Company.id).where(*repo.criteria({
+            "sector": Condition("in", ("Tech", "Health")), "name": Condition("nin", ("X",)),
+        }))
+        sql, params = driver_sql(stmt, postgresql.dialect())
+        assert "POSTCOMPILE" not in sql
+        assert sorted(v for v in params.values() if v in ("Tech", "Health", "X")) == ["Health", "Tech", "X"]
+
+    def test_list_keyset_walks_every_row_once(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        stamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            # Shared timestamps force the id tie-breaker to do its job.
+            repo.create({"name": f"Co-{i}", "created_at": stamp if i % 2 else stamp.replace(day=2)})
+        seen, cursor, pages = [], None, 0
+        while True:
+            page, cursor = repo.list_keyset(limit=3, cursor=cursor)
+            seen.extend(c.id for c in page)
+            pages += 1
+            if cursor is None:
+                break
+        assert pages == 3
+        assert len(seen) == len(set(seen)) == 7
+        assert seen == [c.id for c in repo.list(limit=10)]
+
+    def test_list_keyset_custom_sort_and_filters(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        for name in ["b", "a", "d", "c"]:
+            repo.create({"name": name, "sector": "Tech"})
+        repo.create({"name": "z", "sector": "Retail"})
+        first, cursor = repo.list_keyset(
+            limit=2, order_by="name", order_desc=False, filters={"sector": "Tech"}
+        )
+        rest, end = repo.list_keyset(
+            limit=2, cursor=cursor, order_by="name", order_desc=False, filters={"sector": "Tech"}
+        )
+        assert [c.name for c in first + rest] == ["a", "b", "c", "d"]
+        assert end is None
+
+    def test_list_keyset_rejects_bad_input(self, db_session):
+        repo = BaseRepository(Company, db_session, tenant_id="default")
+        for i in range(3):
+            repo.create({"name": f"Co-{i}"})
+        _, cursor = repo.list_keyset(limit=1)
+        with pytest.raises(ValueError, match="does not match"):
+            repo.list_keyset(limit=1, cursor=cursor, order_by="name")
+        with pytest.raises(ValueError, match="nullable"):
+            repo.list_keyset(order_by="sector")
+        with pytest.raises(ValueError, match="Cannot sort"):
+            repo.list_keyset(order_by="nope")
+        with pytest.raises(ValueError, match="Invalid pagination cursor"):
+            repo.list_keyset(cursor="garbage")
+
+
+class TestTTLCache:
+    """Verify expiry and size bounds of the shared TTL cache."""
+
+    def test_entries_expire(self):
+        now = [0.0]
+        cache = TTLCache(ttl=10, clock=lambda: now[0])
+        cache.set("k", 1)
+        now[0] = 9.9
+        assert cache.get("k") == 1
+        now[0] = 10.0
+        assert cache.get("k") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(ttl=60, maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    def test_discard_where_and_disabled(self):
+        cache = TTLCache(ttl=60)
+        cache.set(("t", 1), "x")
+        cache.set(("u", 1), "y")
+        assert cache.discard_where(lambda k: k[0] == "t") == 1
+        assert cache.get(("u", 1)) == "y"
+        disabled = TTLCache(ttl=0)
+        disabled.set("k", 1)
+        assert disabled.get("k") is None
+
 
 class TestCompanyService:
     """Verify CompanyService business logic."""
@@ -94,6 +217,18 @@ class TestCompanyService:
         svc.create({"name": "B"})
         assert len(svc.list()) == 2
 
+    def test_list_companies_endpoint_cursor(self, auth_client):
+        for i in range(3):
+            auth_client.post("/companies", json={"name": f"Paged {i}"})
+        first = auth_client.get("/companies", params={"limit": 2})
+        assert first.status_code == 200
+        assert len(first.json()) == 2
+        cursor = first.headers["X-Next-Cursor"]
+        second = auth_client.get("/companies", params={"limit": 2, "cursor": cursor})
+        assert [c["name"] for c in second.json()] == ["Paged 0"]
+        assert "X-Next-Cursor" not in second.headers
+        assert auth_client.get("/companies", params={"cursor": "bad"}).status_code == 400
+
 
 class TestContactService:
     """Verify ContactService business logic."""